@@ -12,6 +12,7 @@ from alembic import context
 
 # Import models so that Alembic can detect them
 from app.models.document import Document, DocumentChunk, QueryLog
+from app.models.cache import CompletionCache
 from app.core.database import Base
 
 # this is the Alembic Config object, which provides
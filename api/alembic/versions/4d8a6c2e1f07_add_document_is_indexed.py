@@ -0,0 +1,26 @@
+"""Add document is_indexed flag
+
+Revision ID: 4d8a6c2e1f07
+Revises: 9b4e2f6a1c3d
+Create Date: 2026-10-17 18:00:00.000000
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = '4d8a6c2e1f07'
+down_revision = '9b4e2f6a1c3d'
+branch_labels = None
+depends_on = None
+
+
+def upgrade() -> None:
+    op.add_column('document', sa.Column('is_indexed', sa.Boolean(), server_default=sa.false(), nullable=False))
+    op.create_index(op.f('ix_document_is_indexed'), 'document', ['is_indexed'], unique=False)
+
+
+def downgrade() -> None:
+    op.drop_index(op.f('ix_document_is_indexed'), table_name='document')
+    op.drop_column('document', 'is_indexed')
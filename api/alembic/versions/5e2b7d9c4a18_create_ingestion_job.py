@@ -0,0 +1,48 @@
+"""Create ingestion job table
+
+Revision ID: 5e2b7d9c4a18
+Revises: 4d8a6c2e1f07
+Create Date: 2026-10-17 18:40:00.000000
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = '5e2b7d9c4a18'
+down_revision = '4d8a6c2e1f07'
+branch_labels = None
+depends_on = None
+
+
+def upgrade() -> None:
+    op.create_table('ingestion_job',
+    sa.Column('status', sa.String(length=16), nullable=False),
+    sa.Column('stage', sa.String(length=32), nullable=False),
+    sa.Column('document_ids', sa.JSON(), nullable=False),
+    sa.Column('processed_documents', sa.Integer(), nullable=False),
+    sa.Column('progress', sa.Float(), nullable=False),
+    sa.Column('attempts', sa.Integer(), nullable=False),
+    sa.Column('max_attempts', sa.Integer(), nullable=False),
+    sa.Column('run_after', sa.DateTime(), nullable=True),
+    sa.Column('error', sa.Text(), nullable=True),
+    sa.Column('heartbeat_at', sa.DateTime(), nullable=True),
+    sa.Column('started_at', sa.DateTime(), nullable=True),
+    sa.Column('finished_at', sa.DateTime(), nullable=True),
+    sa.Column('timings', sa.JSON(), nullable=True),
+    sa.Column('id', sa.Integer(), nullable=False),
+    sa.Column('created_at', sa.DateTime(), nullable=False),
+    sa.Column('updated_at', sa.DateTime(), nullable=False),
+    sa.PrimaryKeyConstraint('id')
+    )
+    op.create_index(op.f('ix_ingestion_job_id'), 'ingestion_job', ['id'], unique=False)
+    op.create_index(op.f('ix_ingestion_job_run_after'), 'ingestion_job', ['run_after'], unique=False)
+    op.create_index(op.f('ix_ingestion_job_status'), 'ingestion_job', ['status'], unique=False)
+
+
+def downgrade() -> None:
+    op.drop_index(op.f('ix_ingestion_job_status'), table_name='ingestion_job')
+    op.drop_index(op.f('ix_ingestion_job_run_after'), table_name='ingestion_job')
+    op.drop_index(op.f('ix_ingestion_job_id'), table_name='ingestion_job')
+    op.drop_table('ingestion_job')
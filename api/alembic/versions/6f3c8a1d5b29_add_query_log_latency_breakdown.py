@@ -0,0 +1,34 @@
+"""Add query log latency breakdown
+
+Revision ID: 6f3c8a1d5b29
+Revises: 5e2b7d9c4a18
+Create Date: 2026-10-17 19:30:00.000000
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = "6f3c8a1d5b29"
+down_revision = "5e2b7d9c4a18"
+branch_labels = None
+depends_on = None
+
+
+def upgrade() -> None:
+    op.add_column("query_log", sa.Column("mode", sa.String(length=20), nullable=True))
+    op.add_column("query_log", sa.Column("cache_hit", sa.Boolean(), nullable=True))
+    op.add_column(
+        "query_log", sa.Column("total_latency_ms", sa.Integer(), nullable=True)
+    )
+    op.add_column("query_log", sa.Column("stage_latency_ms", sa.JSON(), nullable=True))
+    op.create_index(op.f("ix_query_log_mode"), "query_log", ["mode"], unique=False)
+
+
+def downgrade() -> None:
+    op.drop_index(op.f("ix_query_log_mode"), table_name="query_log")
+    op.drop_column("query_log", "stage_latency_ms")
+    op.drop_column("query_log", "total_latency_ms")
+    op.drop_column("query_log", "cache_hit")
+    op.drop_column("query_log", "mode")
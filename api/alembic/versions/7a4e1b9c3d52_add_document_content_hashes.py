@@ -0,0 +1,32 @@
+"""Add document content hashes
+
+Revision ID: 7a4e1b9c3d52
+Revises: 6f3c8a1d5b29
+Create Date: 2026-10-17 20:15:00.000000
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = '7a4e1b9c3d52'
+down_revision = '6f3c8a1d5b29'
+branch_labels = None
+depends_on = None
+
+
+def upgrade() -> None:
+    op.add_column('document', sa.Column('content_hash', sa.String(length=64), nullable=True))
+    op.add_column('document', sa.Column('chunk_hashes', sa.JSON(), nullable=True))
+    op.create_index(op.f('ix_document_content_hash'), 'document', ['content_hash'], unique=False)
+    op.add_column('ingestion_job', sa.Column('skipped_document_ids', sa.JSON(), nullable=True))
+    # Hash existing documents so re-submissions of them are recognized
+    op.execute("UPDATE document SET content_hash = encode(sha256(convert_to(content, 'UTF8')), 'hex')")
+
+
+def downgrade() -> None:
+    op.drop_column('ingestion_job', 'skipped_document_ids')
+    op.drop_index(op.f('ix_document_content_hash'), table_name='document')
+    op.drop_column('document', 'chunk_hashes')
+    op.drop_column('document', 'content_hash')
@@ -0,0 +1,43 @@
+"""Create completion cache table
+
+Revision ID: 7c1d9e4b2a10
+Revises: 2fa1b772a085
+Create Date: 2026-10-17 09:12:00.000000
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = '7c1d9e4b2a10'
+down_revision = '2fa1b772a085'
+branch_labels = None
+depends_on = None
+
+
+def upgrade() -> None:
+    op.create_table('completion_cache',
+    sa.Column('cache_key', sa.String(length=64), nullable=False),
+    sa.Column('model', sa.String(length=255), nullable=False),
+    sa.Column('response_text', sa.Text(), nullable=False),
+    sa.Column('expires_at', sa.DateTime(), nullable=True),
+    sa.Column('hit_count', sa.Integer(), nullable=False),
+    sa.Column('last_accessed_at', sa.DateTime(), nullable=True),
+    sa.Column('id', sa.Integer(), nullable=False),
+    sa.Column('created_at', sa.DateTime(), nullable=False),
+    sa.Column('updated_at', sa.DateTime(), nullable=False),
+    sa.PrimaryKeyConstraint('id')
+    )
+    op.create_index(op.f('ix_completion_cache_cache_key'), 'completion_cache', ['cache_key'], unique=True)
+    op.create_index(op.f('ix_completion_cache_expires_at'), 'completion_cache', ['expires_at'], unique=False)
+    op.create_index(op.f('ix_completion_cache_id'), 'completion_cache', ['id'], unique=False)
+    op.create_index(op.f('ix_completion_cache_last_accessed_at'), 'completion_cache', ['last_accessed_at'], unique=False)
+
+
+def downgrade() -> None:
+    op.drop_index(op.f('ix_completion_cache_last_accessed_at'), table_name='completion_cache')
+    op.drop_index(op.f('ix_completion_cache_id'), table_name='completion_cache')
+    op.drop_index(op.f('ix_completion_cache_expires_at'), table_name='completion_cache')
+    op.drop_index(op.f('ix_completion_cache_cache_key'), table_name='completion_cache')
+    op.drop_table('completion_cache')
@@ -0,0 +1,27 @@
+"""Add document workspace
+
+Revision ID: 8b5d2f7e4a61
+Revises: 7a4e1b9c3d52
+Create Date: 2026-10-17 22:40:00.000000
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = '8b5d2f7e4a61'
+down_revision = '7a4e1b9c3d52'
+branch_labels = None
+depends_on = None
+
+
+def upgrade() -> None:
+    # Existing documents belong to the default workspace
+    op.add_column('document', sa.Column('workspace', sa.String(length=64), nullable=False, server_default='default'))
+    op.create_index(op.f('ix_document_workspace'), 'document', ['workspace'], unique=False)
+
+
+def downgrade() -> None:
+    op.drop_index(op.f('ix_document_workspace'), table_name='document')
+    op.drop_column('document', 'workspace')
@@ -0,0 +1,30 @@
+"""Add chunk embedding encoding columns
+
+Revision ID: 9b4e2f6a1c3d
+Revises: 7c1d9e4b2a10
+Create Date: 2026-10-17 10:30:00.000000
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = '9b4e2f6a1c3d'
+down_revision = '7c1d9e4b2a10'
+branch_labels = None
+depends_on = None
+
+
+def upgrade() -> None:
+    op.add_column('document_chunk', sa.Column('embedding_encoding', sa.String(length=16), nullable=True))
+    op.add_column('document_chunk', sa.Column('embedding_scale', sa.Float(), nullable=True))
+    op.add_column('document_chunk', sa.Column('embedding_offset', sa.Float(), nullable=True))
+    op.add_column('document_chunk', sa.Column('embedding_full', sa.LargeBinary(), nullable=True))
+
+
+def downgrade() -> None:
+    op.drop_column('document_chunk', 'embedding_full')
+    op.drop_column('document_chunk', 'embedding_offset')
+    op.drop_column('document_chunk', 'embedding_scale')
+    op.drop_column('document_chunk', 'embedding_encoding')
@@ -0,0 +1,62 @@
+"""Add pgvector chunk embeddings with an HNSW index
+
+Revision ID: 9c6e3a8f5b72
+Revises: 8b5d2f7e4a61
+Create Date: 2026-10-17 23:30:00.000000
+
+"""
+import os
+
+from alembic import op
+import numpy as np
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = '9c6e3a8f5b72'
+down_revision = '8b5d2f7e4a61'
+branch_labels = None
+depends_on = None
+
+EMBEDDING_DIM = int(os.getenv('EMBEDDING_DIM', 1024))
+BACKFILL_BATCH_SIZE = 1000
+
+
+def upgrade() -> None:
+    op.execute('CREATE EXTENSION IF NOT EXISTS vector')
+    op.execute(f'ALTER TABLE document_chunk ADD COLUMN embedding_vector vector({EMBEDDING_DIM})')
+
+    # Copy stored embeddings: lossy codes keep a float32 copy in embedding_full
+    conn = op.get_bind()
+    last_id = 0
+    while True:
+        rows = conn.execute(
+            sa.text(
+                "SELECT id, COALESCE(embedding_full, embedding) AS vector FROM document_chunk "
+                "WHERE id > :last_id AND (embedding_full IS NOT NULL OR embedding_encoding IS NULL "
+                "OR embedding_encoding = 'float32') AND embedding IS NOT NULL "
+                "ORDER BY id LIMIT :limit"
+            ),
+            {'last_id': last_id, 'limit': BACKFILL_BATCH_SIZE},
+        ).all()
+        if not rows:
+            break
+        conn.execute(
+            sa.text('UPDATE document_chunk SET embedding_vector = CAST(:vector AS vector) WHERE id = :id'),
+            [
+                {'id': row.id, 'vector': '[' + ','.join(map(repr, np.frombuffer(row.vector, dtype='<f4').tolist())) + ']'}
+                for row in rows
+            ],
+        )
+        last_id = rows[-1].id
+
+    # Built after the backfill, which is much faster than updating the index per row
+    op.execute(
+        'CREATE INDEX ix_document_chunk_embedding_vector_hnsw ON document_chunk '
+        'USING hnsw (embedding_vector vector_cosine_ops) WITH (m = 16, ef_construction = 64)'
+    )
+
+
+def downgrade() -> None:
+    op.execute('DROP INDEX IF EXISTS ix_document_chunk_embedding_vector_hnsw')
+    op.drop_column('document_chunk', 'embedding_vector')
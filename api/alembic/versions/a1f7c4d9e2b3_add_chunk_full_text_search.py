@@ -0,0 +1,37 @@
+"""Add full-text search vector to document chunks
+
+Revision ID: a1f7c4d9e2b3
+Revises: 9c6e3a8f5b72
+Create Date: 2026-10-18 00:20:00.000000
+
+"""
+import os
+import re
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = 'a1f7c4d9e2b3'
+down_revision = '9c6e3a8f5b72'
+branch_labels = None
+depends_on = None
+
+# Must match SEARCH_TEXT_CONFIG, which lexical queries are parsed with
+TEXT_CONFIG = os.getenv('SEARCH_TEXT_CONFIG', 'english')
+
+
+def upgrade() -> None:
+    if not re.fullmatch(r'[a-z_]+', TEXT_CONFIG):
+        raise ValueError(f"Invalid SEARCH_TEXT_CONFIG '{TEXT_CONFIG}'")
+    op.execute(
+        'ALTER TABLE document_chunk ADD COLUMN chunk_tsv tsvector GENERATED ALWAYS AS '
+        f"(to_tsvector('{TEXT_CONFIG}'::regconfig, chunk_text)) STORED"
+    )
+    op.create_index('ix_document_chunk_chunk_tsv', 'document_chunk', ['chunk_tsv'], unique=False, postgresql_using='gin')
+
+
+def downgrade() -> None:
+    op.drop_index('ix_document_chunk_chunk_tsv', table_name='document_chunk', postgresql_using='gin')
+    op.drop_column('document_chunk', 'chunk_tsv')
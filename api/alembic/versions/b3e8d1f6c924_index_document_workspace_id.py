@@ -0,0 +1,28 @@
+"""Index documents by workspace and id
+
+Revision ID: b3e8d1f6c924
+Revises: a1f7c4d9e2b3
+Create Date: 2026-10-18 01:10:00.000000
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = 'b3e8d1f6c924'
+down_revision = 'a1f7c4d9e2b3'
+branch_labels = None
+depends_on = None
+
+
+def upgrade() -> None:
+    # Keyset pagination within a workspace reads this index in id order; it
+    # also serves every lookup the workspace-only index did
+    op.create_index('ix_document_workspace_id', 'document', ['workspace', 'id'], unique=False)
+    op.drop_index(op.f('ix_document_workspace'), table_name='document')
+
+
+def downgrade() -> None:
+    op.create_index(op.f('ix_document_workspace'), 'document', ['workspace'], unique=False)
+    op.drop_index('ix_document_workspace_id', table_name='document')
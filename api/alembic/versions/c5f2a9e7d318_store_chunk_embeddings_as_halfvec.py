@@ -0,0 +1,58 @@
+"""Store chunk embeddings only as a pgvector halfvec
+
+Revision ID: c5f2a9e7d318
+Revises: b3e8d1f6c924
+Create Date: 2026-10-18 09:00:00.000000
+
+"""
+import os
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = 'c5f2a9e7d318'
+down_revision = 'b3e8d1f6c924'
+branch_labels = None
+depends_on = None
+
+EMBEDDING_DIM = int(os.getenv('EMBEDDING_DIM', 1024))
+
+
+def upgrade() -> None:
+    # The HNSW index is rebuilt over halfvec; the column rewrite is cheaper without it
+    op.execute('DROP INDEX IF EXISTS ix_document_chunk_embedding_vector_hnsw')
+    op.execute(
+        f'ALTER TABLE document_chunk ALTER COLUMN embedding_vector TYPE halfvec({EMBEDDING_DIM}) '
+        f'USING embedding_vector::halfvec({EMBEDDING_DIM})'
+    )
+    op.execute(
+        'CREATE INDEX ix_document_chunk_embedding_vector_hnsw ON document_chunk '
+        'USING hnsw (embedding_vector halfvec_cosine_ops) WITH (m = 16, ef_construction = 64)'
+    )
+
+    # Compact codes and the float32 rescoring copy are superseded by the halfvec
+    op.drop_column('document_chunk', 'embedding_full')
+    op.drop_column('document_chunk', 'embedding_offset')
+    op.drop_column('document_chunk', 'embedding_scale')
+    op.drop_column('document_chunk', 'embedding_encoding')
+    op.drop_column('document_chunk', 'embedding')
+
+
+def downgrade() -> None:
+    op.add_column('document_chunk', sa.Column('embedding', sa.LargeBinary(), nullable=True))
+    op.add_column('document_chunk', sa.Column('embedding_encoding', sa.String(length=16), nullable=True))
+    op.add_column('document_chunk', sa.Column('embedding_scale', sa.Float(), nullable=True))
+    op.add_column('document_chunk', sa.Column('embedding_offset', sa.Float(), nullable=True))
+    op.add_column('document_chunk', sa.Column('embedding_full', sa.LargeBinary(), nullable=True))
+
+    op.execute('DROP INDEX IF EXISTS ix_document_chunk_embedding_vector_hnsw')
+    op.execute(
+        f'ALTER TABLE document_chunk ALTER COLUMN embedding_vector TYPE vector({EMBEDDING_DIM}) '
+        f'USING embedding_vector::vector({EMBEDDING_DIM})'
+    )
+    op.execute(
+        'CREATE INDEX ix_document_chunk_embedding_vector_hnsw ON document_chunk '
+        'USING hnsw (embedding_vector vector_cosine_ops) WITH (m = 16, ef_construction = 64)'
+    )
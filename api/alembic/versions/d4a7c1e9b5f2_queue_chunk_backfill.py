@@ -0,0 +1,56 @@
+"""Queue ingestion of indexed documents that have no search chunks
+
+Revision ID: d4a7c1e9b5f2
+Revises: c5f2a9e7d318
+Create Date: 2026-10-18 12:00:00.000000
+
+"""
+import datetime
+import json
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = 'd4a7c1e9b5f2'
+down_revision = 'c5f2a9e7d318'
+branch_labels = None
+depends_on = None
+
+DOCUMENTS_PER_JOB = 1000
+MAX_ATTEMPTS = 3
+
+
+def upgrade() -> None:
+    # The 9c6e3a8f5b72 backfill copied embeddings from columns nothing wrote,
+    # so documents indexed before ingestion stored chunks have none; the
+    # ingestion workers chunk and embed them from these jobs
+    conn = op.get_bind()
+    document_ids = conn.execute(
+        sa.text(
+            'SELECT id FROM document WHERE is_indexed '
+            'AND NOT EXISTS (SELECT 1 FROM document_chunk WHERE document_chunk.document_id = document.id) '
+            'ORDER BY id'
+        )
+    ).scalars().all()
+
+    now = datetime.datetime.utcnow()
+    for start in range(0, len(document_ids), DOCUMENTS_PER_JOB):
+        conn.execute(
+            sa.text(
+                'INSERT INTO ingestion_job (status, stage, document_ids, skipped_document_ids, '
+                'processed_documents, progress, attempts, max_attempts, timings, created_at, updated_at) '
+                "VALUES ('queued', 'queued', :document_ids, '[]', 0, 0, 0, :max_attempts, '{}', :now, :now)"
+            ),
+            {
+                'document_ids': json.dumps(document_ids[start:start + DOCUMENTS_PER_JOB]),
+                'max_attempts': MAX_ATTEMPTS,
+                'now': now,
+            },
+        )
+
+
+def downgrade() -> None:
+    # Queued jobs are ordinary work; nothing to undo
+    pass
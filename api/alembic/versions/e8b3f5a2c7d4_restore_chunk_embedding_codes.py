@@ -0,0 +1,34 @@
+"""Restore compact chunk embedding codes and the full-precision copy
+
+Revision ID: e8b3f5a2c7d4
+Revises: d4a7c1e9b5f2
+Create Date: 2026-10-18 15:00:00.000000
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = 'e8b3f5a2c7d4'
+down_revision = 'd4a7c1e9b5f2'
+branch_labels = None
+depends_on = None
+
+
+def upgrade() -> None:
+    # Chunks embedded before this revision have neither; search ranks them by
+    # their halfvec score until they are re-embedded
+    op.add_column('document_chunk', sa.Column('embedding', sa.LargeBinary(), nullable=True))
+    op.add_column('document_chunk', sa.Column('embedding_encoding', sa.String(length=16), nullable=True))
+    op.add_column('document_chunk', sa.Column('embedding_scale', sa.Float(), nullable=True))
+    op.add_column('document_chunk', sa.Column('embedding_offset', sa.Float(), nullable=True))
+    op.add_column('document_chunk', sa.Column('embedding_full', sa.LargeBinary(), nullable=True))
+
+
+def downgrade() -> None:
+    op.drop_column('document_chunk', 'embedding_full')
+    op.drop_column('document_chunk', 'embedding_offset')
+    op.drop_column('document_chunk', 'embedding_scale')
+    op.drop_column('document_chunk', 'embedding_encoding')
+    op.drop_column('document_chunk', 'embedding')
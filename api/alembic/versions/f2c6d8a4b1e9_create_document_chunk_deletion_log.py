@@ -0,0 +1,49 @@
+"""Log deleted chunk IDs for the in-process vector index
+
+Revision ID: f2c6d8a4b1e9
+Revises: e8b3f5a2c7d4
+Create Date: 2026-10-18 18:00:00.000000
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = 'f2c6d8a4b1e9'
+down_revision = 'e8b3f5a2c7d4'
+branch_labels = None
+depends_on = None
+
+
+def upgrade() -> None:
+    op.create_table(
+        'document_chunk_deletion',
+        sa.Column('chunk_id', sa.Integer(), nullable=False),
+        sa.Column('id', sa.Integer(), nullable=False),
+        sa.Column('created_at', sa.DateTime(), nullable=False),
+        sa.Column('updated_at', sa.DateTime(), nullable=False),
+        sa.PrimaryKeyConstraint('id'),
+    )
+    op.create_index(op.f('ix_document_chunk_deletion_id'), 'document_chunk_deletion', ['id'], unique=False)
+    op.create_index('ix_document_chunk_deletion_created_at', 'document_chunk_deletion', ['created_at'], unique=False)
+
+    # Written by a trigger so bulk deletes and every worker are logged
+    op.execute(
+        'CREATE OR REPLACE FUNCTION log_document_chunk_deletion() RETURNS trigger AS $$ BEGIN '
+        'INSERT INTO document_chunk_deletion (chunk_id, created_at, updated_at) '
+        "VALUES (OLD.id, now() AT TIME ZONE 'utc', now() AT TIME ZONE 'utc'); "
+        'RETURN OLD; END; $$ LANGUAGE plpgsql'
+    )
+    op.execute(
+        'CREATE TRIGGER document_chunk_deletion AFTER DELETE ON document_chunk '
+        'FOR EACH ROW EXECUTE FUNCTION log_document_chunk_deletion()'
+    )
+
+
+def downgrade() -> None:
+    op.execute('DROP TRIGGER IF EXISTS document_chunk_deletion ON document_chunk')
+    op.execute('DROP FUNCTION IF EXISTS log_document_chunk_deletion()')
+    op.drop_index('ix_document_chunk_deletion_created_at', table_name='document_chunk_deletion')
+    op.drop_index(op.f('ix_document_chunk_deletion_id'), table_name='document_chunk_deletion')
+    op.drop_table('document_chunk_deletion')
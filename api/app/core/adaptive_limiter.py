@@ -0,0 +1,174 @@
+"""
+Adaptive (AIMD) concurrency control for outbound model API endpoints.
+
+Each base URL gets a limiter whose concurrency limit grows additively while
+request latency stays close to its observed baseline, and shrinks
+multiplicatively when the provider signals overload (429/5xx or transport
+errors). A ``Retry-After`` header pauses all new requests to that endpoint
+until the provider says it is ready again.
+"""
+import asyncio
+import email.utils
+import random
+import time
+from typing import Any, Dict, Optional
+
+from app.core.config import settings
+
+
+def parse_retry_after(value: Optional[str]) -> Optional[float]:
+    """Parse a ``Retry-After`` header (delta seconds or HTTP date) into seconds."""
+    if not value:
+        return None
+    try:
+        return max(0.0, float(value))
+    except ValueError:
+        pass
+    try:
+        retry_at = email.utils.parsedate_to_datetime(value)
+    except (TypeError, ValueError):
+        return None
+    return max(0.0, retry_at.timestamp() - time.time())
+
+
+def backoff_delay(attempt: int) -> float:
+    """Exponential backoff with full jitter for the given retry attempt."""
+    ceiling = min(
+        float(settings.LLM_RETRY_MAX_BACKOFF_SECONDS),
+        float(settings.LLM_RETRY_BACKOFF_SECONDS) * 2**attempt,
+    )
+    return random.uniform(0, ceiling)
+
+
+class AdaptiveConcurrencyLimiter:
+    """
+    AIMD concurrency limiter for a single endpoint.
+
+    Callers ``await acquire()`` before sending and ``await release(...)`` once
+    the response arrives, reporting its latency and whether the endpoint was
+    overloaded.
+    """
+
+    # Weight of each new sample in the baseline latency average
+    LATENCY_ALPHA = 0.05
+
+    def __init__(
+        self,
+        initial_limit: int = 4,
+        min_limit: int = 1,
+        max_limit: int = 64,
+        latency_tolerance: float = 2.0,
+        decrease_factor: float = 0.5,
+    ):
+        self.min_limit = min_limit
+        self.max_limit = max(max_limit, min_limit)
+        self.limit = float(min(max(initial_limit, min_limit), self.max_limit))
+        self.latency_tolerance = latency_tolerance
+        self.decrease_factor = decrease_factor
+
+        self.in_flight = 0
+        self.baseline_latency: Optional[float] = None
+        self._blocked_until = 0.0
+        self._last_decrease = 0.0
+        self._condition = asyncio.Condition()
+
+        self.successes = 0
+        self.overloads = 0
+
+    async def acquire(self) -> None:
+        """Wait for a free slot (and for any ``Retry-After`` pause to end)."""
+        async with self._condition:
+            while True:
+                pause = self._blocked_until - time.monotonic()
+                if pause > 0:
+                    try:
+                        await asyncio.wait_for(self._condition.wait(), pause)
+                    except asyncio.TimeoutError:
+                        pass
+                    continue
+                if self.in_flight < int(self.limit):
+                    break
+                await self._condition.wait()
+            self.in_flight += 1
+
+    async def release(
+        self,
+        latency: Optional[float] = None,
+        overloaded: bool = False,
+        retry_after: Optional[float] = None,
+    ) -> None:
+        """
+        Free a slot and adjust the limit.
+
+        ``latency`` (seconds) is used as a health sample for successful
+        requests; pass ``None`` when it is not representative (e.g. streams).
+        """
+        async with self._condition:
+            self.in_flight -= 1
+            now = time.monotonic()
+
+            if overloaded:
+                self.overloads += 1
+                # Back off once per round trip, not once per failed request
+                window = self.baseline_latency or 1.0
+                if now - self._last_decrease >= window:
+                    self.limit = max(
+                        float(self.min_limit), self.limit * self.decrease_factor
+                    )
+                    self._last_decrease = now
+                if retry_after:
+                    self._blocked_until = max(self._blocked_until, now + retry_after)
+            elif latency is not None:
+                self.successes += 1
+                if self.baseline_latency is None:
+                    self.baseline_latency = latency
+                healthy = latency <= self.baseline_latency * self.latency_tolerance
+                self.baseline_latency += self.LATENCY_ALPHA * (
+                    latency - self.baseline_latency
+                )
+                if healthy:
+                    # Roughly +1 per limit's worth of healthy responses
+                    self.limit = min(
+                        float(self.max_limit), self.limit + 1.0 / self.limit
+                    )
+
+            self._condition.notify_all()
+
+    def stats(self) -> Dict[str, Any]:
+        """Return the current limit and counters for monitoring."""
+        return {
+            "limit": int(self.limit),
+            "in_flight": self.in_flight,
+            "baseline_latency": self.baseline_latency,
+            "successes": self.successes,
+            "overloads": self.overloads,
+            "paused_for": max(0.0, self._blocked_until - time.monotonic()),
+        }
+
+
+_limiters: Dict[str, AdaptiveConcurrencyLimiter] = {}
+
+
+def get_endpoint_limiter(base_url: str) -> AdaptiveConcurrencyLimiter:
+    """Get the process-wide limiter for a base URL."""
+    base_url = base_url.rstrip("/")
+    limiter = _limiters.get(base_url)
+    if limiter is None:
+        if settings.LLM_ADAPTIVE_CONCURRENCY:
+            min_limit = int(settings.LLM_CONCURRENCY_MIN)
+            max_limit = int(settings.LLM_CONCURRENCY_MAX)
+        else:
+            # Static limit: never grows or shrinks
+            min_limit = max_limit = int(settings.LLM_MAX_ASYNC)
+        limiter = _limiters[base_url] = AdaptiveConcurrencyLimiter(
+            initial_limit=int(settings.LLM_MAX_ASYNC),
+            min_limit=min_limit,
+            max_limit=max_limit,
+            latency_tolerance=float(settings.LLM_LATENCY_TOLERANCE),
+        )
+    return limiter
+
+
+def endpoint_limiter_stats() -> Dict[str, Dict[str, Any]]:
+    """Limits and counters for every endpoint used in this process."""
+    return {base_url: limiter.stats() for base_url, limiter in _limiters.items()}
@@ -40,6 +40,41 @@ class Settings(BaseSettings):
     # Vector search settings
     SEARCH_TOP_K: int = 5
     SEARCH_SCORE_THRESHOLD: float = 0.7
+    # pgvector index search depth, overridable per request: HNSW candidate list
+    # size and IVFFlat lists scanned (higher = better recall, slower)
+    SEARCH_HNSW_EF_SEARCH: int = 40
+    SEARCH_IVFFLAT_PROBES: int = 10
+    # "auto" searches pgvector on Postgres and the in-process index otherwise
+    SEARCH_BACKEND: str = "auto"  # auto, pgvector or memory
+    # Postgres text search configuration (language) of the lexical search mode;
+    # document_chunk.chunk_tsv is generated with it, so changing it needs the
+    # column rebuilt
+    SEARCH_TEXT_CONFIG: str = "english"
+    # Without Postgres full-text search (SQLite), lexical search is BM25 over
+    # at most this many LIKE-matched chunks
+    SEARCH_BM25_MAX_CANDIDATES: int = 1000
+    # Hybrid search: candidates per retriever, fused with weighted reciprocal-
+    # rank fusion (score = sum of weight / (k + rank))
+    SEARCH_HYBRID_CANDIDATES: int = 50
+    SEARCH_HYBRID_VECTOR_WEIGHT: float = 1.0
+    SEARCH_HYBRID_LEXICAL_WEIGHT: float = 1.0
+    SEARCH_HYBRID_RRF_K: int = 60
+    # Opt-in result totals count at most this many rows ("1000+" beyond it)
+    PAGINATION_TOTAL_CAP: int = 1000
+    # In-process vector index (snapshot defaults to <LIGHTRAG_WORKING_DIR>/vector_index)
+    VECTOR_INDEX_KIND: str = "flat"  # flat (exact) or ivf
+    VECTOR_INDEX_IVF_LISTS: int = 0  # 0 = square root of the number of vectors
+    VECTOR_INDEX_IVF_PROBES: int = 8  # Default when a search sets no probes
+    VECTOR_INDEX_BLOCK_SIZE: int = 65536  # Vectors scored per matrix product
+    VECTOR_INDEX_DIR: str = ""
+    # Catch up with writes made outside this process's ORM sessions
+    VECTOR_INDEX_SYNC_SECONDS: float = 30.0
+    # Save a snapshot of unsaved changes at most this often (and at shutdown)
+    VECTOR_INDEX_SAVE_SECONDS: float = 300.0
+    # Stored chunk embedding encoding: float32, float16, int8 or binary
+    EMBEDDING_STORAGE_ENCODING: str = "int8"
+    # Candidates per result rescored with full precision for lossy encodings
+    EMBEDDING_RESCORE_FACTOR: int = 4
 
     # Logging settings
     LOG_LEVEL: str = os.getenv("LOG_LEVEL", "INFO")
@@ -47,8 +82,37 @@ class Settings(BaseSettings):
     # LightRAG settings
     LIGHTRAG_WORKING_DIR: str = "./data"
     LIGHTRAG_GRAPH_NAME: str = "embediq"
+    # Documents passed to one LightRAG insert, and how many it processes at once
+    INGEST_BATCH_SIZE: int = 100
+    LIGHTRAG_MAX_PARALLEL_INSERT: int = 8
+    # Initialize LightRAG in the background at startup; /ready reports when done
+    LIGHTRAG_WARMUP_ENABLED: bool = True
+    LIGHTRAG_INIT_MAX_RETRIES: int = 3  # Per attempt; warmup keeps retrying
+    LIGHTRAG_INIT_RETRY_SECONDS: float = 2.0  # Doubles after each failure
+    LIGHTRAG_INIT_MAX_RETRY_SECONDS: float = 60.0
+    # Queries embedded during warmup to open connections and fill the cache
+    LIGHTRAG_WARMUP_QUERIES: List[str] = []
+    # Tenant workspaces (X-Workspace header): each has its own LightRAG storages
+    # and graph over one shared connection pool. The default workspace holds
+    # documents stored without one; others are opened on demand, at most
+    # LIGHTRAG_MAX_WORKSPACES at a time, and closed after sitting idle
+    LIGHTRAG_DEFAULT_WORKSPACE: str = "default"
+    LIGHTRAG_MAX_WORKSPACES: int = 16
+    LIGHTRAG_WORKSPACE_IDLE_SECONDS: float = 900.0  # 0 keeps them open
 
-    # Model settings
+    # Background ingestion queue (jobs are stored in the ingestion_job table)
+    INGEST_WORKERS: int = 2
+    INGEST_JOB_MAX_ATTEMPTS: int = 3
+    INGEST_JOB_RETRY_SECONDS: float = 30.0  # Doubles with each attempt
+    INGEST_JOB_LEASE_SECONDS: float = 300.0  # Heartbeat age before a job is resumed
+    INGEST_JOB_POLL_SECONDS: float = 5.0
+
+    # Text extraction process pool (0 workers = one per CPU, 0 MB = no limit)
+    EXTRACT_WORKERS: int = 0
+    EXTRACT_TIMEOUT_SECONDS: float = 120.0
+    EXTRACT_MEMORY_LIMIT_MB: int = 2048
+
+    # Model settings (base URLs accept a comma-separated list of endpoints)
     MODEL_BASE_URL: str = os.getenv("MODEL_BASE_URL", "https://api.deepseek.com/v1")
     MODEL_API_KEY: str = os.getenv("MODEL_API_KEY", "")
     LLM_MODEL_NAME: str = os.getenv("LLM_MODEL_NAME", "deepseek-chat")
@@ -60,10 +124,83 @@ class Settings(BaseSettings):
     )
     EMBEDDING_MODEL_API_KEY: str = os.getenv("EMBEDDING_MODEL_API_KEY", "")
     EMBEDDING_DIM: int = int(os.getenv("EMBEDDING_DIM", 1024))
+    # "base64" halves transfer size vs "float"; float lists are still accepted
+    EMBEDDING_ENCODING_FORMAT: str = os.getenv("EMBEDDING_ENCODING_FORMAT", "base64")
     MAX_TOKEN_SIZE: int = int(os.getenv("MAX_TOKEN_SIZE", 8192))
     LLM_MAX_TOKENS: int = int(os.getenv("LLM_MAX_TOKENS", 32768))
     LLM_MAX_ASYNC: int = int(os.getenv("LLM_MAX_ASYNC", 4))
 
+    # HTTP client pool settings (shared by all LLM and embedding calls)
+    HTTP_TIMEOUT: float = 30.0
+    HTTP_MAX_CONNECTIONS: int = 100
+    HTTP_MAX_KEEPALIVE_CONNECTIONS: int = 20
+    HTTP_KEEPALIVE_EXPIRY: float = 30.0
+    HTTP2_ENABLED: bool = True
+    # JSON object of per base URL overrides, e.g.
+    # {"https://api.deepseek.com/v1": {"max_connections": 50, "http2": false}}
+    HTTP_POOL_OVERRIDES: str = ""
+
+    # Adaptive concurrency per model endpoint (starts at LLM_MAX_ASYNC)
+    LLM_ADAPTIVE_CONCURRENCY: bool = True
+    LLM_CONCURRENCY_MIN: int = 1
+    LLM_CONCURRENCY_MAX: int = 64
+    # Responses slower than this multiple of the baseline latency stop growth
+    LLM_LATENCY_TOLERANCE: float = 2.0
+    # Retries for 429/5xx/transport errors, with exponential backoff; with
+    # several endpoints each retry fails over to another endpoint instead
+    LLM_MAX_RETRIES: int = 5
+    LLM_RETRY_BACKOFF_SECONDS: float = 1.0
+    LLM_RETRY_MAX_BACKOFF_SECONDS: float = 60.0
+
+    # Multi-endpoint balancing: eject endpoints after consecutive failures, and
+    # optionally hedge requests slower than the observed latency quantile
+    ENDPOINT_EJECT_FAILURES: int = 3
+    ENDPOINT_EJECT_SECONDS: float = 30.0
+    ENDPOINT_HEDGING_ENABLED: bool = False
+    ENDPOINT_HEDGE_QUANTILE: float = 0.95
+    ENDPOINT_HEDGE_MIN_SAMPLES: int = 20
+
+    # Completion cache settings
+    LLM_CACHE_ENABLED: bool = True
+    LLM_CACHE_TTL_SECONDS: int = 7 * 24 * 3600  # 0 disables expiry
+    LLM_CACHE_MAX_MEMORY_ENTRIES: int = 2048
+    LLM_CACHE_PERSIST: bool = True
+    LLM_CACHE_MAX_PERSISTED_ENTRIES: int = 100000
+    # Database tier lookups give up after this long; after this many failures
+    # in a row the tier is skipped for LLM_CACHE_DB_RETRY_SECONDS
+    LLM_CACHE_DB_TIMEOUT_SECONDS: float = 0.5
+    LLM_CACHE_DB_FAILURE_THRESHOLD: int = 3
+    LLM_CACHE_DB_RETRY_SECONDS: float = 60.0
+
+    # "fusion" query mode: retrieve with these modes concurrently and merge the
+    # contexts with reciprocal-rank fusion (score = sum of 1 / (k + rank))
+    QUERY_FUSION_MODES: List[str] = ["naive", "local", "global"]
+    QUERY_FUSION_RRF_K: int = 60
+
+    # Semantic query cache: reuse answers of near-identical earlier queries
+    QUERY_CACHE_ENABLED: bool = True
+    QUERY_CACHE_SIMILARITY: float = 0.95  # Minimum cosine similarity for a hit
+    QUERY_CACHE_MAX_ENTRIES: int = 1000
+    # Also bounds how stale other workers' answers get after documents
+    # change, since invalidation is per process; 0 disables expiry
+    QUERY_CACHE_TTL_SECONDS: int = 3600
+
+    # Query logs with per-stage latency, written in the background in batches
+    QUERY_LOG_ENABLED: bool = True
+    QUERY_LOG_QUEUE_SIZE: int = 10000  # Further logs are dropped while full
+    QUERY_LOG_BATCH_SIZE: int = 100
+
+    # Embedding cache settings (defaults to <LIGHTRAG_WORKING_DIR>/embedding_cache)
+    EMBEDDING_CACHE_ENABLED: bool = True
+    EMBEDDING_CACHE_DIR: str = ""
+
+    # Embedding request coalescing; batches are capped at this many texts and
+    # estimated tokens per /embeddings request (MAX_TOKEN_SIZE is per input)
+    EMBEDDING_BATCH_ENABLED: bool = True
+    EMBEDDING_BATCH_WINDOW_MS: float = 5.0
+    EMBEDDING_BATCH_MAX_SIZE: int = 96
+    EMBEDDING_BATCH_MAX_TOKENS: int = 300000
+
     class Config:
         env_file = ".env"
         case_sensitive = True
@@ -71,9 +208,3 @@ class Settings(BaseSettings):
 
 # Create global settings instance
 settings = Settings()
-
-# Update settings from environment variables if provided
-for field in settings.model_fields:
-    env_value = os.getenv(field.upper())
-    if env_value is not None:
-        setattr(settings, field, env_value)
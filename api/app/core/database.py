@@ -5,16 +5,23 @@ from loguru import logger
 from contextlib import asynccontextmanager
 
 # Get database connection string from environment
-DATABASE_URL = os.getenv(
-    "DATABASE_URL", "postgresql://postgres:postgres@db:5432/embediq"
-).replace("postgresql://", "postgresql+asyncpg://")
+DATABASE_URL = (
+    os.getenv("DATABASE_URL", "postgresql://postgres:postgres@db:5432/embediq")
+    .replace("postgresql://", "postgresql+asyncpg://")
+    .replace("sqlite://", "sqlite+aiosqlite://")
+)
 
 # Create async SQLAlchemy engine
 engine = create_async_engine(DATABASE_URL, echo=False)
 
-# Create async session factory
+# Create async session factory. Objects stay loaded after commit: an
+# AsyncSession cannot lazily refresh them once the caller has them
 AsyncSessionLocal = sessionmaker(
-    class_=AsyncSession, autocommit=False, autoflush=False, bind=engine
+    class_=AsyncSession,
+    autocommit=False,
+    autoflush=False,
+    expire_on_commit=False,
+    bind=engine,
 )
 
 # Create base class for models
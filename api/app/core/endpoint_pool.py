@@ -0,0 +1,297 @@
+"""
+Load balancing across several OpenAI-compatible endpoints.
+
+``MODEL_BASE_URL`` and ``EMBEDDING_MODEL_BASE_URL`` accept a comma-separated
+list of base URLs. Requests go to the healthy endpoint with the fewest
+outstanding requests; endpoints that fail repeatedly are ejected for a while.
+A request that fails with a retryable error is failed over to the next least
+loaded endpoint. Optionally, a request still running after the pool's
+observed p95 latency is hedged: a duplicate is sent to a second endpoint and
+the first answer wins.
+"""
+import asyncio
+import random
+import time
+from collections import deque
+from typing import (
+    Any,
+    Awaitable,
+    Callable,
+    Deque,
+    Dict,
+    Iterable,
+    List,
+    Optional,
+    Set,
+    TypeVar,
+)
+
+from loguru import logger
+
+from app.core.adaptive_limiter import backoff_delay
+from app.core.config import settings
+
+T = TypeVar("T")
+
+
+class EndpointError(Exception):
+    """
+    A request to one endpoint failed.
+
+    Retryable errors (rate limits, 5xx) are failed over to another endpoint
+    and count against the endpoint's health; others (e.g. a 400 for a bad
+    request, which every endpoint would reject) are raised to the caller.
+    """
+
+    def __init__(self, message: str, retryable: bool = True):
+        super().__init__(message)
+        self.retryable = retryable
+
+
+def is_retryable(error: BaseException) -> bool:
+    """Whether ``error`` may succeed on another endpoint."""
+    return getattr(error, "retryable", True)
+
+
+def split_base_urls(value: str) -> List[str]:
+    """Split a comma-separated base URL setting into normalized URLs."""
+    return [url.strip().rstrip("/") for url in value.split(",") if url.strip()]
+
+
+class _EndpointState:
+    def __init__(self):
+        self.outstanding = 0
+        self.consecutive_failures = 0
+        self.ejected_until = 0.0
+        self.ejections = 0
+
+
+class EndpointPool:
+    """
+    Least-outstanding-requests balancer with health ejection and hedging.
+    """
+
+    # Number of recent request latencies used for the hedge delay
+    LATENCY_WINDOW = 200
+
+    def __init__(
+        self,
+        base_urls: Iterable[str],
+        eject_failures: int = 3,
+        eject_seconds: float = 30.0,
+        hedge_quantile: float = 0.95,
+        hedge_min_samples: int = 20,
+    ):
+        self.endpoints: Dict[str, _EndpointState] = {
+            url: _EndpointState() for url in base_urls
+        }
+        if not self.endpoints:
+            raise ValueError("EndpointPool needs at least one base URL")
+        self.eject_failures = eject_failures
+        self.eject_seconds = eject_seconds
+        self.hedge_quantile = hedge_quantile
+        self.hedge_min_samples = hedge_min_samples
+
+        self._latencies: Deque[float] = deque(maxlen=self.LATENCY_WINDOW)
+        self.hedges = 0
+        self.hedge_wins = 0
+        self.failovers = 0
+
+    def pick(self, exclude: Iterable[str] = ()) -> Optional[str]:
+        """
+        Choose the healthy endpoint with the fewest outstanding requests.
+
+        If every candidate is ejected, the one due back soonest is used.
+        """
+        exclude = set(exclude)
+        candidates = [url for url in self.endpoints if url not in exclude]
+        if not candidates:
+            return None
+
+        now = time.monotonic()
+        healthy = [
+            url for url in candidates if self.endpoints[url].ejected_until <= now
+        ]
+        if not healthy:
+            return min(candidates, key=lambda url: self.endpoints[url].ejected_until)
+        return min(
+            healthy,
+            key=lambda url: (self.endpoints[url].outstanding, random.random()),
+        )
+
+    def begin(self, url: str) -> float:
+        """Mark a request to ``url`` as outstanding and return its start time."""
+        self.endpoints[url].outstanding += 1
+        return time.monotonic()
+
+    def end(
+        self, url: str, start: float, ok: Optional[bool], record_latency: bool = True
+    ) -> None:
+        """
+        Record the outcome of a request started with :meth:`begin`.
+
+        ``ok=None`` is neutral: the request says nothing about the endpoint's
+        health (it was cancelled, or failed in a way any endpoint would).
+        """
+        state = self.endpoints[url]
+        state.outstanding -= 1
+        if ok is None:
+            return
+        now = time.monotonic()
+
+        if ok:
+            state.consecutive_failures = 0
+            if record_latency:
+                self._latencies.append(now - start)
+            return
+
+        state.consecutive_failures += 1
+        if (
+            state.consecutive_failures >= self.eject_failures
+            and len(self.endpoints) > 1
+        ):
+            state.ejected_until = now + self.eject_seconds
+            state.consecutive_failures = 0
+            state.ejections += 1
+            logger.warning(f"Ejecting endpoint {url} for {self.eject_seconds:.0f}s")
+
+    def hedge_delay(self) -> Optional[float]:
+        """Observed latency quantile used as the hedge delay, once enough samples exist."""
+        if len(self._latencies) < self.hedge_min_samples:
+            return None
+        ordered = sorted(self._latencies)
+        return ordered[int(self.hedge_quantile * (len(ordered) - 1))]
+
+    async def _attempt(self, url: str, func: Callable[[str], Awaitable[T]]) -> T:
+        start = self.begin(url)
+        try:
+            result = await func(url)
+        except asyncio.CancelledError:
+            # A cancelled hedge loser says nothing about endpoint health
+            self.end(url, start, ok=None)
+            raise
+        except Exception as e:
+            self.end(url, start, ok=False if is_retryable(e) else None)
+            raise
+        self.end(url, start, ok=True)
+        return result
+
+    async def call(
+        self,
+        func: Callable[[str], Awaitable[T]],
+        hedge: bool = False,
+        failovers: int = 0,
+    ) -> T:
+        """
+        Run ``func(base_url)`` against the pool.
+
+        A retryable failure is retried up to ``failovers`` times, each time on
+        the least loaded endpoint not yet tried (backing off once every
+        endpoint has been). With ``hedge``, a duplicate is sent to another
+        endpoint if the first has not answered within :meth:`hedge_delay`;
+        the first success is returned.
+        """
+        delay = self.hedge_delay() if hedge and len(self.endpoints) > 1 else None
+        tried: List[str] = []
+        pending: Dict[asyncio.Task, str] = {}
+        hedge_tasks: Set[asyncio.Task] = set()
+
+        async def launch(exclude: Iterable[str]) -> Optional[asyncio.Task]:
+            url = self.pick(exclude=exclude)
+            if url is None:
+                return None
+            if url in tried:
+                await asyncio.sleep(backoff_delay(len(tried) - len(self.endpoints)))
+            tried.append(url)
+            task = asyncio.ensure_future(self._attempt(url, func))
+            pending[task] = url
+            return task
+
+        await launch(())
+        try:
+            while True:
+                done, _ = await asyncio.wait(
+                    pending,
+                    timeout=None if hedge_tasks else delay,
+                    return_when=asyncio.FIRST_COMPLETED,
+                )
+                if not done:
+                    # Only hedge once, to an endpoint other than the primary
+                    task = await launch(exclude=tried)
+                    if task is None:
+                        delay = None
+                        continue
+                    hedge_tasks.add(task)
+                    self.hedges += 1
+                    continue
+
+                for task in done:
+                    url = pending.pop(task)
+                    error = task.exception()
+                    if error is None:
+                        if task in hedge_tasks:
+                            self.hedge_wins += 1
+                        return task.result()
+                    if not is_retryable(error):
+                        raise error
+                    if failovers > 0:
+                        failovers -= 1
+                        self.failovers += 1
+                        # Prefer an endpoint not tried yet, then any other one
+                        for exclude in (tried, [url], ()):
+                            next_task = await launch(exclude)
+                            if next_task is not None:
+                                break
+                        logger.warning(
+                            f"Request to {url} failed ({error}), failing over to "
+                            f"{pending[next_task]}"
+                        )
+                    elif not pending:
+                        raise error
+        finally:
+            for task in pending:
+                task.cancel()
+            # Let cancelled attempts record their (neutral) outcome
+            await asyncio.gather(*pending, return_exceptions=True)
+
+    def stats(self) -> Dict[str, Any]:
+        """Return per-endpoint load and health plus hedging counters."""
+        now = time.monotonic()
+        return {
+            "endpoints": {
+                url: {
+                    "outstanding": state.outstanding,
+                    "ejected": state.ejected_until > now,
+                    "ejections": state.ejections,
+                }
+                for url, state in self.endpoints.items()
+            },
+            "hedge_delay": self.hedge_delay(),
+            "hedges": self.hedges,
+            "hedge_wins": self.hedge_wins,
+            "failovers": self.failovers,
+        }
+
+
+_pools: Dict[str, EndpointPool] = {}
+
+
+def get_endpoint_pool(base_urls: str) -> EndpointPool:
+    """Get the process-wide pool for a (comma-separated) base URL setting."""
+    urls = split_base_urls(base_urls)
+    key = ",".join(urls)
+    pool = _pools.get(key)
+    if pool is None:
+        pool = _pools[key] = EndpointPool(
+            urls,
+            eject_failures=int(settings.ENDPOINT_EJECT_FAILURES),
+            eject_seconds=float(settings.ENDPOINT_EJECT_SECONDS),
+            hedge_quantile=float(settings.ENDPOINT_HEDGE_QUANTILE),
+            hedge_min_samples=int(settings.ENDPOINT_HEDGE_MIN_SAMPLES),
+        )
+    return pool
+
+
+def endpoint_pool_stats() -> Dict[str, Dict[str, Any]]:
+    """Counters for every endpoint pool used in this process."""
+    return {key: pool.stats() for key, pool in _pools.items()}
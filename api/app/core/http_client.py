@@ -0,0 +1,117 @@
+"""
+Shared HTTP client pool for outbound model API calls.
+
+A single ``httpx.AsyncClient`` is kept per base URL for the lifetime of the
+application so LLM and embedding requests reuse warm TCP/TLS (and HTTP/2)
+connections instead of paying a new handshake on every call.
+"""
+import asyncio
+import json
+from typing import Any, Dict
+
+import httpx
+from loguru import logger
+
+from app.core.config import settings
+
+
+class HTTPClientPool:
+    """
+    Application-lifetime pool of ``httpx.AsyncClient`` instances keyed by base URL.
+
+    Limits default to the ``HTTP_*`` settings and can be overridden per base URL
+    through ``HTTP_POOL_OVERRIDES`` or :meth:`configure`.
+    """
+
+    def __init__(self):
+        self._clients: Dict[str, httpx.AsyncClient] = {}
+        self._overrides: Dict[str, Dict[str, Any]] = {}
+        self._lock = asyncio.Lock()
+
+        if settings.HTTP_POOL_OVERRIDES:
+            try:
+                for base_url, options in json.loads(
+                    settings.HTTP_POOL_OVERRIDES
+                ).items():
+                    self.configure(base_url, **options)
+            except (ValueError, AttributeError) as e:
+                logger.error(f"Ignoring invalid HTTP_POOL_OVERRIDES: {e}")
+
+    @staticmethod
+    def _normalize(base_url: str) -> str:
+        return base_url.rstrip("/")
+
+    def configure(self, base_url: str, **options: Any) -> None:
+        """
+        Override pool options for a base URL.
+
+        Supported options: ``max_connections``, ``max_keepalive_connections``,
+        ``keepalive_expiry``, ``http2`` and ``timeout``. Takes effect the next
+        time a client is created for that base URL.
+        """
+        self._overrides[self._normalize(base_url)] = options
+
+    def _build_client(self, base_url: str) -> httpx.AsyncClient:
+        options = self._overrides.get(base_url, {})
+        limits = httpx.Limits(
+            max_connections=int(
+                options.get("max_connections", settings.HTTP_MAX_CONNECTIONS)
+            ),
+            max_keepalive_connections=int(
+                options.get(
+                    "max_keepalive_connections",
+                    settings.HTTP_MAX_KEEPALIVE_CONNECTIONS,
+                )
+            ),
+            keepalive_expiry=float(
+                options.get("keepalive_expiry", settings.HTTP_KEEPALIVE_EXPIRY)
+            ),
+        )
+        http2 = bool(options.get("http2", settings.HTTP2_ENABLED))
+        if http2:
+            try:
+                import h2  # noqa: F401
+            except ImportError:
+                logger.warning("h2 is not installed, falling back to HTTP/1.1")
+                http2 = False
+
+        logger.info(
+            f"Creating pooled HTTP client for {base_url} "
+            f"(max_connections={limits.max_connections}, http2={http2})"
+        )
+        return httpx.AsyncClient(
+            limits=limits,
+            http2=http2,
+            timeout=float(options.get("timeout", settings.HTTP_TIMEOUT)),
+        )
+
+    async def get_client(self, base_url: str) -> httpx.AsyncClient:
+        """Get the pooled client for a base URL, creating it on first use."""
+        base_url = self._normalize(base_url)
+        client = self._clients.get(base_url)
+        if client is None or client.is_closed:
+            async with self._lock:
+                client = self._clients.get(base_url)
+                if client is None or client.is_closed:
+                    client = self._build_client(base_url)
+                    self._clients[base_url] = client
+        return client
+
+    async def startup(self, *base_urls: str) -> None:
+        """Eagerly create clients for the given base URLs."""
+        for base_url in base_urls:
+            if base_url:
+                await self.get_client(base_url)
+
+    async def aclose(self) -> None:
+        """Close all pooled clients and release their connections."""
+        async with self._lock:
+            clients = list(self._clients.values())
+            self._clients.clear()
+        for client in clients:
+            await client.aclose()
+        logger.info(f"Closed {len(clients)} pooled HTTP client(s)")
+
+
+# Global pool shared by the LLM and embedding services
+http_client_pool = HTTPClientPool()
@@ -0,0 +1,48 @@
+"""
+Fine-grained asyncio locking helpers.
+"""
+import asyncio
+from contextlib import AsyncExitStack, asynccontextmanager
+from typing import AsyncIterator, Dict, Hashable, Iterable
+
+
+class KeyedLock:
+    """
+    One asyncio lock per key, created on demand and dropped once unused.
+
+    Operations on different keys (e.g. different documents) never wait on each
+    other; only operations on the same key are serialized.
+    """
+
+    def __init__(self):
+        self._locks: Dict[Hashable, asyncio.Lock] = {}
+        self._users: Dict[Hashable, int] = {}
+
+    @asynccontextmanager
+    async def lock(self, key: Hashable) -> AsyncIterator[None]:
+        """Hold the lock for ``key`` for the duration of the block."""
+        lock = self._locks.get(key)
+        if lock is None:
+            lock = self._locks[key] = asyncio.Lock()
+        self._users[key] = self._users.get(key, 0) + 1
+        try:
+            async with lock:
+                yield
+        finally:
+            self._users[key] -= 1
+            if not self._users[key]:
+                del self._users[key]
+                del self._locks[key]
+
+    @asynccontextmanager
+    async def lock_many(self, keys: Iterable[Hashable]) -> AsyncIterator[None]:
+        """Hold the locks for all ``keys``, taken in sorted order to avoid deadlock."""
+        async with AsyncExitStack() as stack:
+            for key in sorted(set(keys)):
+                await stack.enter_async_context(self.lock(key))
+            yield
+
+    def locked(self, key: Hashable) -> bool:
+        """Whether an operation currently holds the lock for ``key``."""
+        lock = self._locks.get(key)
+        return lock is not None and lock.locked()
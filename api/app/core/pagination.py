@@ -0,0 +1,63 @@
+"""
+Keyset pagination cursors and cheap result totals.
+
+A cursor is an opaque, URL-safe token holding the sort key of the last item
+of a page; the next page continues strictly after that key, so reading page
+N costs the same as reading page 1 (unlike OFFSET, which scans and discards
+every earlier row).
+
+Counting every match is a full scan too, so totals are opt-in and either
+capped (exact up to a limit, then "1000+") or estimated from the Postgres
+planner's row estimate ("~12000").
+"""
+import base64
+import binascii
+import json
+from typing import Any, Dict, Optional
+
+from sqlalchemy import func, select, text
+from sqlalchemy.orm import Session
+from sqlalchemy.sql import Select
+
+
+def encode_cursor(position: Dict[str, Any]) -> str:
+    """Opaque token for a page position."""
+    raw = json.dumps(position, separators=(",", ":")).encode("utf-8")
+    return base64.urlsafe_b64encode(raw).decode("ascii").rstrip("=")
+
+
+def decode_cursor(cursor: Optional[str]) -> Optional[Dict[str, Any]]:
+    """Page position of a cursor; raises ValueError for malformed cursors."""
+    if not cursor:
+        return None
+    try:
+        raw = base64.urlsafe_b64decode(cursor + "=" * (-len(cursor) % 4))
+        position = json.loads(raw)
+    except (binascii.Error, UnicodeDecodeError, ValueError):
+        raise ValueError("Invalid cursor")
+    if not isinstance(position, dict):
+        raise ValueError("Invalid cursor")
+    return position
+
+
+def capped_total(db: Session, stmt: Select, cap: int) -> str:
+    """Number of rows of ``stmt``, counting at most ``cap`` + 1 of them."""
+    limited = stmt.limit(cap + 1).subquery()
+    count = db.execute(select(func.count()).select_from(limited)).scalar_one()
+    return f"{cap}+" if count > cap else str(count)
+
+
+def estimated_total(db: Session, stmt: Select, cap: int) -> str:
+    """
+    Planner row estimate of ``stmt`` on Postgres; other databases get a
+    capped count instead.
+    """
+    if db.get_bind().dialect.name != "postgresql":
+        return capped_total(db, stmt, cap)
+    compiled = stmt.compile(
+        dialect=db.get_bind().dialect, compile_kwargs={"literal_binds": True}
+    )
+    plan = db.execute(text(f"EXPLAIN (FORMAT JSON) {compiled}")).scalar_one()
+    if isinstance(plan, str):
+        plan = json.loads(plan)
+    return f"~{int(plan[0]['Plan']['Plan Rows'])}"
@@ -0,0 +1,28 @@
+"""
+Tenant workspace selection for API requests.
+"""
+import re
+from typing import Optional
+
+from fastapi import Header, HTTPException, status
+
+from app.core.config import settings
+
+# Workspace names become part of graph and directory names
+WORKSPACE_PATTERN = re.compile(r"^[A-Za-z0-9_]{1,48}$")
+
+
+def get_workspace(
+    x_workspace: Optional[str] = Header(
+        None, description="Tenant workspace; the default workspace when omitted"
+    )
+) -> str:
+    """Workspace named by the ``X-Workspace`` header."""
+    if not x_workspace:
+        return settings.LIGHTRAG_DEFAULT_WORKSPACE
+    if not WORKSPACE_PATTERN.match(x_workspace):
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail="Invalid workspace: use up to 48 letters, digits or underscores",
+        )
+    return x_workspace
@@ -1,4 +1,5 @@
 from fastapi import FastAPI, HTTPException
+from fastapi.responses import JSONResponse
 from fastapi.middleware.cors import CORSMiddleware
 from loguru import logger
 import uvicorn
@@ -6,9 +7,16 @@ import os
 
 from app.core.config import settings
 from app.core.database import init_db
+from app.core.http_client import http_client_pool
+from app.core.endpoint_pool import split_base_urls
+from app.services.ingestion_queue import ingestion_queue
+from app.services.lightrag_service import LightRAGService, workspace_pool
+from app.services.query_log import query_log_writer
+from app.services.text_extraction import text_extractor
+from app.services.vector_index import save_vector_index
 
 # Import routers
-from app.routers import ingest, search, query
+from app.routers import ingest, search, query, stats
 
 # Initialize FastAPI app
 app = FastAPI(
@@ -39,6 +47,28 @@ async def health_check():
     return {"status": "ok", "service": "embediq-api"}
 
 
+# Readiness endpoint
+@app.get("/ready", tags=["Health"])
+async def readiness_check():
+    """
+    Readiness check: 200 only once LightRAG storages are initialized.
+
+    Unlike `/health` (the process is up), load balancers should wait for this
+    before routing traffic to a new instance.
+    """
+    rag_service = await LightRAGService.get_instance()
+    if rag_service.is_ready():
+        return {"status": "ready", "service": "embediq-api"}
+    return JSONResponse(
+        status_code=503,
+        content={
+            "status": "starting",
+            "service": "embediq-api",
+            "error": rag_service.warmup_error,
+        },
+    )
+
+
 # Root endpoint
 @app.get("/", tags=["Root"])
 async def root():
@@ -56,6 +86,7 @@ async def root():
 app.include_router(ingest.router, prefix=settings.API_V1_STR)
 app.include_router(search.router, prefix=settings.API_V1_STR)
 app.include_router(query.router, prefix=settings.API_V1_STR)
+app.include_router(stats.router, prefix=settings.API_V1_STR)
 
 
 @app.on_event("startup")
@@ -68,6 +99,26 @@ async def startup_event():
     # Initialize database
     init_db()
 
+    # Open pooled HTTP clients for the model endpoints
+    await http_client_pool.startup(
+        *split_base_urls(settings.MODEL_BASE_URL),
+        *split_base_urls(settings.EMBEDDING_MODEL_BASE_URL),
+    )
+
+    # Initialize LightRAG in the background so startup is not blocked
+    if settings.LIGHTRAG_WARMUP_ENABLED:
+        rag_service = await LightRAGService.get_instance()
+        rag_service.start_warmup()
+
+    # Resume unfinished ingestion jobs and start the workers
+    await ingestion_queue.start()
+
+    # Write query logs in the background
+    await query_log_writer.start()
+
+    # Close tenant workspaces that sit idle
+    await workspace_pool.start()
+
 
 @app.on_event("shutdown")
 async def shutdown_event():
@@ -76,6 +127,24 @@ async def shutdown_event():
     """
     logger.info(f"Shutting down {settings.PROJECT_NAME}")
 
+    # Stop ingestion workers; interrupted jobs resume on the next start
+    await ingestion_queue.stop()
+
+    # Cancel an unfinished warmup and close every open workspace
+    await workspace_pool.stop()
+
+    # Write the query logs still queued
+    await query_log_writer.stop()
+
+    # Snapshot the in-process vector index for a fast restart
+    save_vector_index()
+
+    # Stop text extraction worker processes
+    text_extractor.shutdown()
+
+    # Close pooled HTTP clients
+    await http_client_pool.aclose()
+
 
 # Main entry point for running the application directly
 if __name__ == "__main__":
@@ -1 +1,8 @@
-from app.models.document import Document, DocumentChunk, QueryLog
+from app.models.document import (
+    Document,
+    DocumentChunk,
+    DocumentChunkDeletion,
+    QueryLog,
+)
+from app.models.cache import CompletionCache
+from app.models.job import IngestionJob
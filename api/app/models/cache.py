@@ -0,0 +1,24 @@
+from sqlalchemy import Column, String, Text, Integer, DateTime
+from app.models.base import BaseModel
+
+
+class CompletionCache(BaseModel):
+    """
+    Model for the durable tier of the LLM completion cache.
+    Entries are content-addressed by a hash of the full request.
+    """
+
+    # Content hash of (model, system prompt, history, prompt, sampling kwargs)
+    cache_key = Column(String(64), nullable=False, unique=True, index=True)
+    model = Column(String(255), nullable=False)
+
+    # Cached completion text
+    response_text = Column(Text, nullable=False)
+
+    # Expiry and usage information for TTL and size-based eviction
+    expires_at = Column(DateTime, nullable=True, index=True)
+    hit_count = Column(Integer, nullable=False, default=0)
+    last_accessed_at = Column(DateTime, nullable=True, index=True)
+
+    def __repr__(self):
+        return f"<CompletionCache(id={self.id}, model='{self.model}', cache_key='{self.cache_key[:12]}...')>"
@@ -1,15 +1,22 @@
 from sqlalchemy import (
+    DDL,
+    Boolean,
     Column,
     String,
     Text,
     JSON,
     LargeBinary,
     ForeignKey,
+    Index,
     Integer,
     Float,
+    event,
+    false,
 )
-from sqlalchemy.orm import relationship
+from sqlalchemy.orm import deferred, relationship
+from app.core.config import settings
 from app.models.base import BaseModel
+from app.models.types import Vector
 
 
 class Document(BaseModel):
@@ -17,17 +24,40 @@ class Document(BaseModel):
     Model for storing document metadata and content.
     """
 
+    # Serves workspace filters and keyset pagination (by id) within them
+    __table_args__ = (Index("ix_document_workspace_id", "workspace", "id"),)
+
     # Document metadata
     title = Column(String(255), nullable=False, index=True)
     source = Column(String(255), nullable=True, index=True)
     author = Column(String(255), nullable=True)
 
+    # Tenant the document belongs to (its LightRAG workspace)
+    workspace = Column(
+        String(64),
+        nullable=False,
+        default="default",
+        server_default="default",
+    )
+
     # Document content
     content = Column(Text, nullable=False)
 
+    # SHA-256 of content, to skip re-submitted unchanged documents
+    content_hash = Column(String(64), nullable=True, index=True)
+
     # Metadata (file type, creation date, etc.)
     doc_metadata = Column(JSON, nullable=True)
 
+    # LightRAG chunk IDs (hashes of chunk content) from the last indexing, so
+    # an edited document only re-processes the chunks that changed
+    chunk_hashes = Column(JSON, nullable=True)
+
+    # Whether the document has been ingested into LightRAG
+    is_indexed = Column(
+        Boolean, nullable=False, default=False, server_default=false(), index=True
+    )
+
     # Relationship to embedding chunks
     chunks = relationship(
         "DocumentChunk", back_populates="document", cascade="all, delete-orphan"
@@ -51,17 +81,83 @@ class DocumentChunk(BaseModel):
     chunk_index = Column(Integer, nullable=False)
     chunk_text = Column(Text, nullable=False)
 
-    # In a real implementation, we would use a PostgreSQL vector extension like pgvector
-    # For now, store as binary or use another approach
+    # Compact embedding code (see app.services.vector_codec) and its decoding
+    # parameters; int8 codes store their per-vector scale and offset. The
+    # in-process vector index is built from these
     embedding = Column(LargeBinary, nullable=True)
+    embedding_encoding = Column(String(16), nullable=True)
+    embedding_scale = Column(Float, nullable=True)
+    embedding_offset = Column(Float, nullable=True)
+
+    # Full-precision float32 copy used to rescore the final top-k; deferred so
+    # scans over compact codes do not load it
+    embedding_full = deferred(Column(LargeBinary, nullable=True))
+
+    # pgvector halfvec copy (2 bytes per dimension) behind the HNSW index that
+    # shortlists candidates for /search on Postgres
+    embedding_vector = deferred(
+        Column(Vector(int(settings.EMBEDDING_DIM), half=True), nullable=True)
+    )
 
     # Metadata about the chunk (e.g., page number, section)
     chunk_metadata = Column(JSON, nullable=True)
 
+    # Postgres also has a generated tsvector column, chunk_tsv, with a GIN index
+    # for lexical search; it is not mapped since only Postgres can compute it
+
     def __repr__(self):
         return f"<DocumentChunk(id={self.id}, document_id={self.document_id}, chunk_index={self.chunk_index})>"
 
 
+event.listen(
+    DocumentChunk.__table__,
+    "after_create",
+    DDL(
+        "ALTER TABLE document_chunk ADD COLUMN chunk_tsv tsvector GENERATED ALWAYS AS "
+        f"(to_tsvector('{settings.SEARCH_TEXT_CONFIG}'::regconfig, chunk_text)) STORED; "
+        "CREATE INDEX ix_document_chunk_chunk_tsv ON document_chunk USING gin (chunk_tsv)"
+    ).execute_if(dialect="postgresql"),
+)
+
+
+class DocumentChunkDeletion(BaseModel):
+    """
+    Log of deleted chunk IDs, written by a database trigger so bulk
+    ``delete()`` statements and other workers are recorded too. The
+    in-process vector index reads the entries created since its last sync
+    instead of scanning every chunk ID.
+    """
+
+    chunk_id = Column(Integer, nullable=False)
+
+    __table_args__ = (Index("ix_document_chunk_deletion_created_at", "created_at"),)
+
+
+# Timestamps are UTC like BaseModel's, which the index compares them with
+event.listen(
+    DocumentChunk.__table__,
+    "after_create",
+    DDL(
+        "CREATE OR REPLACE FUNCTION log_document_chunk_deletion() RETURNS trigger AS $$ BEGIN "
+        "INSERT INTO document_chunk_deletion (chunk_id, created_at, updated_at) "
+        "VALUES (OLD.id, now() AT TIME ZONE 'utc', now() AT TIME ZONE 'utc'); "
+        "RETURN OLD; END; $$ LANGUAGE plpgsql; "
+        "CREATE TRIGGER document_chunk_deletion AFTER DELETE ON document_chunk "
+        "FOR EACH ROW EXECUTE FUNCTION log_document_chunk_deletion()"
+    ).execute_if(dialect="postgresql"),
+)
+event.listen(
+    DocumentChunk.__table__,
+    "after_create",
+    DDL(
+        "CREATE TRIGGER document_chunk_deletion AFTER DELETE ON document_chunk "
+        "BEGIN INSERT INTO document_chunk_deletion (chunk_id, created_at, updated_at) "
+        "VALUES (OLD.id, strftime('%%Y-%%m-%%d %%H:%%M:%%f', 'now'), "
+        "strftime('%%Y-%%m-%%d %%H:%%M:%%f', 'now')); END"
+    ).execute_if(dialect="sqlite"),
+)
+
+
 class QueryLog(BaseModel):
     """
     Model for storing user queries and retrieval information.
@@ -74,8 +170,13 @@ class QueryLog(BaseModel):
 
     # Response information
     response_text = Column(Text, nullable=True)
+    mode = Column(String(20), nullable=True, index=True)
+    cache_hit = Column(Boolean, nullable=True)
     retrieval_latency_ms = Column(Integer, nullable=True)
     generation_latency_ms = Column(Integer, nullable=True)
+    total_latency_ms = Column(Integer, nullable=True)
+    # Milliseconds per query stage (keyword_extraction, vector_lookup, ...)
+    stage_latency_ms = Column(JSON, nullable=True)
 
     # Retrieval information
     retrieved_chunk_ids = Column(JSON, nullable=True)  # Store list of chunk IDs
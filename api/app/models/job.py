@@ -0,0 +1,39 @@
+from sqlalchemy import Column, String, Text, Integer, Float, DateTime, JSON
+from app.models.base import BaseModel
+
+
+class IngestionJob(BaseModel):
+    """
+    Model for a queued LightRAG ingestion of one or more stored documents.
+    Rows are the durable queue: workers claim queued rows and unfinished jobs
+    are resumed after a restart.
+    """
+
+    # queued -> running -> succeeded | failed
+    status = Column(String(16), nullable=False, default="queued", index=True)
+    # Current step within the job (queued, ingesting, done, failed)
+    stage = Column(String(32), nullable=False, default="queued")
+
+    # Documents to ingest and how many of them are done
+    document_ids = Column(JSON, nullable=False)
+    # Submitted documents left out because their content was already indexed
+    skipped_document_ids = Column(JSON, nullable=True)
+    processed_documents = Column(Integer, nullable=False, default=0)
+    progress = Column(Float, nullable=False, default=0.0)
+
+    # Retry bookkeeping
+    attempts = Column(Integer, nullable=False, default=0)
+    max_attempts = Column(Integer, nullable=False, default=3)
+    run_after = Column(DateTime, nullable=True, index=True)
+    error = Column(Text, nullable=True)
+
+    # Liveness of the worker running the job, used for crash recovery
+    heartbeat_at = Column(DateTime, nullable=True)
+
+    # Timings
+    started_at = Column(DateTime, nullable=True)
+    finished_at = Column(DateTime, nullable=True)
+    timings = Column(JSON, nullable=True)  # Seconds spent per stage
+
+    def __repr__(self):
+        return f"<IngestionJob(id={self.id}, status='{self.status}', stage='{self.stage}')>"
@@ -1,17 +1,24 @@
-from fastapi import APIRouter, Depends, HTTPException, status, UploadFile, File, Form
-from sqlalchemy.orm import Session
+from fastapi import (
+    APIRouter,
+    Depends,
+    HTTPException,
+    Query,
+    Response,
+    status,
+    UploadFile,
+    File,
+    Form,
+)
 from typing import List, Dict, Any, Optional
 from loguru import logger
-import time
 import json
 
-from app.core.database import get_db
-from app.schemas.document import DocumentCreate, DocumentResponse
-from app.services.document_service import (
-    create_document,
-    get_document_by_id,
-    get_documents,
-)
+from app.core.pagination import decode_cursor, encode_cursor
+from app.core.workspace import get_workspace
+from app.schemas.document import DocumentCreate, DocumentResponse, TotalMode
+from app.schemas.job import IngestionJobResponse
+from app.services.document_service import DocumentService
+from app.services.ingestion_queue import ingestion_queue
 from app.services.lightrag_service import LightRAGService
 
 router = APIRouter(
@@ -21,39 +28,30 @@ router = APIRouter(
 )
 
 
-@router.post("/", response_model=DocumentResponse, status_code=status.HTTP_201_CREATED)
-async def ingest_document(document: DocumentCreate, db: Session = Depends(get_db)):
+@router.post(
+    "/", response_model=IngestionJobResponse, status_code=status.HTTP_202_ACCEPTED
+)
+async def ingest_document(
+    document: DocumentCreate, workspace: str = Depends(get_workspace)
+):
     """
     Ingest a new document into the system.
 
-    This will:
-    1. Store the document metadata and content in the database
-    2. Process the document into chunks
-    3. Generate embeddings for each chunk
-    4. Store the embeddings in the database
+    The document is stored right away and a background job ingests it into
+    LightRAG; poll `/ingest/jobs/{job_id}` for progress.
     """
     logger.info(f"Ingesting document: {document.title}")
-    start_time = time.time()
 
     try:
-        # Create the document in the database
-        db_documentId = create_document(db=db, document=document)
-
-        # Also ingest into LightRAG if content is available
-        if document.content:
-            rag_service = await LightRAGService.get_instance()
-            doc_metadata = {
-                "title": document.title,
-                "document_id": db_documentId,
-                "source": document.source,
-            }
-            await rag_service.ingest_text(document.content, doc_metadata=doc_metadata)
-
-        # Calculate processing time
-        process_time = time.time() - start_time
-        logger.info(f"Document ingestion completed in {process_time:.2f}s")
-
-        return {"id": db_documentId}
+        # Committed before the job is queued, so workers can load it
+        document_id = await DocumentService(workspace).create_document(
+            document.content,
+            document.doc_metadata,
+            title=document.title,
+            source=document.source,
+            author=document.author,
+        )
+        return await ingestion_queue.enqueue([document_id])
     except Exception as e:
         logger.error(f"Error ingesting document: {e}")
         raise HTTPException(
@@ -62,50 +60,46 @@ async def ingest_document(document: DocumentCreate, db: Session = Depends(get_db
         )
 
 
-@router.post("/text", status_code=status.HTTP_201_CREATED)
-async def ingest_text(text: str = Form(...), metadata_json: Optional[str] = Form(None)):
+@router.post(
+    "/text", response_model=IngestionJobResponse, status_code=status.HTTP_202_ACCEPTED
+)
+async def ingest_text(
+    text: str = Form(...),
+    metadata_json: Optional[str] = Form(None),
+    workspace: str = Depends(get_workspace),
+):
     """
     Ingest plain text into LightRAG.
 
-    This endpoint allows ingesting text directly into LightRAG without storing it in the SQL database.
-    Optionally provide metadata as a JSON string.
+    The text is stored as a document and ingested by a background job.
+    Optionally provide metadata as a JSON string; a `source` (or `file_path`)
+    in it identifies the document, so re-sending it with edited text updates
+    that document. Text identical to an indexed document is not ingested
+    again and is reported in `skipped_document_ids`.
     """
     logger.info("Ingesting text into LightRAG")
-    start_time = time.time()
 
-    try:
-        # Parse metadata if provided
-        doc_metadata = None
-        if metadata_json:
-            try:
-                doc_metadata = json.loads(metadata_json)
-            except json.JSONDecodeError:
-                raise HTTPException(
-                    status_code=status.HTTP_400_BAD_REQUEST,
-                    detail="Invalid metadata JSON format",
-                )
-
-        # Ingest text into LightRAG
-        rag_service = await LightRAGService.get_instance()
-        result = await rag_service.ingest_text(text, doc_metadata=doc_metadata)
-
-        if result.get("status") == "error":
+    # Parse metadata if provided
+    doc_metadata = None
+    if metadata_json:
+        try:
+            doc_metadata = json.loads(metadata_json)
+        except json.JSONDecodeError:
             raise HTTPException(
-                status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
-                detail=result.get("message", "Error ingesting text"),
+                status_code=status.HTTP_400_BAD_REQUEST,
+                detail="Invalid metadata JSON format",
             )
 
-        # Calculate processing time
-        process_time = time.time() - start_time
-        logger.info(f"Text ingestion completed in {process_time:.2f}s")
-
-        return {
-            "status": "success",
-            "message": "Text ingested successfully",
-            "latency_ms": process_time * 1000,
-        }
-    except HTTPException:
-        raise
+    try:
+        upserts = await DocumentService(workspace).upsert_documents(
+            [text], [doc_metadata]
+        )
+        return await ingestion_queue.enqueue(
+            [u.document_id for u in upserts if u.outcome != "skipped"],
+            skipped_document_ids=[
+                u.document_id for u in upserts if u.outcome == "skipped"
+            ],
+        )
     except Exception as e:
         logger.error(f"Error ingesting text: {e}")
         raise HTTPException(
@@ -114,12 +108,26 @@ async def ingest_text(text: str = Form(...), metadata_json: Optional[str] = Form
         )
 
 
+@router.get("/jobs/{job_id}", response_model=IngestionJobResponse)
+async def get_ingestion_job(job_id: int):
+    """
+    Report the status, stage, progress and timings of an ingestion job.
+    """
+    job = await ingestion_queue.get_job(job_id)
+    if not job:
+        raise HTTPException(
+            status_code=status.HTTP_404_NOT_FOUND,
+            detail="Ingestion job not found",
+        )
+    return job
+
+
 @router.get("/{document_id}", response_model=DocumentResponse)
-async def get_document(document_id: int, db: Session = Depends(get_db)):
+async def get_document(document_id: int, workspace: str = Depends(get_workspace)):
     """
     Retrieve a document by ID.
     """
-    document = get_document_by_id(db=db, document_id=document_id)
+    document = await DocumentService(workspace).get_document(document_id)
     if not document:
         raise HTTPException(
             status_code=status.HTTP_404_NOT_FOUND,
@@ -130,10 +138,50 @@ async def get_document(document_id: int, db: Session = Depends(get_db)):
 
 @router.get("/", response_model=List[DocumentResponse])
 async def list_documents(
-    skip: int = 0, limit: int = 100, db: Session = Depends(get_db)
+    response: Response,
+    cursor: Optional[str] = None,
+    limit: int = Query(100, ge=1, le=1000),
+    total: TotalMode = TotalMode.none,
+    workspace: str = Depends(get_workspace),
 ):
     """
-    Retrieve a list of documents.
+    Retrieve a page of documents of the workspace, in ID order.
+
+    Pages are keyset-paginated: when more documents may follow, the
+    `X-Next-Cursor` response header holds the `cursor` for the next page.
+    `total=capped` or `total=estimate` reports the number of documents in
+    `X-Total-Count` ("1000+" past PAGINATION_TOTAL_CAP, "~N" when estimated).
     """
-    documents = get_documents(db=db, skip=skip, limit=limit)
+    try:
+        position = decode_cursor(cursor)
+        after_id = int(position["id"]) if position else None
+    except (KeyError, TypeError, ValueError):
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST, detail="Invalid cursor"
+        )
+
+    service = DocumentService(workspace)
+    documents = await service.get_documents(after_id=after_id, limit=limit)
+    if len(documents) == limit:
+        response.headers["X-Next-Cursor"] = encode_cursor({"id": documents[-1].id})
+    total_count = await service.count_documents(mode=total)
+    if total_count is not None:
+        response.headers["X-Total-Count"] = total_count
     return documents
+
+
+@router.delete("/{document_id}", status_code=status.HTTP_204_NO_CONTENT)
+async def delete_document(document_id: int, workspace: str = Depends(get_workspace)):
+    """
+    Delete a document from the database and LightRAG.
+
+    Waits for an in-flight ingestion of the same document; other documents and
+    queries are not blocked.
+    """
+    async with LightRAGService.lease(workspace) as rag_service:
+        deleted = await rag_service.delete_document(document_id)
+    if not deleted:
+        raise HTTPException(
+            status_code=status.HTTP_404_NOT_FOUND,
+            detail="Document not found",
+        )
@@ -1,11 +1,14 @@
 from fastapi import APIRouter, Depends, HTTPException, status
+from fastapi.responses import StreamingResponse
 from sqlalchemy.orm import Session
-from typing import List, Dict, Any, Optional
+from typing import AsyncIterator, List, Dict, Any, Optional
 from loguru import logger
 import time
+import json
 from enum import Enum
 
 from app.core.database import get_db
+from app.core.workspace import get_workspace
 from app.services.lightrag_service import LightRAGService
 from pydantic import BaseModel
 
@@ -21,37 +24,71 @@ class QueryMode(str, Enum):
     local = "local"
     global_ = "global"
     hybrid = "hybrid"
+    fusion = "fusion"
 
 
 class QueryRequest(BaseModel):
     query: str
     mode: QueryMode = QueryMode.hybrid
     top_k: Optional[int] = 3
+    stream: bool = False
     params: Optional[Dict[str, Any]] = None
 
 
+async def _sse_events(events: AsyncIterator[Dict[str, Any]]) -> AsyncIterator[str]:
+    """Format query stream events as server-sent events."""
+    async for event in events:
+        name = event.pop("event")
+        yield f"event: {name}\ndata: {json.dumps(event, default=str)}\n\n"
+
+
+async def _leased_stream(workspace: str, **kwargs: Any) -> AsyncIterator[Dict]:
+    """Stream a query, keeping the workspace open until the stream ends."""
+    async with LightRAGService.lease(workspace) as service:
+        async for event in service.query_stream(**kwargs):
+            yield event
+
+
 @router.post("/query")
-async def query(request: QueryRequest):
+async def query(request: QueryRequest, workspace: str = Depends(get_workspace)):
     """
     Query the RAG system with various search modes.
 
     Args:
         request: QueryRequest containing:
             - query: The text to search for
-            - mode: Search mode (naive/local/global/hybrid)
+            - mode: Search mode (naive/local/global/hybrid/fusion)
             - top_k: Number of top results to return
+            - stream: Stream the answer as server-sent events (``token`` events,
+              then a ``done`` event with execution_time and time_to_first_token)
             - params: Additional query parameters
+
+    Only the documents of the ``X-Workspace`` workspace are searched.
     """
     try:
-        service = await LightRAGService.get_instance()
         params = request.params or {}
 
-        result = await service.query(
-            query_text=request.query,
-            mode=request.mode.value,
-            top_k=request.top_k,
-            **params,
-        )
+        if request.stream:
+            events = _leased_stream(
+                workspace,
+                query_text=request.query,
+                mode=request.mode.value,
+                top_k=request.top_k,
+                **params,
+            )
+            return StreamingResponse(
+                _sse_events(events),
+                media_type="text/event-stream",
+                headers={"Cache-Control": "no-cache", "X-Accel-Buffering": "no"},
+            )
+
+        async with LightRAGService.lease(workspace) as service:
+            result = await service.query(
+                query_text=request.query,
+                mode=request.mode.value,
+                top_k=request.top_k,
+                **params,
+            )
 
         if result["status"] == "error":
             raise HTTPException(status_code=500, detail=result["message"])
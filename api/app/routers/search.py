@@ -1,12 +1,27 @@
 from fastapi import APIRouter, Depends, HTTPException, status
-from sqlalchemy.orm import Session
-from typing import List
+from sqlalchemy.ext.asyncio import AsyncSession
+from typing import List, Optional
 from loguru import logger
 import time
 
 from app.core.database import get_db
-from app.schemas.document import SearchQuery, SearchResponse, SearchResult
-from app.services.search_service import search_documents
+from app.core.pagination import decode_cursor, encode_cursor
+from app.core.workspace import get_workspace
+from app.schemas.document import (
+    SearchMode,
+    SearchQuery,
+    SearchResponse,
+    SearchResult,
+    TotalMode,
+)
+from app.services.search_service import (
+    SearchPosition,
+    count_lexical_matches,
+    embed_query,
+    search_documents,
+    search_documents_hybrid,
+    search_documents_lexical,
+)
 
 router = APIRouter(
     prefix="/search",
@@ -15,27 +30,115 @@ router = APIRouter(
 )
 
 
+def _search_position(cursor: Optional[str]) -> Optional[SearchPosition]:
+    try:
+        position = decode_cursor(cursor)
+        if position is None:
+            return None
+        return SearchPosition(
+            float(position["score"]), int(position["chunk_id"]), int(position["depth"])
+        )
+    except (KeyError, TypeError, ValueError):
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST, detail="Invalid cursor"
+        )
+
+
+def _next_cursor(
+    results: List[SearchResult], after: Optional[SearchPosition], top_k: int
+) -> Optional[str]:
+    # A short page is the last one
+    if not results or len(results) < top_k:
+        return None
+    last = results[-1]
+    return encode_cursor(
+        {
+            "score": last.score,
+            "chunk_id": last.chunk_id,
+            "depth": (after.depth if after else 0) + len(results),
+        }
+    )
+
+
 @router.post("/", response_model=SearchResponse)
-async def search(search_query: SearchQuery, db: Session = Depends(get_db)):
+async def search(
+    search_query: SearchQuery,
+    db: AsyncSession = Depends(get_db),
+    workspace: str = Depends(get_workspace),
+):
     """
     Search for documents based on vector similarity.
 
     This endpoint:
     1. Converts the query to a vector using the same embedding model
-    2. Searches for similar vectors in the database
-    3. Returns the most relevant document chunks
+    2. Searches for similar vectors in the pgvector HNSW index
+    3. Returns the most relevant document chunks scoring at least
+       SEARCH_SCORE_THRESHOLD (cosine similarity)
+
+    `ef_search` (HNSW) and `probes` (IVFFlat) raise recall at some latency.
+    Only documents of the request's workspace (`X-Workspace`) are searched.
+
+    With `mode=lexical` chunks are matched on keywords instead (Postgres
+    full-text search over a GIN index, ranked with ts_rank_cd). `mode=hybrid`
+    runs both and fuses them with weighted reciprocal-rank fusion; each
+    result's `doc_metadata` then has `vector_rank`/`vector_score` and
+    `lexical_rank`/`lexical_score`.
+
+    Pages are keyset-paginated: pass a response's `next_cursor` as `cursor`
+    to get the results ranked after it (null on the last page). `total` is
+    the number of results returned; for lexical search `total=capped` or
+    `total=estimate` also reports the number of matching chunks in
+    `total_hits` ("1000+" past PAGINATION_TOTAL_CAP, "~N" when estimated).
     """
     logger.info(f"Search query: {search_query.query}")
     start_time = time.time()
+    after = _search_position(search_query.cursor)
 
     try:
         # Perform the search
-        results, total = search_documents(
-            db=db,
-            query=search_query.query,
-            top_k=search_query.top_k,
-            filters=search_query.filters,
-        )
+        if search_query.mode == SearchMode.hybrid:
+            results, total = await search_documents_hybrid(
+                db=db,
+                query=search_query.query,
+                top_k=search_query.top_k,
+                filters=search_query.filters,
+                ef_search=search_query.ef_search,
+                probes=search_query.probes,
+                embed=embed_query,
+                after=after,
+                workspace=workspace,
+            )
+        elif search_query.mode == SearchMode.lexical:
+            results, total = await search_documents_lexical(
+                db=db,
+                query=search_query.query,
+                top_k=search_query.top_k,
+                filters=search_query.filters,
+                after=after,
+                workspace=workspace,
+            )
+        else:
+            query_vector = await embed_query(search_query.query)
+            results, total = await search_documents(
+                db=db,
+                query_vector=query_vector,
+                top_k=search_query.top_k,
+                filters=search_query.filters,
+                ef_search=search_query.ef_search,
+                probes=search_query.probes,
+                after=after,
+                workspace=workspace,
+            )
+
+        total_hits = None
+        if search_query.mode == SearchMode.lexical:
+            total_hits = await count_lexical_matches(
+                db,
+                search_query.query,
+                search_query.filters,
+                search_query.total,
+                workspace=workspace,
+            )
 
         # Calculate processing time
         process_time = (time.time() - start_time) * 1000  # Convert to ms
@@ -46,6 +149,8 @@ async def search(search_query: SearchQuery, db: Session = Depends(get_db)):
             results=results,
             total=total,
             latency_ms=process_time,
+            next_cursor=_next_cursor(results, after, search_query.top_k),
+            total_hits=total_hits,
         )
     except Exception as e:
         logger.error(f"Error during search: {e}")
@@ -56,9 +161,27 @@ async def search(search_query: SearchQuery, db: Session = Depends(get_db)):
 
 
 @router.get("/", response_model=SearchResponse)
-async def search_get(query: str, top_k: int = 5, db: Session = Depends(get_db)):
+async def search_get(
+    query: str,
+    top_k: int = 5,
+    mode: SearchMode = SearchMode.vector,
+    ef_search: Optional[int] = None,
+    probes: Optional[int] = None,
+    cursor: Optional[str] = None,
+    total: TotalMode = TotalMode.none,
+    db: AsyncSession = Depends(get_db),
+    workspace: str = Depends(get_workspace),
+):
     """
     GET version of the search endpoint for simple queries.
     """
-    search_query = SearchQuery(query=query, top_k=top_k)
-    return await search(search_query=search_query, db=db)
+    search_query = SearchQuery(
+        query=query,
+        top_k=top_k,
+        mode=mode,
+        ef_search=ef_search,
+        probes=probes,
+        cursor=cursor,
+        total=total,
+    )
+    return await search(search_query=search_query, db=db, workspace=workspace)
@@ -0,0 +1,40 @@
+from fastapi import APIRouter
+from typing import Dict, Any
+
+from app.core.adaptive_limiter import endpoint_limiter_stats
+from app.core.endpoint_pool import endpoint_pool_stats
+from app.services.llm_cache import completion_cache
+from app.services.embedding_cache import embedding_cache_stats
+from app.services.embedding_batcher import embedding_batcher_stats
+from app.services.ingestion_queue import ingestion_queue
+from app.services.lightrag_service import workspace_pool
+from app.services.query_cache import query_cache
+from app.services.query_log import query_log_writer
+from app.services.text_extraction import text_extractor
+from app.services.vector_index import vector_index_stats
+
+router = APIRouter(
+    prefix="/stats",
+    tags=["Stats"],
+    responses={404: {"description": "Not found"}},
+)
+
+
+@router.get("/")
+async def get_stats() -> Dict[str, Any]:
+    """
+    Report runtime counters for caches and model clients.
+    """
+    return {
+        "llm_cache": completion_cache.stats(),
+        "embedding_cache": embedding_cache_stats(),
+        "embedding_batcher": embedding_batcher_stats(),
+        "endpoints": endpoint_limiter_stats(),
+        "endpoint_pools": endpoint_pool_stats(),
+        "ingestion_queue": ingestion_queue.stats(),
+        "query_cache": query_cache.stats(),
+        "query_log": query_log_writer.stats(),
+        "text_extraction": text_extractor.stats(),
+        "vector_index": vector_index_stats(),
+        "workspaces": workspace_pool.stats(),
+    }
@@ -1,2 +1,3 @@
 # Import schemas here
 from app.schemas.document import *
+from app.schemas.job import *
@@ -1,6 +1,7 @@
 from pydantic import BaseModel, Field
 from typing import Optional, List, Dict, Any
 from datetime import datetime
+from enum import Enum
 
 
 class DocumentBase(BaseModel):
@@ -75,6 +76,18 @@ class DocumentChunkResponse(DocumentChunkBase):
         orm_mode = True
 
 
+class SearchMode(str, Enum):
+    vector = "vector"
+    lexical = "lexical"
+    hybrid = "hybrid"
+
+
+class TotalMode(str, Enum):
+    none = "none"
+    capped = "capped"
+    estimate = "estimate"
+
+
 class SearchQuery(BaseModel):
     """
     Schema for search queries.
@@ -82,9 +95,29 @@ class SearchQuery(BaseModel):
 
     query: str = Field(..., description="Search query text", min_length=1)
     top_k: Optional[int] = Field(5, description="Number of results to return")
+    mode: SearchMode = Field(
+        SearchMode.vector,
+        description=(
+            "vector (embedding similarity), lexical (keyword match) or hybrid "
+            "(both, fused by reciprocal rank)"
+        ),
+    )
     filters: Optional[Dict[str, Any]] = Field(
         None, description="Filters to apply to search"
     )
+    ef_search: Optional[int] = Field(
+        None, ge=1, description="HNSW candidate list size (recall vs. latency)"
+    )
+    probes: Optional[int] = Field(
+        None, ge=1, description="IVFFlat lists to scan (recall vs. latency)"
+    )
+    cursor: Optional[str] = Field(
+        None, description="next_cursor of the previous page, to continue after it"
+    )
+    total: TotalMode = Field(
+        TotalMode.none,
+        description="Count lexical matches: capped (e.g. '1000+') or estimate",
+    )
 
 
 class SearchResult(BaseModel):
@@ -109,6 +142,8 @@ class SearchResponse(BaseModel):
     results: List[SearchResult]
     total: int
     latency_ms: float
+    next_cursor: Optional[str] = None
+    total_hits: Optional[str] = None
 
 
 class QueryRequest(BaseModel):
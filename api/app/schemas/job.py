@@ -0,0 +1,29 @@
+from pydantic import BaseModel, Field
+from typing import Optional, List, Dict
+from datetime import datetime
+
+
+class IngestionJobResponse(BaseModel):
+    """
+    Schema for background ingestion job status.
+    """
+
+    id: int
+    status: str = Field(..., description="queued, running, succeeded or failed")
+    stage: str = Field(..., description="Current step of the job")
+    progress: float = Field(..., description="Fraction of documents ingested (0-1)")
+    document_ids: List[int]
+    skipped_document_ids: List[int] = Field(
+        default_factory=list,
+        description="Submitted documents skipped because they are unchanged",
+    )
+    processed_documents: int
+    attempts: int
+    max_attempts: int
+    error: Optional[str] = None
+    timings: Dict[str, float] = Field(
+        default_factory=dict, description="Seconds spent per stage"
+    )
+    created_at: datetime
+    started_at: Optional[datetime] = None
+    finished_at: Optional[datetime] = None
@@ -1,93 +1,304 @@
 from sqlalchemy.orm import Session
-from typing import List, Optional, Dict, Any
+from sqlalchemy import select, update
+from typing import List, NamedTuple, Optional, Dict, Any
 from loguru import logger
-import asyncio
+import hashlib
 
 from app.models.document import Document, DocumentChunk
-from app.schemas.document import DocumentCreate, DocumentChunkCreate
+from app.schemas.document import DocumentChunkCreate, TotalMode
+from app.core.config import settings
+from app.core.pagination import capped_total, estimated_total
 from app.core.database import get_session
 
 
-class DocumentService:
-    def __init__(self):
-        self.db_lock = asyncio.Lock()
+def content_hash(text: str) -> str:
+    """SHA-256 of a document's text, used to recognize re-submitted content."""
+    return hashlib.sha256(text.encode("utf-8")).hexdigest()
 
-    async def create_document(
-        self, text: str, metadata: Optional[Dict[str, Any]] = None
-    ) -> Document:
-        """Create a document with thread-safe database access."""
-        async with self.db_lock:
-            async with get_session() as session:
-                document = Document(content=text, metadata=metadata or {}, title="")
-                session.add(document)
-                await session.commit()
-                await session.refresh(document)
-                return document.id
 
-    async def get_document(self, document_id: int) -> Optional[Document]:
-        """Get a document by ID with thread-safe database access."""
-        async with self.db_lock:
-            async with get_session() as session:
-                result = await session.get(Document, document_id)
-                return result
-
-    async def get_documents(self, skip: int = 0, limit: int = 100) -> List[Document]:
-        """Get a list of documents with pagination."""
-        async with self.db_lock:
-            async with get_session() as session:
-                result = await session.execute(
-                    select(Document).offset(skip).limit(limit)
-                )
-                return result.scalars().all()
+def document_source(metadata: Optional[Dict[str, Any]]) -> Optional[str]:
+    """Identity of a document across re-submissions (its source or file path)."""
+    metadata = metadata or {}
+    return metadata.get("source") or metadata.get("file_path")
 
-    async def delete_document(self, document_id: int) -> bool:
-        """Delete a document by ID."""
-        async with self.db_lock:
-            async with get_session() as session:
-                document = await session.get(Document, document_id)
-                if not document:
-                    return False
-                await session.delete(document)
-                await session.commit()
-                return True
-
-
-def create_document(db: Session, document: DocumentCreate) -> Document:
+
+class DocumentUpsert(NamedTuple):
     """
-    Create a new document in the database.
+    Result of storing one submitted text.
+
+    ``outcome`` is ``created`` (new document), ``updated`` (same source, new
+    content), ``pending`` (identical to a stored document not indexed yet) or
+    ``skipped`` (identical to an indexed document, nothing to do).
     """
-    # Create document object
-    db_document = Document(
-        title=document.title,
-        source=document.source,
-        author=document.author,
-        content=document.content,
-        doc_metadata=document.doc_metadata or {},
-    )
 
-    # Add to database
-    db.add(db_document)
-    db.commit()
-    db.refresh(db_document)
+    document_id: int
+    outcome: str
 
-    # In a real implementation, we would handle chunking and embedding generation
-    # For now, we'll leave this as a placeholder
 
-    return db_document
+class DocumentService:
+    """
+    Async document operations.
 
+    Each call uses its own session, so concurrent callers do not need a shared
+    lock; serializing work on a single document is up to the caller.
 
-def get_document_by_id(db: Session, document_id: int) -> Optional[Document]:
-    """
-    Get a document by ID.
+    Documents are created in, and matched and listed within, ``workspace``.
     """
-    return db.query(Document).filter(Document.id == document_id).first()
+
+    def __init__(self, workspace: Optional[str] = None):
+        self.workspace = workspace or settings.LIGHTRAG_DEFAULT_WORKSPACE
+
+    async def create_document(
+        self,
+        text: str,
+        metadata: Optional[Dict[str, Any]] = None,
+        title: str = "",
+        source: Optional[str] = None,
+        author: Optional[str] = None,
+    ) -> int:
+        """Create a document and return its ID."""
+        async with get_session() as session:
+            document = Document(
+                content=text,
+                content_hash=content_hash(text),
+                doc_metadata=metadata or {},
+                title=title,
+                source=source,
+                author=author,
+                workspace=self.workspace,
+            )
+            session.add(document)
+            await session.commit()
+            await session.refresh(document)
+            return document.id
+
+    async def create_documents(
+        self, texts: List[str], metadatas: List[Optional[Dict[str, Any]]]
+    ) -> List[int]:
+        """Create many documents in a single transaction and return their IDs."""
+        async with get_session() as session:
+            documents = [
+                Document(
+                    content=text,
+                    doc_metadata=metadata or {},
+                    title="",
+                    workspace=self.workspace,
+                )
+                for text, metadata in zip(texts, metadatas)
+            ]
+            session.add_all(documents)
+            await session.flush()
+            document_ids = [document.id for document in documents]
+            await session.commit()
+            return document_ids
+
+    async def upsert_documents(
+        self,
+        texts: List[str],
+        metadatas: List[Optional[Dict[str, Any]]],
+        sources: Optional[List[Optional[str]]] = None,
+    ) -> List[DocumentUpsert]:
+        """
+        Store submitted texts, reusing documents whose content is unchanged.
+
+        A text is matched to a stored document by source (see
+        ``document_source``) first, then by content hash. A source match with
+        different content updates that document in place and marks it for
+        re-indexing; an identical text is not stored again.
+        """
+        sources = sources or [document_source(metadata) for metadata in metadatas]
+        hashes = [content_hash(text) for text in texts]
+
+        async with get_session() as session:
+            by_hash: Dict[str, Any] = {}
+            for row in await session.execute(
+                select(Document.id, Document.content_hash, Document.is_indexed)
+                .where(Document.workspace == self.workspace)
+                .where(Document.content_hash.in_(set(hashes)))
+                .order_by(Document.id)
+            ):
+                by_hash.setdefault(row.content_hash, row)
+
+            by_source: Dict[str, Any] = {}
+            wanted_sources = {source for source in sources if source}
+            if wanted_sources:
+                # The newest document per source is the current version
+                for row in await session.execute(
+                    select(
+                        Document.id,
+                        Document.source,
+                        Document.content_hash,
+                        Document.is_indexed,
+                    )
+                    .where(Document.workspace == self.workspace)
+                    .where(Document.source.in_(wanted_sources))
+                    .order_by(Document.id)
+                ):
+                    by_source[row.source] = row
+
+            # Entries are an ID or a new Document whose ID is known after flush
+            results: List[Any] = []
+            created: Dict[str, Document] = {}
+            for text, metadata, source, digest in zip(
+                texts, metadatas, sources, hashes
+            ):
+                current = by_source.get(source) if source else None
+                if current is not None and current.content_hash != digest:
+                    await session.execute(
+                        update(Document)
+                        .where(Document.id == current.id)
+                        .values(
+                            content=text,
+                            content_hash=digest,
+                            doc_metadata=metadata or {},
+                            is_indexed=False,
+                        )
+                    )
+                    results.append((current.id, "updated"))
+                    continue
+
+                match = current if current is not None else by_hash.get(digest)
+                if match is not None:
+                    outcome = "skipped" if match.is_indexed else "pending"
+                    results.append((match.id, outcome))
+                elif digest in created:
+                    # Repeated within this submission
+                    results.append((created[digest], "skipped"))
+                else:
+                    document = Document(
+                        content=text,
+                        content_hash=digest,
+                        source=source,
+                        doc_metadata=metadata or {},
+                        title="",
+                        workspace=self.workspace,
+                    )
+                    session.add(document)
+                    created[digest] = document
+                    results.append((document, "created"))
+
+            await session.flush()
+            upserts = [
+                DocumentUpsert(
+                    entry if isinstance(entry, int) else entry.id,
+                    outcome,
+                )
+                for entry, outcome in results
+            ]
+            await session.commit()
+            return upserts
+
+    async def get_chunk_hashes(
+        self, document_ids: List[int]
+    ) -> Dict[int, Optional[List[str]]]:
+        """LightRAG chunk IDs recorded when each document was last indexed."""
+        async with get_session() as session:
+            result = await session.execute(
+                select(Document.id, Document.chunk_hashes).where(
+                    Document.id.in_(document_ids)
+                )
+            )
+            return {row.id: row.chunk_hashes for row in result}
+
+    async def set_chunk_hashes(self, chunk_hashes: Dict[int, List[str]]) -> None:
+        """Record the LightRAG chunk IDs of freshly indexed documents."""
+        async with get_session() as session:
+            for document_id, hashes in chunk_hashes.items():
+                await session.execute(
+                    update(Document)
+                    .where(Document.id == document_id)
+                    .values(chunk_hashes=list(hashes))
+                )
+            await session.commit()
+
+    async def get_document(self, document_id: int) -> Optional[Document]:
+        """Get a document of this workspace by ID."""
+        async with get_session() as session:
+            document = await session.get(Document, document_id)
+            if not document or document.workspace != self.workspace:
+                return None
+            return document
+
+    async def get_document_contents(self, document_ids: List[int]) -> List[Any]:
+        """Get ``(id, content, doc_metadata)`` rows for the given IDs, in ID order."""
+        async with get_session() as session:
+            result = await session.execute(
+                select(Document.id, Document.content, Document.doc_metadata)
+                .where(Document.id.in_(document_ids))
+                .order_by(Document.id)
+            )
+            return result.all()
+
+    async def get_documents(
+        self, after_id: Optional[int] = None, limit: int = 100
+    ) -> List[Document]:
+        """
+        Get a page of documents in ID order, starting after ``after_id``.
+
+        Keyset pagination: pass the last ID of the previous page as
+        ``after_id``, so deep pages are read from the index instead of
+        skipping earlier rows.
+        """
+        stmt = select(Document).where(Document.workspace == self.workspace)
+        if after_id is not None:
+            stmt = stmt.where(Document.id > after_id)
+        async with get_session() as session:
+            result = await session.execute(stmt.order_by(Document.id).limit(limit))
+            return result.scalars().all()
+
+    async def count_documents(
+        self, mode: TotalMode = TotalMode.capped
+    ) -> Optional[str]:
+        """
+        Number of documents, capped at PAGINATION_TOTAL_CAP (``"1000+"``) or
+        estimated by the Postgres planner (``"~1200"``).
+        """
+        if mode == TotalMode.none:
+            return None
+        stmt = select(Document.id).where(Document.workspace == self.workspace)
+        cap = int(settings.PAGINATION_TOTAL_CAP)
+        total = estimated_total if mode == TotalMode.estimate else capped_total
+        async with get_session() as session:
+            return await session.run_sync(total, stmt, cap)
+
+    async def get_document_workspaces(
+        self, document_ids: List[int]
+    ) -> Dict[str, List[int]]:
+        """Group document IDs by the workspace they belong to."""
+        async with get_session() as session:
+            result = await session.execute(
+                select(Document.id, Document.workspace)
+                .where(Document.id.in_(document_ids))
+                .order_by(Document.id)
+            )
+            workspaces: Dict[str, List[int]] = {}
+            for row in result:
+                workspaces.setdefault(
+                    row.workspace or settings.LIGHTRAG_DEFAULT_WORKSPACE, []
+                ).append(row.id)
+            return workspaces
+
+    async def delete_document(self, document_id: int) -> bool:
+        """Delete a document of this workspace by ID."""
+        async with get_session() as session:
+            document = await session.get(Document, document_id)
+            if not document or document.workspace != self.workspace:
+                return False
+            await session.delete(document)
+            await session.commit()
+            return True
 
 
-def get_documents(db: Session, skip: int = 0, limit: int = 100) -> List[Document]:
+def get_document_by_id(
+    db: Session, document_id: int, workspace: Optional[str] = None
+) -> Optional[Document]:
     """
-    Get a list of documents with pagination.
+    Get a document by ID, optionally only if it belongs to ``workspace``.
     """
-    return db.query(Document).offset(skip).limit(limit).all()
+    query = db.query(Document).filter(Document.id == document_id)
+    if workspace is not None:
+        query = query.filter(Document.workspace == workspace)
+    return query.first()
 
 
 def delete_document(db: Session, document_id: int) -> bool:
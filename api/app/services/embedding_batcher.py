@@ -0,0 +1,178 @@
+"""
+Micro-batching coalescer for embedding requests.
+
+LightRAG and the ingest routers issue many small concurrent embedding calls.
+Requests arriving within a short window are gathered into a single
+``/embeddings`` call, and the rows of the returned array are scattered back to
+each awaiting caller. A caller's texts are never split across batches.
+"""
+import asyncio
+import weakref
+from typing import Awaitable, Callable, Dict, List, Optional, Set, Tuple
+
+import numpy as np
+
+from app.core.config import settings
+
+EmbedFunc = Callable[[List[str]], Awaitable[np.ndarray]]
+
+
+def estimate_tokens(text: str) -> int:
+    """Cheap token estimate (~4 characters per token) used for batch budgeting."""
+    return len(text) // 4 + 1
+
+
+class EmbeddingBatcher:
+    """
+    Coalesce concurrent ``embed`` calls into batched requests to ``embed_func``.
+
+    A batch is sent when the window elapses, or earlier once it reaches
+    ``max_batch_size`` texts or ``max_batch_tokens`` estimated tokens.
+    """
+
+    def __init__(
+        self,
+        embed_func: EmbedFunc,
+        window_seconds: float = 0.005,
+        max_batch_size: int = 96,
+        max_batch_tokens: int = 8192,
+    ):
+        self.embed_func = embed_func
+        self.window_seconds = window_seconds
+        self.max_batch_size = max_batch_size
+        self.max_batch_tokens = max_batch_tokens
+
+        self._pending: List[Tuple[List[str], asyncio.Future]] = []
+        self._pending_texts = 0
+        self._pending_tokens = 0
+        self._timer: Optional[asyncio.TimerHandle] = None
+        self._tasks: Set[asyncio.Task] = set()
+
+        self.requests = 0
+        self.batches = 0
+        self.texts = 0
+
+    async def embed(self, texts: List[str]) -> np.ndarray:
+        """Embed ``texts`` as part of the next batch."""
+        if not texts:
+            return await self.embed_func(texts)
+
+        loop = asyncio.get_running_loop()
+        future = loop.create_future()
+        tokens = sum(estimate_tokens(text) for text in texts)
+
+        # Send what is pending first if this request would overflow the batch
+        if self._pending and (
+            self._pending_texts + len(texts) > self.max_batch_size
+            or self._pending_tokens + tokens > self.max_batch_tokens
+        ):
+            self._flush()
+
+        self._pending.append((texts, future))
+        self._pending_texts += len(texts)
+        self._pending_tokens += tokens
+        self.requests += 1
+
+        if (
+            self._pending_texts >= self.max_batch_size
+            or self._pending_tokens >= self.max_batch_tokens
+        ):
+            self._flush()
+        elif self._timer is None:
+            self._timer = loop.call_later(self.window_seconds, self._flush)
+
+        return await future
+
+    def _flush(self) -> None:
+        """Send all pending requests as one batch."""
+        if self._timer is not None:
+            self._timer.cancel()
+            self._timer = None
+        if not self._pending:
+            return
+
+        batch = self._pending
+        self._pending = []
+        self._pending_texts = 0
+        self._pending_tokens = 0
+
+        task = asyncio.ensure_future(self._run(batch))
+        self._tasks.add(task)
+        task.add_done_callback(self._tasks.discard)
+
+    async def _run(self, batch: List[Tuple[List[str], asyncio.Future]]) -> None:
+        texts = [text for request_texts, _ in batch for text in request_texts]
+        self.batches += 1
+        self.texts += len(texts)
+
+        try:
+            embeddings = await self.embed_func(texts)
+            if len(embeddings) != len(texts):
+                raise ValueError(
+                    f"Expected {len(texts)} embeddings, got {len(embeddings)}"
+                )
+        except Exception as e:
+            for _, future in batch:
+                if not future.done():
+                    future.set_exception(e)
+            return
+
+        offset = 0
+        for request_texts, future in batch:
+            if not future.done():
+                future.set_result(embeddings[offset : offset + len(request_texts)])
+            offset += len(request_texts)
+
+    def stats(self) -> Dict[str, float]:
+        """Return batching counters for monitoring."""
+        return _batch_stats(self.requests, self.batches, self.texts)
+
+
+def _batch_stats(requests: int, batches: int, texts: int) -> Dict[str, float]:
+    return {
+        "requests": requests,
+        "batches": batches,
+        "texts": texts,
+        "avg_batch_size": texts / batches if batches else 0.0,
+        "avg_requests_per_batch": requests / batches if batches else 0.0,
+    }
+
+
+# loop -> {(model, base_url, api_key): batcher}. Batchers hold futures and
+# timers of the loop they were created on, so each event loop (one per test,
+# or a worker thread's own loop) gets its own
+_batchers: weakref.WeakKeyDictionary = weakref.WeakKeyDictionary()
+
+
+def get_embedding_batcher(
+    model: str, base_url: str, api_key: str, embed_func: EmbedFunc
+) -> EmbeddingBatcher:
+    """
+    Get the running loop's batcher for a model, endpoint and API key.
+
+    ``embed_func`` is only used when the batcher is first created.
+    """
+    batchers = _batchers.setdefault(asyncio.get_running_loop(), {})
+    key = (model, base_url, api_key)
+    batcher = batchers.get(key)
+    if batcher is None:
+        batcher = batchers[key] = EmbeddingBatcher(
+            embed_func,
+            window_seconds=float(settings.EMBEDDING_BATCH_WINDOW_MS) / 1000,
+            max_batch_size=int(settings.EMBEDDING_BATCH_MAX_SIZE),
+            max_batch_tokens=int(settings.EMBEDDING_BATCH_MAX_TOKENS),
+        )
+    return batcher
+
+
+def embedding_batcher_stats() -> Dict[str, Dict[str, float]]:
+    """Counters for every embedding batcher created in this process."""
+    # Batchers of the same endpoint on different loops are summed
+    totals: Dict[str, List[int]] = {}
+    for batchers in list(_batchers.values()):
+        for (model, base_url, _), batcher in batchers.items():
+            total = totals.setdefault(f"{model}@{base_url}", [0, 0, 0])
+            total[0] += batcher.requests
+            total[1] += batcher.batches
+            total[2] += batcher.texts
+    return {name: _batch_stats(*total) for name, total in totals.items()}
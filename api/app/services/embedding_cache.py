@@ -0,0 +1,218 @@
+"""
+Persistent embedding cache backed by a memory-mapped float32 vector file.
+
+Each (model, dim) pair owns three files in the cache directory:
+
+- ``<name>.f32``: row-major float32 vectors, appended in place
+- ``<name>.idx``: index sidecar of fixed-size ``(key, row)`` records
+- ``<name>.lock``: lock file serializing writers across processes
+
+Vectors are read through ``np.memmap``, so every uvicorn worker shares the same
+page-cache pages instead of holding its own copy, and the cache survives
+restarts. Writers append vectors before their index records, so readers never
+see a key whose row has not been written yet.
+
+File reads, the cross-process lock and fsync can block, so ``embed`` runs
+lookups and writes in worker threads rather than on the event loop.
+"""
+import asyncio
+import fcntl
+import hashlib
+import os
+import re
+import threading
+from typing import Awaitable, Callable, Dict, List, Optional, Tuple
+
+import numpy as np
+from loguru import logger
+
+from app.core.config import settings
+
+# Index record: 16-byte BLAKE2b digest followed by a little-endian uint64 row
+INDEX_RECORD = np.dtype([("key", "V16"), ("row", "<u8")])
+
+
+class EmbeddingCache:
+    """
+    Cache of embeddings keyed by ``hash(model, text)`` for one model and dimension.
+    """
+
+    def __init__(self, directory: str, model: str, dim: int):
+        self.model = model
+        self.dim = dim
+        self._row_bytes = dim * 4
+
+        os.makedirs(directory, exist_ok=True)
+        name = f"{re.sub(r'[^A-Za-z0-9_.-]+', '_', model)}-{dim}"
+        self.vectors_path = os.path.join(directory, f"{name}.f32")
+        self.index_path = os.path.join(directory, f"{name}.idx")
+        self.lock_path = os.path.join(directory, f"{name}.lock")
+        for path in (self.vectors_path, self.index_path, self.lock_path):
+            open(path, "ab").close()
+
+        self._rows: Dict[bytes, int] = {}
+        self._index_offset = 0
+        self._vectors: Optional[np.memmap] = None
+        # Guards the in-process index and mapping across worker threads
+        self._state_lock = threading.Lock()
+
+        self.hits = 0
+        self.misses = 0
+
+        self._refresh_index()
+
+    def key(self, text: str) -> bytes:
+        """Content key for a text under this cache's model."""
+        return hashlib.blake2b(
+            f"{self.model}\0{text}".encode("utf-8"), digest_size=16
+        ).digest()
+
+    def _refresh_index(self) -> None:
+        """Load index records appended since the last refresh (possibly by other workers)."""
+        with open(self.index_path, "rb") as f:
+            f.seek(self._index_offset)
+            data = f.read()
+        usable = len(data) - len(data) % INDEX_RECORD.itemsize
+        if not usable:
+            return
+        records = np.frombuffer(data[:usable], dtype=INDEX_RECORD)
+        for record in records:
+            self._rows[bytes(record["key"])] = int(record["row"])
+        self._index_offset += usable
+
+    def _vector_rows(self, min_rows: int) -> np.memmap:
+        """Map the vector file, remapping if it has grown past the current view."""
+        if self._vectors is None or len(self._vectors) < min_rows:
+            rows = os.path.getsize(self.vectors_path) // self._row_bytes
+            self._vectors = np.memmap(
+                self.vectors_path, dtype=np.float32, mode="r", shape=(rows, self.dim)
+            )
+        return self._vectors
+
+    def lookup(self, texts: List[str]) -> Tuple[np.ndarray, List[int]]:
+        """
+        Fetch cached vectors for ``texts``.
+
+        Returns a ``(len(texts), dim)`` float32 array with cached rows filled in,
+        and the positions of texts that were not cached.
+        """
+        keys = [self.key(text) for text in texts]
+        with self._state_lock:
+            return self._lookup(keys)
+
+    def _lookup(self, keys: List[bytes]) -> Tuple[np.ndarray, List[int]]:
+        if any(key not in self._rows for key in keys):
+            self._refresh_index()
+
+        result = np.empty((len(keys), self.dim), dtype=np.float32)
+        positions, rows, missing = [], [], []
+        for i, key in enumerate(keys):
+            row = self._rows.get(key)
+            if row is None:
+                missing.append(i)
+            else:
+                positions.append(i)
+                rows.append(row)
+
+        if rows:
+            result[positions] = self._vector_rows(max(rows) + 1)[rows]
+
+        self.hits += len(positions)
+        self.misses += len(missing)
+        return result, missing
+
+    def store(self, texts: List[str], vectors: np.ndarray) -> None:
+        """Append vectors for texts not already in the cache."""
+        vectors = np.ascontiguousarray(vectors, dtype=np.float32)
+        if vectors.shape != (len(texts), self.dim):
+            raise ValueError(
+                f"Expected embeddings of shape {(len(texts), self.dim)}, got {vectors.shape}"
+            )
+
+        with self._state_lock, open(self.lock_path, "rb") as lock:
+            fcntl.flock(lock, fcntl.LOCK_EX)
+            try:
+                self._refresh_index()
+                new_keys, new_rows = {}, []
+                for text, vector in zip(texts, vectors):
+                    key = self.key(text)
+                    if key not in self._rows and key not in new_keys:
+                        new_keys[key] = None
+                        new_rows.append(vector)
+                if not new_keys:
+                    return
+
+                with open(self.vectors_path, "r+b") as f:
+                    # Drop any partial row left by an interrupted writer
+                    size = os.path.getsize(self.vectors_path)
+                    first_row = size // self._row_bytes
+                    f.truncate(first_row * self._row_bytes)
+                    f.seek(first_row * self._row_bytes)
+                    f.write(np.stack(new_rows).tobytes())
+                    f.flush()
+                    os.fsync(f.fileno())
+
+                records = np.empty(len(new_keys), dtype=INDEX_RECORD)
+                records["key"] = np.frombuffer(b"".join(new_keys), dtype="V16")
+                records["row"] = np.arange(first_row, first_row + len(new_keys))
+                with open(self.index_path, "ab") as f:
+                    f.write(records.tobytes())
+                    f.flush()
+
+                self._refresh_index()
+            finally:
+                fcntl.flock(lock, fcntl.LOCK_UN)
+
+    async def embed(
+        self,
+        texts: List[str],
+        embed_func: Callable[[List[str]], Awaitable[np.ndarray]],
+    ) -> np.ndarray:
+        """
+        Embed ``texts``, calling ``embed_func`` only for texts not in the cache.
+        """
+        result, missing = await asyncio.to_thread(self.lookup, texts)
+        if not missing:
+            return result
+
+        # Embed each distinct missing text once
+        unique_texts = list(dict.fromkeys(texts[i] for i in missing))
+        embeddings = np.asarray(await embed_func(unique_texts), dtype=np.float32)
+        by_text = dict(zip(unique_texts, embeddings))
+        for i in missing:
+            result[i] = by_text[texts[i]]
+
+        try:
+            await asyncio.to_thread(self.store, unique_texts, embeddings)
+        except Exception as e:
+            logger.warning(f"Embedding cache write failed: {e}")
+        return result
+
+    def stats(self) -> Dict[str, float]:
+        """Return hit/miss counters for monitoring."""
+        lookups = self.hits + self.misses
+        return {
+            "hits": self.hits,
+            "misses": self.misses,
+            "hit_rate": self.hits / lookups if lookups else 0.0,
+            "entries": len(self._rows),
+        }
+
+
+_caches: Dict[Tuple[str, int], EmbeddingCache] = {}
+
+
+def get_embedding_cache(model: str, dim: int) -> EmbeddingCache:
+    """Get the process-wide cache for a model and embedding dimension."""
+    cache = _caches.get((model, dim))
+    if cache is None:
+        directory = settings.EMBEDDING_CACHE_DIR or os.path.join(
+            settings.LIGHTRAG_WORKING_DIR, "embedding_cache"
+        )
+        cache = _caches[(model, dim)] = EmbeddingCache(directory, model, dim)
+    return cache
+
+
+def embedding_cache_stats() -> Dict[str, Dict[str, float]]:
+    """Counters for every embedding cache opened in this process."""
+    return {f"{model}-{dim}": cache.stats() for (model, dim), cache in _caches.items()}
@@ -0,0 +1,381 @@
+"""
+Durable background queue for LightRAG ingestion.
+
+Jobs are rows in the ``ingestion_job`` table. Ingest endpoints store their
+documents, enqueue a job and return its ID straight away; in-process workers
+claim queued rows with a conditional ``UPDATE`` (so several API processes can
+share the table), run the ingestion and record stage, progress and timings.
+
+Failed jobs are retried with exponential backoff up to ``max_attempts``. A
+running job refreshes its heartbeat; on startup and then once per lease,
+running jobs whose heartbeat is older than the lease (their worker died) are
+put back in the queue. Jobs cancelled by ``stop`` are requeued straight away.
+"""
+import asyncio
+import datetime
+from typing import Any, Awaitable, Callable, Dict, List, Optional, Set
+
+from loguru import logger
+from sqlalchemy import or_, select, update
+
+from app.core.config import settings
+from app.core.database import get_session
+from app.models.job import IngestionJob
+
+Progress = Callable[[int, int], Awaitable[None]]
+Processor = Callable[[List[int], Progress], Awaitable[None]]
+
+
+async def ingest_stored_documents(document_ids: List[int], progress: Progress) -> None:
+    """
+    Default processor: ingest stored documents through the LightRAGService of
+    the workspace they belong to.
+    """
+    from app.services.document_service import DocumentService
+    from app.services.lightrag_service import LightRAGService
+
+    workspaces = await DocumentService().get_document_workspaces(document_ids)
+    done, total = 0, len(document_ids)
+    for workspace, ids in workspaces.items():
+
+        async def report(processed: int, _: int) -> None:
+            await progress(done + processed, total)
+
+        async with LightRAGService.lease(workspace) as rag_service:
+            await rag_service.ingest_stored_documents(ids, progress=report)
+        done += len(ids)
+
+
+def _utcnow() -> datetime.datetime:
+    return datetime.datetime.utcnow()
+
+
+def job_to_dict(job: IngestionJob) -> Dict[str, Any]:
+    """Public view of a job row."""
+    return {
+        "id": job.id,
+        "status": job.status,
+        "stage": job.stage,
+        "progress": job.progress,
+        "document_ids": job.document_ids,
+        "skipped_document_ids": job.skipped_document_ids or [],
+        "processed_documents": job.processed_documents,
+        "attempts": job.attempts,
+        "max_attempts": job.max_attempts,
+        "error": job.error,
+        "timings": job.timings or {},
+        "created_at": job.created_at,
+        "started_at": job.started_at,
+        "finished_at": job.finished_at,
+    }
+
+
+class IngestionQueue:
+    """
+    Postgres-backed job queue with a bounded pool of async workers.
+    """
+
+    def __init__(
+        self,
+        processor: Processor = ingest_stored_documents,
+        session_factory=get_session,
+        workers: Optional[int] = None,
+        max_attempts: Optional[int] = None,
+        retry_seconds: Optional[float] = None,
+        lease_seconds: Optional[float] = None,
+        poll_seconds: Optional[float] = None,
+    ):
+        self.processor = processor
+        self.session_factory = session_factory
+        self.workers = max(1, int(workers or settings.INGEST_WORKERS))
+        self.max_attempts = int(max_attempts or settings.INGEST_JOB_MAX_ATTEMPTS)
+        self.retry_seconds = float(
+            settings.INGEST_JOB_RETRY_SECONDS
+            if retry_seconds is None
+            else retry_seconds
+        )
+        self.lease_seconds = float(lease_seconds or settings.INGEST_JOB_LEASE_SECONDS)
+        self.poll_seconds = float(poll_seconds or settings.INGEST_JOB_POLL_SECONDS)
+
+        self._wakeup = asyncio.Event()
+        self._dispatcher: Optional[asyncio.Task] = None
+        self._running: Set[asyncio.Task] = set()
+
+        self.completed = 0
+        self.failed = 0
+        self.retried = 0
+        self.recovered = 0
+
+    async def enqueue(
+        self,
+        document_ids: List[int],
+        skipped_document_ids: Optional[List[int]] = None,
+    ) -> Dict[str, Any]:
+        """
+        Queue ingestion of stored documents and return the new job.
+
+        ``skipped_document_ids`` are reported on the job but not ingested.
+        """
+        async with self.session_factory() as session:
+            job = IngestionJob(
+                status="queued",
+                stage="queued",
+                document_ids=list(document_ids),
+                skipped_document_ids=list(skipped_document_ids or []),
+                processed_documents=0,
+                progress=0.0,
+                attempts=0,
+                max_attempts=self.max_attempts,
+                timings={},
+            )
+            session.add(job)
+            await session.flush()
+            result = job_to_dict(job)
+        self._wakeup.set()
+        return result
+
+    async def get_job(self, job_id: int) -> Optional[Dict[str, Any]]:
+        """Current state of a job, or ``None`` if it does not exist."""
+        async with self.session_factory() as session:
+            job = await session.get(IngestionJob, job_id)
+            return job_to_dict(job) if job is not None else None
+
+    async def start(self) -> None:
+        """Resume jobs abandoned by a crashed worker and start dispatching."""
+        if self._dispatcher is not None:
+            return
+        try:
+            await self.recover()
+        except Exception as e:
+            # The dispatcher keeps polling, so jobs run once the database is up
+            logger.error(f"Failed to recover ingestion jobs: {e}")
+        # An event is bound to the loop it first waited on; a restarted queue
+        # may be running on another one
+        self._wakeup = asyncio.Event()
+        self._dispatcher = asyncio.create_task(self._dispatch())
+        logger.info(f"Ingestion queue started with {self.workers} worker(s)")
+
+    async def stop(self) -> None:
+        """Stop dispatching and cancel running jobs, putting them back in the queue."""
+        tasks = list(self._running)
+        if self._dispatcher is not None:
+            tasks.append(self._dispatcher)
+            self._dispatcher = None
+        for task in tasks:
+            task.cancel()
+        await asyncio.gather(*tasks, return_exceptions=True)
+
+    async def recover(self) -> int:
+        """Requeue running jobs whose heartbeat is older than the lease."""
+        stale = _utcnow() - datetime.timedelta(seconds=self.lease_seconds)
+        async with self.session_factory() as session:
+            result = await session.execute(
+                update(IngestionJob)
+                .where(IngestionJob.status == "running")
+                .where(
+                    or_(
+                        IngestionJob.heartbeat_at.is_(None),
+                        IngestionJob.heartbeat_at < stale,
+                    )
+                )
+                .values(status="queued", stage="queued", run_after=None)
+            )
+        if result.rowcount:
+            logger.warning(f"Requeued {result.rowcount} interrupted ingestion job(s)")
+        self.recovered += result.rowcount
+        return result.rowcount
+
+    async def _dispatch(self) -> None:
+        loop = asyncio.get_running_loop()
+        slots = asyncio.Semaphore(self.workers)
+        # start() has just recovered; other processes' workers may die later
+        next_recovery = loop.time() + self.lease_seconds
+        while True:
+            await slots.acquire()
+            if loop.time() >= next_recovery:
+                next_recovery = loop.time() + self.lease_seconds
+                try:
+                    await self.recover()
+                except Exception as e:
+                    logger.error(f"Failed to recover ingestion jobs: {e}")
+            # Cleared before looking, so an enqueue during the claim is not missed
+            self._wakeup.clear()
+            try:
+                job = await self._claim_next()
+            except Exception as e:
+                logger.error(f"Failed to claim ingestion job: {e}")
+                job = None
+
+            if job is None:
+                slots.release()
+                try:
+                    await asyncio.wait_for(self._wakeup.wait(), self.poll_seconds)
+                except asyncio.TimeoutError:
+                    pass
+                continue
+
+            task = asyncio.create_task(self._run(job))
+            self._running.add(task)
+            task.add_done_callback(self._running.discard)
+            task.add_done_callback(lambda _: slots.release())
+
+    async def _claim_next(self) -> Optional[Dict[str, Any]]:
+        """Atomically move the oldest due job from queued to running."""
+        now = _utcnow()
+        async with self.session_factory() as session:
+            candidates = (
+                (
+                    await session.execute(
+                        select(IngestionJob.id)
+                        .where(IngestionJob.status == "queued")
+                        .where(
+                            or_(
+                                IngestionJob.run_after.is_(None),
+                                IngestionJob.run_after <= now,
+                            )
+                        )
+                        .order_by(IngestionJob.id)
+                        .limit(self.workers)
+                    )
+                )
+                .scalars()
+                .all()
+            )
+
+            for job_id in candidates:
+                claimed = await session.execute(
+                    update(IngestionJob)
+                    .where(IngestionJob.id == job_id)
+                    .where(IngestionJob.status == "queued")
+                    .values(
+                        status="running",
+                        stage="ingesting",
+                        attempts=IngestionJob.attempts + 1,
+                        heartbeat_at=now,
+                        started_at=now,
+                        error=None,
+                    )
+                )
+                # Another worker or process may have claimed it first
+                if claimed.rowcount == 1:
+                    await session.commit()
+                    return job_to_dict(await session.get(IngestionJob, job_id))
+        return None
+
+    async def _update(self, job_id: int, **values: Any) -> None:
+        async with self.session_factory() as session:
+            await session.execute(
+                update(IngestionJob).where(IngestionJob.id == job_id).values(**values)
+            )
+
+    async def _heartbeat(self, job_id: int) -> None:
+        while True:
+            await asyncio.sleep(self.lease_seconds / 3)
+            try:
+                await self._update(job_id, heartbeat_at=_utcnow())
+            except Exception as e:
+                logger.warning(f"Heartbeat for ingestion job {job_id} failed: {e}")
+
+    async def _run(self, job: Dict[str, Any]) -> None:
+        job_id = job["id"]
+        started = job["started_at"]
+        timings = dict(job["timings"])
+        timings["queue_wait"] = (started - job["created_at"]).total_seconds()
+
+        async def progress(done: int, total: int) -> None:
+            await self._update(
+                job_id,
+                processed_documents=done,
+                progress=done / total if total else 1.0,
+                heartbeat_at=_utcnow(),
+            )
+
+        heartbeat = asyncio.create_task(self._heartbeat(job_id))
+        try:
+            await self.processor(job["document_ids"], progress)
+        except asyncio.CancelledError:
+            # Interrupted by stop(), not failed: requeue without using an attempt
+            try:
+                await self._update(
+                    job_id,
+                    status="queued",
+                    stage="queued",
+                    run_after=None,
+                    attempts=IngestionJob.attempts - 1,
+                )
+            except Exception as e:
+                logger.error(f"Failed to requeue ingestion job {job_id}: {e}")
+            raise
+        except Exception as e:
+            await self._fail(job, timings, e)
+        else:
+            finished = _utcnow()
+            timings["ingesting"] = (finished - started).total_seconds()
+            timings["total"] = (finished - job["created_at"]).total_seconds()
+            await self._update(
+                job_id,
+                status="succeeded",
+                stage="done",
+                progress=1.0,
+                processed_documents=len(job["document_ids"]),
+                finished_at=finished,
+                timings=timings,
+            )
+            self.completed += 1
+            logger.info(
+                f"Ingestion job {job_id} finished in {timings['ingesting']:.1f}s"
+            )
+        finally:
+            heartbeat.cancel()
+
+    async def _fail(
+        self, job: Dict[str, Any], timings: Dict[str, float], error: Exception
+    ) -> None:
+        job_id = job["id"]
+        now = _utcnow()
+        timings[f"attempt_{job['attempts']}"] = (
+            now - job["started_at"]
+        ).total_seconds()
+
+        if job["attempts"] < job["max_attempts"]:
+            delay = self.retry_seconds * 2 ** (job["attempts"] - 1)
+            logger.warning(
+                f"Ingestion job {job_id} failed (attempt {job['attempts']}): "
+                f"{error}; retrying in {delay:.0f}s"
+            )
+            await self._update(
+                job_id,
+                status="queued",
+                stage="queued",
+                error=str(error),
+                run_after=now + datetime.timedelta(seconds=delay),
+                timings=timings,
+            )
+            self.retried += 1
+            asyncio.get_running_loop().call_later(delay, self._wakeup.set)
+            return
+
+        logger.error(f"Ingestion job {job_id} failed: {error}")
+        await self._update(
+            job_id,
+            status="failed",
+            stage="failed",
+            error=str(error),
+            finished_at=now,
+            timings=timings,
+        )
+        self.failed += 1
+
+    def stats(self) -> Dict[str, Any]:
+        """Worker usage and job counters for monitoring."""
+        return {
+            "workers": self.workers,
+            "running": len(self._running),
+            "completed": self.completed,
+            "failed": self.failed,
+            "retried": self.retried,
+            "recovered": self.recovered,
+        }
+
+
+ingestion_queue = IngestionQueue()
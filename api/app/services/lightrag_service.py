@@ -1,40 +1,102 @@
 from lightrag import LightRAG, QueryParam
-from lightrag.utils import EmbeddingFunc
+from lightrag.base import DocStatus
+from lightrag.operate import get_keywords_from_query, kg_query, naive_query
+from lightrag.utils import (
+    EmbeddingFunc,
+    compute_mdhash_id,
+    truncate_list_by_token_size,
+)
 from lightrag.kg.shared_storage import initialize_pipeline_status
-import textract
+from lightrag.prompt import PROMPTS
 import asyncio
+import copy
 import os
 import time
-from typing import List, Dict, Any, Optional
+from dataclasses import asdict, replace
+from datetime import datetime
+from typing import (
+    Any,
+    AsyncIterator,
+    Awaitable,
+    Callable,
+    Dict,
+    List,
+    Optional,
+    Tuple,
+    Union,
+)
 from loguru import logger
 from dotenv import load_dotenv
 from app.core.config import settings
+from app.core.locks import KeyedLock
 from app.services.llm_service import openai_complete_if_cache, openai_embed
+from app.services.embedding_cache import get_embedding_cache
 from app.services.document_service import DocumentService
+from app.services.query_cache import CacheHit, query_cache
+from app.services.query_log import query_log_writer
+from app.services.query_trace import (
+    QueryTrace,
+    current_trace,
+    instrument_rag,
+    trace_stream,
+)
+from app.services.query_fusion import (
+    fuse_contexts,
+    format_context,
+    parse_graph_context,
+    parse_naive_context,
+)
 from app.services.search_service import SearchService
+from app.services.text_extraction import text_extractor
+from app.services.workspace_pool import WorkspacePool
 
 load_dotenv()
 
+# Inserts into one workspace's LightRAG are serialized; workspaces insert
+# concurrently (see LightRAGService._process_queued)
+_pipeline_locks = KeyedLock()
+
+# Wait between retries of a pipeline run another workspace held up
+PIPELINE_RETRY_SECONDS = 0.05
+PIPELINE_MAX_RETRY_SECONDS = 1.0
 
-class LightRAGService:
-    _instance = None
-    _lock = asyncio.Lock()
 
-    def __init__(self):
-        """Initialize the LightRAG service."""
-        self.db_lock = asyncio.Lock()
-        self.document_service = DocumentService()
+class LightRAGService:
+    def __init__(self, workspace: Optional[str] = None):
+        """Initialize the LightRAG service for one workspace (tenant)."""
+        self.workspace = workspace or settings.LIGHTRAG_DEFAULT_WORKSPACE
+        # Queries run fully in parallel; only initialization and operations on
+        # the same document (e.g. deleting a document being indexed) wait
+        self._init_lock = asyncio.Lock()
+        self.document_locks = KeyedLock()
+        self.document_service = DocumentService(self.workspace)
         self.search_service = SearchService()
         self.rag = None
+        # Shared database client the workspace's storages were attached to
+        self._shared_db = None
+
+        # Startup warmup state reported by the readiness endpoint
+        self.warmed_up = False
+        self.warmup_error: Optional[str] = None
+        self._warmup_task: Optional[asyncio.Task] = None
 
     @classmethod
     async def get_instance(cls) -> "LightRAGService":
-        """Get or create a singleton instance of LightRAGService."""
-        if not cls._instance:
-            async with cls._lock:
-                if not cls._instance:
-                    cls._instance = cls()
-        return cls._instance
+        """Get the service of the default workspace (it is never closed)."""
+        return await workspace_pool.get(settings.LIGHTRAG_DEFAULT_WORKSPACE)
+
+    @staticmethod
+    def lease(workspace: Optional[str] = None):
+        """
+        Use a workspace's service: ``async with LightRAGService.lease(name) as s``.
+
+        The workspace is opened if needed and kept open until released.
+        """
+        return workspace_pool.lease(workspace or settings.LIGHTRAG_DEFAULT_WORKSPACE)
+
+    @property
+    def is_default_workspace(self) -> bool:
+        return self.workspace == settings.LIGHTRAG_DEFAULT_WORKSPACE
 
     async def _llm_model_func(
         self,
@@ -42,35 +104,61 @@ class LightRAGService:
         system_prompt: Optional[str] = None,
         history_messages: List[Dict[str, str]] = [],
         keyword_extraction: bool = False,
+        stream: bool = False,
         **kwargs,
-    ) -> str:
+    ) -> Union[str, AsyncIterator[str]]:
         """LLM model function wrapper for LightRAG."""
-        return await openai_complete_if_cache(
-            settings.LLM_MODEL_NAME,
-            prompt,
-            system_prompt=system_prompt,
-            history_messages=history_messages,
-            api_key=settings.MODEL_API_KEY,
-            base_url=settings.MODEL_BASE_URL,
-        )
+        trace = current_trace()
+        stage = "keyword_extraction" if keyword_extraction else "llm_generation"
+        if trace is not None:
+            trace.begin(stage)
+        try:
+            response = await openai_complete_if_cache(
+                settings.LLM_MODEL_NAME,
+                prompt,
+                system_prompt=system_prompt,
+                history_messages=history_messages,
+                api_key=settings.MODEL_API_KEY,
+                base_url=settings.MODEL_BASE_URL,
+                stream=stream,
+            )
+        finally:
+            if trace is not None:
+                trace.end(stage)
+        # A streamed answer is still being generated while it is consumed
+        if trace is not None and not isinstance(response, str):
+            response = trace_stream(stage, response)
+        return response
 
     def _create_embedding_func(self):
         """Create embedding function using OpenAI-compatible API."""
-        return EmbeddingFunc(
-            embedding_dim=settings.EMBEDDING_DIM,
-            max_token_size=settings.MAX_TOKEN_SIZE,
-            func=lambda texts: openai_embed(
+
+        def embed(texts: List[str]):
+            return openai_embed(
                 texts,
                 model=settings.EMBEDDING_MODEL_NAME,
                 api_key=settings.EMBEDDING_MODEL_API_KEY,
                 base_url=settings.EMBEDDING_MODEL_BASE_URL,
-            ),
+            )
+
+        func = embed
+        if settings.EMBEDDING_CACHE_ENABLED:
+            # Only texts missing from the persistent cache reach the API
+            cache = get_embedding_cache(
+                settings.EMBEDDING_MODEL_NAME, int(settings.EMBEDDING_DIM)
+            )
+            func = lambda texts: cache.embed(texts, embed)
+
+        return EmbeddingFunc(
+            embedding_dim=settings.EMBEDDING_DIM,
+            max_token_size=settings.MAX_TOKEN_SIZE,
+            func=func,
         )
 
     async def _initialize_rag(self) -> LightRAG:
         """Initialize LightRAG with PostgreSQL storage"""
-        max_retries = 3
-        retry_delay = 2
+        max_retries = max(1, int(settings.LIGHTRAG_INIT_MAX_RETRIES))
+        retry_delay = float(settings.LIGHTRAG_INIT_RETRY_SECONDS)
 
         for retry in range(max_retries):
             try:
@@ -80,12 +168,22 @@ class LightRAGService:
 
                 # Initialize LightRAG with complete configuration
                 embedding_func = self._create_embedding_func()
-                self.rag = LightRAG(
-                    working_dir=settings.LIGHTRAG_WORKING_DIR,
+                rag = LightRAG(
+                    working_dir=self._working_dir(),
+                    # Other workspaces get their own graph, named after them
+                    namespace_prefix=(
+                        "" if self.is_default_workspace else f"{self.workspace}_"
+                    ),
                     llm_model_func=self._llm_model_func,
                     llm_model_name=settings.LLM_MODEL_NAME,
-                    llm_model_max_async=int(settings.LLM_MAX_ASYNC),
+                    # The per-endpoint adaptive limiter enforces the real cap
+                    llm_model_max_async=(
+                        int(settings.LLM_CONCURRENCY_MAX)
+                        if settings.LLM_ADAPTIVE_CONCURRENCY
+                        else int(settings.LLM_MAX_ASYNC)
+                    ),
                     llm_model_max_token_size=int(settings.LLM_MAX_TOKENS),
+                    max_parallel_insert=int(settings.LIGHTRAG_MAX_PARALLEL_INSERT),
                     enable_llm_cache_for_entity_extract=True,
                     embedding_func=embedding_func,
                     kv_storage="PGKVStorage",
@@ -96,14 +194,19 @@ class LightRAGService:
                 )
 
                 # Initialize storages and pipeline status
-                await self.rag.initialize_storages()
+                if not self.is_default_workspace:
+                    await self._attach_workspace_db(rag)
+                await rag.initialize_storages()
                 await initialize_pipeline_status()
 
                 # Set embedding function for graph database
-                self.rag.chunk_entity_relation_graph.embedding_func = embedding_func
+                rag.chunk_entity_relation_graph.embedding_func = embedding_func
+
+                # Time query stages (see query_trace)
+                instrument_rag(rag)
 
                 logger.info("LightRAG instance initialized successfully")
-                return self.rag
+                return rag
 
             except Exception as e:
                 logger.error(
@@ -111,63 +214,583 @@ class LightRAGService:
                 )
                 if retry < max_retries - 1:
                     logger.info(f"Retrying in {retry_delay} seconds...")
-                    time.sleep(retry_delay)
-                    retry_delay *= 2
+                    await asyncio.sleep(retry_delay)
+                    retry_delay = min(
+                        retry_delay * 2, float(settings.LIGHTRAG_INIT_MAX_RETRY_SECONDS)
+                    )
                 else:
                     logger.error("All retry attempts failed")
                     raise RuntimeError(
                         f"Failed to initialize LightRAG after {max_retries} attempts: {str(e)}"
                     )
 
+    def _working_dir(self) -> str:
+        if self.is_default_workspace:
+            return settings.LIGHTRAG_WORKING_DIR
+        return os.path.join(settings.LIGHTRAG_WORKING_DIR, self.workspace)
+
+    @staticmethod
+    def _storages(rag: LightRAG) -> List[Any]:
+        return [
+            rag.full_docs,
+            rag.text_chunks,
+            rag.llm_response_cache,
+            rag.entities_vdb,
+            rag.relationships_vdb,
+            rag.chunks_vdb,
+            rag.chunk_entity_relation_graph,
+            rag.doc_status,
+        ]
+
+    async def _attach_workspace_db(self, rag: LightRAG) -> None:
+        """
+        Point the storages at a copy of the shared database client scoped to
+        this workspace.
+
+        PG storages filter every read and write by the client's ``workspace``,
+        so queries never touch other tenants' rows, while all workspaces share
+        one connection pool instead of opening one each.
+        """
+        from lightrag.kg.postgres_impl import ClientManager
+
+        shared = await ClientManager.get_client()
+        db = copy.copy(shared)
+        db.workspace = self.workspace
+        for storage in self._storages(rag):
+            storage.db = db
+        self._shared_db = shared
+
+    async def close(self) -> None:
+        """Finalize the workspace's storages; the next use re-initializes them."""
+        await self.stop_warmup()
+        async with self._init_lock:
+            rag, self.rag = self.rag, None
+            shared, self._shared_db = self._shared_db, None
+            self.warmed_up = False
+            if rag is None:
+                return
+            if shared is not None:
+                from lightrag.kg.postgres_impl import ClientManager
+
+                # Releasing the copies would close the shared pool itself
+                for storage in self._storages(rag):
+                    storage.db = None
+                await rag.finalize_storages()
+                await ClientManager.release_client(shared)
+            else:
+                await rag.finalize_storages()
+
+    async def _get_rag(self) -> LightRAG:
+        """Get the LightRAG instance, initializing it once for all callers."""
+        if self.rag is None:
+            async with self._init_lock:
+                if self.rag is None:
+                    self.rag = await self._initialize_rag()
+        return self.rag
+
+    def is_ready(self) -> bool:
+        """Whether storages are initialized (and startup warmup has finished)."""
+        if settings.LIGHTRAG_WARMUP_ENABLED:
+            return self.warmed_up
+        return self.rag is not None
+
+    def start_warmup(self) -> asyncio.Task:
+        """Start warming up in the background (no-op if already running)."""
+        if self._warmup_task is None or self._warmup_task.done():
+            self._warmup_task = asyncio.create_task(self.warmup())
+        return self._warmup_task
+
+    async def stop_warmup(self) -> None:
+        """Cancel an unfinished warmup."""
+        task, self._warmup_task = self._warmup_task, None
+        if task is not None and not task.done():
+            task.cancel()
+            await asyncio.gather(task, return_exceptions=True)
+
+    async def warmup(self) -> None:
+        """
+        Initialize LightRAG, retrying with backoff until it succeeds, then
+        embed the configured warmup queries.
+
+        Warmup query failures are logged but do not hold back readiness.
+        """
+        delay = float(settings.LIGHTRAG_INIT_RETRY_SECONDS)
+        while True:
+            try:
+                rag = await self._get_rag()
+                break
+            except Exception as e:
+                self.warmup_error = str(e)
+                logger.error(f"LightRAG warmup failed, retrying in {delay:.0f}s: {e}")
+                await asyncio.sleep(delay)
+                delay = min(delay * 2, float(settings.LIGHTRAG_INIT_MAX_RETRY_SECONDS))
+
+        queries = list(settings.LIGHTRAG_WARMUP_QUERIES)
+        if queries:
+            start_time = time.time()
+            try:
+                await rag.embedding_func(queries)
+                logger.info(
+                    f"Embedded {len(queries)} warmup queries in "
+                    f"{time.time() - start_time:.2f}s"
+                )
+            except Exception as e:
+                logger.warning(f"Warmup queries failed: {e}")
+
+        self.warmup_error = None
+        self.warmed_up = True
+        logger.info("LightRAG is ready")
+
     async def ingest_text(
         self, text: str, doc_metadata: Optional[Dict[str, Any]] = None
     ) -> Dict[str, Any]:
-        """Ingest text with thread-safe database operations and LightRAG ingestion."""
+        """Ingest text into the database and LightRAG (skipped if unchanged)."""
         try:
-            async with self.db_lock:  # Ensure thread-safe database access
-                documentId = await self.document_service.create_document(
-                    text, doc_metadata
+            result = await self.ingest_texts([text], [doc_metadata])
+            document_id = result["document_ids"][0]
+            return {
+                "status": "success",
+                "document_id": document_id,
+                "skipped": document_id in result["skipped"],
+            }
+        except Exception as e:
+            logger.error(f"Error during text ingestion: {str(e)}")
+            return {"status": "error", "message": str(e)}
+
+    async def ingest_texts(
+        self,
+        texts: List[str],
+        metadatas: Optional[List[Optional[Dict[str, Any]]]] = None,
+        file_paths: Optional[List[str]] = None,
+    ) -> Dict[str, List[int]]:
+        """
+        Ingest many texts with one transaction and one LightRAG insert per batch.
+
+        Rows are stored together, handed to a single ``ainsert`` so LightRAG
+        can chunk, extract and embed them in parallel, then marked indexed in
+        bulk. Texts identical to an indexed document are skipped and edited
+        documents (same source or file path) are re-indexed incrementally.
+
+        Returns the document ID of every text, plus the IDs that were
+        ``created``, ``updated`` or ``skipped``.
+        """
+        metadatas = metadatas or [None] * len(texts)
+        batch_size = max(1, int(settings.INGEST_BATCH_SIZE))
+        result: Dict[str, List[int]] = {
+            "document_ids": [],
+            "created": [],
+            "updated": [],
+            "skipped": [],
+        }
+
+        for start in range(0, len(texts), batch_size):
+            batch = texts[start : start + batch_size]
+            upserts = await self.document_service.upsert_documents(
+                batch,
+                metadatas[start : start + batch_size],
+                file_paths[start : start + batch_size] if file_paths else None,
+            )
+            paths = (
+                file_paths[start : start + batch_size]
+                if file_paths
+                else [str(upsert.document_id) for upsert in upserts]
+            )
+
+            pending = [
+                (upsert.document_id, text, path)
+                for upsert, text, path in zip(upserts, batch, paths)
+                if upsert.outcome != "skipped"
+            ]
+            if pending:
+                await self._insert_batch(*map(list, zip(*pending)))
+
+            for upsert in upserts:
+                result["document_ids"].append(upsert.document_id)
+                outcome = "created" if upsert.outcome == "pending" else upsert.outcome
+                result[outcome].append(upsert.document_id)
+
+        return result
+
+    async def ingest_stored_documents(
+        self,
+        document_ids: List[int],
+        progress: Optional[Callable[[int, int], Awaitable[None]]] = None,
+    ) -> None:
+        """
+        Ingest documents already stored in the database into LightRAG.
+
+        ``progress(done, total)`` is awaited after each batch. Documents that
+        no longer exist are skipped.
+        """
+        batch_size = max(1, int(settings.INGEST_BATCH_SIZE))
+        total = len(document_ids)
+
+        for start in range(0, total, batch_size):
+            rows = await self.document_service.get_document_contents(
+                document_ids[start : start + batch_size]
+            )
+            if rows:
+                await self._insert_batch(
+                    [row.id for row in rows],
+                    [row.content for row in rows],
+                    [
+                        (row.doc_metadata or {}).get("file_path") or str(row.id)
+                        for row in rows
+                    ],
                 )
-                await self.search_service.index_document(documentId)
+            if progress is not None:
+                await progress(min(start + batch_size, total), total)
 
-                # Ingest into LightRAG
-                if not self.rag:
-                    self.rag = await self._initialize_rag()
-                await self.rag.ainsert(
-                    text, ids=[str(documentId)], file_paths=[str(documentId)]
+    async def _insert_batch(
+        self, document_ids: List[int], texts: List[str], file_paths: List[str]
+    ) -> None:
+        """
+        Insert stored documents into LightRAG, store their chunks and
+        embeddings for ``/search`` and mark them indexed.
+
+        Documents LightRAG already holds (edited re-submissions) are updated
+        through ``_update_document`` instead of being inserted again. Only
+        documents LightRAG reports as processed are marked indexed; if any
+        are not (their extraction failed), a RuntimeError is raised after the
+        others are recorded so the caller can retry them.
+        """
+        async with self.document_locks.lock_many(document_ids):
+            rag = await self._get_rag()
+            keys = [str(document_id) for document_id in document_ids]
+            statuses = await rag.doc_status.get_by_ids(keys)
+            previous = await self.document_service.get_chunk_hashes(document_ids)
+
+            inserts, updates = [], []
+            for index, (document_id, status) in enumerate(zip(document_ids, statuses)):
+                if status is None:
+                    inserts.append(index)
+                elif previous.get(document_id) is None:
+                    # Indexed before chunk hashes were recorded: rebuild it
+                    await rag.adelete_by_doc_id(keys[index])
+                    inserts.append(index)
+                else:
+                    updates.append((index, status))
+
+            chunks = {
+                document_id: self._chunk_document(rag, text)
+                for document_id, text in zip(document_ids, texts)
+            }
+            async with _pipeline_locks.lock(self.workspace):
+                if inserts:
+                    inserted = [keys[index] for index in inserts]
+                    await rag.ainsert(
+                        [texts[index] for index in inserts],
+                        ids=inserted,
+                        file_paths=[file_paths[index] for index in inserts],
+                    )
+                    await self._process_queued(rag, inserted)
+                for index, status in updates:
+                    await self._update_document(
+                        rag,
+                        keys[index],
+                        texts[index],
+                        chunks[document_ids[index]],
+                        file_paths[index],
+                        previous[document_ids[index]],
+                        status,
+                    )
+
+            statuses = await rag.doc_status.get_by_ids(keys)
+            indexed = {
+                document_id: chunks[document_id]
+                for document_id, status in zip(document_ids, statuses)
+                if status is not None and status.get("status") == DocStatus.PROCESSED
+            }
+            if indexed:
+                # /search reads the same chunks from document_chunk; LightRAG
+                # has just embedded them, so with the embedding cache this
+                # costs no model calls
+                await self.search_service.store_chunks(indexed, rag.embedding_func)
+                await self.document_service.set_chunk_hashes(
+                    {
+                        document_id: list(chunked)
+                        for document_id, chunked in indexed.items()
+                    }
                 )
+                await self.search_service.index_documents(list(indexed))
+        # Cached answers may not reflect the new documents
+        query_cache.invalidate(self.workspace)
 
-                return {"status": "success", "document_id": documentId}
-        except Exception as e:
-            logger.error(f"Error during text ingestion: {str(e)}")
-            return {"status": "error", "message": str(e)}
+        unprocessed = sorted(set(document_ids).difference(indexed))
+        if unprocessed:
+            raise RuntimeError(
+                f"LightRAG did not process document(s) {unprocessed}; "
+                "they are not marked indexed"
+            )
+
+    @staticmethod
+    async def _process_queued(rag: LightRAG, doc_ids: List[str]) -> None:
+        """
+        Run LightRAG's pipeline until none of ``doc_ids`` is still queued.
+
+        The pipeline's busy flag is shared by every workspace in the process:
+        while another workspace's pipeline runs, ``ainsert`` only flags a
+        request that pipeline serves from its own workspace's queue, leaving
+        these documents pending. Processing is retried until they are picked
+        up; documents whose extraction failed are left to the caller.
+        """
+        delay = PIPELINE_RETRY_SECONDS
+        while True:
+            statuses = await rag.doc_status.get_by_ids(doc_ids)
+            if not any(
+                status is not None
+                and status.get("status") in (DocStatus.PENDING, DocStatus.PROCESSING)
+                for status in statuses
+            ):
+                return
+            await asyncio.sleep(delay)
+            delay = min(delay * 2, PIPELINE_MAX_RETRY_SECONDS)
+            await rag.apipeline_process_enqueue_documents()
+
+    @staticmethod
+    def _chunk_document(rag: LightRAG, text: str) -> Dict[str, Dict[str, Any]]:
+        """Chunk text exactly as LightRAG's insert pipeline does, keyed by chunk ID."""
+        return {
+            compute_mdhash_id(chunk["content"], prefix="chunk-"): chunk
+            for chunk in rag.chunking_func(
+                text,
+                None,
+                False,
+                rag.chunk_overlap_token_size,
+                rag.chunk_token_size,
+                rag.tiktoken_model_name,
+            )
+        }
+
+    async def _update_document(
+        self,
+        rag: LightRAG,
+        doc_id: str,
+        text: str,
+        chunks: Dict[str, Dict[str, Any]],
+        file_path: str,
+        previous_chunk_ids: List[str],
+        status: Dict[str, Any],
+    ) -> None:
+        """
+        Re-index an edited document, extracting only chunks that are new.
+
+        Chunk IDs are hashes of chunk content, so unchanged chunks keep their
+        IDs and their entities. When chunks were removed the document is
+        rebuilt instead, since LightRAG can only drop the entities and
+        relationships of a whole document; extraction of its unchanged chunks
+        is then answered from the LLM cache. ``chunks`` is the new text's
+        ``_chunk_document`` output.
+        """
+        previous = set(previous_chunk_ids)
+        added = {
+            chunk_id: {**chunk, "full_doc_id": doc_id, "file_path": file_path}
+            for chunk_id, chunk in chunks.items()
+            if chunk_id not in previous
+        }
+        removed = previous.difference(chunks)
+        logger.info(
+            f"Document {doc_id} changed: {len(added)} chunk(s) added, "
+            f"{len(removed)} removed, {len(chunks) - len(added)} unchanged"
+        )
+
+        if removed:
+            await rag.adelete_by_doc_id(doc_id)
+            await rag.ainsert(text, ids=doc_id, file_paths=file_path)
+            await self._process_queued(rag, [doc_id])
+        elif added:
+            await asyncio.gather(
+                rag.chunks_vdb.upsert(added),
+                rag.text_chunks.upsert(added),
+                rag._process_entity_relation_graph(added),
+            )
+            await rag.full_docs.upsert({doc_id: {"content": text}})
+            await rag.doc_status.upsert(
+                {
+                    doc_id: {
+                        **status,
+                        "content": text,
+                        "content_length": len(text),
+                        "chunks_count": len(chunks),
+                        "file_path": file_path,
+                        "updated_at": datetime.now().isoformat(),
+                    }
+                }
+            )
+            await rag._insert_done()
 
     async def ingest_documents(self, file_paths: List[str]) -> Dict[str, Any]:
-        """Ingest documents with file paths into LightRAG and database."""
+        """
+        Ingest documents with file paths into LightRAG and database.
+
+        Text is extracted in a process pool, one batch ahead of ingestion, so
+        parsing the next batch overlaps with LightRAG ingesting the current
+        one. Files that fail to extract are reported in ``failed``; files
+        whose content is unchanged since their last ingestion are listed in
+        ``skipped`` and edited ones in ``updated``.
+        """
+        batch_size = max(1, int(settings.INGEST_BATCH_SIZE))
+        batches = [
+            file_paths[start : start + batch_size]
+            for start in range(0, len(file_paths), batch_size)
+        ]
+
+        def extract(paths: List[str]) -> asyncio.Future:
+            return asyncio.ensure_future(
+                asyncio.gather(
+                    *(text_extractor.extract(path) for path in paths),
+                    return_exceptions=True,
+                )
+            )
+
+        report: Dict[str, List[int]] = {
+            "document_ids": [],
+            "updated": [],
+            "skipped": [],
+        }
+        failed: Dict[str, str] = {}
+        pending = extract(batches[0]) if batches else None
         try:
-            async with self.db_lock:  # Ensure thread-safe database access
-                for file_path in file_paths:
-                    text = textract.process(file_path).decode("utf-8")
+            for index, paths in enumerate(batches):
+                results = await pending
+                pending = (
+                    extract(batches[index + 1]) if index + 1 < len(batches) else None
+                )
 
-                    documentId = await self.document_service.create_document(
-                        text, {"file_path": file_path}
-                    )
-                    await self.search_service.index_document(documentId)
+                texts, extracted = [], []
+                for path, result in zip(paths, results):
+                    if isinstance(result, BaseException):
+                        logger.error(f"Skipping {path}: {result}")
+                        failed[path] = str(result)
+                    else:
+                        texts.append(result)
+                        extracted.append(path)
 
-                    # Ingest into LightRAG
-                    if not self.rag:
-                        self.rag = await self._initialize_rag()
-                    await self.rag.ainsert(
-                        text, ids=[str(documentId)], file_paths=[file_path]
+                if texts:
+                    ingested = await self.ingest_texts(
+                        texts,
+                        [{"file_path": path} for path in extracted],
+                        extracted,
                     )
+                    for key in report:
+                        report[key].extend(ingested[key])
 
-                return {
-                    "status": "success",
-                    "message": "Documents ingested successfully",
-                }
+            return {
+                "status": "success",
+                "message": "Documents ingested successfully",
+                **report,
+                "failed": failed,
+            }
         except Exception as e:
             logger.error(f"Error ingesting documents: {e}")
             return {"status": "error", "message": str(e)}
+        finally:
+            if pending is not None:
+                pending.cancel()
+
+    async def delete_document(self, document_id: int) -> bool:
+        """
+        Delete a document from LightRAG and the database.
+
+        Waits for any in-flight ingestion of the same document to finish.
+        """
+        async with self.document_locks.lock(document_id):
+            rag = await self._get_rag()
+            await rag.adelete_by_doc_id(str(document_id))
+            deleted = await self.document_service.delete_document(document_id)
+        query_cache.invalidate(self.workspace)
+        return deleted
+
+    @staticmethod
+    def _validate_mode(mode: str) -> None:
+        valid_modes = ["naive", "local", "global", "hybrid", "fusion"]
+        if mode not in valid_modes:
+            raise ValueError(f"Invalid mode '{mode}'. Must be one of {valid_modes}")
+
+    async def _fusion_query(
+        self, rag: LightRAG, query_text: str, param: QueryParam
+    ) -> Tuple[Union[str, AsyncIterator[str]], Dict[str, Any]]:
+        """
+        Retrieve with several modes at once and answer from the fused context.
+
+        Keywords are extracted once and shared by the graph modes, the
+        retrievals of QUERY_FUSION_MODES run concurrently, and their contexts
+        are merged with reciprocal-rank fusion so a single LLM call answers
+        from the union of what every mode found.
+        """
+        global_config = asdict(rag)
+        modes = list(settings.QUERY_FUSION_MODES)
+        metadata: Dict[str, Any] = {"modes": modes, "retrieval_seconds": {}}
+
+        start = time.time()
+        if any(mode != "naive" for mode in modes):
+            param.hl_keywords, param.ll_keywords = await get_keywords_from_query(
+                query_text, param, global_config, rag.llm_response_cache
+            )
+        metadata["keyword_seconds"] = time.time() - start
+
+        async def retrieve(mode: str) -> Optional[str]:
+            mode_start = time.time()
+            # No hashing_kv: a cached answer would be returned instead of context
+            mode_param = replace(param, mode=mode, only_need_context=True, stream=False)
+            if mode == "naive":
+                context = await naive_query(
+                    query_text,
+                    rag.chunks_vdb,
+                    rag.text_chunks,
+                    mode_param,
+                    global_config,
+                )
+            else:
+                context = await kg_query(
+                    query_text,
+                    rag.chunk_entity_relation_graph,
+                    rag.entities_vdb,
+                    rag.relationships_vdb,
+                    rag.text_chunks,
+                    mode_param,
+                    global_config,
+                )
+            metadata["retrieval_seconds"][mode] = time.time() - mode_start
+            return None if context == PROMPTS["fail_response"] else context
+
+        retrieval_start = time.time()
+        contexts = await asyncio.gather(*(retrieve(mode) for mode in modes))
+        metadata["retrieval_wall_seconds"] = time.time() - retrieval_start
+
+        fused = fuse_contexts(
+            [
+                (parse_naive_context if mode == "naive" else parse_graph_context)(
+                    context
+                )
+                for mode, context in zip(modes, contexts)
+                if context
+            ],
+            k=int(settings.QUERY_FUSION_RRF_K),
+        )
+        budgets = {
+            "Entities": param.max_token_for_local_context,
+            "Relationships": param.max_token_for_global_context,
+            "Sources": param.max_token_for_text_unit,
+        }
+
+        def truncate(section: str, rows: List[List[str]]) -> List[List[str]]:
+            return truncate_list_by_token_size(
+                rows, key=lambda row: ",".join(row), max_token_size=budgets[section]
+            )
+
+        context = format_context(fused, truncate)
+        metadata["fused_items"] = {name: len(rows) for name, (_, rows) in fused.items()}
+        if context is None:
+            return PROMPTS["fail_response"], metadata
+
+        system_prompt = PROMPTS["rag_response"].format(
+            context_data=context, response_type=param.response_type, history=""
+        )
+        answer = await rag.llm_model_func(
+            query_text, system_prompt=system_prompt, stream=param.stream
+        )
+        return answer, metadata
 
     async def query(
         self, query_text: str, mode: str = "hybrid", top_k: int = 3, **kwargs
@@ -177,7 +800,8 @@ class LightRAGService:
 
         Args:
             query_text: The query text to search for
-            mode: Search mode ('naive', 'local', 'global', or 'hybrid')
+            mode: Search mode ('naive', 'local', 'global', 'hybrid', or 'fusion'
+                to fuse the retrievals of QUERY_FUSION_MODES)
             top_k: Number of top results to return
             **kwargs: Additional parameters to pass to the query
 
@@ -185,34 +809,75 @@ class LightRAGService:
             Dictionary containing query results and timing information
         """
         start_time = time.time()
+        trace = QueryTrace()
         try:
-            async with self.db_lock:
-                # Ensure RAG instance is initialized
-                if not self.rag:
-                    self.rag = await self._initialize_rag()
+            rag = await self._get_rag()
+            self._validate_mode(mode)
+            metadata = {"top_k": top_k, "query_params": kwargs}
 
-                # Validate mode
-                valid_modes = ["naive", "local", "global", "hybrid"]
-                if mode not in valid_modes:
-                    raise ValueError(
-                        f"Invalid mode '{mode}'. Must be one of {valid_modes}"
-                    )
+            with trace.activate():
+                # Answer paraphrases of earlier queries from the semantic cache
+                cache_key = query_vector = None
+                generation = query_cache.generation(self.workspace)
+                if settings.QUERY_CACHE_ENABLED:
+                    with trace.stage("cache_lookup"):
+                        cache_key = query_cache.group_key(
+                            mode, top_k, kwargs, workspace=self.workspace
+                        )
+                        try:
+                            query_vector = (await rag.embedding_func([query_text]))[0]
+                        except Exception as e:
+                            logger.warning(f"Query cache lookup skipped: {e}")
+                            cache_key = None
+                        hit = None
+                        if cache_key is not None:
+                            hit = query_cache.lookup(cache_key, query_vector)
+                            metadata["cache"] = self._query_cache_metadata(hit)
+                    if hit is not None:
+                        trace.cache_hit = True
+                        self._finish_trace(
+                            trace, query_text, mode, metadata, hit.entry.answer
+                        )
+                        return {
+                            "status": "success",
+                            "mode": mode,
+                            "result": hit.entry.answer,
+                            "execution_time": time.time() - start_time,
+                            "metadata": metadata,
+                        }
 
                 # Execute query with specified mode
                 param = QueryParam(mode=mode, top_k=top_k, **kwargs)
 
-                result = await self.rag.aquery(query_text, param=param)
+                answer_start = time.time()
+                if mode == "fusion":
+                    result, metadata["fusion"] = await self._fusion_query(
+                        rag, query_text, param
+                    )
+                else:
+                    result = await rag.aquery(query_text, param=param)
 
-                # Calculate execution time
-                execution_time = time.time() - start_time
+            # Calculate execution time
+            execution_time = time.time() - start_time
+            self._finish_trace(trace, query_text, mode, metadata, result)
 
-                return {
-                    "status": "success",
-                    "mode": mode,
-                    "result": result,
-                    "execution_time": execution_time,
-                    "metadata": {"top_k": top_k, "query_params": kwargs},
-                }
+            if cache_key is not None and result != PROMPTS["fail_response"]:
+                query_cache.store(
+                    cache_key,
+                    query_vector,
+                    query_text,
+                    result,
+                    time.time() - answer_start,
+                    generation,
+                )
+
+            return {
+                "status": "success",
+                "mode": mode,
+                "result": result,
+                "execution_time": execution_time,
+                "metadata": metadata,
+            }
 
         except Exception as e:
             logger.error(f"Error during {mode} query execution: {str(e)}")
@@ -222,3 +887,105 @@ class LightRAGService:
                 "message": str(e),
                 "execution_time": time.time() - start_time,
             }
+
+    @staticmethod
+    def _finish_trace(
+        trace: QueryTrace,
+        query_text: str,
+        mode: str,
+        metadata: Dict[str, Any],
+        response_text: Optional[str],
+    ) -> None:
+        """Report per-stage latency and queue the query log write."""
+        trace.finish()
+        metadata["latency_ms"] = trace.stage_milliseconds()
+        if settings.QUERY_LOG_ENABLED:
+            query_log_writer.record_trace(query_text, mode, trace, response_text)
+
+    @staticmethod
+    def _query_cache_metadata(hit: Optional[CacheHit]) -> Dict[str, Any]:
+        """Cache outcome for one query plus the running hit rate."""
+        stats = query_cache.stats()
+        metadata = {
+            "hit": hit is not None,
+            "hit_rate": stats["hit_rate"],
+            "total_saved_seconds": stats["saved_seconds"],
+        }
+        if hit is not None:
+            metadata.update(
+                similarity=hit.similarity,
+                matched_query=hit.entry.query,
+                saved_seconds=hit.entry.generation_seconds,
+            )
+        return metadata
+
+    async def query_stream(
+        self, query_text: str, mode: str = "hybrid", top_k: int = 3, **kwargs
+    ) -> AsyncIterator[Dict[str, Any]]:
+        """
+        Query the RAG system, yielding the answer as it is generated.
+
+        Yields ``{"event": "token", "text": ...}`` for each chunk of the answer,
+        then a final ``{"event": "done", ...}`` with ``execution_time`` and
+        ``time_to_first_token`` (seconds), or ``{"event": "error", ...}``.
+        """
+        start_time = time.time()
+        time_to_first_token = None
+        trace = QueryTrace()
+        try:
+            rag = await self._get_rag()
+            self._validate_mode(mode)
+
+            metadata = {"top_k": top_k, "query_params": kwargs}
+            param = QueryParam(mode=mode, top_k=top_k, stream=True, **kwargs)
+            # Not held across yields: the consumer runs in its own context
+            with trace.activate():
+                if mode == "fusion":
+                    result, metadata["fusion"] = await self._fusion_query(
+                        rag, query_text, param
+                    )
+                else:
+                    result = await rag.aquery(query_text, param=param)
+
+            # Cached answers come back as a plain string
+            chunks = []
+            if isinstance(result, str):
+                time_to_first_token = time.time() - start_time
+                chunks.append(result)
+                yield {"event": "token", "text": result}
+            else:
+                async for chunk in result:
+                    if not chunk:
+                        continue
+                    if time_to_first_token is None:
+                        time_to_first_token = time.time() - start_time
+                    chunks.append(chunk)
+                    yield {"event": "token", "text": chunk}
+            self._finish_trace(trace, query_text, mode, metadata, "".join(chunks))
+
+            yield {
+                "event": "done",
+                "status": "success",
+                "mode": mode,
+                "execution_time": time.time() - start_time,
+                "time_to_first_token": time_to_first_token,
+                "metadata": metadata,
+            }
+
+        except Exception as e:
+            logger.error(f"Error during {mode} streaming query: {str(e)}")
+            yield {
+                "event": "error",
+                "status": "error",
+                "mode": mode,
+                "message": str(e),
+                "execution_time": time.time() - start_time,
+            }
+
+
+workspace_pool = WorkspacePool(
+    LightRAGService,
+    max_open=settings.LIGHTRAG_MAX_WORKSPACES,
+    idle_seconds=settings.LIGHTRAG_WORKSPACE_IDLE_SECONDS,
+    pinned=[settings.LIGHTRAG_DEFAULT_WORKSPACE],
+)
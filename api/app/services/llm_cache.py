@@ -0,0 +1,321 @@
+"""
+Content-addressed cache for LLM completions.
+
+Two tiers: an in-memory LRU for hot entries and a durable table
+(``completion_cache``) in the application database, so cached answers survive
+restarts and are shared between workers.
+"""
+import asyncio
+import datetime
+import hashlib
+import json
+import time
+from collections import OrderedDict
+from typing import Any, Awaitable, Callable, Dict, List, Optional, Tuple
+
+from loguru import logger
+from sqlalchemy import delete, or_, select, update
+from sqlalchemy.exc import IntegrityError
+
+from app.core.config import settings
+from app.core.database import get_session
+from app.models.cache import CompletionCache
+
+
+class CompletionResponseCache:
+    """
+    Two-tier completion cache with TTL and size-based eviction.
+
+    The durable tier is best effort: database errors are logged and treated as
+    cache misses so an unavailable database never fails an LLM call. Each
+    database operation is bounded by ``db_timeout``, and after
+    ``failure_threshold`` consecutive failures the tier is skipped for
+    ``retry_seconds`` so a slow or unreachable database adds no latency.
+    """
+
+    # Prune the durable tier after this many writes, deleting at most
+    # PRUNE_BATCH rows per statement
+    PRUNE_EVERY = 100
+    PRUNE_BATCH = 1000
+
+    def __init__(
+        self,
+        max_entries: int = 2048,
+        ttl_seconds: Optional[float] = None,
+        persist: bool = True,
+        max_persisted_entries: int = 100000,
+        db_timeout: float = 0.5,
+        failure_threshold: int = 3,
+        retry_seconds: float = 60.0,
+    ):
+        self.max_entries = max_entries
+        self.ttl_seconds = ttl_seconds
+        self.persist = persist
+        self.max_persisted_entries = max_persisted_entries
+        self.db_timeout = db_timeout
+        self.failure_threshold = max(1, int(failure_threshold))
+        self.retry_seconds = retry_seconds
+        self._failures = 0
+        self._disabled_until = 0.0
+
+        self._memory: "OrderedDict[str, Tuple[str, Optional[float]]]" = OrderedDict()
+        self._lock = asyncio.Lock()
+        self._writes_since_prune = 0
+        self._prune_task: Optional[asyncio.Task] = None
+
+        self.memory_hits = 0
+        self.persistent_hits = 0
+        self.misses = 0
+        self.persistent_errors = 0
+
+    @staticmethod
+    def make_key(
+        model: str,
+        prompt: str,
+        system_prompt: Optional[str] = None,
+        history_messages: Optional[List[Dict[str, str]]] = None,
+        **kwargs: Any,
+    ) -> str:
+        """Hash everything that affects the completion into a stable key."""
+        payload = json.dumps(
+            {
+                "model": model,
+                "system_prompt": system_prompt,
+                "history_messages": history_messages or [],
+                "prompt": prompt,
+                "kwargs": kwargs,
+            },
+            sort_keys=True,
+            separators=(",", ":"),
+            ensure_ascii=False,
+            default=str,
+        )
+        return hashlib.sha256(payload.encode("utf-8")).hexdigest()
+
+    def _expiry(self) -> Optional[float]:
+        return time.time() + self.ttl_seconds if self.ttl_seconds else None
+
+    def _remember(self, key: str, response: str, expires_at: Optional[float]) -> None:
+        self._memory[key] = (response, expires_at)
+        self._memory.move_to_end(key)
+        while len(self._memory) > self.max_entries:
+            self._memory.popitem(last=False)
+
+    async def get(self, key: str) -> Optional[str]:
+        """Look up a completion, checking memory first and then the database."""
+        async with self._lock:
+            entry = self._memory.get(key)
+            if entry is not None:
+                response, expires_at = entry
+                if expires_at is None or expires_at > time.time():
+                    self._memory.move_to_end(key)
+                    self.memory_hits += 1
+                    return response
+                del self._memory[key]
+
+        if self.persist:
+            response, expires_at = await self._durable(
+                "lookup", lambda: self._get_persisted(key), (None, None)
+            )
+            if response is not None:
+                async with self._lock:
+                    self._remember(key, response, expires_at)
+                    self.persistent_hits += 1
+                return response
+
+        self.misses += 1
+        return None
+
+    async def set(self, key: str, model: str, response: str) -> None:
+        """Store a completion in both tiers."""
+        expires_at = self._expiry()
+        async with self._lock:
+            self._remember(key, response, expires_at)
+
+        if self.persist and await self._durable(
+            "write",
+            lambda: self._set_persisted(key, model, response, expires_at),
+            False,
+        ):
+            self._writes_since_prune += 1
+            if self._writes_since_prune >= self.PRUNE_EVERY and (
+                self._prune_task is None or self._prune_task.done()
+            ):
+                self._writes_since_prune = 0
+                # In the background: pruning is not bounded by db_timeout
+                self._prune_task = asyncio.create_task(self.prune())
+
+    def persistent_available(self) -> bool:
+        """Whether the durable tier is in use (not disabled after failures)."""
+        return self.persist and time.monotonic() >= self._disabled_until
+
+    async def _durable(
+        self, action: str, operation: Callable[[], Awaitable[Any]], default: Any
+    ) -> Any:
+        """
+        Run a durable-tier operation with a timeout, returning ``default`` on
+        failure or while the tier is disabled.
+        """
+        if not self.persistent_available():
+            return default
+        try:
+            result = await asyncio.wait_for(operation(), self.db_timeout)
+        except Exception as e:
+            self.persistent_errors += 1
+            self._failures += 1
+            if isinstance(e, asyncio.TimeoutError):
+                e = f"timed out after {self.db_timeout}s"
+            logger.warning(f"Completion cache {action} failed: {e}")
+            if self._failures >= self.failure_threshold:
+                self._failures = 0
+                self._disabled_until = time.monotonic() + self.retry_seconds
+                logger.warning(
+                    f"Completion cache database tier disabled for {self.retry_seconds}s"
+                )
+            return default
+        self._failures = 0
+        return result
+
+    async def _get_persisted(self, key: str) -> Tuple[Optional[str], Optional[float]]:
+        now = datetime.datetime.utcnow()
+        async with get_session() as session:
+            entry = (
+                await session.execute(
+                    select(CompletionCache).where(CompletionCache.cache_key == key)
+                )
+            ).scalar_one_or_none()
+            if entry is None:
+                return None, None
+            if entry.expires_at is not None and entry.expires_at <= now:
+                await session.delete(entry)
+                return None, None
+
+            await session.execute(
+                update(CompletionCache)
+                .where(CompletionCache.id == entry.id)
+                .values(
+                    hit_count=CompletionCache.hit_count + 1,
+                    last_accessed_at=now,
+                )
+            )
+            expires_at = (
+                entry.expires_at.replace(tzinfo=datetime.timezone.utc).timestamp()
+                if entry.expires_at is not None
+                else None
+            )
+            return entry.response_text, expires_at
+
+    async def _set_persisted(
+        self, key: str, model: str, response: str, expires_at: Optional[float]
+    ) -> bool:
+        try:
+            async with get_session() as session:
+                session.add(
+                    CompletionCache(
+                        cache_key=key,
+                        model=model,
+                        response_text=response,
+                        expires_at=(
+                            datetime.datetime.utcfromtimestamp(expires_at)
+                            if expires_at is not None
+                            else None
+                        ),
+                        hit_count=0,
+                        last_accessed_at=datetime.datetime.utcnow(),
+                    )
+                )
+        except IntegrityError:
+            # Another worker cached the same request first
+            pass
+        return True
+
+    async def prune(self) -> None:
+        """
+        Drop expired rows and trim the durable tier to its size limit.
+
+        Runs outside the lookup budget (``db_timeout``) and the failure count:
+        rows are deleted in indexed batches of PRUNE_BATCH, each in its own
+        transaction, so a large backlog takes several short statements
+        rather than one long one. Failures are logged and retried on a later
+        prune.
+        """
+        if not self.persistent_available():
+            return
+        try:
+            now = datetime.datetime.utcnow()
+            await self._delete_batches(CompletionCache.expires_at <= now)
+
+            # Least recently used beyond the limit, found on the
+            # last_accessed_at index; ties at the cutoff go too
+            async with get_session() as session:
+                cutoff = (
+                    await session.execute(
+                        select(CompletionCache.last_accessed_at)
+                        .where(CompletionCache.last_accessed_at.isnot(None))
+                        .order_by(CompletionCache.last_accessed_at.desc())
+                        .offset(self.max_persisted_entries)
+                        .limit(1)
+                    )
+                ).scalar_one_or_none()
+            if cutoff is not None:
+                await self._delete_batches(
+                    or_(
+                        CompletionCache.last_accessed_at <= cutoff,
+                        CompletionCache.last_accessed_at.is_(None),
+                    )
+                )
+        except Exception as e:
+            logger.warning(f"Completion cache prune failed: {e}")
+
+    async def _delete_batches(self, condition) -> int:
+        """Delete rows matching ``condition``, PRUNE_BATCH per transaction."""
+        deleted = 0
+        while True:
+            batch = (
+                select(CompletionCache.id)
+                .where(condition)
+                .limit(self.PRUNE_BATCH)
+                .scalar_subquery()
+            )
+            async with get_session() as session:
+                result = await session.execute(
+                    delete(CompletionCache)
+                    .where(CompletionCache.id.in_(batch))
+                    .execution_options(synchronize_session=False)
+                )
+            deleted += result.rowcount
+            if result.rowcount < self.PRUNE_BATCH:
+                return deleted
+
+    async def clear(self) -> None:
+        """Empty the in-memory tier and reset counters."""
+        async with self._lock:
+            self._memory.clear()
+        self.memory_hits = self.persistent_hits = self.misses = 0
+
+    def stats(self) -> Dict[str, Any]:
+        """Return hit/miss counters for monitoring."""
+        hits = self.memory_hits + self.persistent_hits
+        lookups = hits + self.misses
+        return {
+            "hits": hits,
+            "memory_hits": self.memory_hits,
+            "persistent_hits": self.persistent_hits,
+            "misses": self.misses,
+            "hit_rate": hits / lookups if lookups else 0.0,
+            "memory_entries": len(self._memory),
+            "persistent_errors": self.persistent_errors,
+            "persistent_available": self.persistent_available(),
+        }
+
+
+# Global completion cache used by openai_complete_if_cache
+completion_cache = CompletionResponseCache(
+    max_entries=int(settings.LLM_CACHE_MAX_MEMORY_ENTRIES),
+    ttl_seconds=float(settings.LLM_CACHE_TTL_SECONDS) or None,
+    persist=settings.LLM_CACHE_PERSIST,
+    max_persisted_entries=int(settings.LLM_CACHE_MAX_PERSISTED_ENTRIES),
+    db_timeout=float(settings.LLM_CACHE_DB_TIMEOUT_SECONDS),
+    failure_threshold=int(settings.LLM_CACHE_DB_FAILURE_THRESHOLD),
+    retry_seconds=float(settings.LLM_CACHE_DB_RETRY_SECONDS),
+)
@@ -1,9 +1,118 @@
-import os
+import json
+import time
+import base64
+import asyncio
 import httpx
 import numpy as np
-from typing import List, Dict, Any, Optional
+from typing import (
+    Any,
+    AsyncIterator,
+    Awaitable,
+    Callable,
+    Dict,
+    List,
+    Optional,
+    Tuple,
+    Union,
+)
 from loguru import logger
 from app.core.config import settings
+from app.core.http_client import http_client_pool
+from app.core.adaptive_limiter import (
+    backoff_delay,
+    get_endpoint_limiter,
+    parse_retry_after,
+)
+from app.core.endpoint_pool import EndpointError, EndpointPool, get_endpoint_pool
+from app.services.llm_cache import completion_cache
+from app.services.embedding_batcher import get_embedding_batcher
+
+try:
+    import orjson
+
+    _json_loads = orjson.loads
+except ImportError:
+    _json_loads = json.loads
+
+# Statuses that signal a rate limit or a transient provider failure
+RETRYABLE_STATUS_CODES = {429, 500, 502, 503, 504}
+
+
+async def _send_with_backoff(
+    base_url: str,
+    send: Callable[[], Awaitable[httpx.Response]],
+    hold_slot: bool = False,
+    max_retries: Optional[int] = None,
+) -> httpx.Response:
+    """
+    Send a request through the endpoint's adaptive concurrency limiter.
+
+    Rate limits, 5xx responses and transport errors shrink the endpoint's limit
+    and are retried up to ``max_retries`` (default ``LLM_MAX_RETRIES``) times,
+    honoring ``Retry-After``.
+    The last failed response is returned so callers can report it. With
+    ``hold_slot`` the slot stays taken whenever a response is returned and the
+    caller must release it (used for streamed bodies).
+    """
+    limiter = get_endpoint_limiter(base_url)
+    if max_retries is None:
+        max_retries = int(settings.LLM_MAX_RETRIES)
+    attempt = 0
+    while True:
+        await limiter.acquire()
+        start = time.monotonic()
+        try:
+            response = await send()
+        except httpx.TransportError as e:
+            await limiter.release(overloaded=True)
+            if attempt >= max_retries:
+                raise
+            delay = backoff_delay(attempt)
+            logger.warning(
+                f"Request to {base_url} failed ({e}), retrying in {delay:.1f}s"
+            )
+        except BaseException:
+            await limiter.release()
+            raise
+        else:
+            if response.status_code not in RETRYABLE_STATUS_CODES:
+                if not hold_slot:
+                    await limiter.release(time.monotonic() - start)
+                return response
+
+            retry_after = parse_retry_after(response.headers.get("Retry-After"))
+            if attempt >= max_retries:
+                if not hold_slot:
+                    await limiter.release(overloaded=True, retry_after=retry_after)
+                return response
+            await limiter.release(overloaded=True, retry_after=retry_after)
+            await response.aclose()
+            delay = retry_after if retry_after is not None else backoff_delay(attempt)
+            logger.warning(
+                f"Request to {base_url} returned {response.status_code}, "
+                f"retrying in {delay:.1f}s"
+            )
+
+        await asyncio.sleep(delay)
+        attempt += 1
+
+
+def _retries(pool: EndpointPool) -> Tuple[int, int]:
+    """
+    Retries on the same endpoint and failovers to other endpoints.
+
+    With several endpoints, a failed request moves to another one right away
+    instead of backing off on the endpoint that failed.
+    """
+    retries = int(settings.LLM_MAX_RETRIES)
+    return (retries, 0) if len(pool.endpoints) == 1 else (0, retries)
+
+
+def _status_error(status_code: int) -> EndpointError:
+    return EndpointError(
+        f"API request failed with status {status_code}",
+        retryable=status_code in RETRYABLE_STATUS_CODES,
+    )
 
 
 async def openai_complete_if_cache(
@@ -13,45 +122,143 @@ async def openai_complete_if_cache(
     history_messages: List[Dict[str, str]] = [],
     api_key: Optional[str] = None,
     base_url: Optional[str] = None,
+    stream: bool = False,
     **kwargs,
-) -> str:
+) -> Union[str, AsyncIterator[str]]:
     """
     Make a completion request to an OpenAI-compatible API with optional caching.
+
+    Responses are cached by a hash of the model, prompts, history and sampling
+    kwargs when ``LLM_CACHE_ENABLED`` is set. With ``stream=True`` an async
+    iterator of text chunks is returned instead, unless the answer is cached.
+    ``base_url`` may be a comma-separated list of endpoints to balance across.
     """
+    cache_key = None
+    if settings.LLM_CACHE_ENABLED:
+        cache_key = completion_cache.make_key(
+            model,
+            prompt,
+            system_prompt=system_prompt,
+            history_messages=history_messages,
+            **kwargs,
+        )
+        cached = await completion_cache.get(cache_key)
+        if cached is not None:
+            return cached
+
+    headers = {
+        "Authorization": f"Bearer {api_key or settings.MODEL_API_KEY}",
+        "Content-Type": "application/json",
+    }
+
+    messages = []
+    if system_prompt:
+        messages.append({"role": "system", "content": system_prompt})
+
+    for msg in history_messages:
+        messages.append(msg)
+
+    messages.append({"role": "user", "content": prompt})
+
+    pool = get_endpoint_pool(base_url or settings.MODEL_BASE_URL)
+    payload = {"model": model, "messages": messages, **kwargs}
+
+    if stream:
+        return _stream_completion(pool, headers, payload, cache_key)
+
+    retries, failovers = _retries(pool)
+
+    async def request(base_url: str) -> str:
+        client = await http_client_pool.get_client(base_url)
+        response = await _send_with_backoff(
+            base_url,
+            lambda: client.post(
+                f"{base_url}/chat/completions", headers=headers, json=payload
+            ),
+            max_retries=retries,
+        )
+
+        if response.status_code != 200:
+            logger.error(f"API request failed: {response.text}")
+            raise _status_error(response.status_code)
+        result = response.json()
+        return result["choices"][0]["message"]["content"]
+
     try:
-        headers = {
-            "Authorization": f"Bearer {api_key or settings.MODEL_API_KEY}",
-            "Content-Type": "application/json",
-        }
+        content = await pool.call(
+            request, hedge=settings.ENDPOINT_HEDGING_ENABLED, failovers=failovers
+        )
 
-        messages = []
-        if system_prompt:
-            messages.append({"role": "system", "content": system_prompt})
+        if cache_key is not None:
+            await completion_cache.set(cache_key, model, content)
+        return content
 
-        for msg in history_messages:
-            messages.append(msg)
+    except Exception as e:
+        logger.error(f"Error in openai_complete_if_cache: {str(e)}")
+        raise
 
-        messages.append({"role": "user", "content": prompt})
 
-        async with httpx.AsyncClient(timeout=30.0) as client:
-            # print(f"Prompt: {prompt}")
-            response = await client.post(
-                f"{base_url or settings.MODEL_BASE_URL}/chat/completions",
-                headers=headers,
-                json={"model": model, "messages": messages, **kwargs},
-            )
+async def _stream_completion(
+    pool: EndpointPool,
+    headers: Dict[str, str],
+    payload: Dict[str, Any],
+    cache_key: Optional[str] = None,
+) -> AsyncIterator[str]:
+    """
+    Yield completion text chunks from a ``stream=true`` server-sent event response.
 
+    Streams are not hedged. The full answer is cached once the stream completes.
+    """
+    parts = []
+    base_url = pool.pick()
+    start = pool.begin(base_url)
+    ok = False
+    try:
+        client = await http_client_pool.get_client(base_url)
+        request = client.build_request(
+            "POST",
+            f"{base_url}/chat/completions",
+            headers=headers,
+            json={**payload, "stream": True},
+        )
+        response = await _send_with_backoff(
+            base_url, lambda: client.send(request, stream=True), hold_slot=True
+        )
+        try:
             if response.status_code != 200:
-                logger.error(f"API request failed: {response.text}")
-                raise Exception(
-                    f"API request failed with status {response.status_code}"
-                )
-            result = response.json()
-            return result["choices"][0]["message"]["content"]
+                body = await response.aread()
+                logger.error(f"API request failed: {body.decode(errors='replace')}")
+                raise _status_error(response.status_code)
+
+            async for line in response.aiter_lines():
+                if not line.startswith("data:"):
+                    continue
+                data = line[len("data:") :].strip()
+                if data == "[DONE]":
+                    break
+                choices = json.loads(data).get("choices") or []
+                if not choices:
+                    continue
+                content = (choices[0].get("delta") or {}).get("content")
+                if content:
+                    parts.append(content)
+                    yield content
+            ok = True
+        finally:
+            await response.aclose()
+            # Stream duration is not a useful health sample
+            await get_endpoint_limiter(base_url).release(
+                overloaded=response.status_code in RETRYABLE_STATUS_CODES
+            )
 
     except Exception as e:
-        logger.error(f"Error in openai_complete_if_cache: {str(e)}")
+        logger.error(f"Error in openai_complete_if_cache stream: {str(e)}")
         raise
+    finally:
+        pool.end(base_url, start, ok=ok, record_latency=False)
+
+    if cache_key is not None and parts:
+        await completion_cache.set(cache_key, payload["model"], "".join(parts))
 
 
 async def openai_embed(
@@ -62,30 +269,86 @@ async def openai_embed(
 ) -> np.ndarray:
     """
     Get embeddings from an OpenAI-compatible API.
+
+    Concurrent calls for the same model and endpoint are coalesced into batched
+    requests when ``EMBEDDING_BATCH_ENABLED`` is set. ``base_url`` may be a
+    comma-separated list of endpoints to balance across.
     """
-    try:
-        headers = {
-            "Authorization": f"Bearer {api_key or settings.EMBEDDING_MODEL_API_KEY}",
-            "Content-Type": "application/json",
-        }
-
-        async with httpx.AsyncClient(timeout=30.0) as client:
-            response = await client.post(
-                f"{base_url or settings.EMBEDDING_MODEL_BASE_URL}/embeddings",
+    api_key = api_key or settings.EMBEDDING_MODEL_API_KEY
+    base_url = base_url or settings.EMBEDDING_MODEL_BASE_URL
+
+    if settings.EMBEDDING_BATCH_ENABLED:
+        batcher = get_embedding_batcher(
+            model,
+            base_url,
+            api_key,
+            lambda batch: _request_embeddings(batch, model, api_key, base_url),
+        )
+        return await batcher.embed(texts)
+    return await _request_embeddings(texts, model, api_key, base_url)
+
+
+async def _request_embeddings(
+    texts: List[str], model: str, api_key: str, base_urls: str
+) -> np.ndarray:
+    """Send a single ``/embeddings`` request to one of ``base_urls``."""
+    headers = {
+        "Authorization": f"Bearer {api_key}",
+        "Content-Type": "application/json",
+    }
+
+    pool = get_endpoint_pool(base_urls)
+    retries, failovers = _retries(pool)
+
+    async def request(base_url: str) -> np.ndarray:
+        client = await http_client_pool.get_client(base_url)
+        response = await _send_with_backoff(
+            base_url,
+            lambda: client.post(
+                f"{base_url}/embeddings",
                 headers=headers,
-                json={"model": model, "input": texts, "encoding_format": "float"},
-            )
+                json={
+                    "model": model,
+                    "input": texts,
+                    "encoding_format": settings.EMBEDDING_ENCODING_FORMAT,
+                },
+            ),
+            max_retries=retries,
+        )
 
-            if response.status_code != 200:
-                logger.error(f"API request failed: {response.text}")
-                raise Exception(
-                    f"API request failed with status {response.status_code}"
-                )
+        if response.status_code != 200:
+            logger.error(f"API request failed: {response.text}")
+            raise _status_error(response.status_code)
 
-            result = response.json()
-            embeddings = [item["embedding"] for item in result["data"]]
-            return np.array(embeddings)
+        return _decode_embeddings(_json_loads(response.content)["data"])
 
+    try:
+        return await pool.call(
+            request, hedge=settings.ENDPOINT_HEDGING_ENABLED, failovers=failovers
+        )
     except Exception as e:
         logger.error(f"Error in openai_embed: {str(e)}")
         raise
+
+
+def _decode_embeddings(data: List[Dict[str, Any]]) -> np.ndarray:
+    """
+    Decode an ``/embeddings`` response into a float32 ``(n, dim)`` array.
+
+    Base64 vectors (little-endian float32) are read with ``np.frombuffer``
+    without an intermediate Python list; plain float lists are also accepted,
+    so providers that ignore ``encoding_format`` still work.
+    """
+    if not data:
+        return np.empty((0, 0), dtype=np.float32)
+
+    data = sorted(data, key=lambda item: item.get("index", 0))
+    rows = [
+        (
+            np.frombuffer(base64.b64decode(item["embedding"]), dtype="<f4")
+            if isinstance(item["embedding"], str)
+            else np.asarray(item["embedding"], dtype=np.float32)
+        )
+        for item in data
+    ]
+    return np.stack(rows)
@@ -0,0 +1,208 @@
+"""
+Semantic cache of LightRAG query answers.
+
+Answers are stored with the embedding of the query that produced them. A new
+query with the same retrieval parameters whose embedding has cosine similarity
+of at least ``threshold`` with a stored query gets the stored answer, so
+paraphrases of a question skip retrieval and generation.
+
+Answers depend on the indexed documents, so a workspace's answers are
+dropped whenever documents are ingested into or deleted from it.
+
+The cache lives in each worker process and invalidation only reaches the
+process that changed the documents. With several workers, another worker can
+keep serving an answer cached before the change until it expires, so
+QUERY_CACHE_TTL_SECONDS bounds that staleness (0 leaves it unbounded and
+suits a single worker only).
+"""
+import json
+import time
+from collections import OrderedDict
+from typing import Any, Dict, NamedTuple, Optional, Tuple
+
+# (workspace, parameters): answers are only shared within a workspace
+GroupKey = Tuple[Optional[str], str]
+
+import numpy as np
+
+from app.core.config import settings
+
+
+class CachedAnswer(NamedTuple):
+    """A stored answer and the query it was produced for."""
+
+    query: str
+    answer: str
+    generation_seconds: float
+    created_at: float
+
+
+class CacheHit(NamedTuple):
+    entry: CachedAnswer
+    similarity: float
+
+
+def _normalize(vector: np.ndarray) -> np.ndarray:
+    vector = np.asarray(vector, dtype=np.float32).ravel()
+    norm = np.linalg.norm(vector)
+    return vector / norm if norm else vector
+
+
+class SemanticQueryCache:
+    """
+    In-memory answer cache matched by query embedding similarity.
+
+    Entries are grouped by workspace, mode, ``top_k`` and any extra query
+    parameters; only queries with identical parameters can share an answer.
+    """
+
+    def __init__(
+        self,
+        threshold: float = 0.95,
+        max_entries: int = 1000,
+        ttl_seconds: float = 0,
+    ):
+        self.threshold = threshold
+        self.max_entries = max_entries
+        self.ttl_seconds = ttl_seconds
+
+        # Insertion-ordered so the oldest entries are evicted first
+        self._entries: "OrderedDict[int, Tuple[GroupKey, CachedAnswer]]" = OrderedDict()
+        self._groups: Dict[GroupKey, Dict[str, Any]] = {}
+        self._next_id = 0
+        # Bumped on invalidation so answers computed before it are not stored:
+        # per workspace, and for all of them
+        self._generations: Dict[Optional[str], int] = {}
+        self._epoch = 0
+
+        self.lookups = 0
+        self.hits = 0
+        self.saved_seconds = 0.0
+        self.invalidations = 0
+
+    @staticmethod
+    def group_key(
+        mode: str,
+        top_k: int,
+        params: Dict[str, Any],
+        workspace: Optional[str] = None,
+    ) -> GroupKey:
+        """Cache partition for a set of retrieval parameters in a workspace."""
+        return workspace, json.dumps(
+            {"mode": mode, "top_k": top_k, **params}, sort_keys=True, default=str
+        )
+
+    def generation(self, workspace: Optional[str] = None) -> int:
+        """Invalidation count of ``workspace``, to pass to ``store``."""
+        return self._epoch + self._generations.get(workspace, 0)
+
+    def _group(self, key: GroupKey) -> Dict[str, Any]:
+        group = self._groups.get(key)
+        if group is None:
+            group = self._groups[key] = {"ids": [], "vectors": [], "matrix": None}
+        return group
+
+    def lookup(self, key: GroupKey, vector: np.ndarray) -> Optional[CacheHit]:
+        """Best stored answer for ``key`` at or above the similarity threshold."""
+        self.lookups += 1
+        group = self._groups.get(key)
+        if not group or not group["ids"]:
+            return None
+
+        if group["matrix"] is None:
+            group["matrix"] = np.stack(group["vectors"])
+        scores = group["matrix"] @ _normalize(vector)
+
+        now = time.time()
+        for index in np.argsort(-scores):
+            similarity = float(scores[index])
+            if similarity < self.threshold:
+                break
+            entry = self._entries[group["ids"][index]][1]
+            if self.ttl_seconds and now - entry.created_at > self.ttl_seconds:
+                continue
+            self.hits += 1
+            self.saved_seconds += entry.generation_seconds
+            return CacheHit(entry, similarity)
+        return None
+
+    def store(
+        self,
+        key: GroupKey,
+        vector: np.ndarray,
+        query: str,
+        answer: str,
+        generation_seconds: float,
+        generation: Optional[int] = None,
+    ) -> None:
+        """
+        Remember an answer for later similar queries.
+
+        Pass the workspace's ``generation`` read before answering; the answer
+        is dropped if its documents changed in the meantime.
+        """
+        if generation is not None and generation != self.generation(key[0]):
+            return
+        entry_id = self._next_id
+        self._next_id += 1
+        self._entries[entry_id] = (
+            key,
+            CachedAnswer(query, answer, generation_seconds, time.time()),
+        )
+        group = self._group(key)
+        group["ids"].append(entry_id)
+        group["vectors"].append(_normalize(vector))
+        group["matrix"] = None
+
+        while len(self._entries) > self.max_entries:
+            self._evict_oldest()
+
+    def _evict_oldest(self) -> None:
+        entry_id, (key, _) = self._entries.popitem(last=False)
+        group = self._groups[key]
+        index = group["ids"].index(entry_id)
+        del group["ids"][index]
+        del group["vectors"][index]
+        group["matrix"] = None
+        if not group["ids"]:
+            del self._groups[key]
+
+    def invalidate(self, workspace: Optional[str] = None) -> None:
+        """
+        Drop the stored answers of ``workspace`` (its indexed documents
+        changed), or of every workspace when none is given.
+        """
+        if workspace is None:
+            if self._entries:
+                self.invalidations += 1
+            self._epoch += 1
+            self._entries.clear()
+            self._groups.clear()
+            return
+
+        self._generations[workspace] = self._generations.get(workspace, 0) + 1
+        keys = [key for key in self._groups if key[0] == workspace]
+        if not keys:
+            return
+        self.invalidations += 1
+        for key in keys:
+            for entry_id in self._groups.pop(key)["ids"]:
+                del self._entries[entry_id]
+
+    def stats(self) -> Dict[str, Any]:
+        """Hit rate and time saved, for responses and monitoring."""
+        return {
+            "entries": len(self._entries),
+            "lookups": self.lookups,
+            "hits": self.hits,
+            "hit_rate": self.hits / self.lookups if self.lookups else 0.0,
+            "saved_seconds": self.saved_seconds,
+            "invalidations": self.invalidations,
+        }
+
+
+query_cache = SemanticQueryCache(
+    threshold=float(settings.QUERY_CACHE_SIMILARITY),
+    max_entries=int(settings.QUERY_CACHE_MAX_ENTRIES),
+    ttl_seconds=float(settings.QUERY_CACHE_TTL_SECONDS),
+)
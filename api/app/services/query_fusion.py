@@ -0,0 +1,132 @@
+"""
+Reciprocal-rank fusion of LightRAG retrieval contexts.
+
+LightRAG's graph modes (local/global/hybrid) return context as three CSV
+sections (entities, relationships and source chunks) and naive mode returns
+``--New Chunk--``-separated chunks. These helpers parse the contexts of
+several modes, merge each section with reciprocal-rank fusion (an item ranked
+highly by several modes wins), drop duplicates and format the result back
+into LightRAG's context layout for a single generation call.
+"""
+import re
+from collections import defaultdict
+from typing import Callable, Dict, List, Optional, Tuple
+
+from lightrag.utils import csv_string_to_list, list_of_list_to_csv
+
+SECTIONS = ("Entities", "Relationships", "Sources")
+
+# Columns (after the id) identifying the same item across modes
+KEY_COLUMNS = {"Entities": 1, "Relationships": 2, "Sources": 1}
+
+DEFAULT_HEADERS = {
+    "Entities": [
+        "id",
+        "entity",
+        "type",
+        "description",
+        "rank",
+        "created_at",
+        "file_path",
+    ],
+    "Relationships": [
+        "id",
+        "source",
+        "target",
+        "description",
+        "keywords",
+        "weight",
+        "rank",
+        "created_at",
+        "file_path",
+    ],
+    "Sources": ["id", "content", "file_path"],
+}
+
+_SECTION_PATTERN = re.compile(
+    r"-----(Entities|Relationships|Sources)-----\s*```csv\s*(.*?)```", re.DOTALL
+)
+
+# section -> (header, rows without the id column, in rank order)
+Context = Dict[str, Tuple[List[str], List[List[str]]]]
+
+
+def parse_graph_context(context: str) -> Context:
+    """Parse a local/global/hybrid context into its CSV sections."""
+    sections: Context = {}
+    for name, body in _SECTION_PATTERN.findall(context or ""):
+        rows = [row for row in csv_string_to_list(body.strip()) if row]
+        if rows:
+            sections[name] = (rows[0], [row[1:] for row in rows[1:]])
+    return sections
+
+
+def parse_naive_context(context: str) -> Context:
+    """Parse a naive-mode context into a ``Sources`` section."""
+    rows = []
+    for chunk in (context or "").split("\n--New Chunk--\n"):
+        if not chunk.strip():
+            continue
+        file_path, content = "unknown_source", chunk
+        if chunk.startswith("File path: "):
+            first_line, _, content = chunk.partition("\n")
+            file_path = first_line[len("File path: ") :]
+        rows.append([content, file_path])
+    return {"Sources": (DEFAULT_HEADERS["Sources"], rows)} if rows else {}
+
+
+def reciprocal_rank_fusion(
+    rankings: List[List[List[str]]], key_columns: int, k: int = 60
+) -> List[List[str]]:
+    """
+    Merge ranked row lists, scoring each distinct row by ``sum(1 / (k + rank))``.
+
+    Rows are identified by their first ``key_columns`` values; the first
+    occurrence is kept.
+    """
+    scores: Dict[Tuple[str, ...], float] = defaultdict(float)
+    rows: Dict[Tuple[str, ...], List[str]] = {}
+    for ranking in rankings:
+        for rank, row in enumerate(ranking, start=1):
+            key = tuple(value.strip() for value in row[:key_columns])
+            scores[key] += 1.0 / (k + rank)
+            rows.setdefault(key, row)
+    ordered = sorted(scores, key=lambda key: scores[key], reverse=True)
+    return [rows[key] for key in ordered]
+
+
+def fuse_contexts(contexts: List[Context], k: int = 60) -> Context:
+    """Fuse each section across the contexts of several modes."""
+    fused: Context = {}
+    for name in SECTIONS:
+        present = [context[name] for context in contexts if name in context]
+        if not present:
+            continue
+        fused[name] = (
+            present[0][0],
+            reciprocal_rank_fusion([rows for _, rows in present], KEY_COLUMNS[name], k),
+        )
+    return fused
+
+
+def format_context(
+    sections: Context,
+    truncate: Optional[Callable[[str, List[List[str]]], List[List[str]]]] = None,
+) -> Optional[str]:
+    """
+    Render fused sections in LightRAG's context layout with fresh ids.
+
+    ``truncate(section, rows)`` can trim each section to a token budget.
+    Returns ``None`` when nothing was retrieved.
+    """
+    if not any(rows for _, rows in sections.values()):
+        return None
+
+    parts = []
+    for name in SECTIONS:
+        header, rows = sections.get(name, (DEFAULT_HEADERS[name], []))
+        if truncate is not None:
+            rows = truncate(name, rows)
+        table = [header] + [[str(i), *row] for i, row in enumerate(rows)]
+        parts.append(f"-----{name}-----\n```csv\n{list_of_list_to_csv(table)}```")
+    return "\n".join(parts)
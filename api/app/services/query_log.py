@@ -0,0 +1,127 @@
+"""
+Asynchronous writes of query logs.
+
+Queries hand their log row to an in-memory queue and return immediately; a
+background task inserts queued rows in batches. When the queue is full
+(the database is slow or down) new rows are dropped rather than slowing
+queries down.
+"""
+import asyncio
+from typing import Any, Dict, List, Optional
+
+from loguru import logger
+
+from app.core.config import settings
+from app.core.database import get_session
+from app.models.document import QueryLog
+from app.services.query_trace import QueryTrace
+
+
+class QueryLogWriter:
+    """
+    Batched background inserts of ``QueryLog`` rows.
+    """
+
+    def __init__(
+        self,
+        session_factory=get_session,
+        max_queue: Optional[int] = None,
+        batch_size: Optional[int] = None,
+    ):
+        self.session_factory = session_factory
+        self.batch_size = max(1, int(batch_size or settings.QUERY_LOG_BATCH_SIZE))
+        self._queue: asyncio.Queue = asyncio.Queue(
+            maxsize=int(max_queue or settings.QUERY_LOG_QUEUE_SIZE)
+        )
+        self._task: Optional[asyncio.Task] = None
+
+        self.written = 0
+        self.dropped = 0
+        self.failed = 0
+
+    def record(self, **values: Any) -> bool:
+        """Queue a row (``QueryLog`` column values); False if it was dropped."""
+        try:
+            self._queue.put_nowait(values)
+        except asyncio.QueueFull:
+            self.dropped += 1
+            return False
+        return True
+
+    def record_trace(
+        self,
+        query_text: str,
+        mode: str,
+        trace: QueryTrace,
+        response_text: Optional[str] = None,
+        **values: Any,
+    ) -> bool:
+        """Queue the timings and retrieved chunks of a finished query."""
+        return self.record(
+            query_text=query_text,
+            mode=mode,
+            response_text=response_text,
+            cache_hit=trace.cache_hit,
+            retrieval_latency_ms=round(trace.retrieval_seconds * 1000),
+            generation_latency_ms=round(trace.generation_seconds * 1000),
+            total_latency_ms=round(trace.total_seconds * 1000),
+            stage_latency_ms=trace.stage_milliseconds(),
+            retrieved_chunk_ids=list(trace.chunk_ids),
+            **values,
+        )
+
+    async def start(self) -> None:
+        if self._task is not None:
+            return
+        # A queue is bound to the loop that first waits on it; keep what is
+        # already queued but wait on a fresh queue in the running loop
+        pending, self._queue = self._queue, asyncio.Queue(maxsize=self._queue.maxsize)
+        while not pending.empty():
+            self._queue.put_nowait(pending.get_nowait())
+        self._task = asyncio.create_task(self._run())
+
+    async def stop(self) -> None:
+        """Stop the writer after inserting what is still queued."""
+        task, self._task = self._task, None
+        if task is not None:
+            task.cancel()
+            await asyncio.gather(task, return_exceptions=True)
+        await self.flush()
+
+    async def flush(self) -> None:
+        """Insert every queued row now."""
+        while not self._queue.empty():
+            await self._write(self._take_batch())
+
+    def _take_batch(self, first: Optional[Dict[str, Any]] = None) -> List[Dict]:
+        batch = [first] if first is not None else []
+        while len(batch) < self.batch_size and not self._queue.empty():
+            batch.append(self._queue.get_nowait())
+        return batch
+
+    async def _run(self) -> None:
+        while True:
+            batch = self._take_batch(await self._queue.get())
+            await self._write(batch)
+
+    async def _write(self, batch: List[Dict[str, Any]]) -> None:
+        try:
+            async with self.session_factory() as session:
+                session.add_all([QueryLog(**values) for values in batch])
+        except Exception as e:
+            self.failed += len(batch)
+            logger.warning(f"Failed to write {len(batch)} query log(s): {e}")
+        else:
+            self.written += len(batch)
+
+    def stats(self) -> Dict[str, int]:
+        """Queue depth and write counters for monitoring."""
+        return {
+            "queued": self._queue.qsize(),
+            "written": self.written,
+            "dropped": self.dropped,
+            "failed": self.failed,
+        }
+
+
+query_log_writer = QueryLogWriter()
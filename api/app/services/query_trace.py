@@ -0,0 +1,226 @@
+"""
+Per-stage timing of LightRAG queries.
+
+LightRAG answers a query in a single call, so its stages are timed from the
+outside by wrapping what it calls: vector storage ``query`` (vector lookup),
+graph storage reads (graph traversal), and the LLM function for keyword
+extraction and answer generation. Whatever retrieval time is left over is
+context assembly (chunk fetches, truncation, formatting).
+
+The active query's ``QueryTrace`` lives in a context variable, which tasks
+spawned by LightRAG inherit, so concurrent queries are timed separately.
+Overlapping calls of one stage (e.g. the local and global lookups of a
+hybrid query) count once, as wall-clock time during which the stage was busy.
+"""
+import time
+from contextlib import contextmanager
+from contextvars import ContextVar
+from functools import wraps
+from typing import Any, AsyncIterator, Callable, Dict, Iterator, List, Optional
+
+STAGES = (
+    "cache_lookup",
+    "keyword_extraction",
+    "vector_lookup",
+    "graph_traversal",
+    "context_assembly",
+    "llm_generation",
+)
+
+# Graph storage reads made while building a query context
+GRAPH_READ_METHODS = (
+    "get_node",
+    "get_edge",
+    "node_degree",
+    "edge_degree",
+    "get_node_edges",
+    "get_nodes_batch",
+    "get_edges_batch",
+    "node_degrees_batch",
+    "edge_degrees_batch",
+    "get_nodes_edges_batch",
+)
+
+_current_trace: ContextVar[Optional["QueryTrace"]] = ContextVar(
+    "query_trace", default=None
+)
+
+
+def current_trace() -> Optional["QueryTrace"]:
+    """Trace of the query running in this context, if any."""
+    return _current_trace.get()
+
+
+class QueryTrace:
+    """Stage timings and retrieved chunk ids of one query."""
+
+    def __init__(self):
+        self.started = time.perf_counter()
+        self.finished: Optional[float] = None
+        self.generation_started: Optional[float] = None
+        self.cache_hit = False
+        self.chunk_ids: List[str] = []
+        self._seen_chunk_ids = set()
+        self._seconds: Dict[str, float] = {}
+        # stage -> (calls in progress, when the first of them started)
+        self._active: Dict[str, tuple] = {}
+
+    @contextmanager
+    def activate(self) -> Iterator["QueryTrace"]:
+        """Attribute stages timed in this context to this trace."""
+        token = _current_trace.set(self)
+        try:
+            yield self
+        finally:
+            _current_trace.reset(token)
+
+    def begin(self, stage: str) -> None:
+        now = time.perf_counter()
+        if stage == "llm_generation" and self.generation_started is None:
+            self.generation_started = now
+        calls, since = self._active.get(stage, (0, now))
+        self._active[stage] = (calls + 1, since)
+
+    def end(self, stage: str) -> None:
+        calls, since = self._active.pop(stage)
+        if calls > 1:
+            self._active[stage] = (calls - 1, since)
+        else:
+            self._seconds[stage] = (
+                self._seconds.get(stage, 0.0) + time.perf_counter() - since
+            )
+
+    @contextmanager
+    def stage(self, stage: str) -> Iterator[None]:
+        self.begin(stage)
+        try:
+            yield
+        finally:
+            self.end(stage)
+
+    def add_chunk_ids(self, chunk_ids: List[str]) -> None:
+        for chunk_id in chunk_ids:
+            if chunk_id not in self._seen_chunk_ids:
+                self._seen_chunk_ids.add(chunk_id)
+                self.chunk_ids.append(chunk_id)
+
+    def finish(self) -> None:
+        if self.finished is None:
+            self.finished = time.perf_counter()
+
+    @property
+    def total_seconds(self) -> float:
+        return (self.finished or time.perf_counter()) - self.started
+
+    @property
+    def retrieval_seconds(self) -> float:
+        """Time from the end of the cache lookup until generation started."""
+        if self.cache_hit:
+            return 0.0
+        until = self.generation_started or self.finished or time.perf_counter()
+        return max(0.0, until - self.started - self._seconds.get("cache_lookup", 0.0))
+
+    @property
+    def generation_seconds(self) -> float:
+        return self._seconds.get("llm_generation", 0.0)
+
+    def stage_seconds(self) -> Dict[str, float]:
+        """Seconds per stage; context assembly is the unattributed retrieval time."""
+        seconds = {stage: self._seconds.get(stage, 0.0) for stage in STAGES}
+        if not self.cache_hit:
+            seconds["context_assembly"] = max(
+                0.0,
+                self.retrieval_seconds
+                - seconds["keyword_extraction"]
+                - seconds["vector_lookup"]
+                - seconds["graph_traversal"],
+            )
+        return seconds
+
+    def stage_milliseconds(self) -> Dict[str, int]:
+        timings = {
+            stage: round(seconds * 1000)
+            for stage, seconds in self.stage_seconds().items()
+        }
+        timings["retrieval"] = round(self.retrieval_seconds * 1000)
+        timings["total"] = round(self.total_seconds * 1000)
+        return timings
+
+
+def trace_stream(stage: str, stream: AsyncIterator[str]) -> AsyncIterator[str]:
+    """
+    Keep ``stage`` open until a streamed response is fully consumed.
+
+    The trace is captured now, since the stream is usually consumed outside
+    the query's context.
+    """
+    trace = current_trace()
+    if trace is None:
+        return stream
+
+    async def traced() -> AsyncIterator[str]:
+        try:
+            async for chunk in stream:
+                yield chunk
+        finally:
+            trace.end(stage)
+
+    trace.begin(stage)
+    return traced()
+
+
+def _timed(
+    stage: Optional[str],
+    func: Callable[..., Any],
+    on_result: Optional[Callable[["QueryTrace", tuple, Any], None]] = None,
+) -> Callable[..., Any]:
+    @wraps(func)
+    async def wrapper(*args, **kwargs):
+        trace = current_trace()
+        if trace is None:
+            return await func(*args, **kwargs)
+        if stage is None:
+            result = await func(*args, **kwargs)
+        else:
+            with trace.stage(stage):
+                result = await func(*args, **kwargs)
+        if on_result is not None:
+            on_result(trace, args, result)
+        return result
+
+    return wrapper
+
+
+def _record_fetched_chunk(trace: QueryTrace, args: tuple, result: Any) -> None:
+    if args and result is not None:
+        trace.add_chunk_ids([args[0]])
+
+
+def _record_fetched_chunks(trace: QueryTrace, args: tuple, results: Any) -> None:
+    if args:
+        trace.add_chunk_ids(
+            [
+                chunk_id
+                for chunk_id, chunk in zip(args[0], results or [])
+                if chunk is not None
+            ]
+        )
+
+
+def instrument_rag(rag: Any) -> None:
+    """Wrap a LightRAG instance's storages so queries are timed per stage."""
+    for storage in (rag.chunks_vdb, rag.entities_vdb, rag.relationships_vdb):
+        storage.query = _timed("vector_lookup", storage.query)
+
+    graph = rag.chunk_entity_relation_graph
+    for name in GRAPH_READ_METHODS:
+        if hasattr(graph, name):
+            setattr(graph, name, _timed("graph_traversal", getattr(graph, name)))
+
+    # Chunks that made it into a context are fetched from the text chunk store
+    rag.text_chunks.get_by_id = _timed(
+        None, rag.text_chunks.get_by_id, _record_fetched_chunk
+    )
+    rag.text_chunks.get_by_ids = _timed(
+        None, rag.text_chunks.get_by_ids, _record_fetched_chunks
+    )
@@ -1,117 +1,798 @@
 from sqlalchemy.orm import Session
-from sqlalchemy import select
-from typing import List, Tuple, Dict, Any, Optional
+from sqlalchemy import (
+    and_,
+    cast,
+    func,
+    literal_column,
+    or_,
+    select,
+    text,
+    update,
+)
+from sqlalchemy.dialects.postgresql import REGCONFIG, TSVECTOR
+from sqlalchemy.engine import Engine
+from sqlalchemy.ext.asyncio import AsyncEngine, AsyncSession
+from typing import (
+    Any,
+    Awaitable,
+    Callable,
+    Dict,
+    List,
+    NamedTuple,
+    Optional,
+    Tuple,
+    Union,
+)
 from loguru import logger
+from collections import Counter, defaultdict
 import asyncio
+import numpy as np
+import re
 
+from app.core.config import settings
+from app.core.pagination import capped_total, estimated_total
 from app.models.document import Document, DocumentChunk
-from app.schemas.document import SearchResult
+from app.schemas.document import SearchResult, TotalMode
 from app.core.database import get_db, get_session
+from app.services.embedding_cache import get_embedding_cache
+from app.services.llm_service import openai_embed
+from app.services.vector_codec import cosine_scores, encode_vector
+from app.services.vector_index import get_vector_index
 
+# Index hits fetched per requested result when filters may drop some
+FILTER_OVERFETCH = 10
 
-def generate_embedding(text: str) -> bytes:
+# Lexical fallback: words (no underscores, which LIKE treats as wildcards)
+# and the usual BM25 parameters
+LEXICAL_TERM = re.compile(r"[^\W_]+")
+BM25_K1 = 1.2
+BM25_B = 0.75
+
+# pgvector rejects larger hnsw.ef_search values
+HNSW_MAX_EF_SEARCH = 1000
+
+
+class SearchPosition(NamedTuple):
     """
-    Generate an embedding for the given text.
-    In a real implementation, this would use a model like sentence-transformers.
-    For now, this is a placeholder.
+    End of a page of search results: the last result's score and chunk id,
+    and the number of results returned up to it. Results are ordered by
+    score, then chunk id, so the next page starts strictly after the pair.
     """
-    # Placeholder for embedding generation
-    # In a real implementation, this would be:
-    #   model = SentenceTransformer('all-MiniLM-L6-v2')
-    #   embedding = model.encode(text)
-    #   return embedding.tobytes()
 
-    # For development, just return a dummy value
-    return bytes([0] * 16)  # 16-byte placeholder
+    score: float
+    chunk_id: int
+    depth: int
+
+
+def _after(ranked: List[tuple], after: Optional[SearchPosition]) -> List[tuple]:
+    """Rows of a (score, chunk id)-ordered ranking that follow ``after``."""
+    if after is None:
+        return ranked
+    return [
+        row
+        for row in ranked
+        if row[2] < after.score
+        or (row[2] == after.score and row[0].id > after.chunk_id)
+    ]
 
 
-def search_documents(
-    db: Session, query: str, top_k: int = 5, filters: Optional[Dict[str, Any]] = None
+def _page_order(row: tuple) -> Tuple[float, int]:
+    return -row[2], row[0].id
+
+
+async def _run(db: Union[Session, AsyncSession], retrieve: Callable, *args) -> Any:
+    """
+    Run ``retrieve(session, *args)`` on ``db``: a Session, or the AsyncSession
+    ``get_db`` yields, whose sync session it then runs on.
+    """
+    if isinstance(db, AsyncSession):
+        return await db.run_sync(retrieve, *args)
+    return retrieve(db, *args)
+
+
+async def embed_query(text: str) -> np.ndarray:
+    """Embed a search query with the model (and cache) used for documents."""
+
+    async def embed(texts: List[str]) -> np.ndarray:
+        return await openai_embed(
+            texts,
+            model=settings.EMBEDDING_MODEL_NAME,
+            api_key=settings.EMBEDDING_MODEL_API_KEY,
+            base_url=settings.EMBEDDING_MODEL_BASE_URL,
+        )
+
+    if settings.EMBEDDING_CACHE_ENABLED:
+        cache = get_embedding_cache(
+            settings.EMBEDDING_MODEL_NAME, int(settings.EMBEDDING_DIM)
+        )
+        vectors = await cache.embed([text], embed)
+    else:
+        vectors = await embed([text])
+    return np.asarray(vectors[0], dtype=np.float32)
+
+
+def set_chunk_embedding(
+    chunk: DocumentChunk, vector: np.ndarray, encoding: Optional[str] = None
+) -> None:
+    """
+    Store an embedding on a chunk using the configured compact encoding.
+
+    Lossy encodings also keep a float32 copy for rescoring the final top-k;
+    the pgvector copy (a halfvec on Postgres) serves the HNSW index.
+    """
+    encoding = encoding or settings.EMBEDDING_STORAGE_ENCODING
+    encoded = encode_vector(vector, encoding)
+    chunk.embedding = encoded.code
+    chunk.embedding_encoding = encoded.encoding
+    chunk.embedding_scale = encoded.scale
+    chunk.embedding_offset = encoded.offset
+    chunk.embedding_full = (
+        None if encoding == "float32" else np.asarray(vector, dtype="<f4").tobytes()
+    )
+    chunk.embedding_vector = np.asarray(vector, dtype=np.float32)
+
+
+def _shortlist_size(depth: int) -> int:
+    """Candidates fetched from a compact index to rescore for ``depth`` results."""
+    return depth * max(1, int(settings.EMBEDDING_RESCORE_FACTOR))
+
+
+def _rescore(
+    db: Session,
+    query_vector: np.ndarray,
+    ranked: List[Tuple[DocumentChunk, Document, float]],
+) -> List[Tuple[DocumentChunk, Document, float]]:
+    """
+    Re-rank shortlisted rows by cosine similarity to their full-precision
+    vectors, loaded for the shortlist only. Rows without one (chunks embedded
+    before the copy was kept) keep their shortlist score.
+    """
+    if not ranked:
+        return ranked
+    vectors = {}
+    for chunk_id, full, code, encoding in db.query(
+        DocumentChunk.id,
+        DocumentChunk.embedding_full,
+        DocumentChunk.embedding,
+        DocumentChunk.embedding_encoding,
+    ).filter(DocumentChunk.id.in_([row[0].id for row in ranked])):
+        if full is not None:
+            vectors[chunk_id] = np.frombuffer(full, dtype="<f4")
+        elif code is not None and encoding == "float32":
+            # float32 codes are exact, so no separate copy is stored
+            vectors[chunk_id] = np.frombuffer(code, dtype="<f4")
+
+    if vectors:
+        ids = list(vectors)
+        exact = dict(
+            zip(ids, cosine_scores(query_vector, np.stack([vectors[i] for i in ids])))
+        )
+        ranked = [
+            (chunk, document, float(exact.get(chunk.id, score)))
+            for chunk, document, score in ranked
+        ]
+    return sorted(ranked, key=_page_order)
+
+
+def _scoped(
+    filters: Optional[Dict[str, Any]], workspace: Optional[str]
+) -> Optional[Dict[str, Any]]:
+    """``filters`` narrowed to the documents of ``workspace``, when given."""
+    if workspace is None:
+        return filters
+    return {**(filters or {}), "workspace": workspace}
+
+
+def _filter_chunks(query_obj, filters: Optional[Dict[str, Any]]):
+    if filters:
+        if "workspace" in filters:
+            query_obj = query_obj.filter(Document.workspace == filters["workspace"])
+        if "source" in filters:
+            query_obj = query_obj.filter(Document.source == filters["source"])
+        if "author" in filters:
+            query_obj = query_obj.filter(Document.author == filters["author"])
+    return query_obj
+
+
+def _nearest_chunks_pgvector(
+    db: Session,
+    query_vector: np.ndarray,
+    top_k: int,
+    filters: Optional[Dict[str, Any]],
+    ef_search: int,
+    probes: int,
+    after: Optional[SearchPosition] = None,
+) -> List[Tuple[DocumentChunk, Document, float]]:
+    """
+    Approximate nearest chunks from the pgvector index over the halfvec
+    copies, rescored with full precision.
+    """
+    # The page's results are picked from EMBEDDING_RESCORE_FACTOR times as
+    # many halfvec candidates, earlier pages included, since rescoring can
+    # reorder them. An HNSW scan only returns up to ef_search rows
+    depth = top_k + (after.depth if after else 0)
+    shortlist = min(_shortlist_size(depth), HNSW_MAX_EF_SEARCH)
+    ef_search = min(max(int(ef_search), shortlist), HNSW_MAX_EF_SEARCH)
+    # Scoped to this transaction
+    db.execute(text(f"SET LOCAL hnsw.ef_search = {ef_search}"))
+    db.execute(text(f"SET LOCAL ivfflat.probes = {int(probes)}"))
+
+    distance = DocumentChunk.embedding_vector.cosine_distance(query_vector)
+    query_obj = (
+        db.query(DocumentChunk, Document, distance.label("distance"))
+        .join(Document, DocumentChunk.document_id == Document.id)
+        .filter(DocumentChunk.embedding_vector.isnot(None))
+    )
+    # Ordering by the raw distance operator (not a score expression) is what
+    # lets Postgres use the index instead of scoring every chunk
+    rows = (
+        _filter_chunks(query_obj, filters)
+        .order_by(distance, DocumentChunk.id)
+        .limit(shortlist)
+        .all()
+    )
+    ranked = _rescore(
+        db,
+        query_vector,
+        [(chunk, document, 1.0 - distance) for chunk, document, distance in rows],
+    )
+    return _after(ranked, after)[:top_k]
+
+
+def _nearest_chunks_index(
+    db: Session,
+    query_vector: np.ndarray,
+    top_k: int,
+    filters: Optional[Dict[str, Any]],
+    probes: Optional[int],
+    after: Optional[SearchPosition] = None,
+) -> List[Tuple[DocumentChunk, Document, float]]:
+    """Nearest chunks from the in-process vector index (see vector_index)."""
+    index = get_vector_index(db)
+    # The index holds decoded compact codes, so EMBEDDING_RESCORE_FACTOR times
+    # as many hits are rescored with full precision. Filters (the workspace
+    # included) are applied to the hits, so fetch more when filtering; later
+    # pages also need the hits of the pages before them
+    depth = top_k + (after.depth if after else 0)
+    fetch = _shortlist_size(depth) * (FILTER_OVERFETCH if filters else 1)
+    with index.lock:
+        hits = index.search(query_vector, fetch, probes=probes)
+    if not hits:
+        return []
+
+    query_obj = (
+        db.query(DocumentChunk, Document)
+        .join(Document, DocumentChunk.document_id == Document.id)
+        .filter(DocumentChunk.id.in_([chunk_id for chunk_id, _ in hits]))
+    )
+    rows = {
+        chunk.id: (chunk, document)
+        for chunk, document in _filter_chunks(query_obj, filters)
+    }
+    # Chunks deleted since the index was updated are no longer found
+    ranked = [(*rows[chunk_id], score) for chunk_id, score in hits if chunk_id in rows]
+    # Only the best of the filtered hits need rescoring
+    ranked = sorted(ranked, key=_page_order)[: _shortlist_size(depth)]
+    return _after(_rescore(db, query_vector, ranked), after)[:top_k]
+
+
+def _search_backend(db: Session) -> str:
+    backend = settings.SEARCH_BACKEND
+    if backend == "auto":
+        return "pgvector" if db.get_bind().dialect.name == "postgresql" else "memory"
+    return backend
+
+
+async def search_documents(
+    db: Union[Session, AsyncSession],
+    query_vector: np.ndarray,
+    top_k: int = 5,
+    filters: Optional[Dict[str, Any]] = None,
+    ef_search: Optional[int] = None,
+    probes: Optional[int] = None,
+    score_threshold: Optional[float] = None,
+    after: Optional[SearchPosition] = None,
+    workspace: Optional[str] = None,
 ) -> Tuple[List[SearchResult], int]:
     """
-    Search for document chunks based on vector similarity to the query.
+    Search for document chunks by cosine similarity to the query embedding.
+
+    On Postgres the HNSW index on ``embedding_vector`` is searched, so latency
+    does not grow with the number of chunks; ``ef_search`` (HNSW) and
+    ``probes`` (IVFFlat) trade recall for speed per request. Without pgvector
+    (or with SEARCH_BACKEND=memory) the in-process index is searched instead,
+    where ``probes`` applies to its IVF lists. Either index only shortlists
+    EMBEDDING_RESCORE_FACTOR candidates per result from compact copies (the
+    halfvec column, or the chunks' codes); they are then rescored against
+    the full-precision vectors.
 
     Args:
-        db: Database session
-        query: Search query text
+        db: Database session (sync or async)
+        query_vector: Embedding of the search query (see ``embed_query``)
         top_k: Number of results to return
         filters: Optional filters to apply to search
+        ef_search: HNSW candidate list size (default SEARCH_HNSW_EF_SEARCH)
+        probes: IVF lists to scan (default SEARCH_IVFFLAT_PROBES, or
+            VECTOR_INDEX_IVF_PROBES for the in-process index)
+        score_threshold: Minimum cosine similarity (default SEARCH_SCORE_THRESHOLD)
+        after: End of the previous page, to return the page following it.
+            On Postgres pages reach at most HNSW_MAX_EF_SEARCH results deep
+        workspace: Only search documents of this workspace (default: all,
+            for scripts; requests always pass theirs)
 
     Returns:
-        Tuple of (search results, total count)
+        Tuple of (search results, total count). Counting every match would
+        need a full scan, so the total is the number of results returned.
     """
-    # Convert query to embedding
-    # In a real implementation, this would be used for vector similarity search
-    query_embedding = generate_embedding(query)
+    ranked = await _run(
+        db,
+        _vector_ranked,
+        query_vector,
+        top_k,
+        _scoped(filters, workspace),
+        ef_search,
+        probes,
+        score_threshold,
+        after,
+    )
+    search_results = [_search_result(*row) for row in ranked]
+    return search_results, len(search_results)
+
+
+def _vector_ranked(
+    db: Session,
+    query_vector: np.ndarray,
+    top_k: int,
+    filters: Optional[Dict[str, Any]],
+    ef_search: Optional[int],
+    probes: Optional[int],
+    score_threshold: Optional[float],
+    after: Optional[SearchPosition] = None,
+) -> List[Tuple[DocumentChunk, Document, float]]:
+    if score_threshold is None:
+        score_threshold = settings.SEARCH_SCORE_THRESHOLD
+
+    backend = _search_backend(db)
+    if backend == "pgvector":
+        ranked = _nearest_chunks_pgvector(
+            db,
+            query_vector,
+            top_k,
+            filters,
+            settings.SEARCH_HNSW_EF_SEARCH if ef_search is None else ef_search,
+            settings.SEARCH_IVFFLAT_PROBES if probes is None else probes,
+            after,
+        )
+    elif backend == "memory":
+        ranked = _nearest_chunks_index(db, query_vector, top_k, filters, probes, after)
+    else:
+        raise ValueError(
+            f"Unknown search backend '{backend}'. Must be auto, pgvector or memory"
+        )
+
+    # Filtered after the index scan: a WHERE on the score would stop Postgres
+    # from using the index
+    return [row for row in ranked if row[2] >= score_threshold]
 
-    # For development, we'll perform a simple text search instead of vector similarity
-    # In a real implementation, this would use the pgvector extension
 
-    query_text = f"%{query}%"
+def _search_result(
+    chunk: DocumentChunk,
+    document: Document,
+    score: float,
+    extra_metadata: Optional[Dict[str, Any]] = None,
+) -> SearchResult:
+    return SearchResult(
+        document_id=document.id,
+        document_title=document.title,
+        chunk_id=chunk.id,
+        chunk_text=chunk.chunk_text,
+        score=score,
+        doc_metadata={
+            "source": document.source,
+            "author": document.author,
+            "chunk_index": chunk.chunk_index,
+            **(chunk.chunk_metadata or {}),
+            **(extra_metadata or {}),
+        },
+    )
+
 
-    # Get chunks that contain the query text
+def _fts_match(query: str):
+    tsquery = func.websearch_to_tsquery(
+        cast(settings.SEARCH_TEXT_CONFIG, REGCONFIG), query
+    )
+    tsv = literal_column("document_chunk.chunk_tsv", type_=TSVECTOR)
+    return tsv, tsquery, tsv.op("@@")(tsquery)
+
+
+def _lexical_chunks_fts(
+    db: Session,
+    query: str,
+    top_k: int,
+    filters: Optional[Dict[str, Any]],
+    after: Optional[SearchPosition] = None,
+) -> List[Tuple[DocumentChunk, Document, float]]:
+    """Chunks matching ``query`` through the GIN-indexed ``chunk_tsv`` column."""
+    tsv, tsquery, match = _fts_match(query)
+    # Cover density rank; normalization 32 maps it to rank / (rank + 1)
+    rank = func.ts_rank_cd(tsv, tsquery, 32)
     query_obj = (
-        db.query(DocumentChunk, Document)
+        db.query(DocumentChunk, Document, rank.label("rank"))
         .join(Document, DocumentChunk.document_id == Document.id)
-        .filter(DocumentChunk.chunk_text.ilike(query_text))
+        .filter(match)
     )
+    if after is not None:
+        query_obj = query_obj.filter(
+            or_(
+                rank < after.score,
+                and_(rank == after.score, DocumentChunk.id > after.chunk_id),
+            )
+        )
+    rows = (
+        _filter_chunks(query_obj, filters)
+        .order_by(rank.desc(), DocumentChunk.id)
+        .limit(top_k)
+        .all()
+    )
+    return [(chunk, document, float(score)) for chunk, document, score in rows]
 
-    # Apply filters if provided
-    if filters:
-        if "source" in filters:
-            query_obj = query_obj.filter(Document.source == filters["source"])
-        if "author" in filters:
-            query_obj = query_obj.filter(Document.author == filters["author"])
 
-    # Get total count
-    total = query_obj.count()
-
-    # Get results with limit
-    results = query_obj.limit(top_k).all()
-
-    # Convert to SearchResult objects
-    search_results = []
-    for chunk, document in results:
-        search_results.append(
-            SearchResult(
-                document_id=document.id,
-                document_title=document.title,
-                chunk_id=chunk.id,
-                chunk_text=chunk.chunk_text,
-                score=0.5,  # Placeholder score
-                doc_metadata={
-                    "source": document.source,
-                    "author": document.author,
-                    "chunk_index": chunk.chunk_index,
-                    **chunk.chunk_metadata,
-                },
-            )
+def _terms(text: str) -> List[str]:
+    return [term.lower() for term in LEXICAL_TERM.findall(text)]
+
+
+def _bm25_match(terms):
+    return or_(*(DocumentChunk.chunk_text.ilike(f"%{t}%") for t in terms))
+
+
+def _lexical_chunks_bm25(
+    db: Session,
+    query: str,
+    top_k: int,
+    filters: Optional[Dict[str, Any]],
+    after: Optional[SearchPosition] = None,
+) -> List[Tuple[DocumentChunk, Document, float]]:
+    """
+    BM25 over chunks containing any query term, for databases without
+    full-text search (SQLite in development and tests); Postgres never takes
+    this path.
+
+    Matching is an unindexed LIKE scan, so only the first
+    SEARCH_BM25_MAX_CANDIDATES matches (by chunk ID) are scored, from their
+    text alone; chunks and documents are loaded for the returned page only.
+    """
+    terms = set(_terms(query))
+    if not terms:
+        return []
+    candidates = (
+        _filter_chunks(
+            db.query(DocumentChunk.id, DocumentChunk.chunk_text)
+            .join(Document, DocumentChunk.document_id == Document.id)
+            .filter(_bm25_match(terms)),
+            filters,
         )
+        .order_by(DocumentChunk.id)
+        .limit(int(settings.SEARCH_BM25_MAX_CANDIDATES))
+        .all()
+    )
+    if not candidates:
+        return []
 
-    return search_results, total
+    counts = [Counter(_terms(candidate.chunk_text)) for candidate in candidates]
+    # The highest chunk ID stands in for the number of chunks: a primary key
+    # lookup rather than a count over the whole table
+    chunk_count = max(
+        db.query(func.max(DocumentChunk.id)).scalar() or 0, len(candidates)
+    )
+    average_length = sum(sum(c.values()) for c in counts) / len(counts) or 1.0
+    idf = {}
+    for term in terms:
+        matches = sum(1 for c in counts if term in c)
+        idf[term] = np.log(1 + (chunk_count - matches + 0.5) / (matches + 0.5))
 
+    ranked = []
+    for candidate, count in zip(candidates, counts):
+        norm = BM25_K1 * (1 - BM25_B + BM25_B * sum(count.values()) / average_length)
+        score = sum(
+            idf[term] * count[term] * (BM25_K1 + 1) / (count[term] + norm)
+            for term in terms
+            if term in count
+        )
+        if score > 0:
+            # Same 0..1 scale as the Postgres rank
+            ranked.append((candidate, None, float(score / (score + 1))))
+    ranked.sort(key=_page_order)
+    page = _after(ranked, after)[:top_k]
 
-class SearchService:
-    def __init__(self):
-        self.db_lock = asyncio.Lock()
+    rows = {
+        chunk.id: (chunk, document)
+        for chunk, document in db.query(DocumentChunk, Document)
+        .join(Document, DocumentChunk.document_id == Document.id)
+        .filter(DocumentChunk.id.in_([candidate.id for candidate, _, _ in page]))
+    }
+    # A chunk deleted since it was scored is left out
+    return [
+        (*rows[candidate.id], score)
+        for candidate, _, score in page
+        if candidate.id in rows
+    ]
+
+
+async def search_documents_lexical(
+    db: Union[Session, AsyncSession],
+    query: str,
+    top_k: int = 5,
+    filters: Optional[Dict[str, Any]] = None,
+    after: Optional[SearchPosition] = None,
+    workspace: Optional[str] = None,
+) -> Tuple[List[SearchResult], int]:
+    """
+    Search for document chunks matching the keywords of ``query``.
+
+    On Postgres the query is parsed with ``websearch_to_tsquery`` (quoted
+    phrases, ``or``, ``-term``) under SEARCH_TEXT_CONFIG and matched against
+    the GIN index on ``document_chunk.chunk_tsv``; results are ordered by
+    ``ts_rank_cd``. Other databases fall back to BM25 over a capped LIKE scan
+    (see ``_lexical_chunks_bm25``).
+    Scores are in [0, 1) but not comparable with cosine scores.
+    With ``workspace``, only documents of that workspace are searched.
+
+    Returns:
+        Tuple of (search results, number of results returned)
+    """
+    ranked = await _run(
+        db, _lexical_ranked, query, top_k, _scoped(filters, workspace), after
+    )
+    results = [_search_result(*row) for row in ranked]
+    return results, len(results)
+
+
+def _lexical_ranked(
+    db: Session,
+    query: str,
+    top_k: int,
+    filters: Optional[Dict[str, Any]],
+    after: Optional[SearchPosition] = None,
+) -> List[Tuple[DocumentChunk, Document, float]]:
+    if db.get_bind().dialect.name == "postgresql":
+        return _lexical_chunks_fts(db, query, top_k, filters, after)
+    return _lexical_chunks_bm25(db, query, top_k, filters, after)
+
+
+async def count_lexical_matches(
+    db: Union[Session, AsyncSession],
+    query: str,
+    filters: Optional[Dict[str, Any]] = None,
+    mode: TotalMode = TotalMode.capped,
+    workspace: Optional[str] = None,
+) -> Optional[str]:
+    """
+    Number of chunks matching ``query`` (within ``workspace``, when given),
+    capped at PAGINATION_TOTAL_CAP (``"1000+"``) or estimated by the Postgres
+    planner (``"~1200"``).
+    """
+    if mode == TotalMode.none:
+        return None
+    return await _run(
+        db, _count_lexical_matches, query, _scoped(filters, workspace), mode
+    )
 
+
+def _count_lexical_matches(
+    db: Session,
+    query: str,
+    filters: Optional[Dict[str, Any]],
+    mode: TotalMode,
+) -> str:
+    if db.get_bind().dialect.name == "postgresql":
+        match = _fts_match(query)[2]
+    else:
+        terms = set(_terms(query))
+        if not terms:
+            return "0"
+        match = _bm25_match(terms)
+    stmt = _filter_chunks(
+        select(DocumentChunk.id)
+        .join(Document, DocumentChunk.document_id == Document.id)
+        .where(match),
+        filters,
+    )
+    cap = int(settings.PAGINATION_TOTAL_CAP)
+    if mode == TotalMode.estimate:
+        return estimated_total(db, stmt, cap)
+    return capped_total(db, stmt, cap)
+
+
+def weighted_rrf(
+    rankings: Dict[str, List[Tuple[DocumentChunk, Document, float]]],
+    weights: Dict[str, float],
+    k: int = 60,
+) -> List[Tuple[DocumentChunk, Document, float, Dict[str, Any]]]:
+    """
+    Fuse ranked chunk lists with weighted reciprocal-rank fusion.
+
+    A chunk scores ``sum(weight / (k + rank))`` over the lists it appears
+    in. Each fused row carries ``<source>_rank`` and ``<source>_score`` for
+    every list (``None`` where the chunk was not retrieved).
+    """
+    fused: Dict[int, List[Any]] = {}
+    for source, ranked in rankings.items():
+        weight = weights.get(source, 1.0)
+        for rank, (chunk, document, score) in enumerate(ranked, start=1):
+            entry = fused.get(chunk.id)
+            if entry is None:
+                details = {}
+                for name in rankings:
+                    details[f"{name}_rank"] = details[f"{name}_score"] = None
+                entry = fused[chunk.id] = [chunk, document, 0.0, details]
+            entry[2] += weight / (k + rank)
+            entry[3][f"{source}_rank"] = rank
+            entry[3][f"{source}_score"] = score
+    return sorted((tuple(entry) for entry in fused.values()), key=_page_order)
+
+
+async def search_documents_hybrid(
+    db: Union[Session, AsyncSession],
+    query: str,
+    top_k: int = 5,
+    filters: Optional[Dict[str, Any]] = None,
+    ef_search: Optional[int] = None,
+    probes: Optional[int] = None,
+    embed: Optional[Callable[[str], Awaitable[np.ndarray]]] = None,
+    after: Optional[SearchPosition] = None,
+    workspace: Optional[str] = None,
+) -> Tuple[List[SearchResult], int]:
+    """
+    Search with both lexical and vector retrieval and fuse the rankings.
+
+    The two retrievers run concurrently, each with its own session (and
+    pooled connection) on ``db``'s engine; the vector search starts once the
+    query is embedded. A session pinned to one connection (e.g. inside an
+    outer transaction) cannot serve both at once, so then only the embedding
+    overlaps the lexical search. Each retriever
+    returns up to SEARCH_HYBRID_CANDIDATES chunks, fused with weighted RRF
+    (SEARCH_HYBRID_*_WEIGHT, SEARCH_HYBRID_RRF_K). ``score`` is the fused
+    score; ``doc_metadata`` reports each retriever's rank and score.
+    Later pages fuse correspondingly deeper candidate lists. With
+    ``workspace``, both retrievers only search documents of that workspace.
+    """
+    embed = embed or embed_query
+    filters = _scoped(filters, workspace)
+    depth = top_k + (after.depth if after else 0)
+    candidates = max(depth, int(settings.SEARCH_HYBRID_CANDIDATES))
+    vector_args = (candidates, filters, ef_search, probes, None)
+
+    if isinstance(db, AsyncSession) and isinstance(db.bind, AsyncEngine):
+
+        async def in_own_session(retrieve, *args):
+            async with AsyncSession(bind=db.bind) as session:
+                return await session.run_sync(retrieve, *args)
+
+    elif isinstance(db, Session) and isinstance(db.get_bind(), Engine):
+        bind = db.get_bind()
+
+        def in_thread(retrieve, *args):
+            with Session(bind=bind) as session:
+                return retrieve(session, *args)
+
+        async def in_own_session(retrieve, *args):
+            return await asyncio.to_thread(in_thread, retrieve, *args)
+
+    else:
+        in_own_session = None
+
+    if in_own_session is not None:
+
+        async def vector_ranked():
+            query_vector = await embed(query)
+            return await in_own_session(_vector_ranked, query_vector, *vector_args)
+
+        lexical, vector = await asyncio.gather(
+            in_own_session(_lexical_ranked, query, candidates, filters),
+            vector_ranked(),
+        )
+    else:
+        if isinstance(db, AsyncSession):
+            lexical_ranked = _run(db, _lexical_ranked, query, candidates, filters)
+        else:
+            lexical_ranked = asyncio.to_thread(
+                _lexical_ranked, db, query, candidates, filters
+            )
+        lexical, query_vector = await asyncio.gather(lexical_ranked, embed(query))
+        vector = await _run(db, _vector_ranked, query_vector, *vector_args)
+
+    fused = weighted_rrf(
+        {"vector": vector, "lexical": lexical},
+        {
+            "vector": float(settings.SEARCH_HYBRID_VECTOR_WEIGHT),
+            "lexical": float(settings.SEARCH_HYBRID_LEXICAL_WEIGHT),
+        },
+        int(settings.SEARCH_HYBRID_RRF_K),
+    )
+    results = [_search_result(*row) for row in _after(fused, after)[:top_k]]
+    return results, len(results)
+
+
+class SearchService:
     async def index_document(self, documentId: int) -> Dict[str, Any]:
-        """Index a document with thread-safe database access."""
-        async with self.db_lock:
-            async with get_session() as session:
-                document = await session.get(Document, documentId)
-                document.is_indexed = True
-                session.add(document)
-                await session.commit()
-                await session.refresh(document)
-            return {"status": "success", "document_id": documentId}
+        """Mark a document as indexed."""
+        async with get_session() as session:
+            document = await session.get(Document, documentId)
+            document.is_indexed = True
+            session.add(document)
+            await session.commit()
+            await session.refresh(document)
+        return {"status": "success", "document_id": documentId}
+
+    async def index_documents(self, document_ids: List[int]) -> Dict[str, Any]:
+        """Mark many documents as indexed with one statement."""
+        async with get_session() as session:
+            await session.execute(
+                update(Document)
+                .where(Document.id.in_(document_ids))
+                .values(is_indexed=True)
+            )
+            await session.commit()
+        return {"status": "success", "document_ids": document_ids}
+
+    async def store_chunks(
+        self,
+        document_chunks: Dict[int, Dict[str, Dict[str, Any]]],
+        embed: Callable[[List[str]], Awaitable[np.ndarray]],
+    ) -> int:
+        """
+        Make documents' LightRAG chunks (keyed by chunk ID, as produced by its
+        chunking function) their searchable chunks, with embeddings.
+
+        Rows of chunks a document still has are kept with their embeddings,
+        so re-indexing an edited document only embeds its new chunks; rows of
+        chunks it no longer has are deleted. Returns the number of chunks
+        embedded.
+        """
+        async with get_session() as session:
+            stored = defaultdict(dict)
+            for row in (
+                await session.execute(
+                    select(DocumentChunk).where(
+                        DocumentChunk.document_id.in_(list(document_chunks))
+                    )
+                )
+            ).scalars():
+                chunk_id = (row.chunk_metadata or {}).get("chunk_id")
+                stored[row.document_id][chunk_id] = row
+
+            new = []
+            for document_id, chunks in document_chunks.items():
+                rows = stored[document_id]
+                for chunk_id in set(rows).difference(chunks):
+                    await session.delete(rows.pop(chunk_id))
+                for chunk_id, chunk in chunks.items():
+                    row = rows.get(chunk_id)
+                    if row is None:
+                        row = DocumentChunk(
+                            document_id=document_id,
+                            chunk_text=chunk["content"],
+                            chunk_metadata={
+                                "chunk_id": chunk_id,
+                                "tokens": chunk.get("tokens"),
+                            },
+                        )
+                        session.add(row)
+                        new.append(row)
+                    row.chunk_index = chunk.get("chunk_order_index", 0)
+
+            if new:
+                vectors = await embed([row.chunk_text for row in new])
+                for row, vector in zip(new, vectors):
+                    set_chunk_embedding(row, vector)
+            await session.commit()
+        return len(new)
 
     async def search_documents(self, query: str, limit: int = 10) -> List[Document]:
-        """Search documents with thread-safe database access."""
-        async with self.db_lock:
-            async with get_session() as session:
-                stmt = select(Document).filter(Document.is_indexed == True).limit(limit)
-                result = await session.execute(stmt)
-                return result.scalars().all()
+        """List indexed documents."""
+        async with get_session() as session:
+            stmt = select(Document).filter(Document.is_indexed == True).limit(limit)
+            result = await session.execute(stmt)
+            return result.scalars().all()
 
     # Add any additional search methods here
@@ -0,0 +1,150 @@
+"""
+Document text extraction in a bounded process pool.
+
+``textract`` parsing is CPU-bound and blocks whichever thread runs it, so it
+runs in worker processes instead of the event loop. Each file gets a timeout;
+a worker stuck past it is killed by recycling the pool. Workers can also be
+capped in address space so a pathological file fails with ``MemoryError``
+instead of exhausting the host.
+"""
+import asyncio
+import os
+from concurrent.futures import ProcessPoolExecutor
+from concurrent.futures.process import BrokenProcessPool
+from typing import Callable, Dict, Optional
+
+from loguru import logger
+
+from app.core.config import settings
+
+try:
+    import resource
+except ImportError:  # Not available on Windows
+    resource = None
+
+
+class ExtractionError(Exception):
+    """Raised when a file cannot be extracted (timeout, crash or parse error)."""
+
+
+def extract_file(file_path: str) -> str:
+    """Extract the text of one file with textract (runs in a worker process)."""
+    import textract
+
+    return textract.process(file_path).decode("utf-8", errors="replace")
+
+
+def _limit_memory(memory_limit_mb: int) -> None:
+    if resource is not None and memory_limit_mb > 0:
+        limit = memory_limit_mb * 1024 * 1024
+        resource.setrlimit(resource.RLIMIT_AS, (limit, limit))
+
+
+class TextExtractor:
+    """
+    Run an extraction function over files in a process pool.
+    """
+
+    def __init__(
+        self,
+        extract_func: Callable[[str], str] = extract_file,
+        max_workers: Optional[int] = None,
+        timeout: Optional[float] = None,
+        memory_limit_mb: Optional[int] = None,
+    ):
+        self.extract_func = extract_func
+        self.max_workers = max(
+            1, int(max_workers or settings.EXTRACT_WORKERS or os.cpu_count() or 1)
+        )
+        self.timeout = float(timeout or settings.EXTRACT_TIMEOUT_SECONDS)
+        self.memory_limit_mb = int(
+            settings.EXTRACT_MEMORY_LIMIT_MB
+            if memory_limit_mb is None
+            else memory_limit_mb
+        )
+        self._pool: Optional[ProcessPoolExecutor] = None
+        # One file per worker at a time, so the timeout covers only parsing
+        self._slots = asyncio.Semaphore(self.max_workers)
+
+        self.extracted = 0
+        self.timeouts = 0
+        self.failures = 0
+        self.pool_restarts = 0
+
+    def _get_pool(self) -> ProcessPoolExecutor:
+        if self._pool is None:
+            self._pool = ProcessPoolExecutor(
+                max_workers=self.max_workers,
+                initializer=_limit_memory,
+                initargs=(self.memory_limit_mb,),
+            )
+        return self._pool
+
+    def _restart_pool(self) -> None:
+        """Kill every worker (a timed-out task cannot be cancelled otherwise)."""
+        pool, self._pool = self._pool, None
+        if pool is None:
+            return
+        # Files still running on the killed workers fail with BrokenProcessPool
+        for process in list((pool._processes or {}).values()):
+            process.kill()
+        pool.shutdown(wait=False)
+        self.pool_restarts += 1
+
+    async def extract(self, file_path: str) -> str:
+        """
+        Extract one file's text without blocking the event loop.
+
+        A file whose worker was killed because another file timed out is
+        retried once on the fresh pool.
+        """
+        async with self._slots:
+            for attempt in range(2):
+                pool = self._get_pool()
+                future = asyncio.get_running_loop().run_in_executor(
+                    pool, self.extract_func, file_path
+                )
+                try:
+                    text = await asyncio.wait_for(future, self.timeout)
+                except asyncio.TimeoutError:
+                    self.timeouts += 1
+                    logger.warning(
+                        f"Extraction of {file_path} timed out after {self.timeout:.0f}s"
+                    )
+                    if self._pool is pool:
+                        self._restart_pool()
+                    raise ExtractionError(f"Timed out extracting {file_path}")
+                except BrokenProcessPool as e:
+                    if self._pool is pool:
+                        self._restart_pool()
+                    if attempt == 0:
+                        continue
+                    self.failures += 1
+                    raise ExtractionError(
+                        f"Worker crashed extracting {file_path}"
+                    ) from e
+                except Exception as e:
+                    self.failures += 1
+                    raise ExtractionError(f"Failed to extract {file_path}: {e}") from e
+
+                self.extracted += 1
+                return text
+
+    def shutdown(self) -> None:
+        """Stop the worker processes."""
+        if self._pool is not None:
+            self._pool.shutdown(wait=False, cancel_futures=True)
+            self._pool = None
+
+    def stats(self) -> Dict[str, int]:
+        """Extraction counters for monitoring."""
+        return {
+            "workers": self.max_workers,
+            "extracted": self.extracted,
+            "timeouts": self.timeouts,
+            "failures": self.failures,
+            "pool_restarts": self.pool_restarts,
+        }
+
+
+text_extractor = TextExtractor()
@@ -0,0 +1,132 @@
+"""
+Compact encodings for stored chunk embeddings.
+
+``DocumentChunk.embedding`` holds one of these codes:
+
+- ``float32``: 4 bytes per dimension, exact
+- ``float16``: 2 bytes per dimension
+- ``int8``: 1 byte per dimension, per-vector scalar quantization with the
+  ``scale``/``offset`` needed to decode stored alongside the code
+- ``binary``: 1 bit per dimension (sign bits), 32x smaller than float32
+
+Lossy codes are used to shortlist candidates cheaply; the final top-k is then
+rescored against the full-precision vectors (``DocumentChunk.embedding_full``).
+"""
+from typing import Callable, List, NamedTuple, Optional, Sequence, Tuple
+
+import numpy as np
+
+ENCODINGS = ("float32", "float16", "int8", "binary")
+
+
+class EncodedVector(NamedTuple):
+    """A stored embedding code and the parameters needed to decode it."""
+
+    code: bytes
+    encoding: str
+    scale: Optional[float] = None
+    offset: Optional[float] = None
+
+
+def _check_encoding(encoding: str) -> None:
+    if encoding not in ENCODINGS:
+        raise ValueError(
+            f"Unknown embedding encoding '{encoding}'. Must be one of {ENCODINGS}"
+        )
+
+
+def encode_vector(vector: np.ndarray, encoding: str) -> EncodedVector:
+    """Encode one embedding vector."""
+    _check_encoding(encoding)
+    vector = np.asarray(vector, dtype=np.float32).ravel()
+
+    if encoding == "float32":
+        return EncodedVector(vector.astype("<f4").tobytes(), encoding)
+    if encoding == "float16":
+        return EncodedVector(vector.astype("<f2").tobytes(), encoding)
+    if encoding == "binary":
+        return EncodedVector(np.packbits(vector > 0).tobytes(), encoding)
+
+    # int8: map [min, max] onto [-128, 127]
+    low, high = float(vector.min()), float(vector.max())
+    scale = (high - low) / 255 or 1.0
+    code = np.clip(np.round((vector - low) / scale) - 128, -128, 127).astype(np.int8)
+    return EncodedVector(code.tobytes(), encoding, scale, low)
+
+
+def decode_vectors(
+    codes: Sequence[bytes],
+    encoding: str,
+    dim: int,
+    scales: Optional[Sequence[float]] = None,
+    offsets: Optional[Sequence[float]] = None,
+) -> np.ndarray:
+    """
+    Decode codes into an approximate ``(len(codes), dim)`` float32 matrix.
+
+    Binary codes decode to ``±1`` per dimension, which preserves cosine ranking.
+    """
+    _check_encoding(encoding)
+    if not codes:
+        return np.empty((0, dim), dtype=np.float32)
+    buffer = b"".join(codes)
+
+    if encoding == "float32":
+        return np.frombuffer(buffer, dtype="<f4").reshape(-1, dim).copy()
+    if encoding == "float16":
+        return np.frombuffer(buffer, dtype="<f2").reshape(-1, dim).astype(np.float32)
+    if encoding == "binary":
+        bits = np.unpackbits(
+            np.frombuffer(buffer, dtype=np.uint8).reshape(len(codes), -1), axis=1
+        )[:, :dim]
+        return bits.astype(np.float32) * 2 - 1
+
+    codes_matrix = np.frombuffer(buffer, dtype=np.int8).reshape(-1, dim)
+    scales = np.asarray(scales, dtype=np.float32)[:, None]
+    offsets = np.asarray(offsets, dtype=np.float32)[:, None]
+    return (codes_matrix.astype(np.float32) + 128) * scales + offsets
+
+
+def cosine_scores(query: np.ndarray, vectors: np.ndarray) -> np.ndarray:
+    """Cosine similarity between one query and each row of ``vectors``."""
+    query = np.asarray(query, dtype=np.float32).ravel()
+    norms = np.linalg.norm(vectors, axis=1) * (np.linalg.norm(query) or 1.0)
+    norms[norms == 0] = 1.0
+    return (vectors @ query) / norms
+
+
+def search_encoded(
+    query: np.ndarray,
+    ids: Sequence[int],
+    codes: Sequence[bytes],
+    encoding: str,
+    top_k: int,
+    scales: Optional[Sequence[float]] = None,
+    offsets: Optional[Sequence[float]] = None,
+    load_full: Optional[Callable[[List[int]], np.ndarray]] = None,
+    rescore_factor: int = 4,
+) -> List[Tuple[int, float]]:
+    """
+    Rank encoded vectors against ``query`` and return ``(id, score)`` pairs.
+
+    Approximate scores from the codes pick ``top_k * rescore_factor``
+    candidates; if ``load_full`` is given (and the encoding is lossy) those are
+    rescored with full-precision vectors, returned in the order of its ``ids``.
+    """
+    if not ids or top_k <= 0:
+        return []
+    query = np.asarray(query, dtype=np.float32).ravel()
+    approximate = cosine_scores(
+        query, decode_vectors(codes, encoding, len(query), scales, offsets)
+    )
+
+    rescore = encoding != "float32" and load_full is not None
+    shortlist = min(len(ids), top_k * rescore_factor if rescore else top_k)
+    order = np.argsort(-approximate, kind="stable")[:shortlist]
+    if not rescore:
+        return [(ids[i], float(approximate[i])) for i in order]
+
+    candidates = [ids[i] for i in order]
+    scores = cosine_scores(query, np.asarray(load_full(candidates), dtype=np.float32))
+    ranked = np.argsort(-scores, kind="stable")[:top_k]
+    return [(candidates[i], float(scores[i])) for i in ranked]
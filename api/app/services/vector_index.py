@@ -0,0 +1,542 @@
+"""
+In-process vector index over chunk embeddings.
+
+Used by ``/search`` when the database has no pgvector (SQLite deployments
+and tests), and as a baseline to benchmark pgvector against. It is built
+from the chunks' compact codes (see ``vector_codec``), so it shortlists
+candidates that search then rescores with full precision. Vectors are
+kept L2-normalized in one float32 matrix, so cosine similarity is a dot
+product:
+
+- ``flat``: exact search, scoring the matrix in fixed-size blocks so memory
+  stays bounded however many chunks there are
+- ``ivf``: vectors are clustered with spherical k-means; a search scores only
+  the ``probes`` lists whose centroids are closest to the query
+
+The index is updated as this process commits chunk embeddings (see
+``track_chunk_changes``). Writes the ORM events cannot see (bulk
+``update()``/``delete()`` statements, other workers) are caught up by
+re-syncing with the database every ``VECTOR_INDEX_SYNC_SECONDS``: chunks
+whose ``updated_at`` is past the last sync are re-read, and deletions are
+read from the trigger-written ``document_chunk_deletion`` log, so a sync costs
+the number of changes rather than the number of chunks. The index
+is saved as ``.npy`` files that are memory-mapped on load, at most every
+``VECTOR_INDEX_SAVE_SECONDS`` while it has unsaved changes and at shutdown, so
+a restart does not re-read every embedding from the database; chunks changed
+since the snapshot are caught up with one query.
+"""
+import datetime
+import json
+import os
+import threading
+import time
+from typing import Dict, Iterable, List, Optional, Sequence, Tuple
+
+import numpy as np
+from loguru import logger
+from sqlalchemy import event, inspect, or_
+from sqlalchemy.orm import Session
+
+from app.core.config import settings
+from app.models.document import DocumentChunk, DocumentChunkDeletion
+from app.services.vector_codec import decode_vectors
+
+KINDS = ("flat", "ivf")
+KMEANS_ITERATIONS = 10
+KMEANS_SAMPLE_SIZE = 50000
+
+# A write committed after a sync can carry an earlier updated_at (set when its
+# statement ran), so each sync also re-reads chunks updated shortly before it
+SYNC_OVERLAP = datetime.timedelta(seconds=60)
+
+
+def _normalize(vectors: np.ndarray) -> np.ndarray:
+    vectors = np.asarray(vectors, dtype=np.float32)
+    norms = np.linalg.norm(vectors, axis=-1, keepdims=True)
+    norms[norms == 0] = 1.0
+    return vectors / norms
+
+
+def chunk_vector(
+    dim: int,
+    code: Optional[bytes],
+    encoding: Optional[str],
+    scale: Optional[float],
+    offset: Optional[float],
+    vector: Optional[np.ndarray],
+) -> Optional[np.ndarray]:
+    """
+    A chunk's vector for the index: its decoded compact code, or the pgvector
+    copy for chunks stored before codes were kept.
+    """
+    if code is not None:
+        return decode_vectors([code], encoding or "float32", dim, [scale], [offset])[0]
+    return vector
+
+
+def _keep_top(
+    scores: np.ndarray, ids: np.ndarray, top_k: int
+) -> Tuple[np.ndarray, np.ndarray]:
+    """The ``top_k`` best (score, id) pairs, unordered."""
+    if len(scores) > top_k:
+        best = np.argpartition(-scores, top_k - 1)[:top_k]
+        return scores[best], ids[best]
+    return scores, ids
+
+
+class VectorIndex:
+    """
+    Cosine-similarity index of ``(chunk id, vector)`` pairs.
+
+    Not thread-safe on its own; ``get_vector_index`` callers share it under
+    ``lock``.
+    """
+
+    def __init__(
+        self,
+        dim: int,
+        kind: str = "flat",
+        lists: int = 0,
+        probes: int = 8,
+        block_size: int = 65536,
+    ):
+        if kind not in KINDS:
+            raise ValueError(f"Unknown vector index '{kind}'. Must be one of {KINDS}")
+        self.dim = dim
+        self.kind = kind
+        self.lists = lists
+        self.probes = max(1, probes)
+        self.block_size = max(1, block_size)
+        self.lock = threading.RLock()
+
+        self._count = 0
+        self._vectors = np.empty((0, dim), dtype=np.float32)
+        self._ids = np.empty(0, dtype=np.int64)
+        self._assignments = np.empty(0, dtype=np.int32)
+        self._centroids: Optional[np.ndarray] = None
+        self._rows: Dict[int, int] = {}
+        self.synced_at: Optional[datetime.datetime] = None
+        # Monotonic times of the last sync and save, and unsaved changes
+        self.checked_at = 0.0
+        self.saved_at = 0.0
+        self.dirty = False
+
+    def __len__(self) -> int:
+        return self._count
+
+    def __contains__(self, chunk_id: int) -> bool:
+        return chunk_id in self._rows
+
+    @property
+    def ids(self) -> np.ndarray:
+        return self._ids[: self._count]
+
+    @property
+    def trained(self) -> bool:
+        return self._centroids is not None
+
+    def _reserve(self, count: int) -> None:
+        """Make room for ``count`` rows (loaded snapshots are read-only maps)."""
+        capacity = len(self._vectors)
+        if count <= capacity and self._vectors.flags.writeable:
+            return
+        if count > capacity:
+            capacity = max(count, capacity * 2, 1024)
+        n = self._count
+        for name, dtype, shape in (
+            ("_vectors", np.float32, (capacity, self.dim)),
+            ("_ids", np.int64, (capacity,)),
+            ("_assignments", np.int32, (capacity,)),
+        ):
+            grown = np.zeros(shape, dtype=dtype)
+            grown[:n] = getattr(self, name)[:n]
+            setattr(self, name, grown)
+
+    def add(self, ids: Sequence[int], vectors: np.ndarray) -> None:
+        """Insert or replace the vectors of the given chunk IDs."""
+        if len(ids) == 0:
+            return
+        self.dirty = True
+        vectors = _normalize(np.asarray(vectors).reshape(len(ids), self.dim))
+        self._reserve(self._count + len(ids))
+        assignments = self._assign(vectors)
+        for chunk_id, vector, assignment in zip(ids, vectors, assignments):
+            row = self._rows.get(int(chunk_id))
+            if row is None:
+                row = self._rows[int(chunk_id)] = self._count
+                self._count += 1
+            self._vectors[row] = vector
+            self._ids[row] = chunk_id
+            self._assignments[row] = assignment
+
+    def remove(self, ids: Iterable[int]) -> None:
+        """Drop chunk IDs; the last row is moved into each freed slot."""
+        for chunk_id in ids:
+            row = self._rows.pop(int(chunk_id), None)
+            if row is None:
+                continue
+            self.dirty = True
+            self._reserve(self._count)
+            last = self._count - 1
+            if row != last:
+                self._vectors[row] = self._vectors[last]
+                self._ids[row] = self._ids[last]
+                self._assignments[row] = self._assignments[last]
+                self._rows[int(self._ids[row])] = row
+            self._count -= 1
+
+    def _assign(self, vectors: np.ndarray) -> np.ndarray:
+        if self._centroids is None:
+            return np.zeros(len(vectors), dtype=np.int32)
+        return np.argmax(vectors @ self._centroids.T, axis=1).astype(np.int32)
+
+    def train(self, seed: int = 0) -> None:
+        """Cluster the current vectors into IVF lists (no-op for ``flat``)."""
+        if self.kind != "ivf" or self._count == 0:
+            return
+        lists = self.lists or int(np.sqrt(self._count))
+        lists = max(1, min(lists, self._count))
+        rng = np.random.default_rng(seed)
+        vectors = self._vectors[: self._count]
+        sample = vectors
+        if self._count > KMEANS_SAMPLE_SIZE:
+            sample = vectors[rng.choice(self._count, KMEANS_SAMPLE_SIZE, replace=False)]
+
+        centroids = sample[rng.choice(len(sample), lists, replace=False)].copy()
+        for _ in range(KMEANS_ITERATIONS):
+            nearest = np.argmax(sample @ centroids.T, axis=1)
+            for i in range(lists):
+                members = sample[nearest == i]
+                if len(members):
+                    centroids[i] = members.sum(axis=0)
+            centroids = _normalize(centroids)
+
+        self._centroids = centroids
+        self.dirty = True
+        self._reserve(self._count)
+        for start in range(0, self._count, self.block_size):
+            end = min(start + self.block_size, self._count)
+            self._assignments[start:end] = self._assign(vectors[start:end])
+
+    def search(
+        self, query: np.ndarray, top_k: int, probes: Optional[int] = None
+    ) -> List[Tuple[int, float]]:
+        """The ``top_k`` most similar chunk IDs with their cosine scores."""
+        if self._count == 0 or top_k <= 0:
+            return []
+        query = _normalize(query).ravel()
+        rows = None
+        if self.trained:
+            probes = min(probes or self.probes, len(self._centroids))
+            nearest_lists = np.argsort(-(self._centroids @ query))[:probes]
+            rows = np.flatnonzero(
+                np.isin(self._assignments[: self._count], nearest_lists)
+            )
+
+        total = self._count if rows is None else len(rows)
+        best_scores = np.empty(0, dtype=np.float32)
+        best_ids = np.empty(0, dtype=np.int64)
+        # Blocked matmul keeps the score buffer at block_size floats
+        for start in range(0, total, self.block_size):
+            end = min(start + self.block_size, total)
+            if rows is None:
+                block, block_ids = self._vectors[start:end], self._ids[start:end]
+            else:
+                block_rows = rows[start:end]
+                block, block_ids = self._vectors[block_rows], self._ids[block_rows]
+            scores, ids = _keep_top(block @ query, block_ids, top_k)
+            best_scores, best_ids = _keep_top(
+                np.concatenate([best_scores, scores]),
+                np.concatenate([best_ids, ids]),
+                top_k,
+            )
+
+        order = np.argsort(-best_scores, kind="stable")
+        return [(int(best_ids[i]), float(best_scores[i])) for i in order]
+
+    def save(self, directory: str) -> None:
+        """Write a snapshot; files are replaced atomically one by one, metadata last."""
+        os.makedirs(directory, exist_ok=True)
+        arrays = {
+            "vectors": self._vectors[: self._count],
+            "ids": self._ids[: self._count],
+            "assignments": self._assignments[: self._count],
+        }
+        if self._centroids is not None:
+            arrays["centroids"] = self._centroids
+        for name, array in arrays.items():
+            path = os.path.join(directory, f"{name}.npy")
+            with open(f"{path}.tmp", "wb") as f:
+                np.save(f, np.ascontiguousarray(array))
+            os.replace(f"{path}.tmp", path)
+
+        meta = {
+            "dim": self.dim,
+            "kind": self.kind,
+            "count": self._count,
+            "trained": self._centroids is not None,
+            "synced_at": self.synced_at.isoformat() if self.synced_at else None,
+        }
+        path = os.path.join(directory, "meta.json")
+        with open(f"{path}.tmp", "w") as f:
+            json.dump(meta, f)
+        os.replace(f"{path}.tmp", path)
+        self.saved_at = time.monotonic()
+        self.dirty = False
+
+    @classmethod
+    def load(cls, directory: str, **kwargs) -> Optional["VectorIndex"]:
+        """
+        Memory-map a snapshot, or ``None`` if there is no usable one.
+
+        The snapshot must match ``dim`` and ``kind``; arrays stay mapped
+        read-only until the first update copies them into memory.
+        """
+        try:
+            with open(os.path.join(directory, "meta.json")) as f:
+                meta = json.load(f)
+        except (OSError, ValueError):
+            return None
+
+        index = cls(**kwargs)
+        if meta.get("dim") != index.dim or meta.get("kind") != index.kind:
+            logger.info("Vector index snapshot does not match the settings, ignoring")
+            return None
+        try:
+            arrays = {
+                name: np.load(os.path.join(directory, f"{name}.npy"), mmap_mode="r")
+                for name in ("vectors", "ids", "assignments")
+            }
+            if meta.get("trained"):
+                index._centroids = np.load(os.path.join(directory, "centroids.npy"))
+        except (OSError, ValueError) as e:
+            logger.warning(f"Unreadable vector index snapshot: {e}")
+            return None
+
+        count = int(meta["count"])
+        if any(len(array) != count for array in arrays.values()):
+            return None
+        index._vectors = arrays["vectors"]
+        index._ids = arrays["ids"]
+        index._assignments = arrays["assignments"]
+        index._count = count
+        index._rows = {int(chunk_id): row for row, chunk_id in enumerate(index._ids)}
+        if meta.get("synced_at"):
+            index.synced_at = datetime.datetime.fromisoformat(meta["synced_at"])
+        index.saved_at = time.monotonic()
+        return index
+
+    def sync(self, db: Session) -> int:
+        """
+        Catch up with the database: add chunks updated since ``synced_at``
+        (all chunks for a new index) and drop deleted ones.
+        """
+        started = datetime.datetime.utcnow()
+        query = db.query(
+            DocumentChunk.id,
+            DocumentChunk.embedding,
+            DocumentChunk.embedding_encoding,
+            DocumentChunk.embedding_scale,
+            DocumentChunk.embedding_offset,
+            DocumentChunk.embedding_vector,
+        ).filter(
+            or_(
+                DocumentChunk.embedding.isnot(None),
+                DocumentChunk.embedding_vector.isnot(None),
+            )
+        )
+        if self.synced_at is not None:
+            query = query.filter(
+                DocumentChunk.updated_at >= self.synced_at - SYNC_OVERLAP
+            )
+
+        changed = 0
+        ids, vectors = [], []
+        for chunk_id, *stored in query.yield_per(self.block_size):
+            ids.append(chunk_id)
+            vectors.append(chunk_vector(self.dim, *stored))
+            if len(ids) == self.block_size:
+                self.add(ids, np.stack(vectors))
+                changed += len(ids)
+                ids, vectors = [], []
+        if ids:
+            self.add(ids, np.stack(vectors))
+            changed += len(ids)
+
+        if self.synced_at is not None and self._count:
+            changed += self._sync_deletions(db, self.synced_at - SYNC_OVERLAP)
+
+        if self.kind == "ivf" and not self.trained:
+            self.train()
+        self.synced_at = started
+        self.checked_at = time.monotonic()
+        return changed
+
+    def _sync_deletions(self, db: Session, since: datetime.datetime) -> int:
+        """
+        Drop indexed chunks logged as deleted since ``since``. An ID that
+        exists again (SQLite can reuse the highest one) is kept.
+        """
+        logged = {
+            chunk_id
+            for (chunk_id,) in db.query(DocumentChunkDeletion.chunk_id)
+            .filter(DocumentChunkDeletion.created_at >= since)
+            .distinct()
+            if chunk_id in self
+        }
+        removed = 0
+        logged = sorted(logged)
+        for start in range(0, len(logged), self.block_size):
+            batch = logged[start : start + self.block_size]
+            existing = {
+                chunk_id
+                for (chunk_id,) in db.query(DocumentChunk.id).filter(
+                    DocumentChunk.id.in_(batch)
+                )
+            }
+            deleted = [chunk_id for chunk_id in batch if chunk_id not in existing]
+            self.remove(deleted)
+            removed += len(deleted)
+        return removed
+
+    def stats(self) -> Dict[str, object]:
+        return {
+            "kind": self.kind,
+            "vectors": self._count,
+            "lists": 0 if self._centroids is None else len(self._centroids),
+        }
+
+
+_index: Optional[VectorIndex] = None
+_index_lock = threading.Lock()
+
+
+def snapshot_dir() -> str:
+    return settings.VECTOR_INDEX_DIR or os.path.join(
+        settings.LIGHTRAG_WORKING_DIR, "vector_index"
+    )
+
+
+def _index_options() -> Dict[str, object]:
+    return {
+        "dim": int(settings.EMBEDDING_DIM),
+        "kind": settings.VECTOR_INDEX_KIND,
+        "lists": int(settings.VECTOR_INDEX_IVF_LISTS),
+        "probes": int(settings.VECTOR_INDEX_IVF_PROBES),
+        "block_size": int(settings.VECTOR_INDEX_BLOCK_SIZE),
+    }
+
+
+def _due(last: float, interval_setting: float) -> bool:
+    return time.monotonic() - last >= float(interval_setting)
+
+
+def _maintain(index: VectorIndex, db: Session) -> None:
+    """Re-sync and save ``index`` if their intervals have passed."""
+    if _due(index.checked_at, settings.VECTOR_INDEX_SYNC_SECONDS):
+        with index.lock:
+            # Another request may have synced while this one waited
+            if _due(index.checked_at, settings.VECTOR_INDEX_SYNC_SECONDS):
+                index.sync(db)
+    if index.dirty and _due(index.saved_at, settings.VECTOR_INDEX_SAVE_SECONDS):
+        with index.lock:
+            if index.dirty:
+                index.save(snapshot_dir())
+
+
+def get_vector_index(db: Session) -> VectorIndex:
+    """
+    The process-wide index, loaded from its snapshot (or built from the
+    database) on first use and caught up with ``db``; afterwards re-synced
+    and saved when their intervals have passed.
+    """
+    global _index
+    if _index is not None:
+        _maintain(_index, db)
+        return _index
+
+    with _index_lock:
+        if _index is None:
+            index = VectorIndex.load(snapshot_dir(), **_index_options())
+            if index is None:
+                index = VectorIndex(**_index_options())
+            with index.lock:
+                changed = index.sync(db)
+            logger.info(
+                f"Vector index ready with {len(index)} vectors "
+                f"({changed} loaded from the database)"
+            )
+            _index = index
+    return _index
+
+
+def save_vector_index() -> None:
+    """Snapshot the index, if it was opened in this process."""
+    if _index is not None:
+        with _index.lock:
+            _index.save(snapshot_dir())
+
+
+def vector_index_stats() -> Optional[Dict[str, object]]:
+    return None if _index is None else _index.stats()
+
+
+def _pending_changes(session: Session) -> Dict[int, Optional[np.ndarray]]:
+    return session.info.setdefault("vector_index_changes", {})
+
+
+def track_chunk_changes() -> None:
+    """
+    Keep the open index in step with committed chunk embeddings.
+
+    Changes are collected at flush and applied only once the transaction
+    commits, so rolled-back writes never reach the index.
+    """
+
+    @event.listens_for(Session, "before_flush")
+    def collect(session, flush_context, instances):
+        if _index is None:
+            return
+        changes = _pending_changes(session)
+        for chunk in list(session.new) + list(session.dirty):
+            if not isinstance(chunk, DocumentChunk):
+                continue
+            attrs = inspect(chunk).attrs
+            changed = (
+                attrs.embedding.history.has_changes()
+                or attrs.embedding_vector.history.has_changes()
+            )
+            if chunk in session.new or changed:
+                changes[chunk] = chunk_vector(
+                    _index.dim,
+                    chunk.embedding,
+                    chunk.embedding_encoding,
+                    chunk.embedding_scale,
+                    chunk.embedding_offset,
+                    chunk.embedding_vector,
+                )
+        for chunk in session.deleted:
+            if isinstance(chunk, DocumentChunk):
+                changes[chunk] = None
+
+    @event.listens_for(Session, "after_commit")
+    def apply(session):
+        changes = session.info.pop("vector_index_changes", None)
+        if not changes or _index is None:
+            return
+        with _index.lock:
+            for chunk, vector in changes.items():
+                chunk_id = inspect(chunk).identity
+                if chunk_id is None:
+                    continue
+                if vector is None:
+                    _index.remove([chunk_id[0]])
+                else:
+                    _index.add([chunk_id[0]], np.asarray(vector)[None, :])
+
+    @event.listens_for(Session, "after_rollback")
+    def discard(session):
+        session.info.pop("vector_index_changes", None)
+
+
+track_chunk_changes()
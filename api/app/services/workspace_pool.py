@@ -0,0 +1,153 @@
+"""
+Bounded pool of per-workspace (tenant) services.
+
+Each workspace gets its own service instance, created on first use. At most
+``max_open`` instances stay open: when another workspace is opened, the least
+recently used instances that are not in use are closed, as are instances
+left idle for longer than ``idle_seconds``. A closed workspace is simply
+opened again on its next use.
+
+Callers hold a lease (``async with pool.lease(workspace) as service``) while
+they use an instance, so it is never closed under them; when every open
+instance is leased the pool temporarily exceeds its cap rather than waiting.
+Pinned workspaces (the default one) are never closed.
+"""
+import asyncio
+import time
+from collections import OrderedDict
+from contextlib import asynccontextmanager
+from typing import Any, AsyncIterator, Callable, Dict, Iterable, List, Optional
+
+from loguru import logger
+
+
+class _Entry:
+    __slots__ = ("service", "leases", "last_used")
+
+    def __init__(self, service: Any):
+        self.service = service
+        self.leases = 0
+        self.last_used = time.monotonic()
+
+
+class WorkspacePool:
+    """
+    LRU cache of open per-workspace services.
+
+    ``factory(workspace)`` creates a service; services are closed with their
+    async ``close()`` method.
+    """
+
+    def __init__(
+        self,
+        factory: Callable[[str], Any],
+        max_open: int,
+        idle_seconds: float,
+        pinned: Iterable[str] = (),
+    ):
+        self.factory = factory
+        self.max_open = max(1, int(max_open))
+        self.idle_seconds = float(idle_seconds)
+        self.pinned = set(pinned)
+        self._entries: "OrderedDict[str, _Entry]" = OrderedDict()
+        self._lock = asyncio.Lock()
+        self._sweeper: Optional[asyncio.Task] = None
+
+        self.opened = 0
+        self.evicted = 0
+
+    async def get(self, workspace: str) -> Any:
+        """
+        The workspace's service, without a lease.
+
+        Only safe for pinned workspaces or short, non-awaiting uses.
+        """
+        entry = await self._acquire(workspace, lease=False)
+        return entry.service
+
+    @asynccontextmanager
+    async def lease(self, workspace: str) -> AsyncIterator[Any]:
+        """Use the workspace's service, keeping it open until released."""
+        entry = await self._acquire(workspace, lease=True)
+        try:
+            yield entry.service
+        finally:
+            entry.leases -= 1
+            entry.last_used = time.monotonic()
+
+    async def _acquire(self, workspace: str, lease: bool) -> _Entry:
+        async with self._lock:
+            entry = self._entries.get(workspace)
+            if entry is None:
+                entry = _Entry(self.factory(workspace))
+                self._entries[workspace] = entry
+                self.opened += 1
+            self._entries.move_to_end(workspace)
+            entry.last_used = time.monotonic()
+            if lease:
+                entry.leases += 1
+            evicted = self._select_evictions(time.monotonic(), keep=workspace)
+        await self._close(evicted)
+        return entry
+
+    def _select_evictions(self, now: float, keep: Optional[str] = None) -> List[tuple]:
+        """Remove and return idle entries and the LRU ones over the cap."""
+        evicted = []
+        excess = len(self._entries) - self.max_open
+        # Least recently used first
+        for workspace, entry in list(self._entries.items()):
+            if workspace == keep or workspace in self.pinned or entry.leases:
+                continue
+            idle = self.idle_seconds > 0 and now - entry.last_used > self.idle_seconds
+            if excess > 0 or idle:
+                del self._entries[workspace]
+                evicted.append((workspace, entry))
+                excess -= 1
+        return evicted
+
+    async def _close(self, evicted: List[tuple]) -> None:
+        for workspace, entry in evicted:
+            self.evicted += 1
+            try:
+                await entry.service.close()
+                logger.info(f"Closed idle workspace '{workspace}'")
+            except Exception as e:
+                logger.warning(f"Error closing workspace '{workspace}': {e}")
+
+    async def sweep(self) -> int:
+        """Close workspaces idle for longer than ``idle_seconds``."""
+        async with self._lock:
+            evicted = self._select_evictions(time.monotonic())
+        await self._close(evicted)
+        return len(evicted)
+
+    async def _sweep_periodically(self) -> None:
+        while True:
+            await asyncio.sleep(max(1.0, self.idle_seconds / 2))
+            await self.sweep()
+
+    async def start(self) -> None:
+        """Start closing idle workspaces in the background."""
+        if self._sweeper is None and self.idle_seconds > 0:
+            self._sweeper = asyncio.create_task(self._sweep_periodically())
+
+    async def stop(self) -> None:
+        """Stop the sweeper and close every open workspace."""
+        task, self._sweeper = self._sweeper, None
+        if task is not None:
+            task.cancel()
+            await asyncio.gather(task, return_exceptions=True)
+        async with self._lock:
+            entries = list(self._entries.items())
+            self._entries.clear()
+        await self._close(entries)
+
+    def stats(self) -> Dict[str, Any]:
+        """Open workspaces and open/eviction counters for monitoring."""
+        return {
+            "open": len(self._entries),
+            "max_open": self.max_open,
+            "leased": sum(1 for entry in self._entries.values() if entry.leases),
+            "opened": self.opened,
+            "evicted": self.evicted,
+        }
@@ -0,0 +1,3 @@
+"""
+Load-testing and test utilities (e.g. the model stand-in server).
+"""
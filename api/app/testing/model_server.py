@@ -0,0 +1,243 @@
+"""
+Deterministic OpenAI-compatible stand-in server for load testing.
+
+Serves ``/v1/chat/completions`` (including ``stream=true``) and
+``/v1/embeddings`` with configurable latency distributions and error
+injection. Embeddings are derived from a hash of the input text, so the same
+text always maps to the same unit vector and runs are reproducible.
+
+Run standalone and point ``MODEL_BASE_URL``/``EMBEDDING_MODEL_BASE_URL`` at it:
+
+    python -m app.testing.model_server --port 9000 --chat-latency lognormal:300:0.5
+
+Latency specs are in milliseconds: ``fixed:MS``, ``uniform:LOW:HIGH``,
+``lognormal:MEDIAN:SIGMA`` or ``exp:MEAN``.
+"""
+import argparse
+import asyncio
+import base64
+import hashlib
+import json
+import math
+import random
+import socket
+import threading
+import time
+from typing import Any, Callable, Dict, List, Optional
+
+import numpy as np
+import uvicorn
+from fastapi import FastAPI, Request
+from fastapi.responses import JSONResponse, StreamingResponse
+from pydantic import BaseModel, Field
+
+Sampler = Callable[[random.Random], float]
+
+
+def parse_latency(spec: str) -> Sampler:
+    """
+    Parse a latency spec (milliseconds) into a sampler returning seconds.
+    """
+    kind, _, args = spec.partition(":")
+    values = [float(value) for value in args.split(":") if value]
+    try:
+        if kind == "fixed":
+            (ms,) = values
+            return lambda rng: ms / 1000
+        if kind == "uniform":
+            low, high = values
+            return lambda rng: rng.uniform(low, high) / 1000
+        if kind == "lognormal":
+            median, sigma = values
+            return lambda rng: rng.lognormvariate(math.log(median), sigma) / 1000
+        if kind == "exp":
+            (mean,) = values
+            return lambda rng: rng.expovariate(1 / mean) / 1000 if mean else 0.0
+    except ValueError:
+        pass
+    raise ValueError(f"Invalid latency spec '{spec}'")
+
+
+def hash_embedding(text: str, dim: int) -> np.ndarray:
+    """Deterministic unit-length float32 embedding seeded by a hash of ``text``."""
+    digest = hashlib.blake2b(text.encode("utf-8"), digest_size=8).digest()
+    seed = int.from_bytes(digest, "little")
+    vector = np.random.default_rng(seed).standard_normal(dim).astype(np.float32)
+    return vector / np.linalg.norm(vector)
+
+
+class StubModelConfig(BaseModel):
+    """
+    Behaviour of the stand-in server.
+    """
+
+    embedding_dim: int = Field(1024, description="Dimension of returned embeddings")
+    chat_latency: str = Field("fixed:0", description="Time to first token")
+    token_latency: str = Field("fixed:0", description="Delay per generated token")
+    embedding_latency: str = Field("fixed:0", description="Delay per embeddings call")
+    response_tokens: int = Field(16, description="Tokens per chat completion")
+    error_rate: float = Field(0.0, description="Fraction of requests answered with 500")
+    rate_limit_rate: float = Field(0.0, description="Fraction answered with 429")
+    retry_after: float = Field(1.0, description="Retry-After seconds sent with 429")
+    seed: int = Field(0, description="Seed for latency and error sampling")
+
+
+def create_app(config: StubModelConfig = StubModelConfig()) -> FastAPI:
+    """Build the stand-in server application for ``config``."""
+    app = FastAPI(title="EmbedIQ model stand-in")
+    rng = random.Random(config.seed)
+    chat_latency = parse_latency(config.chat_latency)
+    token_latency = parse_latency(config.token_latency)
+    embedding_latency = parse_latency(config.embedding_latency)
+    counters = {"chat": 0, "embeddings": 0, "errors": 0, "rate_limited": 0}
+    app.state.counters = counters
+
+    def injected_error() -> Optional[JSONResponse]:
+        roll = rng.random()
+        if roll < config.rate_limit_rate:
+            counters["rate_limited"] += 1
+            return JSONResponse(
+                {"error": {"message": "Rate limit exceeded", "type": "rate_limit"}},
+                status_code=429,
+                headers={"Retry-After": str(config.retry_after)},
+            )
+        if roll < config.rate_limit_rate + config.error_rate:
+            counters["errors"] += 1
+            return JSONResponse(
+                {"error": {"message": "Injected failure", "type": "server_error"}},
+                status_code=500,
+            )
+        return None
+
+    def answer_tokens(messages: List[Dict[str, Any]]) -> List[str]:
+        digest = hashlib.sha256(
+            json.dumps(messages, sort_keys=True).encode("utf-8")
+        ).hexdigest()
+        offsets = [(i * 8) % len(digest) for i in range(config.response_tokens)]
+        return [f"{digest[offset:offset + 8]} " for offset in offsets]
+
+    @app.post("/v1/chat/completions")
+    async def chat_completions(request: Request):
+        body = await request.json()
+        counters["chat"] += 1
+        error = injected_error()
+        if error is not None:
+            return error
+
+        tokens = answer_tokens(body.get("messages", []))
+        model = body.get("model", "stub")
+        await asyncio.sleep(chat_latency(rng))
+
+        if body.get("stream"):
+
+            async def events():
+                for i, token in enumerate(tokens):
+                    if i:
+                        await asyncio.sleep(token_latency(rng))
+                    chunk = {
+                        "model": model,
+                        "choices": [{"index": 0, "delta": {"content": token}}],
+                    }
+                    yield f"data: {json.dumps(chunk)}\n\n"
+                yield "data: [DONE]\n\n"
+
+            return StreamingResponse(events(), media_type="text/event-stream")
+
+        await asyncio.sleep(sum(token_latency(rng) for _ in tokens[1:]))
+        return {
+            "id": f"stub-{counters['chat']}",
+            "object": "chat.completion",
+            "model": model,
+            "choices": [
+                {
+                    "index": 0,
+                    "message": {"role": "assistant", "content": "".join(tokens)},
+                    "finish_reason": "stop",
+                }
+            ],
+            "usage": {"completion_tokens": len(tokens)},
+        }
+
+    @app.post("/v1/embeddings")
+    async def embeddings(request: Request):
+        body = await request.json()
+        counters["embeddings"] += 1
+        error = injected_error()
+        if error is not None:
+            return error
+
+        texts = body.get("input", [])
+        if isinstance(texts, str):
+            texts = [texts]
+        await asyncio.sleep(embedding_latency(rng))
+
+        as_base64 = body.get("encoding_format") == "base64"
+        data = []
+        for i, text in enumerate(texts):
+            vector = hash_embedding(text, config.embedding_dim)
+            data.append(
+                {
+                    "object": "embedding",
+                    "index": i,
+                    "embedding": (
+                        base64.b64encode(vector.astype("<f4").tobytes()).decode()
+                        if as_base64
+                        else vector.tolist()
+                    ),
+                }
+            )
+        return {"object": "list", "model": body.get("model", "stub"), "data": data}
+
+    @app.get("/stats")
+    async def stats():
+        return counters
+
+    return app
+
+
+class StubModelServer:
+    """
+    Run the stand-in server on a background thread (e.g. inside tests).
+    """
+
+    def __init__(self, config: StubModelConfig = StubModelConfig(), port: int = 0):
+        if not port:
+            with socket.socket() as sock:
+                sock.bind(("127.0.0.1", 0))
+                port = sock.getsockname()[1]
+        self.app = create_app(config)
+        self.base_url = f"http://127.0.0.1:{port}/v1"
+        self._server = uvicorn.Server(
+            uvicorn.Config(self.app, host="127.0.0.1", port=port, log_level="error")
+        )
+        self._thread = threading.Thread(target=self._server.run, daemon=True)
+
+    @property
+    def counters(self) -> Dict[str, int]:
+        return self.app.state.counters
+
+    def start(self) -> "StubModelServer":
+        self._thread.start()
+        while not self._server.started:
+            time.sleep(0.01)
+        return self
+
+    def stop(self) -> None:
+        self._server.should_exit = True
+        self._thread.join(timeout=5)
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="OpenAI-compatible stand-in server")
+    parser.add_argument("--host", default="127.0.0.1")
+    parser.add_argument("--port", type=int, default=9000)
+    for name, field in StubModelConfig.model_fields.items():
+        parser.add_argument(
+            f"--{name.replace('_', '-')}",
+            type=type(field.default),
+            default=field.default,
+            help=field.description,
+        )
+    args = vars(parser.parse_args())
+    host, port = args.pop("host"), args.pop("port")
+    uvicorn.run(create_app(StubModelConfig(**args)), host=host, port=port)
@@ -1,11 +1,23 @@
+import asyncio
+
+import numpy as np
 import pytest
 from fastapi.testclient import TestClient
 from sqlalchemy import create_engine
+from sqlalchemy.ext.asyncio import AsyncSession, create_async_engine
 from sqlalchemy.orm import sessionmaker
-from sqlalchemy.pool import StaticPool
+from sqlalchemy.pool import NullPool, StaticPool
 
+from app.core import database
+from app.core.config import settings
 from app.core.database import Base, get_db
+from app.core.http_client import http_client_pool
 from app.main import app
+from app.services import vector_index
+from app.testing.model_server import StubModelConfig, StubModelServer
+
+# Tests never initialize real LightRAG storages at startup
+settings.LIGHTRAG_WARMUP_ENABLED = False
 
 
 # Create a test database engine and session factory
@@ -70,3 +82,94 @@ def client(db_session):
 
     # Clear dependency overrides
     app.dependency_overrides.clear()
+
+
+@pytest.fixture
+def async_session_factory(tmp_path, monkeypatch):
+    """
+    Point ``get_db`` and ``get_session`` at a fresh SQLite database on an
+    async engine, as the API runs, and return its session factory.
+    """
+    # Unpooled: the test and the test client each run their own event loop
+    async_engine = create_async_engine(
+        f"sqlite+aiosqlite:///{tmp_path / 'api.db'}", poolclass=NullPool
+    )
+
+    async def create_tables():
+        async with async_engine.begin() as conn:
+            await conn.run_sync(Base.metadata.create_all)
+
+    asyncio.run(create_tables())
+    factory = sessionmaker(
+        class_=AsyncSession,
+        autocommit=False,
+        autoflush=False,
+        expire_on_commit=False,
+        bind=async_engine,
+    )
+    monkeypatch.setattr(database, "AsyncSessionLocal", factory)
+
+    yield factory
+
+    asyncio.run(async_engine.dispose())
+
+
+@pytest.fixture
+def async_client(async_session_factory):
+    """
+    Create a test client using the real async ``get_db``.
+    """
+    with TestClient(app) as client:
+        yield client
+
+
+@pytest.fixture(autouse=True)
+def fresh_vector_index(tmp_path, monkeypatch):
+    """
+    Each test starts without an in-process vector index or snapshot.
+    """
+    monkeypatch.setattr(settings, "VECTOR_INDEX_DIR", str(tmp_path / "vector_index"))
+    monkeypatch.setattr(vector_index, "_index", None)
+
+
+@pytest.fixture
+def fake_embed():
+    """
+    Factory of embedding functions that record each call's texts in ``calls``
+    and return rows of ``[len(text), position, 1.0]``.
+    """
+
+    def make(calls):
+        async def embed(texts):
+            calls.append(list(texts))
+            return np.array([[len(t), i, 1.0] for i, t in enumerate(texts)])
+
+        return embed
+
+    return make
+
+
+@pytest.fixture
+def stub_model_config():
+    """
+    Stand-in server behaviour; override this fixture to inject latency or errors.
+    """
+    return StubModelConfig(embedding_dim=int(settings.EMBEDDING_DIM))
+
+
+@pytest.fixture
+def stub_model_server(stub_model_config, monkeypatch):
+    """
+    Run the local model stand-in and point the LLM and embedding base URLs at it.
+    """
+    server = StubModelServer(stub_model_config).start()
+    monkeypatch.setattr(settings, "MODEL_BASE_URL", server.base_url)
+    monkeypatch.setattr(settings, "EMBEDDING_MODEL_BASE_URL", server.base_url)
+    monkeypatch.setattr(settings, "MODEL_API_KEY", "stub")
+    monkeypatch.setattr(settings, "EMBEDDING_MODEL_API_KEY", "stub")
+
+    yield server
+
+    server.stop()
+    # Pooled clients are bound to the test's event loop
+    http_client_pool._clients.pop(server.base_url, None)
@@ -0,0 +1,72 @@
+import asyncio
+import time
+
+from app.core.adaptive_limiter import AdaptiveConcurrencyLimiter, parse_retry_after
+
+
+def test_limit_grows_while_healthy_and_shrinks_on_overload():
+    """
+    Healthy responses raise the limit additively; overload halves it.
+    """
+    limiter = AdaptiveConcurrencyLimiter(initial_limit=4, min_limit=1, max_limit=8)
+
+    async def scenario():
+        for _ in range(20):
+            await limiter.acquire()
+            await limiter.release(0.1)
+        grown = limiter.limit
+
+        await limiter.acquire()
+        await limiter.release(overloaded=True)
+        return grown
+
+    grown = asyncio.run(scenario())
+    assert 4 < grown <= 8
+    assert limiter.limit == max(1.0, grown / 2)
+    assert limiter.stats()["overloads"] == 1
+
+
+def test_slow_responses_do_not_grow_the_limit():
+    """
+    Latency far above the baseline holds the limit steady.
+    """
+    limiter = AdaptiveConcurrencyLimiter(initial_limit=2, latency_tolerance=2.0)
+
+    async def scenario():
+        await limiter.acquire()
+        await limiter.release(0.1)
+        before = limiter.limit
+        await limiter.acquire()
+        await limiter.release(5.0)
+        return before
+
+    before = asyncio.run(scenario())
+    assert limiter.limit == before
+
+
+def test_acquire_waits_for_free_slot_and_retry_after():
+    """
+    Callers beyond the limit wait for a release, and Retry-After pauses everyone.
+    """
+    limiter = AdaptiveConcurrencyLimiter(initial_limit=1, min_limit=1, max_limit=1)
+
+    async def scenario():
+        await limiter.acquire()
+        waiter = asyncio.create_task(limiter.acquire())
+        await asyncio.sleep(0.01)
+        assert not waiter.done()
+
+        await limiter.release(overloaded=True, retry_after=0.05)
+        start = time.monotonic()
+        await waiter
+        return time.monotonic() - start
+
+    assert asyncio.run(scenario()) >= 0.04
+    assert limiter.in_flight == 1
+
+
+def test_parse_retry_after():
+    assert parse_retry_after("3") == 3.0
+    assert parse_retry_after(None) is None
+    assert parse_retry_after("not a date") is None
+    assert parse_retry_after("Wed, 21 Oct 2015 07:28:00 GMT") == 0.0
@@ -0,0 +1,200 @@
+import asyncio
+
+import pytest
+
+from app.core.config import settings
+from app.services.document_service import DocumentUpsert
+from app.services.lightrag_service import LightRAGService
+
+
+class RecordingDocuments:
+    def __init__(self):
+        self.batches = []
+        self.next_id = 1
+
+    async def upsert_documents(self, texts, metadatas, sources=None):
+        self.batches.append(list(texts))
+        ids = list(range(self.next_id, self.next_id + len(texts)))
+        self.next_id += len(texts)
+        return [DocumentUpsert(document_id, "created") for document_id in ids]
+
+    async def get_chunk_hashes(self, document_ids):
+        return {document_id: None for document_id in document_ids}
+
+    async def set_chunk_hashes(self, chunk_hashes):
+        pass
+
+
+class RecordingSearch:
+    def __init__(self):
+        self.indexed = []
+        self.chunks = {}
+
+    async def store_chunks(self, document_chunks, embed):
+        for document_id, chunks in document_chunks.items():
+            self.chunks[document_id] = [chunk["content"] for chunk in chunks.values()]
+
+    async def index_documents(self, document_ids):
+        self.indexed.append(list(document_ids))
+
+
+class DocStatuses:
+    def __init__(self):
+        self.statuses = {}
+
+    async def get_by_ids(self, ids):
+        return [self.statuses.get(doc_id) for doc_id in ids]
+
+
+class RecordingRAG:
+    chunk_overlap_token_size = 0
+    chunk_token_size = 1024
+    tiktoken_model_name = "gpt-4o"
+
+    def __init__(self, statuses=None):
+        self.inserts = []
+        self.doc_status = DocStatuses()
+        self.outcomes = statuses or {}
+
+    @staticmethod
+    def chunking_func(text, *args):
+        return [{"content": text}]
+
+    @staticmethod
+    async def embedding_func(texts):
+        return [[1.0] for _ in texts]
+
+    async def ainsert(self, texts, ids=None, file_paths=None):
+        self.inserts.append((list(texts), ids, file_paths))
+        for doc_id in ids:
+            status = self.outcomes.get(doc_id, "processed")
+            self.doc_status.statuses[doc_id] = {"status": status}
+
+
+def test_texts_are_ingested_in_batches(monkeypatch):
+    """
+    Each batch is one transaction, one LightRAG insert and one bulk index update.
+    """
+    monkeypatch.setattr(settings, "INGEST_BATCH_SIZE", 2)
+    service = LightRAGService()
+    service.document_service = RecordingDocuments()
+    service.search_service = RecordingSearch()
+    service.rag = RecordingRAG()
+
+    texts = [f"text {i}" for i in range(5)]
+    result = asyncio.run(service.ingest_texts(texts))
+
+    assert result["document_ids"] == result["created"] == [1, 2, 3, 4, 5]
+    assert service.document_service.batches == [texts[:2], texts[2:4], texts[4:]]
+    assert service.rag.inserts == [
+        (texts[:2], ["1", "2"], ["1", "2"]),
+        (texts[2:4], ["3", "4"], ["3", "4"]),
+        (texts[4:], ["5"], ["5"]),
+    ]
+    assert service.search_service.indexed == [[1, 2], [3, 4], [5]]
+    assert service.search_service.chunks == {
+        i + 1: [text] for i, text in enumerate(texts)
+    }
+    assert not service.document_locks._locks
+
+
+def test_documents_lightrag_did_not_process_are_not_marked_indexed():
+    """
+    Documents whose processing failed stay unindexed and are reported.
+    """
+    service = LightRAGService()
+    service.document_service = RecordingDocuments()
+    service.search_service = RecordingSearch()
+    service.rag = RecordingRAG(statuses={"2": "failed", "3": "failed"})
+
+    with pytest.raises(RuntimeError, match=r"\[2, 3\]"):
+        asyncio.run(service._insert_batch([1, 2, 3], ["a", "b", "c"], ["a", "b", "c"]))
+
+    assert service.search_service.indexed == [[1]]
+    assert list(service.search_service.chunks) == [1]
+
+
+class SharedPipelineRAG(RecordingRAG):
+    """LightRAG stand-in whose pipeline, like LightRAG's, is busy process-wide."""
+
+    pipeline = {"busy": False, "runs": []}
+
+    async def ainsert(self, texts, ids=None, file_paths=None):
+        self.inserts.append((list(texts), ids, file_paths))
+        for doc_id in ids:
+            self.doc_status.statuses[doc_id] = {"status": "pending"}
+        await self.apipeline_process_enqueue_documents()
+
+    async def apipeline_process_enqueue_documents(self):
+        if self.pipeline["busy"]:
+            return
+        self.pipeline["busy"] = True
+        try:
+            pending = [
+                doc_id
+                for doc_id, status in self.doc_status.statuses.items()
+                if status["status"] == "pending"
+            ]
+            self.pipeline["runs"].append(pending)
+            await asyncio.sleep(0.05)
+            for doc_id in pending:
+                self.doc_status.statuses[doc_id] = {"status": "processed"}
+        finally:
+            self.pipeline["busy"] = False
+
+
+def test_workspaces_insert_concurrently_despite_shared_pipeline():
+    """
+    A workspace whose insert finds the pipeline busy with another workspace
+    retries processing instead of leaving its documents pending.
+    """
+    services = []
+    for workspace in ("a", "b"):
+        service = LightRAGService(workspace)
+        service.document_service = RecordingDocuments()
+        service.search_service = RecordingSearch()
+        service.rag = SharedPipelineRAG()
+        services.append(service)
+
+    async def scenario():
+        await asyncio.gather(
+            services[0]._insert_batch([1], ["a"], ["a"]),
+            services[1]._insert_batch([1, 2], ["b", "c"], ["b", "c"]),
+        )
+
+    asyncio.run(scenario())
+    assert SharedPipelineRAG.pipeline["runs"] == [["1"], ["1", "2"]]
+    assert services[0].search_service.indexed == [[1]]
+    assert services[1].search_service.indexed == [[1, 2]]
+
+
+def test_documents_skip_files_that_fail_to_extract(monkeypatch):
+    """
+    Extraction runs a batch ahead of ingestion and failed files are reported.
+    """
+    from app.services import lightrag_service
+    from app.services.text_extraction import ExtractionError
+
+    class FakeExtractor:
+        async def extract(self, path):
+            if path == "b.pdf":
+                raise ExtractionError("Timed out extracting b.pdf")
+            return f"text of {path}"
+
+    monkeypatch.setattr(settings, "INGEST_BATCH_SIZE", 2)
+    monkeypatch.setattr(lightrag_service, "text_extractor", FakeExtractor())
+    service = LightRAGService()
+    service.document_service = RecordingDocuments()
+    service.search_service = RecordingSearch()
+    service.rag = RecordingRAG()
+
+    result = asyncio.run(service.ingest_documents(["a.pdf", "b.pdf", "c.pdf"]))
+
+    assert result["status"] == "success"
+    assert result["document_ids"] == [1, 2]
+    assert result["failed"] == {"b.pdf": "Timed out extracting b.pdf"}
+    assert [texts for texts, _, _ in service.rag.inserts] == [
+        ["text of a.pdf"],
+        ["text of c.pdf"],
+    ]
+    assert [paths for _, _, paths in service.rag.inserts] == [["a.pdf"], ["c.pdf"]]
@@ -0,0 +1,79 @@
+import asyncio
+import weakref
+
+import numpy as np
+
+from app.core.config import settings
+from app.services import embedding_batcher
+from app.services.embedding_batcher import EmbeddingBatcher, get_embedding_batcher
+
+
+def test_concurrent_requests_share_one_call(fake_embed):
+    """
+    Requests arriving within the window are sent together and scattered back.
+    """
+    calls = []
+    batcher = EmbeddingBatcher(fake_embed(calls), window_seconds=0.01)
+
+    async def scenario():
+        return await asyncio.gather(
+            batcher.embed(["a"]), batcher.embed(["bb", "ccc"]), batcher.embed(["dddd"])
+        )
+
+    first, second, third = asyncio.run(scenario())
+    assert calls == [["a", "bb", "ccc", "dddd"]]
+    np.testing.assert_array_equal(first[:, 0], [1])
+    np.testing.assert_array_equal(second[:, 0], [2, 3])
+    np.testing.assert_array_equal(third[:, 0], [4])
+    assert batcher.stats()["avg_requests_per_batch"] == 3
+
+
+def test_batches_respect_size_limit_and_propagate_errors(fake_embed):
+    """
+    A request that would overflow the batch starts a new one; failures reach
+    every caller in the failed batch.
+    """
+    calls = []
+    batcher = EmbeddingBatcher(fake_embed(calls), window_seconds=0.01, max_batch_size=3)
+
+    async def scenario():
+        return await asyncio.gather(
+            batcher.embed(["a", "b"]), batcher.embed(["c", "d"])
+        )
+
+    asyncio.run(scenario())
+    assert calls == [["a", "b"], ["c", "d"]]
+
+    async def failing(texts):
+        raise RuntimeError("boom")
+
+    batcher = EmbeddingBatcher(failing, window_seconds=0.01)
+
+    async def failing_scenario():
+        return await asyncio.gather(
+            batcher.embed(["a"]), batcher.embed(["b"]), return_exceptions=True
+        )
+
+    results = asyncio.run(failing_scenario())
+    assert all(isinstance(r, RuntimeError) for r in results)
+
+
+def test_each_event_loop_gets_its_own_batcher(fake_embed, monkeypatch):
+    """
+    A batcher is never reused from a closed loop, and budgets use
+    EMBEDDING_BATCH_MAX_TOKENS rather than the per-input MAX_TOKEN_SIZE.
+    """
+    monkeypatch.setattr(embedding_batcher, "_batchers", weakref.WeakKeyDictionary())
+    monkeypatch.setattr(settings, "EMBEDDING_BATCH_MAX_TOKENS", 12345)
+    calls = []
+
+    async def scenario():
+        batcher = get_embedding_batcher("m", "url", "key", fake_embed(calls))
+        assert get_embedding_batcher("m", "url", "key", fake_embed(calls)) is batcher
+        await batcher.embed(["a"])
+        return batcher
+
+    first, second = asyncio.run(scenario()), asyncio.run(scenario())
+    assert first is not second
+    assert first.max_batch_tokens == 12345
+    assert calls == [["a"], ["a"]]
@@ -0,0 +1,62 @@
+import asyncio
+import fcntl
+
+import numpy as np
+
+from app.services.embedding_cache import EmbeddingCache
+
+
+def test_embed_only_requests_missing_texts(tmp_path, fake_embed):
+    """
+    Cached texts are served from the vector file; only misses reach the API.
+    """
+    cache = EmbeddingCache(str(tmp_path), "model", 3)
+    calls = []
+
+    first = asyncio.run(cache.embed(["a", "bb", "a"], fake_embed(calls)))
+    assert calls == [["a", "bb"]]
+    assert first.dtype == np.float32
+    np.testing.assert_array_equal(first[0], first[2])
+
+    second = asyncio.run(cache.embed(["bb", "ccc"], fake_embed(calls)))
+    assert calls[-1] == ["ccc"]
+    np.testing.assert_array_equal(second[0], first[1])
+    assert cache.stats()["hits"] == 1
+
+
+def test_cache_survives_reopen(tmp_path, fake_embed):
+    """
+    A new instance (e.g. another worker or a restart) sees stored vectors.
+    """
+    calls = []
+    writer = EmbeddingCache(str(tmp_path), "model", 3)
+    stored = asyncio.run(writer.embed(["x", "y"], fake_embed(calls)))
+
+    reader = EmbeddingCache(str(tmp_path), "model", 3)
+    vectors, missing = reader.lookup(["y", "x", "z"])
+    assert missing == [2]
+    np.testing.assert_array_equal(vectors[:2], stored[::-1])
+
+
+def test_embed_waits_for_the_file_lock_off_the_event_loop(tmp_path, fake_embed):
+    """
+    While another worker holds the cache lock, other coroutines keep running.
+    """
+    cache = EmbeddingCache(str(tmp_path), "model", 3)
+
+    async def scenario():
+        with open(cache.lock_path, "rb") as holder:
+            fcntl.flock(holder, fcntl.LOCK_EX)
+            task = asyncio.create_task(cache.embed(["a"], fake_embed([])))
+            ticks = 0
+            for _ in range(5):
+                await asyncio.sleep(0.01)
+                ticks += 1
+            blocked = not task.done()
+            fcntl.flock(holder, fcntl.LOCK_UN)
+        await task
+        return ticks, blocked
+
+    ticks, blocked = asyncio.run(scenario())
+    assert ticks == 5 and blocked
+    assert cache.lookup(["a"])[1] == []
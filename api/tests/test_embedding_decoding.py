@@ -0,0 +1,29 @@
+import base64
+
+import numpy as np
+
+from app.services.llm_service import _decode_embeddings
+
+
+def test_decodes_base64_into_float32():
+    """
+    Base64 vectors decode to float32 rows in response index order.
+    """
+    vectors = np.array([[0.5, -1.0, 2.0], [3.0, 0.25, -0.125]], dtype="<f4")
+    data = [
+        {"index": 1, "embedding": base64.b64encode(vectors[1].tobytes()).decode()},
+        {"index": 0, "embedding": base64.b64encode(vectors[0].tobytes()).decode()},
+    ]
+
+    decoded = _decode_embeddings(data)
+    assert decoded.dtype == np.float32
+    np.testing.assert_array_equal(decoded, vectors)
+
+
+def test_accepts_float_lists():
+    """
+    Providers that ignore encoding_format and return floats still work.
+    """
+    decoded = _decode_embeddings([{"index": 0, "embedding": [1.0, 2.0]}])
+    assert decoded.dtype == np.float32
+    np.testing.assert_array_equal(decoded, [[1.0, 2.0]])
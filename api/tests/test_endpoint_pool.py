@@ -0,0 +1,106 @@
+import asyncio
+
+import pytest
+
+from app.core.endpoint_pool import EndpointError, EndpointPool, split_base_urls
+
+
+def test_split_base_urls():
+    assert split_base_urls("http://a/v1/, http://b/v1") == [
+        "http://a/v1",
+        "http://b/v1",
+    ]
+    assert split_base_urls("http://a") == ["http://a"]
+
+
+def test_pick_prefers_least_outstanding_and_skips_ejected():
+    """
+    Requests go to the least loaded endpoint; failing endpoints are ejected.
+    """
+    pool = EndpointPool(["a", "b"], eject_failures=2, eject_seconds=60)
+    pool.begin("a")
+    assert pool.pick() == "b"
+
+    for _ in range(2):
+        pool.end("b", pool.begin("b"), ok=False)
+    assert pool.stats()["endpoints"]["b"]["ejected"]
+    assert pool.pick() == "a"
+
+
+def test_hedged_request_takes_first_answer():
+    """
+    A request slower than the hedge delay is duplicated to another endpoint.
+    """
+    pool = EndpointPool(["slow", "fast"], hedge_min_samples=1)
+    pool._latencies.append(0.01)
+    pool.begin("fast")  # make "slow" the primary
+
+    async def request(url):
+        await asyncio.sleep(1.0 if url == "slow" else 0.0)
+        return url
+
+    assert asyncio.run(pool.call(request, hedge=True)) == "fast"
+    assert pool.hedges == 1 and pool.hedge_wins == 1
+    assert pool.endpoints["slow"].outstanding == 0
+
+
+def test_hedged_request_raises_when_all_fail():
+    pool = EndpointPool(["a", "b"], hedge_min_samples=1)
+    pool._latencies.append(0.01)
+
+    async def request(url):
+        await asyncio.sleep(0.02)
+        raise RuntimeError(url)
+
+    with pytest.raises(RuntimeError):
+        asyncio.run(pool.call(request, hedge=True))
+
+
+def test_retryable_failure_fails_over_to_another_endpoint():
+    """
+    The request in flight moves to a healthy endpoint; errors any endpoint
+    would return are raised right away and do not count against health.
+    """
+    pool = EndpointPool(["bad", "good"], eject_failures=5)
+    pool.begin("good")  # make "bad" the primary
+    calls = []
+
+    async def request(url):
+        calls.append(url)
+        if url == "bad":
+            raise EndpointError("503", retryable=True)
+        return url
+
+    assert asyncio.run(pool.call(request, failovers=1)) == "good"
+    assert calls == ["bad", "good"]
+    assert pool.stats()["failovers"] == 1
+    assert pool.endpoints["bad"].consecutive_failures == 1
+
+    async def bad_request(url):
+        calls.append(url)
+        raise EndpointError("400", retryable=False)
+
+    calls.clear()
+    with pytest.raises(EndpointError):
+        asyncio.run(pool.call(bad_request, failovers=3))
+    assert calls == ["bad"]
+    assert pool.endpoints["bad"].consecutive_failures == 1
+
+
+def test_cancelled_hedge_loser_keeps_its_failure_streak():
+    pool = EndpointPool(["slow", "fast"], hedge_min_samples=1, eject_failures=5)
+    pool._latencies.append(0.01)
+    pool.endpoints["slow"].consecutive_failures = 2
+    pool.begin("fast")  # make "slow" the primary
+
+    async def request(url):
+        await asyncio.sleep(1.0 if url == "slow" else 0.0)
+        return url
+
+    async def scenario():
+        result = await pool.call(request, hedge=True)
+        # The loser was cancelled and awaited before call() returned
+        return result, pool.endpoints["slow"].outstanding
+
+    assert asyncio.run(scenario()) == ("fast", 0)
+    assert pool.endpoints["slow"].consecutive_failures == 2
@@ -0,0 +1,218 @@
+import asyncio
+import threading
+
+import numpy as np
+import pytest
+from fastapi.testclient import TestClient
+
+from sqlalchemy.orm import Session
+
+from app.core.config import settings
+from app.models.document import Document, DocumentChunk
+from app.services import search_service
+from app.services.search_service import (
+    search_documents_hybrid,
+    set_chunk_embedding,
+    weighted_rrf,
+)
+
+
+class Chunk:
+    def __init__(self, id):
+        self.id = id
+
+
+def test_weighted_rrf_sums_weighted_reciprocal_ranks():
+    a, b, c = Chunk(1), Chunk(2), Chunk(3)
+    fused = weighted_rrf(
+        {
+            "vector": [(a, None, 0.9), (b, None, 0.8)],
+            "lexical": [(c, None, 0.7), (b, None, 0.6)],
+        },
+        {"vector": 1.0, "lexical": 2.0},
+        k=10,
+    )
+
+    assert [row[0].id for row in fused] == [2, 3, 1]
+    assert fused[0][2] == pytest.approx(1 / 12 + 2 / 12)
+    assert fused[0][3] == {
+        "vector_rank": 2,
+        "vector_score": 0.8,
+        "lexical_rank": 2,
+        "lexical_score": 0.6,
+    }
+    assert fused[2][3]["lexical_rank"] is None
+
+
+def test_hybrid_search_fuses_both_retrievers(db_session, monkeypatch):
+    """
+    A chunk found by both retrievers outranks chunks found by only one.
+    """
+    monkeypatch.setattr(settings, "EMBEDDING_DIM", 3)
+    monkeypatch.setattr(settings, "SEARCH_SCORE_THRESHOLD", 0.5)
+    document = Document(title="doc", content="text", source="a.txt")
+    db_session.add(document)
+    db_session.flush()
+    chunks = [
+        ("vector only match", [1, 0, 0]),
+        ("pgvector tuning guide", [0.8, 0.6, 0]),
+        ("pgvector keyword only", [0, 0, 1]),
+    ]
+    for i, (text, vector) in enumerate(chunks):
+        chunk = DocumentChunk(document_id=document.id, chunk_index=i, chunk_text=text)
+        set_chunk_embedding(chunk, np.asarray(vector, dtype=np.float32))
+        db_session.add(chunk)
+    db_session.flush()
+
+    async def embed(text):
+        return np.array([1, 0, 0], dtype=np.float32)
+
+    results, total = asyncio.run(
+        search_documents_hybrid(db_session, "pgvector tuning", top_k=2, embed=embed)
+    )
+
+    assert total == 2
+    assert [r.chunk_text for r in results] == [
+        "pgvector tuning guide",
+        "vector only match",
+    ]
+    top = results[0].doc_metadata
+    assert top["vector_rank"] == 2 and top["lexical_rank"] == 1
+    assert top["vector_score"] == pytest.approx(0.8, rel=1e-2)
+    assert results[1].doc_metadata["lexical_rank"] is None
+
+
+def test_hybrid_retrievers_run_concurrently_in_their_own_sessions(monkeypatch):
+    """
+    With an engine-bound session, each retriever gets a session of its own
+    and both run at the same time.
+    """
+    from tests.conftest import engine
+
+    started = threading.Barrier(2, timeout=5)
+    sessions = {}
+
+    def retriever(name):
+        def retrieve(session, *args):
+            sessions[name] = session
+            # Both retrievers must be running for either to get past this
+            started.wait()
+            return []
+
+        return retrieve
+
+    monkeypatch.setattr(search_service, "_lexical_ranked", retriever("lexical"))
+    monkeypatch.setattr(search_service, "_vector_ranked", retriever("vector"))
+
+    async def embed(text):
+        return np.array([1, 0, 0], dtype=np.float32)
+
+    with Session(bind=engine) as db:
+        results, _ = asyncio.run(search_documents_hybrid(db, "q", embed=embed))
+
+    assert results == []
+    assert db not in sessions.values()
+    assert sessions["lexical"] is not sessions["vector"]
+
+
+def test_search_endpoint_hybrid_mode(client: TestClient, monkeypatch):
+    calls = []
+
+    async def fake_hybrid(db, query, **kwargs):
+        calls.append((query, kwargs))
+        return [], 0
+
+    monkeypatch.setattr("app.routers.search.search_documents_hybrid", fake_hybrid)
+    response = client.get("/api/v1/search/", params={"query": "q", "mode": "hybrid"})
+    assert response.status_code == 200
+    assert calls[0][0] == "q" and calls[0][1]["top_k"] == 5
+
+
+def test_search_endpoint_runs_every_mode_on_the_async_session(
+    async_client: TestClient, async_session_factory, monkeypatch
+):
+    """
+    Without a get_db override, searches run on the AsyncSession it yields.
+    """
+    monkeypatch.setattr(settings, "EMBEDDING_DIM", 3)
+
+    async def add_chunks():
+        async with async_session_factory() as session:
+            document = Document(title="doc", content="text", source="a.txt")
+            session.add(document)
+            await session.flush()
+            for i, text in enumerate(["pgvector tuning", "a dog in the garden"]):
+                chunk = DocumentChunk(
+                    document_id=document.id, chunk_index=i, chunk_text=text
+                )
+                set_chunk_embedding(chunk, np.array([1, i, 0], dtype=np.float32))
+                session.add(chunk)
+            await session.commit()
+
+    asyncio.run(add_chunks())
+
+    async def embed_query(text):
+        return np.array([1, 0, 0], dtype=np.float32)
+
+    monkeypatch.setattr("app.routers.search.embed_query", embed_query)
+    for mode in ("vector", "lexical", "hybrid"):
+        response = async_client.get(
+            "/api/v1/search/",
+            params={"query": "pgvector", "mode": mode, "total": "capped"},
+        )
+        assert response.status_code == 200, response.text
+        body = response.json()
+        assert body["results"][0]["chunk_text"] == "pgvector tuning"
+        assert body["total_hits"] == ("1" if mode == "lexical" else None)
+
+
+def test_search_endpoint_only_finds_chunks_of_the_request_workspace(
+    async_client: TestClient, async_session_factory, monkeypatch
+):
+    """
+    Every search mode, and the lexical match count, stays within X-Workspace.
+    """
+    monkeypatch.setattr(settings, "EMBEDDING_DIM", 3)
+
+    async def add_chunks():
+        async with async_session_factory() as session:
+            for workspace in ("tenant_a", "tenant_b"):
+                document = Document(
+                    title=workspace, content="text", workspace=workspace
+                )
+                session.add(document)
+                await session.flush()
+                chunk = DocumentChunk(
+                    document_id=document.id,
+                    chunk_index=0,
+                    chunk_text=f"pgvector notes of {workspace}",
+                )
+                set_chunk_embedding(chunk, np.array([1, 0, 0], dtype=np.float32))
+                session.add(chunk)
+            await session.commit()
+
+    asyncio.run(add_chunks())
+
+    async def embed_query(text):
+        return np.array([1, 0, 0], dtype=np.float32)
+
+    monkeypatch.setattr("app.routers.search.embed_query", embed_query)
+    for workspace in ("tenant_a", "tenant_b"):
+        for mode in ("vector", "lexical", "hybrid"):
+            response = async_client.get(
+                "/api/v1/search/",
+                params={"query": "pgvector", "mode": mode, "total": "capped"},
+                headers={"X-Workspace": workspace},
+            )
+            assert response.status_code == 200, response.text
+            body = response.json()
+            assert [r["document_title"] for r in body["results"]] == [workspace]
+            if mode == "lexical":
+                assert body["total_hits"] == "1"
+
+    response = async_client.get(
+        "/api/v1/search/",
+        params={"query": "pgvector", "mode": "hybrid"},
+        headers={"X-Workspace": "tenant_c"},
+    )
+    assert response.json()["results"] == []
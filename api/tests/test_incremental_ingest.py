@@ -0,0 +1,265 @@
+import asyncio
+from contextlib import asynccontextmanager
+
+from lightrag.utils import compute_mdhash_id
+import numpy as np
+from sqlalchemy import select, update
+from sqlalchemy.ext.asyncio import AsyncSession, create_async_engine
+from sqlalchemy.orm import sessionmaker
+
+from app.core.database import Base
+from app.models.document import Document, DocumentChunk
+from app.services import document_service, search_service
+from app.services.document_service import DocumentService
+from app.services.lightrag_service import LightRAGService
+
+
+def chunk_id(text):
+    return compute_mdhash_id(text, prefix="chunk-")
+
+
+def test_upsert_skips_unchanged_and_updates_edited_documents(tmp_path, monkeypatch):
+    """
+    Identical texts reuse their document; a new version of a source updates it.
+    """
+    engine = create_async_engine(f"sqlite+aiosqlite:///{tmp_path / 'docs.db'}")
+    factory = sessionmaker(class_=AsyncSession, bind=engine)
+
+    @asynccontextmanager
+    async def get_session():
+        session = factory()
+        try:
+            yield session
+            await session.commit()
+        finally:
+            await session.close()
+
+    monkeypatch.setattr(document_service, "get_session", get_session)
+    service = DocumentService()
+
+    async def outcomes(texts, metadatas):
+        return [
+            tuple(upsert) for upsert in await service.upsert_documents(texts, metadatas)
+        ]
+
+    async def scenario():
+        async with engine.begin() as conn:
+            await conn.run_sync(Base.metadata.create_all)
+
+        first = await outcomes(["alpha", "beta"], [{"file_path": "a.txt"}, None])
+        # Not indexed yet, so still to be ingested
+        again = await outcomes(["alpha", "beta"], [{"file_path": "a.txt"}, None])
+
+        async with get_session() as session:
+            await session.execute(update(Document).values(is_indexed=True))
+
+        resync = await outcomes(
+            ["alpha", "beta", "beta"], [{"file_path": "a.txt"}, None, None]
+        )
+        edited = await outcomes(["alpha v2"], [{"file_path": "a.txt"}])
+        repeated = await outcomes(["gamma", "gamma"], [None, None])
+
+        async with get_session() as session:
+            document = await session.get(Document, 1)
+            stored = (document.content, document.is_indexed)
+        return first, again, resync, edited, repeated, stored
+
+    first, again, resync, edited, repeated, stored = asyncio.run(scenario())
+
+    assert first == [(1, "created"), (2, "created")]
+    assert again == [(1, "pending"), (2, "pending")]
+    assert resync == [(1, "skipped"), (2, "skipped"), (2, "skipped")]
+    assert edited == [(1, "updated")]
+    assert repeated == [(3, "created"), (3, "skipped")]
+    assert stored == ("alpha v2", False)
+
+
+def test_stored_chunks_follow_the_document_and_embed_only_new_text(
+    tmp_path, monkeypatch
+):
+    """
+    Re-storing an edited document keeps unchanged chunk rows and their
+    embeddings, deletes removed ones and embeds only the new text.
+    """
+    engine = create_async_engine(f"sqlite+aiosqlite:///{tmp_path / 'chunks.db'}")
+    factory = sessionmaker(class_=AsyncSession, bind=engine)
+
+    @asynccontextmanager
+    async def get_session():
+        session = factory()
+        try:
+            yield session
+            await session.commit()
+        finally:
+            await session.close()
+
+    monkeypatch.setattr(search_service, "get_session", get_session)
+    embedded = []
+
+    async def embed(texts):
+        embedded.append(list(texts))
+        return np.array([[len(text), 1.0] for text in texts], dtype=np.float32)
+
+    def chunks(*parts):
+        return {
+            chunk_id(part): {"content": part, "tokens": 1, "chunk_order_index": i}
+            for i, part in enumerate(parts)
+        }
+
+    async def stored_rows():
+        async with get_session() as session:
+            rows = (
+                await session.execute(
+                    select(
+                        DocumentChunk.id,
+                        DocumentChunk.chunk_index,
+                        DocumentChunk.chunk_text,
+                        DocumentChunk.embedding_vector,
+                    ).order_by(DocumentChunk.chunk_index)
+                )
+            ).all()
+        return [(row[0], row[1], row[2], list(row[3])) for row in rows]
+
+    async def scenario():
+        async with engine.begin() as conn:
+            await conn.run_sync(Base.metadata.create_all)
+        async with get_session() as session:
+            session.add(Document(id=1, title="doc", content="p1 p2"))
+
+        service = search_service.SearchService()
+        first = await service.store_chunks({1: chunks("p1", "p2")}, embed)
+        before = await stored_rows()
+        second = await service.store_chunks({1: chunks("p0", "p1")}, embed)
+        return first, before, second, await stored_rows()
+
+    first, before, second, after = asyncio.run(scenario())
+    assert (first, second) == (2, 1)
+    assert embedded == [["p1", "p2"], ["p0"]]
+    assert [row[1:] for row in before] == [(0, "p1", [2, 1]), (1, "p2", [2, 1])]
+    assert after[0][1:] == (0, "p0", [2, 1])
+    # p1 keeps its row and embedding at its new position
+    assert after[1] == (before[0][0], 1, "p1", [2, 1])
+    assert len(after) == 2
+
+
+class FakeStorage:
+    def __init__(self):
+        self.upserts = []
+
+    async def upsert(self, data):
+        self.upserts.append(data)
+
+
+class FakeDocStatus(FakeStorage):
+    def __init__(self, statuses):
+        super().__init__()
+        self.statuses = statuses
+
+    async def get_by_ids(self, ids):
+        return [self.statuses.get(doc_id) for doc_id in ids]
+
+
+class ParagraphRAG:
+    """LightRAG stand-in that chunks on blank lines and records writes."""
+
+    chunk_overlap_token_size = 0
+    chunk_token_size = 1024
+    tiktoken_model_name = "gpt-4o"
+
+    def __init__(self, statuses):
+        self.doc_status = FakeDocStatus(statuses)
+        self.chunks_vdb = FakeStorage()
+        self.text_chunks = FakeStorage()
+        self.full_docs = FakeStorage()
+        self.extracted = []
+        self.calls = []
+
+    @staticmethod
+    def chunking_func(text, *args):
+        return [
+            {"content": part, "chunk_order_index": index}
+            for index, part in enumerate(text.split("\n\n"))
+        ]
+
+    @staticmethod
+    async def embedding_func(texts):
+        return [[1.0] for _ in texts]
+
+    async def _process_entity_relation_graph(self, chunks):
+        self.extracted.extend(chunk["content"] for chunk in chunks.values())
+
+    async def _insert_done(self):
+        pass
+
+    async def ainsert(self, texts, ids=None, file_paths=None):
+        self.calls.append(("insert", ids))
+        for doc_id in [ids] if isinstance(ids, str) else ids:
+            self.doc_status.statuses[doc_id] = {"status": "processed"}
+
+    async def adelete_by_doc_id(self, doc_id):
+        self.calls.append(("delete", doc_id))
+
+
+class StoredDocuments:
+    def __init__(self, chunk_hashes):
+        self.chunk_hashes = chunk_hashes
+
+    async def get_chunk_hashes(self, document_ids):
+        return {
+            document_id: self.chunk_hashes.get(document_id)
+            for document_id in document_ids
+        }
+
+    async def set_chunk_hashes(self, chunk_hashes):
+        self.chunk_hashes.update(chunk_hashes)
+
+
+class NoopSearch:
+    async def store_chunks(self, document_chunks, embed):
+        pass
+
+    async def index_documents(self, document_ids):
+        pass
+
+
+def make_service(rag, chunk_hashes):
+    service = LightRAGService()
+    service.rag = rag
+    service.document_service = StoredDocuments(chunk_hashes)
+    service.search_service = NoopSearch()
+    return service
+
+
+def test_edited_document_only_extracts_new_chunks():
+    """
+    Appending to an indexed document processes just the appended chunk.
+    """
+    status = {"status": "processed", "content": "p1\n\np2", "chunks_count": 2}
+    rag = ParagraphRAG({"1": status})
+    service = make_service(rag, {1: [chunk_id("p1"), chunk_id("p2")]})
+
+    asyncio.run(service._insert_batch([1, 2], ["p1\n\np2\n\np3", "new"], ["a", "b"]))
+
+    # Document 2 is new to LightRAG and inserted normally
+    assert rag.calls == [("insert", ["2"])]
+    assert rag.extracted == ["p3"]
+    assert list(rag.chunks_vdb.upserts[0]) == [chunk_id("p3")]
+    assert rag.doc_status.upserts[0]["1"]["chunks_count"] == 3
+    assert service.document_service.chunk_hashes == {
+        1: [chunk_id("p1"), chunk_id("p2"), chunk_id("p3")],
+        2: [chunk_id("new")],
+    }
+
+
+def test_document_with_removed_chunks_is_rebuilt():
+    """
+    Removed chunks need their entities dropped, so the document is rebuilt.
+    """
+    rag = ParagraphRAG({"1": {"status": "processed"}})
+    service = make_service(rag, {1: [chunk_id("p1"), chunk_id("p2")]})
+
+    asyncio.run(service._insert_batch([1], ["p1\n\np3"], ["a"]))
+
+    assert rag.calls == [("delete", "1"), ("insert", "1")]
+    assert rag.extracted == []
+    assert service.document_service.chunk_hashes[1] == [chunk_id("p1"), chunk_id("p3")]
@@ -0,0 +1,265 @@
+import asyncio
+import datetime
+import time
+from contextlib import asynccontextmanager
+
+from sqlalchemy.ext.asyncio import AsyncSession, create_async_engine
+from sqlalchemy.orm import sessionmaker
+
+from app.core.database import Base
+from app.models.document import Document
+from app.models.job import IngestionJob
+from app.services.ingestion_queue import IngestionQueue, ingestion_queue
+
+
+def make_session_factory(tmp_path):
+    engine = create_async_engine(f"sqlite+aiosqlite:///{tmp_path / 'jobs.db'}")
+    factory = sessionmaker(class_=AsyncSession, bind=engine)
+
+    @asynccontextmanager
+    async def session_factory():
+        session = factory()
+        try:
+            yield session
+            await session.commit()
+        finally:
+            await session.close()
+
+    async def create_tables():
+        async with engine.begin() as conn:
+            await conn.run_sync(Base.metadata.create_all)
+
+    return session_factory, create_tables
+
+
+async def wait_for_status(queue, job_id, status, timeout=5.0):
+    deadline = asyncio.get_running_loop().time() + timeout
+    while True:
+        job = await queue.get_job(job_id)
+        if job["status"] == status:
+            return job
+        assert asyncio.get_running_loop().time() < deadline, job
+        await asyncio.sleep(0.01)
+
+
+def test_job_reports_progress_and_timings(tmp_path):
+    """
+    A queued job is picked up, reports per-batch progress and finishes.
+    """
+    session_factory, create_tables = make_session_factory(tmp_path)
+    seen = []
+
+    async def processor(document_ids, progress):
+        for done in range(1, len(document_ids) + 1):
+            await progress(done, len(document_ids))
+        seen.append(document_ids)
+
+    queue = IngestionQueue(processor, session_factory, workers=2, poll_seconds=0.05)
+
+    async def scenario():
+        await create_tables()
+        await queue.start()
+        job = await queue.enqueue([1, 2, 3])
+        assert job["status"] == "queued"
+        done = await wait_for_status(queue, job["id"], "succeeded")
+        await queue.stop()
+        return done
+
+    job = asyncio.run(scenario())
+    assert seen == [[1, 2, 3]]
+    assert job["stage"] == "done"
+    assert job["progress"] == 1.0 and job["processed_documents"] == 3
+    assert job["attempts"] == 1
+    assert {"queue_wait", "ingesting", "total"} <= set(job["timings"])
+    assert queue.stats()["completed"] == 1
+
+
+def test_failed_job_is_retried_then_marked_failed(tmp_path):
+    session_factory, create_tables = make_session_factory(tmp_path)
+    calls = []
+
+    async def processor(document_ids, progress):
+        calls.append(document_ids)
+        if len(calls) == 1:
+            raise RuntimeError("provider down")
+
+    async def always_fails(document_ids, progress):
+        raise RuntimeError("bad document")
+
+    async def scenario():
+        await create_tables()
+        queue = IngestionQueue(
+            processor, session_factory, max_attempts=2, retry_seconds=0
+        )
+        await queue.start()
+        retried = await wait_for_status(
+            queue, (await queue.enqueue([7]))["id"], "succeeded"
+        )
+        await queue.stop()
+
+        queue = IngestionQueue(
+            always_fails, session_factory, max_attempts=2, retry_seconds=0
+        )
+        await queue.start()
+        failed = await wait_for_status(
+            queue, (await queue.enqueue([8]))["id"], "failed"
+        )
+        await queue.stop()
+        return retried, failed
+
+    retried, failed = asyncio.run(scenario())
+    assert len(calls) == 2
+    assert retried["attempts"] == 2 and retried["error"] is None
+    assert failed["attempts"] == 2 and failed["error"] == "bad document"
+    assert failed["stage"] == "failed"
+
+
+def test_interrupted_jobs_resume_on_start(tmp_path):
+    """
+    Running jobs with a stale heartbeat are requeued when the queue starts.
+    """
+    session_factory, create_tables = make_session_factory(tmp_path)
+    seen = []
+
+    async def processor(document_ids, progress):
+        seen.append(document_ids)
+
+    async def scenario():
+        await create_tables()
+        stale = datetime.datetime.utcnow() - datetime.timedelta(hours=1)
+        async with session_factory() as session:
+            job = IngestionJob(
+                status="running",
+                stage="ingesting",
+                document_ids=[4, 5],
+                attempts=1,
+                max_attempts=3,
+                heartbeat_at=stale,
+                started_at=stale,
+            )
+            session.add(job)
+            await session.flush()
+            job_id = job.id
+
+        queue = IngestionQueue(processor, session_factory, lease_seconds=60)
+        await queue.start()
+        done = await wait_for_status(queue, job_id, "succeeded")
+        await queue.stop()
+        return queue, done
+
+    queue, job = asyncio.run(scenario())
+    assert seen == [[4, 5]]
+    assert job["attempts"] == 2
+    assert queue.stats()["recovered"] == 1
+
+
+def test_stopped_jobs_are_requeued_and_resume_on_restart(tmp_path):
+    """
+    stop() puts a running job back in the queue; the next start() finishes it.
+    """
+    session_factory, create_tables = make_session_factory(tmp_path)
+    started = asyncio.Event()
+    calls = []
+
+    async def processor(document_ids, progress):
+        calls.append(document_ids)
+        if len(calls) == 1:
+            started.set()
+            await asyncio.sleep(60)
+
+    async def scenario():
+        await create_tables()
+        queue = IngestionQueue(processor, session_factory, poll_seconds=0.05)
+        await queue.start()
+        job = await queue.enqueue([3])
+        await asyncio.wait_for(started.wait(), 5)
+        await queue.stop()
+        stopped = await queue.get_job(job["id"])
+
+        await queue.start()
+        done = await wait_for_status(queue, job["id"], "succeeded")
+        await queue.stop()
+        return stopped, done
+
+    stopped, done = asyncio.run(scenario())
+    assert stopped["status"] == "queued" and stopped["attempts"] == 0
+    assert calls == [[3], [3]]
+    assert done["attempts"] == 1
+
+
+def test_jobs_of_dead_workers_are_recovered_while_running(tmp_path):
+    """
+    Stale running jobs are requeued periodically, not only at startup.
+    """
+    session_factory, create_tables = make_session_factory(tmp_path)
+
+    async def processor(document_ids, progress):
+        pass
+
+    async def scenario():
+        await create_tables()
+        queue = IngestionQueue(
+            processor, session_factory, lease_seconds=0.2, poll_seconds=0.05
+        )
+        await queue.start()
+        # Claimed by a worker elsewhere that dies after the queue started
+        async with session_factory() as session:
+            job = IngestionJob(
+                status="running",
+                stage="ingesting",
+                document_ids=[6],
+                attempts=1,
+                max_attempts=3,
+                heartbeat_at=datetime.datetime.utcnow(),
+            )
+            session.add(job)
+            await session.flush()
+            job_id = job.id
+
+        done = await wait_for_status(queue, job_id, "succeeded")
+        await queue.stop()
+        return queue, done
+
+    queue, job = asyncio.run(scenario())
+    assert job["attempts"] == 2
+    assert queue.stats()["recovered"] == 1
+
+
+def test_ingest_endpoint_queues_the_committed_document(
+    async_client, async_session_factory, monkeypatch
+):
+    """
+    POST /ingest/ stores the document through the real session and queues a
+    job holding its ID.
+    """
+    seen = []
+
+    async def processor(document_ids, progress):
+        seen.append(document_ids)
+
+    monkeypatch.setattr(ingestion_queue, "processor", processor)
+    response = async_client.post(
+        "/api/v1/ingest/",
+        json={"title": "Notes", "content": "pgvector notes", "source": "a.txt"},
+        headers={"X-Workspace": "acme"},
+    )
+    assert response.status_code == 202, response.text
+    job = response.json()
+
+    async def stored():
+        async with async_session_factory() as session:
+            return await session.get(Document, job["document_ids"][0])
+
+    document = asyncio.run(stored())
+    assert job["document_ids"] == [document.id]
+    assert (document.title, document.workspace) == ("Notes", "acme")
+    assert document.content_hash is not None
+
+    deadline = time.monotonic() + 5
+    while (
+        async_client.get(f"/api/v1/ingest/jobs/{job['id']}").json()["status"]
+        != "succeeded"
+    ):
+        assert time.monotonic() < deadline
+        time.sleep(0.01)
+    assert seen == [[document.id]]
@@ -0,0 +1,113 @@
+import asyncio
+
+from fastapi.testclient import TestClient
+from sqlalchemy.dialects import postgresql
+
+from app.core.config import settings
+from app.models.document import Document, DocumentChunk
+from app.services import search_service
+from app.services.search_service import search_documents_lexical
+
+
+def add_chunks(db_session, texts, source="a.txt"):
+    document = Document(title="doc", content="text", source=source)
+    db_session.add(document)
+    db_session.flush()
+    db_session.add_all(
+        DocumentChunk(document_id=document.id, chunk_index=i, chunk_text=text)
+        for i, text in enumerate(texts)
+    )
+    db_session.flush()
+
+
+def test_lexical_search_ranks_rare_and_repeated_terms_higher(db_session):
+    """
+    The BM25 fallback ranks chunks by term frequency and rarity.
+    """
+    add_chunks(
+        db_session,
+        [
+            "the cat sat on the mat",
+            "pgvector pgvector index tuning for the cat",
+            "a dog in the garden",
+            "the weather today",
+        ],
+    )
+
+    results, total = asyncio.run(
+        search_documents_lexical(db_session, "PGVECTOR cat", top_k=5)
+    )
+
+    assert [r.doc_metadata["chunk_index"] for r in results] == [1, 0]
+    assert total == 2
+    assert 0 < results[1].score < results[0].score < 1
+    assert asyncio.run(search_documents_lexical(db_session, "  _%  ", top_k=5)) == (
+        [],
+        0,
+    )
+
+
+def test_bm25_fallback_scores_a_capped_candidate_set(db_session, monkeypatch):
+    """
+    Only the first SEARCH_BM25_MAX_CANDIDATES matching chunks are scored.
+    """
+    monkeypatch.setattr(settings, "SEARCH_BM25_MAX_CANDIDATES", 2)
+    add_chunks(db_session, ["cat one", "cat two", "cat cat cat three"])
+
+    results, _ = asyncio.run(search_documents_lexical(db_session, "cat", top_k=5))
+
+    assert sorted(r.doc_metadata["chunk_index"] for r in results) == [0, 1]
+    assert results[0].document_title == "doc"
+
+
+def test_postgres_lexical_query_uses_the_indexed_tsvector():
+    """
+    On Postgres the tsvector column is matched with @@ and ranked by ts_rank_cd.
+    """
+    captured = {}
+
+    class Query:
+        def __init__(self, *entities):
+            captured["entities"] = entities
+
+        def join(self, *args):
+            return self
+
+        def filter(self, condition):
+            captured["condition"] = condition
+            return self
+
+        def order_by(self, *args):
+            return self
+
+        def limit(self, limit):
+            return self
+
+        def all(self):
+            return []
+
+    class FakeSession:
+        query = Query
+
+    search_service._lexical_chunks_fts(FakeSession(), "cats -dogs", 5, None)
+
+    dialect = postgresql.dialect()
+    condition = str(captured["condition"].compile(dialect=dialect))
+    assert condition == (
+        "document_chunk.chunk_tsv @@ websearch_to_tsquery("
+        "CAST(%(param_1)s AS REGCONFIG), %(websearch_to_tsquery_1)s)"
+    )
+    rank = str(captured["entities"][2].compile(dialect=dialect))
+    assert rank.startswith("ts_rank_cd(document_chunk.chunk_tsv")
+
+
+def test_search_endpoint_lexical_mode_skips_embedding(client: TestClient, monkeypatch):
+    async def embed_query(text):
+        raise AssertionError("lexical search must not embed the query")
+
+    monkeypatch.setattr("app.routers.search.embed_query", embed_query)
+    response = client.post(
+        "/api/v1/search/", json={"query": "anything", "mode": "lexical"}
+    )
+    assert response.status_code == 200
+    assert response.json()["results"] == []
@@ -0,0 +1,187 @@
+import asyncio
+import datetime
+import time
+from contextlib import asynccontextmanager
+
+from sqlalchemy import select
+from sqlalchemy.ext.asyncio import AsyncSession, create_async_engine
+from sqlalchemy.orm import sessionmaker
+
+from app.core.database import Base
+from app.models.cache import CompletionCache
+from app.services import llm_cache
+from app.services.llm_cache import CompletionResponseCache
+
+
+def test_cache_key_depends_on_request():
+    """
+    Keys are stable for identical requests and change with any input.
+    """
+    key = CompletionResponseCache.make_key("m", "hi", system_prompt="s", temperature=0)
+    assert key == CompletionResponseCache.make_key(
+        "m", "hi", system_prompt="s", temperature=0
+    )
+    assert key != CompletionResponseCache.make_key(
+        "m", "hi", system_prompt="s", temperature=1
+    )
+    assert key != CompletionResponseCache.make_key(
+        "m",
+        "hi",
+        system_prompt="s",
+        history_messages=[{"role": "user", "content": "x"}],
+    )
+
+
+def test_memory_tier_hits_and_lru_eviction():
+    """
+    The in-memory tier returns stored completions and evicts least recently used.
+    """
+    cache = CompletionResponseCache(max_entries=2, persist=False)
+
+    async def scenario():
+        await cache.set("a", "m", "A")
+        await cache.set("b", "m", "B")
+        assert await cache.get("a") == "A"
+        await cache.set("c", "m", "C")  # evicts "b"
+        assert await cache.get("b") is None
+        assert await cache.get("c") == "C"
+
+    asyncio.run(scenario())
+    stats = cache.stats()
+    assert stats["hits"] == 2
+    assert stats["misses"] == 1
+    assert stats["memory_entries"] == 2
+
+
+def test_memory_tier_ttl_expiry():
+    """
+    Entries older than the TTL are treated as misses.
+    """
+    cache = CompletionResponseCache(ttl_seconds=0.01, persist=False)
+
+    async def scenario():
+        await cache.set("a", "m", "A")
+        time.sleep(0.02)
+        return await cache.get("a")
+
+    assert asyncio.run(scenario()) is None
+
+
+def sqlite_sessions(tmp_path, monkeypatch):
+    """Point the durable tier at a fresh SQLite database."""
+    engine = create_async_engine(f"sqlite+aiosqlite:///{tmp_path / 'cache.db'}")
+    factory = sessionmaker(class_=AsyncSession, bind=engine)
+
+    @asynccontextmanager
+    async def get_session():
+        session = factory()
+        try:
+            yield session
+            await session.commit()
+        finally:
+            await session.close()
+
+    monkeypatch.setattr(llm_cache, "get_session", get_session)
+    return engine
+
+
+def test_durable_tier_round_trip(tmp_path, monkeypatch):
+    """
+    A completion written by one cache instance is found by another (a restart
+    or another worker) through the database, and counted as a hit there.
+    """
+    engine = sqlite_sessions(tmp_path, monkeypatch)
+
+    async def scenario():
+        async with engine.begin() as conn:
+            await conn.run_sync(Base.metadata.create_all)
+        await CompletionResponseCache(ttl_seconds=60).set("k", "m", "answer")
+        other = CompletionResponseCache(ttl_seconds=60)
+        found = await other.get("k"), await other.get("k"), await other.get("x")
+        async with engine.connect() as conn:
+            hit_count = (
+                await conn.execute(select(CompletionCache.hit_count))
+            ).scalar_one()
+        return found, hit_count, other.stats()
+
+    found, hit_count, stats = asyncio.run(scenario())
+    assert found == ("answer", "answer", None)
+    # The second lookup is served from memory
+    assert hit_count == 1
+    assert stats["persistent_hits"] == 1
+    assert stats["memory_hits"] == 1
+    assert stats["misses"] == 1
+
+
+def test_durable_tier_times_out_and_is_disabled_after_failures(monkeypatch):
+    """
+    A hanging database costs at most ``db_timeout`` per lookup, and after
+    ``failure_threshold`` failures lookups skip the database entirely.
+    """
+    calls = []
+
+    @asynccontextmanager
+    async def hanging_session():
+        calls.append(1)
+        await asyncio.sleep(10)
+        yield None
+
+    monkeypatch.setattr(llm_cache, "get_session", hanging_session)
+    cache = CompletionResponseCache(
+        db_timeout=0.01, failure_threshold=2, retry_seconds=60
+    )
+
+    async def scenario():
+        started = time.perf_counter()
+        for key in "abcd":
+            assert await cache.get(key) is None
+        return time.perf_counter() - started
+
+    elapsed = asyncio.run(scenario())
+    assert len(calls) == 2
+    assert elapsed < 1
+    stats = cache.stats()
+    assert stats["persistent_errors"] == 2
+    assert stats["persistent_available"] is False
+
+
+def test_prune_deletes_in_batches_outside_the_lookup_timeout(tmp_path, monkeypatch):
+    """
+    Pruning drops expired rows and the least recently used beyond the limit,
+    batch by batch, and is neither cut short by nor counted against the
+    lookup timeout.
+    """
+    engine = sqlite_sessions(tmp_path, monkeypatch)
+    cache = CompletionResponseCache(max_persisted_entries=3, db_timeout=1e-6)
+    cache.PRUNE_BATCH = 2
+    now = datetime.datetime.utcnow()
+
+    async def scenario():
+        async with engine.begin() as conn:
+            await conn.run_sync(Base.metadata.create_all)
+        async with llm_cache.get_session() as session:
+            session.add_all(
+                CompletionCache(
+                    cache_key=f"k{i}",
+                    model="m",
+                    response_text="r",
+                    hit_count=0,
+                    last_accessed_at=now - datetime.timedelta(minutes=i),
+                    expires_at=now - datetime.timedelta(seconds=1) if i == 1 else None,
+                )
+                for i in range(8)
+            )
+        await cache.prune()
+        async with engine.connect() as conn:
+            return (
+                (
+                    await conn.execute(
+                        select(CompletionCache.cache_key).order_by(CompletionCache.id)
+                    )
+                )
+                .scalars()
+                .all()
+            )
+
+    assert asyncio.run(scenario()) == ["k0", "k2", "k3"]
+    assert cache.stats()["persistent_errors"] == 0
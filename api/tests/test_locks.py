@@ -0,0 +1,57 @@
+import asyncio
+
+from app.core.locks import KeyedLock
+
+
+def test_same_key_is_serialized_and_other_keys_are_not():
+    """
+    Holders of one key block only that key; locks are dropped once unused.
+    """
+    locks = KeyedLock()
+    events = []
+
+    async def hold(key, name, delay):
+        async with locks.lock(key):
+            events.append(f"{name} start")
+            await asyncio.sleep(delay)
+            events.append(f"{name} end")
+
+    async def scenario():
+        first = asyncio.create_task(hold(1, "a", 0.05))
+        await asyncio.sleep(0)
+        assert locks.locked(1)
+        assert not locks.locked(2)
+        await asyncio.gather(first, hold(1, "b", 0), hold(2, "c", 0))
+
+    asyncio.run(scenario())
+    # "c" ran while "a" held key 1; "b" waited for "a"
+    assert events.index("c end") < events.index("a end")
+    assert events.index("a end") < events.index("b start")
+    assert not locks._locks and not locks._users
+
+
+def test_lock_is_released_when_the_block_raises():
+    locks = KeyedLock()
+
+    async def scenario():
+        try:
+            async with locks.lock("doc"):
+                raise RuntimeError("boom")
+        except RuntimeError:
+            pass
+        async with locks.lock("doc"):
+            return True
+
+    assert asyncio.run(scenario())
+    assert not locks.locked("doc")
+
+
+def test_lock_many_holds_every_key():
+    locks = KeyedLock()
+
+    async def scenario():
+        async with locks.lock_many([3, 1, 2, 1]):
+            return [locks.locked(key) for key in (1, 2, 3, 4)]
+
+    assert asyncio.run(scenario()) == [True, True, True, False]
+    assert not locks._locks
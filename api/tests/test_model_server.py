@@ -0,0 +1,43 @@
+import asyncio
+
+import numpy as np
+import pytest
+
+from app.core.config import settings
+from app.services.llm_service import openai_complete_if_cache, openai_embed
+from app.testing.model_server import StubModelConfig, hash_embedding, parse_latency
+
+
+@pytest.fixture
+def stub_model_config():
+    return StubModelConfig(embedding_dim=8, rate_limit_rate=0.3, retry_after=0, seed=1)
+
+
+def test_model_calls_against_stand_in(stub_model_server, monkeypatch):
+    """
+    Completions, streams and embeddings round-trip through the stand-in,
+    with injected rate limits absorbed by retries.
+    """
+    monkeypatch.setattr(settings, "LLM_CACHE_ENABLED", False)
+    monkeypatch.setattr(settings, "LLM_RETRY_BACKOFF_SECONDS", 0.0)
+
+    async def scenario():
+        answer = await openai_complete_if_cache("stub", "hello")
+        stream = await openai_complete_if_cache("stub", "hello", stream=True)
+        streamed = "".join([chunk async for chunk in stream])
+        vectors = await asyncio.gather(
+            *(openai_embed([text], model="stub") for text in ["a", "b", "a"])
+        )
+        return answer, streamed, vectors
+
+    answer, streamed, vectors = asyncio.run(scenario())
+    assert answer and answer == streamed
+    np.testing.assert_array_equal(vectors[0][0], hash_embedding("a", 8))
+    np.testing.assert_array_equal(vectors[0], vectors[2])
+    assert stub_model_server.counters["rate_limited"] > 0
+
+
+def test_parse_latency():
+    assert parse_latency("fixed:20")(None) == 0.02
+    with pytest.raises(ValueError):
+        parse_latency("gaussian:1")
@@ -0,0 +1,102 @@
+import asyncio
+
+import numpy as np
+import pytest
+from fastapi.testclient import TestClient
+
+from app.core.config import settings
+from app.core.pagination import decode_cursor, encode_cursor
+from app.models.document import Document, DocumentChunk
+from app.services.search_service import set_chunk_embedding
+
+
+def test_cursor_round_trip_and_rejects_garbage():
+    cursor = encode_cursor({"score": 0.5, "chunk_id": 7, "depth": 10})
+    assert decode_cursor(cursor) == {"score": 0.5, "chunk_id": 7, "depth": 10}
+    assert decode_cursor(None) is None
+    for bad in ("%%%", "bm90IGpzb24", encode_cursor([1, 2])):
+        with pytest.raises(ValueError):
+            decode_cursor(bad)
+
+
+def test_document_listing_pages_by_cursor(
+    async_client: TestClient, async_session_factory, monkeypatch
+):
+    """
+    Pages follow each other by ID via X-Next-Cursor; totals are capped.
+    """
+    monkeypatch.setattr(settings, "PAGINATION_TOTAL_CAP", 3)
+
+    async def add_documents():
+        async with async_session_factory() as session:
+            session.add_all(
+                Document(title=f"doc {i}", content=f"text {i}", source=f"{i}.txt")
+                for i in range(5)
+            )
+            session.add(Document(title="other", content="x", workspace="acme"))
+            await session.commit()
+
+    asyncio.run(add_documents())
+
+    seen, cursor = [], None
+    while True:
+        params = {"limit": 2, "total": "capped"}
+        if cursor:
+            params["cursor"] = cursor
+        response = async_client.get("/api/v1/ingest/", params=params)
+        assert response.status_code == 200
+        assert response.headers["X-Total-Count"] == "3+"
+        seen.extend(document["title"] for document in response.json())
+        cursor = response.headers.get("X-Next-Cursor")
+        if cursor is None:
+            break
+
+    assert seen == [f"doc {i}" for i in range(5)]
+
+    response = async_client.get("/api/v1/ingest/", params={"cursor": "not-a-cursor"})
+    assert response.status_code == 400
+
+
+def test_search_pages_continue_after_cursor(
+    client: TestClient, db_session, monkeypatch
+):
+    """
+    Vector and lexical pages never repeat or skip results, ties included.
+    """
+    monkeypatch.setattr(settings, "EMBEDDING_DIM", 2)
+    monkeypatch.setattr(settings, "SEARCH_SCORE_THRESHOLD", 0.0)
+    document = Document(title="doc", content="text", source="a.txt")
+    db_session.add(document)
+    db_session.flush()
+    for i in range(7):
+        # Pairs of chunks share a score
+        angle = (i // 2) * 0.2
+        chunk = DocumentChunk(
+            document_id=document.id, chunk_index=i, chunk_text=f"alpha chunk {i}"
+        )
+        vector = np.array([np.cos(angle), np.sin(angle)], dtype=np.float32)
+        set_chunk_embedding(chunk, vector)
+        db_session.add(chunk)
+    db_session.flush()
+
+    async def embed_query(text):
+        return np.array([1, 0], dtype=np.float32)
+
+    monkeypatch.setattr("app.routers.search.embed_query", embed_query)
+
+    for mode in ("vector", "lexical"):
+        seen, cursor = [], None
+        while True:
+            body = {"query": "alpha", "top_k": 3, "mode": mode, "total": "capped"}
+            if cursor:
+                body["cursor"] = cursor
+            data = client.post("/api/v1/search/", json=body).json()
+            seen.extend(result["chunk_id"] for result in data["results"])
+            cursor = data["next_cursor"]
+            if cursor is None:
+                break
+        assert sorted(seen) == sorted(set(seen)) and len(seen) == 7, mode
+        assert data["total_hits"] == ("7" if mode == "lexical" else None)
+
+    response = client.post("/api/v1/search/", json={"query": "a", "cursor": "e30"})
+    assert response.status_code == 400
@@ -0,0 +1,96 @@
+import asyncio
+
+import numpy as np
+
+from app.core.config import settings
+from app.services import lightrag_service
+from app.services.lightrag_service import LightRAGService
+from app.services.query_cache import SemanticQueryCache
+
+
+def test_similar_queries_hit_and_different_params_do_not():
+    cache = SemanticQueryCache(threshold=0.9)
+    key = cache.group_key("hybrid", 3, {})
+    cache.store(key, np.array([1.0, 0.0]), "what is rag?", "answer", 2.5)
+
+    hit = cache.lookup(key, np.array([0.98, 0.1]))
+    assert hit.entry.answer == "answer" and hit.similarity > 0.9
+    assert cache.lookup(key, np.array([0.0, 1.0])) is None
+    assert cache.lookup(cache.group_key("naive", 3, {}), np.array([1.0, 0.0])) is None
+
+    stats = cache.stats()
+    assert stats["hits"] == 1 and stats["lookups"] == 3
+    assert stats["saved_seconds"] == 2.5
+
+
+def test_invalidation_drops_answers_and_stale_stores():
+    cache = SemanticQueryCache(threshold=0.9, max_entries=2)
+    key = cache.group_key("hybrid", 3, {})
+    for i, vector in enumerate(([1.0, 0.0], [0.0, 1.0], [1.0, 1.0])):
+        cache.store(key, np.array(vector), f"q{i}", f"a{i}", 1.0)
+    # The oldest entry was evicted
+    assert cache.lookup(key, np.array([1.0, 0.0])) is None
+    assert cache.stats()["entries"] == 2
+
+    generation = cache.generation()
+    cache.invalidate()
+    cache.store(key, np.array([1.0, 0.0]), "late", "stale", 1.0, generation)
+    assert cache.stats()["entries"] == 0
+
+
+def test_invalidation_is_scoped_to_the_workspace():
+    cache = SemanticQueryCache(threshold=0.9)
+    acme = cache.group_key("hybrid", 3, {}, workspace="acme")
+    globex = cache.group_key("hybrid", 3, {}, workspace="globex")
+    vector = np.array([1.0, 0.0])
+    cache.store(acme, vector, "q", "acme answer", 1.0)
+    cache.store(globex, vector, "q", "globex answer", 1.0)
+
+    acme_generation = cache.generation("acme")
+    globex_generation = cache.generation("globex")
+    cache.invalidate("acme")
+
+    assert cache.lookup(acme, vector) is None
+    assert cache.lookup(globex, vector).entry.answer == "globex answer"
+    # Only answers computed before acme's documents changed are dropped
+    cache.store(acme, vector, "q", "stale", 1.0, acme_generation)
+    cache.store(globex, vector, "q2", "fresh", 1.0, globex_generation)
+    assert cache.stats()["entries"] == 2
+    assert cache.stats()["invalidations"] == 1
+
+
+class FakeRAG:
+    def __init__(self):
+        self.queries = []
+
+    async def embedding_func(self, texts):
+        # "how does X work" and "how does X function" map to the same vector
+        return np.array([[1.0, float(len(text.split()))] for text in texts])
+
+    async def aquery(self, query_text, param=None):
+        self.queries.append(query_text)
+        return f"answer to {query_text}"
+
+
+def test_query_serves_paraphrases_from_cache(monkeypatch):
+    cache = SemanticQueryCache(threshold=0.99)
+    monkeypatch.setattr(lightrag_service, "query_cache", cache)
+    monkeypatch.setattr(settings, "QUERY_CACHE_ENABLED", True)
+    service = LightRAGService()
+    service.rag = FakeRAG()
+
+    async def scenario():
+        first = await service.query("how does rag work", mode="naive")
+        second = await service.query("how does rag function", mode="naive")
+        cache.invalidate()
+        third = await service.query("how does rag function", mode="naive")
+        return first, second, third
+
+    first, second, third = asyncio.run(scenario())
+    assert service.rag.queries == ["how does rag work", "how does rag function"]
+    assert first["metadata"]["cache"]["hit"] is False
+    assert second["result"] == "answer to how does rag work"
+    assert second["metadata"]["cache"]["hit"] is True
+    assert second["metadata"]["cache"]["matched_query"] == "how does rag work"
+    assert second["metadata"]["cache"]["hit_rate"] == 0.5
+    assert third["metadata"]["cache"]["hit"] is False
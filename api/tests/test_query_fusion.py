@@ -0,0 +1,150 @@
+import asyncio
+from types import SimpleNamespace
+
+from lightrag import QueryParam
+from lightrag.utils import list_of_list_to_csv
+
+from app.services import lightrag_service
+from app.services.lightrag_service import LightRAGService
+from app.services.query_fusion import (
+    DEFAULT_HEADERS,
+    format_context,
+    fuse_contexts,
+    parse_graph_context,
+    parse_naive_context,
+    reciprocal_rank_fusion,
+)
+
+
+def graph_context(entities, relations, sources):
+    def section(name, rows):
+        table = [DEFAULT_HEADERS[name]] + [[str(i), *row] for i, row in enumerate(rows)]
+        return f"-----{name}-----\n```csv\n{list_of_list_to_csv(table)}\n```"
+
+    return "\n".join(
+        [
+            section("Entities", entities),
+            section("Relationships", relations),
+            section("Sources", sources),
+        ]
+    )
+
+
+def entity(name):
+    return [name, "concept", f"about {name}", "1", "now", "a.txt"]
+
+
+def relation(source, target):
+    return [source, target, "related", "kw", "1.0", "1", "now", "a.txt"]
+
+
+def test_rrf_prefers_items_ranked_by_several_lists():
+    """
+    An item found by two rankings outranks one ranked first by only one.
+    """
+    fused = reciprocal_rank_fusion([[["a"], ["b"]], [["c"], ["b"]]], key_columns=1)
+    assert [row[0] for row in fused] == ["b", "a", "c"]
+
+
+def test_fuse_deduplicates_graph_and_naive_contexts():
+    """
+    Entities, relationships and chunks seen by several modes appear once.
+    """
+    local = graph_context(
+        [entity("Alice"), entity("Bob")],
+        [relation("Alice", "Bob")],
+        [["chunk one", "a.txt"]],
+    )
+    global_ = graph_context(
+        [entity("Bob")],
+        [relation("Alice", "Bob"), relation("Bob", "Carol")],
+        [["chunk two", "b.txt"]],
+    )
+    naive = "File path: b.txt\nchunk two\n--New Chunk--\nFile path: c.txt\nchunk three"
+
+    fused = fuse_contexts(
+        [
+            parse_graph_context(local),
+            parse_graph_context(global_),
+            parse_naive_context(naive),
+        ]
+    )
+
+    assert [row[0] for row in fused["Entities"][1]] == ["Bob", "Alice"]
+    assert [tuple(row[:2]) for row in fused["Relationships"][1]] == [
+        ("Alice", "Bob"),
+        ("Bob", "Carol"),
+    ]
+    assert [row[0] for row in fused["Sources"][1]] == [
+        "chunk two",
+        "chunk one",
+        "chunk three",
+    ]
+
+    # The rendered context parses back to the same rows with fresh ids
+    reparsed = parse_graph_context(format_context(fused))
+    assert reparsed["Sources"][1] == fused["Sources"][1]
+    assert format_context({}) is None
+
+
+def test_fusion_query_retrieves_concurrently_and_answers_once(monkeypatch):
+    """
+    Fusion mode runs every retrieval at once and makes a single LLM call.
+    """
+    active = peak = 0
+
+    async def retrieval(context):
+        nonlocal active, peak
+        active += 1
+        peak = max(peak, active)
+        await asyncio.sleep(0.01)
+        active -= 1
+        return context
+
+    async def fake_kg_query(query, graph, entities, relations, chunks, param, config):
+        assert param.only_need_context and param.ll_keywords == ["alice"]
+        return await retrieval(
+            graph_context([entity(param.mode)], [], [["shared", "a.txt"]])
+        )
+
+    async def fake_naive_query(query, chunks_vdb, chunks, param, config):
+        return await retrieval("File path: a.txt\nshared")
+
+    async def fake_keywords(query, param, config, hashing_kv):
+        return ["people"], ["alice"]
+
+    prompts = []
+
+    async def llm_model_func(query, system_prompt=None, stream=False):
+        prompts.append(system_prompt)
+        return "answer"
+
+    monkeypatch.setattr(lightrag_service, "kg_query", fake_kg_query)
+    monkeypatch.setattr(lightrag_service, "naive_query", fake_naive_query)
+    monkeypatch.setattr(lightrag_service, "get_keywords_from_query", fake_keywords)
+    monkeypatch.setattr(lightrag_service, "asdict", lambda rag: {})
+    # Token budgets need the tiktoken vocabulary, which is not available offline
+    monkeypatch.setattr(
+        lightrag_service,
+        "truncate_list_by_token_size",
+        lambda rows, key, max_token_size: rows,
+    )
+
+    rag = SimpleNamespace(
+        llm_model_func=llm_model_func,
+        llm_response_cache=None,
+        chunks_vdb=None,
+        text_chunks=None,
+        chunk_entity_relation_graph=None,
+        entities_vdb=None,
+        relationships_vdb=None,
+    )
+    answer, metadata = asyncio.run(
+        LightRAGService()._fusion_query(rag, "who is alice?", QueryParam(top_k=3))
+    )
+
+    assert answer == "answer"
+    assert peak == 3
+    assert len(prompts) == 1 and prompts[0].count("shared") == 1
+    assert metadata["fused_items"] == {"Entities": 2, "Relationships": 0, "Sources": 1}
+    assert set(metadata["retrieval_seconds"]) == {"naive", "local", "global"}
@@ -0,0 +1,137 @@
+import asyncio
+from contextlib import asynccontextmanager
+from types import SimpleNamespace
+
+from sqlalchemy import select
+from sqlalchemy.ext.asyncio import AsyncSession, create_async_engine
+from sqlalchemy.orm import sessionmaker
+
+from app.core.database import Base
+from app.models.document import QueryLog
+from app.services.query_log import QueryLogWriter
+from app.services.query_trace import QueryTrace, instrument_rag, trace_stream
+
+
+class FakeVectorStorage:
+    async def query(self, query, top_k, ids=None):
+        await asyncio.sleep(0.02)
+        return [{"id": "chunk-1"}, {"id": "chunk-2"}]
+
+
+class FakeGraphStorage:
+    async def get_node(self, name):
+        await asyncio.sleep(0.01)
+        return {"entity_id": name}
+
+
+class FakeChunkStorage:
+    async def get_by_id(self, chunk_id):
+        return {"content": chunk_id}
+
+    async def get_by_ids(self, chunk_ids):
+        return [{"content": chunk_id} for chunk_id in chunk_ids[:-1]] + [None]
+
+
+def make_rag():
+    rag = SimpleNamespace(
+        chunks_vdb=FakeVectorStorage(),
+        entities_vdb=FakeVectorStorage(),
+        relationships_vdb=FakeVectorStorage(),
+        chunk_entity_relation_graph=FakeGraphStorage(),
+        text_chunks=FakeChunkStorage(),
+    )
+    instrument_rag(rag)
+    return rag
+
+
+def test_trace_times_stages_and_records_chunks():
+    """
+    Concurrent lookups count once; chunks fetched for the context are kept.
+    """
+    rag = make_rag()
+    trace = QueryTrace()
+
+    async def answer():
+        yield "partial"
+        await asyncio.sleep(0.01)
+        yield " answer"
+
+    async def scenario():
+        with trace.activate():
+            await asyncio.gather(
+                rag.entities_vdb.query("q", top_k=3),
+                rag.relationships_vdb.query("q", top_k=3),
+            )
+            await rag.chunk_entity_relation_graph.get_node("Alice")
+            await rag.text_chunks.get_by_ids(["chunk-1", "chunk-2", "missing"])
+            await rag.text_chunks.get_by_id("chunk-1")
+            trace.begin("llm_generation")
+            stream = trace_stream("llm_generation", answer())
+            trace.end("llm_generation")
+        # The stream is consumed after the query's context was left
+        return [chunk async for chunk in stream]
+
+    assert asyncio.run(scenario()) == ["partial", " answer"]
+    # Untraced calls are passed through
+    asyncio.run(rag.chunks_vdb.query("q", top_k=3))
+    trace.finish()
+
+    seconds = trace.stage_seconds()
+    assert 0.02 <= seconds["vector_lookup"] < 0.04
+    assert seconds["graph_traversal"] >= 0.01
+    assert seconds["llm_generation"] >= 0.01
+    assert seconds["cache_lookup"] == 0.0
+    assert trace.retrieval_seconds >= seconds["vector_lookup"]
+    assert trace.chunk_ids == ["chunk-1", "chunk-2"]
+    assert set(trace.stage_milliseconds()) >= {"retrieval", "total", "llm_generation"}
+
+
+def test_writer_inserts_query_logs_in_background(tmp_path):
+    """
+    Recorded traces are written as QueryLog rows by the background task.
+    """
+    engine = create_async_engine(f"sqlite+aiosqlite:///{tmp_path / 'logs.db'}")
+    factory = sessionmaker(class_=AsyncSession, bind=engine)
+
+    @asynccontextmanager
+    async def session_factory():
+        session = factory()
+        try:
+            yield session
+            await session.commit()
+        finally:
+            await session.close()
+
+    writer = QueryLogWriter(session_factory, max_queue=2, batch_size=10)
+    trace = QueryTrace()
+    trace.add_chunk_ids(["chunk-1"])
+    trace.finish()
+
+    async def scenario():
+        async with engine.begin() as conn:
+            await conn.run_sync(Base.metadata.create_all)
+        await writer.start()
+        assert writer.record_trace("first?", "naive", trace, "one")
+        assert writer.record_trace("second?", "hybrid", trace, "two")
+        await writer.stop()
+        async with session_factory() as session:
+            rows = (await session.execute(select(QueryLog))).scalars().all()
+            return [
+                (
+                    row.query_text,
+                    row.mode,
+                    row.retrieved_chunk_ids,
+                    row.stage_latency_ms,
+                )
+                for row in rows
+            ]
+
+    rows = asyncio.run(scenario())
+    assert [row[:2] for row in rows] == [("first?", "naive"), ("second?", "hybrid")]
+    assert rows[0][2] == ["chunk-1"]
+    assert "vector_lookup" in rows[0][3]
+
+    # A full queue drops new logs instead of blocking the query
+    for _ in range(3):
+        writer.record(query_text="overflow")
+    assert writer.stats()["dropped"] == 1
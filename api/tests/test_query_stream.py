@@ -0,0 +1,47 @@
+import json
+from contextlib import asynccontextmanager
+
+from fastapi.testclient import TestClient
+
+from app.services.lightrag_service import LightRAGService
+
+
+class StreamingService:
+    async def query_stream(self, query_text, mode="hybrid", top_k=3, **kwargs):
+        for text in ["Hello", ", world"]:
+            yield {"event": "token", "text": text}
+        yield {
+            "event": "done",
+            "status": "success",
+            "mode": mode,
+            "execution_time": 0.2,
+            "time_to_first_token": 0.1,
+        }
+
+
+def test_query_streams_server_sent_events(client: TestClient, monkeypatch):
+    """
+    With stream=true the answer arrives as token events followed by timings.
+    """
+
+    @asynccontextmanager
+    async def lease(workspace=None):
+        yield StreamingService()
+
+    monkeypatch.setattr(LightRAGService, "lease", lease)
+
+    response = client.post(
+        "/api/v1/query/query", json={"query": "hi", "mode": "naive", "stream": True}
+    )
+    assert response.status_code == 200
+    assert response.headers["content-type"].startswith("text/event-stream")
+
+    events = [
+        (block.split("\n")[0][len("event: ") :], json.loads(block.split("\n")[1][6:]))
+        for block in response.text.strip().split("\n\n")
+    ]
+    assert [name for name, _ in events] == ["token", "token", "done"]
+    assert "".join(data["text"] for name, data in events if name == "token") == (
+        "Hello, world"
+    )
+    assert events[-1][1]["time_to_first_token"] == 0.1
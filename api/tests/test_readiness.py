@@ -0,0 +1,58 @@
+import asyncio
+
+from fastapi.testclient import TestClient
+
+from app.core.config import settings
+from app.services.lightrag_service import LightRAGService
+
+
+def test_ready_reports_503_until_warmup_finishes(client: TestClient, monkeypatch):
+    """
+    /health is always ok while /ready waits for LightRAG.
+    """
+    service = LightRAGService()
+
+    async def get_instance():
+        return service
+
+    monkeypatch.setattr(LightRAGService, "get_instance", get_instance)
+    monkeypatch.setattr(settings, "LIGHTRAG_WARMUP_ENABLED", True)
+    service.warmup_error = "connection refused"
+
+    response = client.get("/ready")
+    assert response.status_code == 503
+    assert response.json()["error"] == "connection refused"
+    assert client.get("/health").status_code == 200
+
+    service.warmed_up = True
+    response = client.get("/ready")
+    assert response.status_code == 200
+    assert response.json()["status"] == "ready"
+
+
+def test_warmup_retries_until_initialized_and_embeds_queries(monkeypatch):
+    monkeypatch.setattr(settings, "LIGHTRAG_INIT_RETRY_SECONDS", 0.0)
+    monkeypatch.setattr(settings, "LIGHTRAG_WARMUP_QUERIES", ["what is embediq?"])
+    service = LightRAGService()
+    attempts = []
+    embedded = []
+
+    class WarmRAG:
+        async def embedding_func(self, texts):
+            embedded.extend(texts)
+
+    async def initialize():
+        attempts.append(1)
+        if len(attempts) < 3:
+            raise ConnectionError("database starting up")
+        return WarmRAG()
+
+    service._initialize_rag = initialize
+
+    async def scenario():
+        await service.start_warmup()
+
+    asyncio.run(scenario())
+    assert len(attempts) == 3
+    assert embedded == ["what is embediq?"]
+    assert service.warmed_up and service.warmup_error is None
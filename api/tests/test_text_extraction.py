@@ -0,0 +1,83 @@
+import asyncio
+import os
+import time
+
+import pytest
+
+from app.services.text_extraction import ExtractionError, TextExtractor
+
+
+def read_text(path: str) -> str:
+    if path.endswith(".slow"):
+        time.sleep(30)
+    if path.endswith(".bad"):
+        raise ValueError("unsupported format")
+    with open(path) as f:
+        return f"{os.getpid()}:{f.read()}"
+
+
+def test_files_are_extracted_in_worker_processes(tmp_path):
+    paths = []
+    for i in range(4):
+        path = tmp_path / f"doc{i}.txt"
+        path.write_text(f"document {i}")
+        paths.append(str(path))
+    extractor = TextExtractor(read_text, max_workers=2, timeout=10)
+
+    async def scenario():
+        return await asyncio.gather(*(extractor.extract(path) for path in paths))
+
+    try:
+        results = asyncio.run(scenario())
+    finally:
+        extractor.shutdown()
+
+    assert [result.split(":", 1)[1] for result in results] == [
+        f"document {i}" for i in range(4)
+    ]
+    assert all(int(result.split(":", 1)[0]) != os.getpid() for result in results)
+    assert extractor.stats()["extracted"] == 4
+
+
+def test_timeout_recycles_the_pool_and_later_files_still_work(tmp_path):
+    """
+    A stuck file is killed after the timeout without blocking other files.
+    """
+    good = tmp_path / "good.txt"
+    good.write_text("fine")
+    extractor = TextExtractor(read_text, max_workers=2, timeout=0.5)
+
+    async def scenario():
+        slow, fast = await asyncio.gather(
+            extractor.extract(str(tmp_path / "stuck.slow")),
+            extractor.extract(str(good)),
+            return_exceptions=True,
+        )
+        again = await extractor.extract(str(good))
+        return slow, fast, again
+
+    start = time.monotonic()
+    try:
+        slow, fast, again = asyncio.run(scenario())
+    finally:
+        extractor.shutdown()
+
+    assert time.monotonic() - start < 10
+    assert isinstance(slow, ExtractionError)
+    assert fast.endswith(":fine") and again.endswith(":fine")
+    assert extractor.stats()["timeouts"] == 1
+    assert extractor.stats()["pool_restarts"] == 1
+
+
+def test_parse_errors_are_reported(tmp_path):
+    extractor = TextExtractor(read_text, max_workers=1, timeout=10)
+
+    async def scenario():
+        await extractor.extract(str(tmp_path / "broken.bad"))
+
+    try:
+        with pytest.raises(ExtractionError, match="unsupported format"):
+            asyncio.run(scenario())
+    finally:
+        extractor.shutdown()
+    assert extractor.stats()["failures"] == 1
@@ -0,0 +1,111 @@
+import asyncio
+
+import numpy as np
+import pytest
+
+from app.core.config import settings
+from app.models.document import Document, DocumentChunk
+from app.services import vector_index
+from app.services.search_service import search_documents, set_chunk_embedding
+from app.services.vector_codec import decode_vectors, encode_vector, search_encoded
+
+
+@pytest.mark.parametrize(
+    "encoding,size,tolerance",
+    [("float32", 256, 0), ("float16", 128, 1e-3), ("int8", 64, 0.02)],
+)
+def test_encodings_round_trip(encoding, size, tolerance):
+    """
+    Each encoding shrinks the vector and decodes close to the original.
+    """
+    vector = np.random.default_rng(0).standard_normal(64).astype(np.float32)
+    encoded = encode_vector(vector, encoding)
+    assert len(encoded.code) == size
+
+    decoded = decode_vectors(
+        [encoded.code], encoding, 64, [encoded.scale], [encoded.offset]
+    )[0]
+    assert np.max(np.abs(decoded - vector)) <= tolerance
+
+
+def test_binary_codes_keep_signs():
+    vector = np.array(
+        [0.5, -1.0, 2.0, -0.1, 0.3, 0.0, 1.0, -2.0, 4.0], dtype=np.float32
+    )
+    encoded = encode_vector(vector, "binary")
+    assert len(encoded.code) == 2
+    np.testing.assert_array_equal(
+        decode_vectors([encoded.code], "binary", 9)[0], np.where(vector > 0, 1, -1)
+    )
+
+
+def test_rescoring_recovers_exact_top_k():
+    """
+    Binary shortlisting plus full-precision rescoring returns the exact top-k.
+    """
+    rng = np.random.default_rng(1)
+    vectors = rng.standard_normal((200, 32)).astype(np.float32)
+    query = vectors[7] + 0.05 * rng.standard_normal(32).astype(np.float32)
+    ids = list(range(200))
+    codes = [encode_vector(v, "binary").code for v in vectors]
+
+    results = search_encoded(
+        query,
+        ids,
+        codes,
+        "binary",
+        5,
+        load_full=lambda rows: vectors[rows],
+        rescore_factor=8,
+    )
+
+    exact = vectors @ query / (np.linalg.norm(vectors, axis=1) * np.linalg.norm(query))
+    assert [chunk_id for chunk_id, _ in results] == list(np.argsort(-exact)[:5])
+    assert results[0][1] == pytest.approx(exact[7], rel=1e-5)
+
+
+def test_search_rescores_compact_candidates_with_full_precision(
+    db_session, monkeypatch
+):
+    """
+    Chunks stored with mixed encodings rank by full-precision cosine score.
+    """
+    monkeypatch.setattr(settings, "EMBEDDING_DIM", 4)
+    document = Document(title="doc", content="text")
+    db_session.add(document)
+    db_session.flush()
+
+    vectors = np.eye(4, dtype=np.float32)
+    for i, encoding in enumerate(["int8", "binary", "float16", "float32"]):
+        chunk = DocumentChunk(document_id=document.id, chunk_index=i, chunk_text=str(i))
+        set_chunk_embedding(chunk, vectors[i], encoding)
+        db_session.add(chunk)
+    db_session.flush()
+
+    results, _ = asyncio.run(
+        search_documents(
+            db_session, vectors[1] + 0.1 * vectors[2], top_k=2, score_threshold=0.0
+        )
+    )
+    assert [r.doc_metadata["chunk_index"] for r in results] == [1, 2]
+    assert results[0].score == pytest.approx(1 / np.sqrt(1.01), rel=1e-5)
+
+
+def test_index_is_built_from_compact_codes():
+    """
+    The in-process index decodes a chunk's code rather than its pgvector copy.
+    """
+    vector = np.array([0.5, -1.0, 2.0], dtype=np.float32)
+    chunk = DocumentChunk()
+    set_chunk_embedding(chunk, vector, "binary")
+
+    decoded = vector_index.chunk_vector(
+        3,
+        chunk.embedding,
+        chunk.embedding_encoding,
+        chunk.embedding_scale,
+        chunk.embedding_offset,
+        chunk.embedding_vector,
+    )
+    np.testing.assert_array_equal(decoded, [1, -1, 1])
+    assert vector_index.chunk_vector(3, None, None, None, None, vector) is vector
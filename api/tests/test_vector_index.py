@@ -0,0 +1,221 @@
+import numpy as np
+import pytest
+from sqlalchemy import delete, update
+from sqlalchemy.orm import sessionmaker
+
+from app.core.config import settings
+from app.models.document import Document, DocumentChunk, DocumentChunkDeletion
+from app.services import vector_index
+from app.services.search_service import set_chunk_embedding
+from app.services.vector_codec import encode_vector
+from app.services.vector_index import VectorIndex, get_vector_index, save_vector_index
+from tests.conftest import engine
+
+
+def random_vectors(count, dim=16, seed=0):
+    return np.random.default_rng(seed).standard_normal((count, dim)).astype(np.float32)
+
+
+def exact_top(vectors, query, k):
+    normed = vectors / np.linalg.norm(vectors, axis=1, keepdims=True)
+    return list(np.argsort(-(normed @ query))[:k])
+
+
+def test_flat_search_is_exact_across_blocks():
+    """
+    Blocked scoring returns the same top-k as scoring every vector at once.
+    """
+    vectors = random_vectors(1000)
+    index = VectorIndex(dim=16, block_size=64)
+    index.add(list(range(1000)), vectors)
+    query = random_vectors(1, seed=1)[0]
+
+    hits = index.search(query, 10)
+    assert [chunk_id for chunk_id, _ in hits] == exact_top(vectors, query, 10)
+    assert hits[0][1] == pytest.approx(
+        float(vectors[hits[0][0]] @ query)
+        / np.linalg.norm(vectors[hits[0][0]])
+        / np.linalg.norm(query),
+        rel=1e-5,
+    )
+
+
+def test_ivf_search_recall_and_updates():
+    """
+    IVF with a few probes finds most true neighbours; updates and removals
+    are reflected immediately.
+    """
+    vectors = random_vectors(2000)
+    index = VectorIndex(dim=16, kind="ivf", lists=20, probes=8)
+    index.add(list(range(2000)), vectors)
+    index.train()
+
+    queries = random_vectors(20, seed=2)
+    recall = np.mean(
+        [
+            len({i for i, _ in index.search(q, 10)} & set(exact_top(vectors, q, 10)))
+            / 10
+            for q in queries
+        ]
+    )
+    assert recall >= 0.8
+
+    query = queries[0]
+    index.add([5], query[None, :])
+    assert index.search(query, 1)[0][0] == 5
+    index.remove([5])
+    assert 5 not in index and len(index) == 1999
+    assert 5 not in {i for i, _ in index.search(query, 50)}
+
+
+def test_snapshot_is_memory_mapped_and_caught_up(db_session, monkeypatch, tmp_path):
+    """
+    A restart loads the snapshot, then picks up chunks committed since.
+    """
+    monkeypatch.setattr(settings, "EMBEDDING_DIM", 16)
+    vectors = random_vectors(4)
+    document = Document(title="doc", content="text")
+    db_session.add(document)
+    db_session.flush()
+
+    def add_chunk(i):
+        chunk = DocumentChunk(document_id=document.id, chunk_index=i, chunk_text=str(i))
+        set_chunk_embedding(chunk, vectors[i])
+        db_session.add(chunk)
+        db_session.flush()
+        return chunk
+
+    first = [add_chunk(i) for i in range(3)]
+    assert len(get_vector_index(db_session)) == 3
+    save_vector_index()
+
+    # Simulate a restart: the next use maps the snapshot from disk
+    monkeypatch.setattr(vector_index, "_index", None)
+    snapshot = VectorIndex.load(vector_index.snapshot_dir(), dim=16, kind="flat")
+    assert isinstance(snapshot._vectors, np.memmap)
+
+    db_session.delete(first[0])
+    latest = add_chunk(3)
+    index = get_vector_index(db_session)
+    assert sorted(int(i) for i in index.ids) == [first[1].id, first[2].id, latest.id]
+    assert index.search(vectors[3], 1)[0][0] == latest.id
+
+
+def test_committed_chunk_changes_update_the_open_index(test_db, monkeypatch):
+    """
+    Committed inserts, updates and deletes of chunk embeddings reach the index.
+    """
+    monkeypatch.setattr(settings, "EMBEDDING_DIM", 16)
+    vectors = random_vectors(2)
+    Session = sessionmaker(bind=engine)
+
+    with Session() as session:
+        document = Document(title="doc", content="text")
+        session.add(document)
+        session.commit()
+        index = get_vector_index(session)
+        assert len(index) == 0
+
+        chunk = DocumentChunk(document_id=document.id, chunk_index=0, chunk_text="a")
+        set_chunk_embedding(chunk, vectors[0])
+        session.add(chunk)
+        session.flush()
+        # Not visible until the transaction commits
+        assert len(index) == 0
+        session.commit()
+        assert index.search(vectors[0], 1)[0][0] == chunk.id
+
+        set_chunk_embedding(chunk, vectors[1])
+        session.commit()
+        assert index.search(vectors[1], 1)[0][1] == pytest.approx(1.0, rel=1e-5)
+
+        session.delete(chunk)
+        session.commit()
+        assert len(index) == 0
+
+
+def test_index_resyncs_bulk_writes_and_saves_changes(test_db, monkeypatch):
+    """
+    Bulk statements bypass the ORM events; the periodic re-sync catches them
+    and the changed index is saved without waiting for shutdown.
+    """
+    monkeypatch.setattr(settings, "EMBEDDING_DIM", 16)
+    monkeypatch.setattr(settings, "VECTOR_INDEX_SYNC_SECONDS", 0)
+    monkeypatch.setattr(settings, "VECTOR_INDEX_SAVE_SECONDS", 0)
+    vectors = random_vectors(3)
+    Session = sessionmaker(bind=engine)
+
+    with Session() as session:
+        document = Document(title="doc", content="text")
+        session.add(document)
+        session.flush()
+        chunks = []
+        for i in range(2):
+            chunk = DocumentChunk(
+                document_id=document.id, chunk_index=i, chunk_text=str(i)
+            )
+            set_chunk_embedding(chunk, vectors[i])
+            chunks.append(chunk)
+        session.add_all(chunks)
+        session.commit()
+        index = get_vector_index(session)
+        assert len(index) == 2
+
+        session.execute(
+            update(DocumentChunk)
+            .where(DocumentChunk.id == chunks[0].id)
+            .values(
+                embedding=encode_vector(vectors[2], "float32").code,
+                embedding_encoding="float32",
+                embedding_vector=vectors[2],
+            )
+        )
+        session.execute(delete(DocumentChunk).where(DocumentChunk.id == chunks[1].id))
+        session.commit()
+        assert get_vector_index(session) is index
+        assert [int(i) for i in index.ids] == [chunks[0].id]
+        assert index.search(vectors[2], 1)[0][1] == pytest.approx(1.0, rel=1e-5)
+
+        # Saved on the same call as the re-sync
+        assert not index.dirty
+        snapshot = VectorIndex.load(vector_index.snapshot_dir(), dim=16, kind="flat")
+        assert [int(i) for i in snapshot.ids] == [chunks[0].id]
+
+
+def test_sync_reads_deletions_from_the_log(db_session, monkeypatch):
+    """
+    Deleted chunks are found through the trigger-written log from the last
+    sync on, not by scanning every chunk ID; re-created IDs are kept.
+    """
+    monkeypatch.setattr(settings, "EMBEDDING_DIM", 16)
+    vectors = random_vectors(3)
+    document = Document(title="doc", content="text")
+    db_session.add(document)
+    db_session.flush()
+    chunks = []
+    for i in range(3):
+        chunk = DocumentChunk(document_id=document.id, chunk_index=i, chunk_text=str(i))
+        set_chunk_embedding(chunk, vectors[i])
+        chunks.append(chunk)
+    db_session.add_all(chunks)
+    db_session.flush()
+    index = VectorIndex(dim=16)
+    index.sync(db_session)
+
+    db_session.execute(delete(DocumentChunk).where(DocumentChunk.id == chunks[0].id))
+    logged = db_session.query(DocumentChunkDeletion.chunk_id).all()
+    assert logged == [(chunks[0].id,)]
+    # A logged ID that exists again is not dropped
+    db_session.add(
+        DocumentChunkDeletion(chunk_id=chunks[1].id, created_at=index.synced_at)
+    )
+    db_session.flush()
+
+    index.sync(db_session)
+    assert sorted(int(i) for i in index.ids) == [chunks[1].id, chunks[2].id]
+
+    # Entries from before the last sync (less the overlap) are not re-read
+    index.add([chunks[0].id], vectors[0][None, :])
+    index.synced_at += 2 * vector_index.SYNC_OVERLAP
+    index.sync(db_session)
+    assert chunks[0].id in index
@@ -0,0 +1,93 @@
+import asyncio
+
+import numpy as np
+import pytest
+from fastapi.testclient import TestClient
+from sqlalchemy.dialects import postgresql
+
+from app.core.config import settings
+from app.models.document import Document, DocumentChunk
+from app.routers import search as search_router
+from app.services.search_service import search_documents, set_chunk_embedding
+
+
+def add_chunks(db_session, vectors, source="a.txt"):
+    document = Document(title="doc", content="text", source=source)
+    db_session.add(document)
+    db_session.flush()
+    for i, vector in enumerate(vectors):
+        chunk = DocumentChunk(
+            document_id=document.id, chunk_index=i, chunk_text=f"chunk {i}"
+        )
+        set_chunk_embedding(chunk, np.asarray(vector, dtype=np.float32))
+        db_session.add(chunk)
+    db_session.flush()
+
+
+def test_search_ranks_by_cosine_and_applies_threshold(db_session, monkeypatch):
+    """
+    Results carry real cosine scores; those under the threshold are dropped.
+    """
+    monkeypatch.setattr(settings, "EMBEDDING_DIM", 3)
+    add_chunks(db_session, [[1, 0, 0], [0.8, 0.6, 0], [0, 0, 1]])
+
+    results, total = asyncio.run(
+        search_documents(
+            db_session,
+            np.array([1, 0, 0], dtype=np.float32),
+            top_k=3,
+            score_threshold=0.5,
+        )
+    )
+
+    assert [r.chunk_text for r in results] == ["chunk 0", "chunk 1"]
+    assert [r.score for r in results] == pytest.approx([1.0, 0.8], rel=1e-5)
+    assert total == 2
+
+    results, _ = asyncio.run(
+        search_documents(
+            db_session,
+            np.array([0, 0, 1], dtype=np.float32),
+            top_k=1,
+            filters={"source": "other.txt"},
+            score_threshold=0.0,
+        )
+    )
+    assert results == []
+
+
+def test_pgvector_query_orders_by_index_distance():
+    """
+    The Postgres query orders by the <=> operator so the HNSW index is used.
+    """
+    distance = DocumentChunk.embedding_vector.cosine_distance(np.ones(3))
+    compiled = str(
+        distance.compile(
+            dialect=postgresql.dialect(), compile_kwargs={"literal_binds": False}
+        )
+    )
+    assert compiled == "document_chunk.embedding_vector <=> %(embedding_vector_1)s"
+    bind = DocumentChunk.embedding_vector.type.bind_processor(postgresql.dialect())
+    assert bind(np.array([0.5, 1.0])) == "[0.5,1.0]"
+    column_type = DocumentChunk.embedding_vector.type
+    assert column_type.compile(dialect=postgresql.dialect()).startswith("HALFVEC(")
+
+
+def test_search_endpoint_embeds_query_and_passes_index_params(
+    client: TestClient, monkeypatch
+):
+    calls = []
+
+    async def embed_query(text):
+        return np.array([1, 0, 0], dtype=np.float32)
+
+    async def fake_search(db, query_vector, **kwargs):
+        calls.append(kwargs)
+        return [], 0
+
+    monkeypatch.setattr(search_router, "embed_query", embed_query)
+    monkeypatch.setattr(search_router, "search_documents", fake_search)
+
+    response = client.get("/api/v1/search/", params={"query": "q", "ef_search": 200})
+    assert response.status_code == 200
+    assert calls[0]["ef_search"] == 200 and calls[0]["probes"] is None
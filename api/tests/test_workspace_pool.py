@@ -0,0 +1,128 @@
+import asyncio
+from contextlib import asynccontextmanager
+
+from sqlalchemy.ext.asyncio import AsyncSession, create_async_engine
+from sqlalchemy.orm import sessionmaker
+
+from app.core.database import Base
+from app.services import document_service
+from app.services.document_service import DocumentService
+from app.services.workspace_pool import WorkspacePool
+
+
+class FakeService:
+    def __init__(self, workspace):
+        self.workspace = workspace
+        self.closed = False
+
+    async def close(self):
+        self.closed = True
+
+
+def test_pool_evicts_least_recently_used_idle_workspaces():
+    """
+    Over the cap, the LRU workspace not in use is closed and later reopened.
+    """
+    pool = WorkspacePool(FakeService, max_open=2, idle_seconds=0, pinned=["default"])
+
+    async def scenario():
+        default = await pool.get("default")
+        async with pool.lease("acme") as acme:
+            # Both others are pinned or leased, so the cap is exceeded for now
+            globex = await pool.get("globex")
+            assert pool.stats()["open"] == 3
+            initech = await pool.get("initech")
+        assert globex.closed and not acme.closed and not default.closed
+
+        # Once acme is released, both it and initech are over the cap
+        await pool.get("umbrella")
+        assert acme.closed and initech.closed
+
+        reopened = await pool.get("acme")
+        assert reopened is not acme and not reopened.closed
+        return pool.stats()
+
+    stats = asyncio.run(scenario())
+    assert stats["open"] == 2
+    assert stats["opened"] == 6
+    assert stats["evicted"] == 4
+
+
+def test_sweep_closes_idle_workspaces_but_not_pinned_or_leased():
+    pool = WorkspacePool(
+        FakeService, max_open=10, idle_seconds=0.01, pinned=["default"]
+    )
+
+    async def scenario():
+        default = await pool.get("default")
+        idle = await pool.get("idle")
+        async with pool.lease("busy") as busy:
+            await asyncio.sleep(0.02)
+            assert await pool.sweep() == 1
+        await pool.stop()
+        return default, idle, busy
+
+    default, idle, busy = asyncio.run(scenario())
+    assert idle.closed
+    # Stopping closes everything, pinned or not
+    assert default.closed and busy.closed
+
+
+def test_documents_are_deduplicated_per_workspace(tmp_path, monkeypatch):
+    """
+    The same text submitted by two tenants is stored once for each of them.
+    """
+    engine = create_async_engine(f"sqlite+aiosqlite:///{tmp_path / 'docs.db'}")
+    factory = sessionmaker(class_=AsyncSession, bind=engine)
+
+    @asynccontextmanager
+    async def get_session():
+        session = factory()
+        try:
+            yield session
+            await session.commit()
+        finally:
+            await session.close()
+
+    monkeypatch.setattr(document_service, "get_session", get_session)
+
+    async def scenario():
+        async with engine.begin() as conn:
+            await conn.run_sync(Base.metadata.create_all)
+        acme, globex = DocumentService("acme"), DocumentService("globex")
+        first = await acme.upsert_documents(["shared"], [{"source": "s"}])
+        second = await globex.upsert_documents(["shared"], [{"source": "s"}])
+        again = await acme.upsert_documents(["shared"], [{"source": "s"}])
+        workspaces = await acme.get_document_workspaces([1, 2])
+        listed = len(await globex.get_documents())
+        deleted = await globex.delete_document(1)
+        return first, second, again, workspaces, listed, deleted
+
+    first, second, again, workspaces, listed, deleted = asyncio.run(scenario())
+    assert [tuple(u) for u in first] == [(1, "created")]
+    assert [tuple(u) for u in second] == [(2, "created")]
+    assert [tuple(u) for u in again] == [(1, "pending")]
+    assert workspaces == {"acme": [1], "globex": [2]}
+    assert listed == 1
+    # A tenant cannot delete another tenant's document
+    assert deleted is False
+
+
+def test_documents_are_read_only_from_their_workspace(async_client):
+    """
+    GET /ingest/{id} finds a document in its own workspace only.
+    """
+    document_id = asyncio.run(
+        DocumentService("acme").create_document("text", title="Notes")
+    )
+
+    response = async_client.get(
+        f"/api/v1/ingest/{document_id}", headers={"X-Workspace": "acme"}
+    )
+    assert response.status_code == 200, response.text
+    assert response.json()["id"] == document_id
+
+    response = async_client.get(
+        f"/api/v1/ingest/{document_id}", headers={"X-Workspace": "globex"}
+    )
+    assert response.status_code == 404
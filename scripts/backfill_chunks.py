@@ -0,0 +1,71 @@
+#!/usr/bin/env python3
+"""
+Queue re-ingestion of indexed documents that have no search chunks.
+
+/search reads chunks and embeddings from ``document_chunk``, which ingestion
+fills from LightRAG's chunking. Documents indexed before that have no rows
+there; this queues ingestion jobs for them, which the API's ingestion workers
+run (migration d4a7c1e9b5f2 queues them once on upgrade). LightRAG already
+holds these documents unchanged, so re-ingesting them normally only chunks
+and embeds them; documents indexed before chunk hashes were recorded are
+rebuilt, with extraction answered from the LLM cache.
+
+Usage:
+    python scripts/backfill_chunks.py --dry-run
+    python scripts/backfill_chunks.py --job-size 500
+"""
+
+import argparse
+import asyncio
+import os
+import sys
+
+# Configure base directory and Python path
+ROOT_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+API_DIR = os.path.join(ROOT_DIR, "api")
+if API_DIR not in sys.path:
+    sys.path.insert(0, API_DIR)
+
+from sqlalchemy import select
+
+from app.core.database import get_session
+from app.models.document import Document, DocumentChunk
+from app.services.ingestion_queue import ingestion_queue
+
+
+async def main(args):
+    has_chunks = select(DocumentChunk.id).where(
+        DocumentChunk.document_id == Document.id
+    )
+    async with get_session() as session:
+        document_ids = (
+            (
+                await session.execute(
+                    select(Document.id)
+                    .where(Document.is_indexed.is_(True))
+                    .where(~has_chunks.exists())
+                    .order_by(Document.id)
+                )
+            )
+            .scalars()
+            .all()
+        )
+    print(f"{len(document_ids)} indexed document(s) have no search chunks")
+    if args.dry_run:
+        return
+
+    for start in range(0, len(document_ids), args.job_size):
+        batch = document_ids[start : start + args.job_size]
+        job = await ingestion_queue.enqueue(batch)
+        print(f"Queued job {job['id']} for {len(batch)} document(s)")
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__.split("\n\n")[0])
+    parser.add_argument(
+        "--job-size", type=int, default=1000, help="documents per ingestion job"
+    )
+    parser.add_argument(
+        "--dry-run", action="store_true", help="only count the documents"
+    )
+    asyncio.run(main(parser.parse_args()))
@@ -0,0 +1,91 @@
+#!/usr/bin/env python3
+"""
+Benchmark per-call httpx clients against the shared HTTP client pool.
+
+Starts a local OpenAI-compatible stand-in server and measures requests/sec for
+small chat completion calls made the old way (a new ``httpx.AsyncClient`` per
+call) and through ``openai_complete_if_cache`` with the pooled client.
+
+Usage:
+    python scripts/bench_http_pool.py --requests 2000 --concurrency 32
+"""
+
+import argparse
+import asyncio
+import os
+import sys
+import time
+
+# Configure base directory and Python path
+ROOT_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+API_DIR = os.path.join(ROOT_DIR, "api")
+if API_DIR not in sys.path:
+    sys.path.insert(0, API_DIR)
+
+import httpx
+
+from app.core.config import settings
+from app.core.http_client import http_client_pool
+from app.services.llm_service import openai_complete_if_cache
+from app.testing.model_server import StubModelConfig, StubModelServer
+
+
+async def unpooled_call(base_url: str) -> str:
+    """The pre-pool request path: a fresh client (and connection) per call."""
+    async with httpx.AsyncClient(timeout=30.0) as client:
+        response = await client.post(
+            f"{base_url}/chat/completions",
+            json={"model": "stub", "messages": [{"role": "user", "content": "hi"}]},
+        )
+        return response.json()["choices"][0]["message"]["content"]
+
+
+async def pooled_call(base_url: str) -> str:
+    return await openai_complete_if_cache(
+        "stub", "hi", api_key="stub", base_url=base_url
+    )
+
+
+async def run(call, base_url: str, total: int, concurrency: int) -> float:
+    """Issue ``total`` calls with bounded concurrency and return requests/sec."""
+    semaphore = asyncio.Semaphore(concurrency)
+
+    async def one():
+        async with semaphore:
+            await call(base_url)
+
+    start = time.perf_counter()
+    await asyncio.gather(*(one() for _ in range(total)))
+    return total / (time.perf_counter() - start)
+
+
+async def main(args):
+    # Every "after" call would otherwise be a completion cache hit after the
+    # warm-up, measuring the cache instead of the HTTP client
+    settings.LLM_CACHE_ENABLED = False
+
+    server = StubModelServer(StubModelConfig(response_tokens=1)).start()
+    base_url = server.base_url
+    print(f"Stand-in server: {base_url}")
+    print(f"{args.requests} requests, concurrency {args.concurrency}\n")
+
+    # Warm up both paths once so imports and the first connect are excluded
+    await unpooled_call(base_url)
+    await pooled_call(base_url)
+
+    before = await run(unpooled_call, base_url, args.requests, args.concurrency)
+    print(f"before (client per call): {before:10.1f} req/s")
+
+    after = await run(pooled_call, base_url, args.requests, args.concurrency)
+    print(f"after  (pooled client):   {after:10.1f} req/s")
+    print(f"speedup:                  {after / before:10.2f}x")
+
+    await http_client_pool.aclose()
+    server.stop()
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__.split("\n")[1])
+    parser.add_argument("--requests", type=int, default=2000)
+    parser.add_argument("--concurrency", type=int, default=32)
+    asyncio.run(main(parser.parse_args()))
@@ -0,0 +1,144 @@
+#!/usr/bin/env python3
+"""
+Benchmark concurrent LightRAG queries with and without a global lock.
+
+Starts a local OpenAI-compatible stand-in server with model latency, seeds a
+LightRAG instance using its default file storages in a temporary directory,
+and measures queries/sec at increasing concurrency. "before" wraps every query
+in one shared ``asyncio.Lock`` (the old ``db_lock`` behaviour); "after" calls
+``LightRAGService.query`` directly.
+
+Usage:
+    python scripts/bench_query_concurrency.py --queries 64 --chat-latency fixed:100
+"""
+
+import argparse
+import asyncio
+import os
+import sys
+import tempfile
+import time
+
+# Configure base directory and Python path
+ROOT_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+API_DIR = os.path.join(ROOT_DIR, "api")
+if API_DIR not in sys.path:
+    sys.path.insert(0, API_DIR)
+
+import lightrag.utils
+from lightrag import LightRAG
+from lightrag.kg.shared_storage import initialize_pipeline_status
+
+from app.core.config import settings
+from app.core.http_client import http_client_pool
+from app.services.lightrag_service import LightRAGService
+from app.testing.model_server import StubModelConfig, StubModelServer
+
+SEED_TEXTS = [
+    f"Document {i} describes topic {i} and how it relates to topic {i + 1}."
+    for i in range(20)
+]
+
+
+class ByteEncoder:
+    """Offline stand-in for the tiktoken encoder (one token per byte)."""
+
+    def encode(self, content: str):
+        return list(content.encode("utf-8"))
+
+    def decode(self, tokens):
+        return bytes(tokens).decode("utf-8", errors="ignore")
+
+
+async def build_service(working_dir: str) -> LightRAGService:
+    """A service backed by file storages instead of PostgreSQL."""
+    service = LightRAGService()
+    rag = LightRAG(
+        working_dir=working_dir,
+        llm_model_func=service._llm_model_func,
+        llm_model_name="stub",
+        llm_model_max_async=64,
+        enable_llm_cache=False,
+        embedding_func=service._create_embedding_func(),
+        # Stand-in embeddings are unrelated random vectors; retrieve regardless
+        vector_db_storage_cls_kwargs={"cosine_better_than_threshold": -1.0},
+    )
+    await rag.initialize_storages()
+    await initialize_pipeline_status()
+    await rag.ainsert(SEED_TEXTS)
+    service.rag = rag
+    return service
+
+
+async def run(query, total: int, concurrency: int, serialize: bool) -> float:
+    """Issue ``total`` distinct queries and return queries/sec."""
+    semaphore = asyncio.Semaphore(concurrency)
+    global_lock = asyncio.Lock()
+
+    async def one(i):
+        async with semaphore:
+            if serialize:
+                async with global_lock:
+                    result = await query(f"question {i} about topic {i % 20}")
+            else:
+                result = await query(f"question {i} about topic {i % 20}")
+            assert result["status"] == "success", result
+
+    start = time.perf_counter()
+    await asyncio.gather(*(one(i) for i in range(total)))
+    return total / (time.perf_counter() - start)
+
+
+async def main(args):
+    server = StubModelServer(
+        StubModelConfig(
+            embedding_dim=int(settings.EMBEDDING_DIM),
+            chat_latency=args.chat_latency,
+            embedding_latency=args.embedding_latency,
+        )
+    ).start()
+    for name in ("MODEL_BASE_URL", "EMBEDDING_MODEL_BASE_URL"):
+        setattr(settings, name, server.base_url)
+    settings.MODEL_API_KEY = settings.EMBEDDING_MODEL_API_KEY = "stub"
+    # Measure uncached queries only (the durable cache tier also needs PostgreSQL)
+    settings.LLM_CACHE_ENABLED = settings.EMBEDDING_CACHE_ENABLED = False
+    # Avoid downloading tiktoken's encoding files
+    lightrag.utils.ENCODER = ByteEncoder()
+
+    with tempfile.TemporaryDirectory() as working_dir:
+        service = await build_service(working_dir)
+        print(f"Stand-in server: {server.base_url}")
+        print(f"{args.queries} naive queries per run\n")
+        print(
+            f"{'concurrency':>11} {'before q/s':>11} {'after q/s':>10} {'speedup':>8}"
+        )
+
+        batch = 0
+        for concurrency in args.concurrency:
+            query = lambda text: service.query(text, mode="naive")
+            # Offset query texts per run so no answer is served from a cache
+            offset = lambda fn, base: (lambda text: fn(f"{base} {text}"))
+            before = await run(
+                offset(query, batch), args.queries, concurrency, serialize=True
+            )
+            after = await run(
+                offset(query, batch + 1), args.queries, concurrency, serialize=False
+            )
+            batch += 2
+            print(
+                f"{concurrency:>11} {before:>11.1f} {after:>10.1f} "
+                f"{after / before:>7.2f}x"
+            )
+
+    print(f"\nstand-in server calls: {server.counters}")
+    await http_client_pool.aclose()
+    server.stop()
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__.split("\n")[1])
+    parser.add_argument("--queries", type=int, default=64)
+    parser.add_argument("--concurrency", type=int, nargs="+", default=[1, 2, 4, 8, 16])
+    parser.add_argument("--chat-latency", default="fixed:100")
+    parser.add_argument("--embedding-latency", default="fixed:10")
+    asyncio.run(main(parser.parse_args()))